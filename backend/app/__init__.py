@@ -5,9 +5,8 @@ from flask_cors import CORS
 from flask_migrate import Migrate
 from flask_session import Session
 from config import config
+from app.utils.cache import init_cache
 import os
-import json
-from datetime import datetime
 
 db = SQLAlchemy()
 jwt = JWTManager()
@@ -26,6 +25,13 @@ def create_app(config_name="default"):
     jwt.init_app(app)
     migrate.init_app(app, db)
     session.init_app(app)
+    init_cache(app)
+
+    # 注册角色/用户变更后的权限缓存失效事件
+    from app.utils import principal  # noqa: F401
+    from app.services.job_service import job_manager
+
+    job_manager.init_app(app)
     CORS(app, resources={r"/api/*": {"origins": app.config["CORS_ORIGINS"]}}, supports_credentials=True)
 
     # 初始化WebSocket
@@ -58,54 +64,19 @@ def create_app(config_name="default"):
         }
         if path in whitelist:
             return None
-        # 优先读取 manager-go 的实时授权状态（适配 PG + manager(sqlite) 的部署）。
-        try:
-            from app.services.manager_api_service import manager_api_service, ManagerError
-
-            status = manager_api_service.request("GET", "/api/v1/license/status")
-            has_license = bool((status or {}).get("has_license"))
-            expired = bool((status or {}).get("expired"))
-            expire_raw = str((status or {}).get("expire_time") or "").strip()
-            if not has_license:
-                return license_block_response("未授权，请先上传 License", has_license=False, expired=False)
-            if expired:
-                return license_block_response(
-                    "License 已过期，请上传新的 License",
-                    has_license=True,
-                    expired=True,
-                    expire_time=expire_raw,
-                )
-            return None
-        except Exception:
-            # manager-go 不可达时，回退本地配置判定，避免全站不可用。
-            from app.models.config import SystemConfig
-
-            claims_raw = SystemConfig.get_value("license_claims_json", "")
-            if not claims_raw:
-                return license_block_response("未授权，请先上传 License", has_license=False, expired=False)
-            try:
-                claims = json.loads(claims_raw)
-            except Exception:
-                return license_block_response("未授权，请先上传 License", has_license=False, expired=False)
-            expire_raw = str(claims.get("expire_time") or "").strip()
-            if not expire_raw:
-                return license_block_response("未授权，请先上传 License", has_license=False, expired=False)
-            try:
-                expire_at = datetime.fromisoformat(expire_raw.replace("Z", "+00:00"))
-            except ValueError:
-                try:
-                    expire_at = datetime.strptime(expire_raw, "%Y-%m-%d %H:%M:%S")
-                except ValueError:
-                    return license_block_response("未授权，请先上传 License", has_license=False, expired=False)
-            now = datetime.now(expire_at.tzinfo) if expire_at.tzinfo else datetime.now()
-            if now <= expire_at:
-                return None
+        from app.services.license_status_service import license_status_cache
+
+        status = license_status_cache.get_status()
+        if not status.get("has_license"):
+            return license_block_response("未授权，请先上传 License", has_license=False, expired=False)
+        if status.get("expired"):
             return license_block_response(
                 "License 已过期，请上传新的 License",
                 has_license=True,
                 expired=True,
-                expire_time=expire_raw,
+                expire_time=status.get("expire_time") or "",
             )
+        return None
 
     # JWT error handlers
     @jwt.expired_token_loader
@@ -148,6 +119,7 @@ def init_default_data(app):
     from app.models.user import User
     from app.models.config import SystemConfig
     from app.notifications.models import init_default_notification_types
+    from app.services.job_service import job_manager
     from app.tasks.scheduler import init_scheduler
 
     admin = User.query.filter_by(username="admin").first()
@@ -184,6 +156,9 @@ def init_default_data(app):
     # 初始化默认通知类型
     init_default_notification_types()
 
+    # 进程重启前未完成的后台任务
+    job_manager.recover_interrupted_jobs()
+
     # 初始化调度器
     init_scheduler(app)
 
@@ -8,11 +8,16 @@ from app.models.cmdb_model import CmdbModel, ModelType
 from app.models.model_region import ModelRegion
 from app.models.department import Department, DepartmentUser, DepartmentRole
 from app.models.role import Role, UserRole
-from app.models.ci_instance import CiInstance, CiHistory, CodeSequence
+from app.models.ci_instance import CiInstance, CiHistory, CodeSequence, CiAttributeIndex
 from app.models.cmdb_relation import RelationType, CmdbRelation, RelationTrigger
 from app.models.cmdb_dict import CmdbDictType, CmdbDictItem
 from app.models.custom_view import CustomView, CustomViewNode, CustomViewNodePermission
 from app.models.cmdb_topology_template import CmdbTopologyTemplate
+from app.models.background_job import BackgroundJob
+from app.models.monitor_ci_binding import MonitorCiBinding
+from app.models.alert_label_index import AlertLabelIndex
+from app.models.alert_hourly_rollup import AlertHourlyRollup
+from app.models.alert_rule_index import AlertRuleIndex
 from app.models.hertzbeat_models import (
     # 采集器管理
     Collector,
@@ -74,6 +79,7 @@ __all__ = [
     "CiInstance",
     "CiHistory",
     "CodeSequence",
+    "CiAttributeIndex",
     "RelationType",
     "CmdbRelation",
     "RelationTrigger",
@@ -83,6 +89,11 @@ __all__ = [
     "CustomViewNode",
     "CustomViewNodePermission",
     "CmdbTopologyTemplate",
+    "BackgroundJob",
+    "MonitorCiBinding",
+    "AlertLabelIndex",
+    "AlertHourlyRollup",
+    "AlertRuleIndex",
     # HertzBeat 模型
     "Collector",
     "CollectorMonitorBind",
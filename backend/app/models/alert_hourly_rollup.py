@@ -0,0 +1,25 @@
+from app import db
+
+
+class AlertHourlyRollup(db.Model):
+    """
+    告警小时汇总
+    由 alert_label_index 中的历史告警按触发小时、监控任务、级别与应用类型汇总（文本维度为小写），
+    监控大盘的告警趋势直接读取汇总行。空维度以 0 / 空串存储，
+    last_alert_id 为已汇总的最大历史告警 ID，作为增量汇总的水位
+    """
+
+    __tablename__ = "alert_hourly_rollups"
+
+    bucket_ms = db.Column(db.BigInteger, primary_key=True, autoincrement=False)  # 小时起点（UTC 毫秒）
+    monitor_id = db.Column(db.Integer, primary_key=True, autoincrement=False, default=0)
+    monitor_name = db.Column(db.String(255), primary_key=True, default="")
+    level = db.Column(db.String(50), primary_key=True, default="")
+    app = db.Column(db.String(100), primary_key=True, default="")
+    alert_count = db.Column(db.Integer, nullable=False, default=0)
+    last_alert_id = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index("idx_alert_rollup_last_alert", "last_alert_id"),
+        db.Index("idx_alert_rollup_monitor", "monitor_id", "bucket_ms"),
+    )
@@ -0,0 +1,40 @@
+from app import db
+
+
+class AlertLabelIndex(db.Model):
+    """
+    告警筛选字段索引
+    single_alerts / alert_history 由 manager-go 写入，标签保存在 JSON 中；这里按与告警中心展示一致的
+    提取规则把筛选字段展开为列（文本字段统一小写），scope 区分当前告警（current）与历史告警（history）。
+    sort_at 为列表排序时间（当前告警取 updated_at，历史告警取 created_at），
+    source_updated_at 记录展开时当前告警的更新时间，用于增量同步
+    """
+
+    __tablename__ = "alert_label_index"
+
+    scope = db.Column(db.String(10), primary_key=True)
+    alert_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    status = db.Column(db.String(10), nullable=False)  # open/closed
+    level = db.Column(db.String(50), nullable=True)
+    monitor_id = db.Column(db.Integer, nullable=True)
+    app = db.Column(db.String(100), nullable=True)
+    metric = db.Column(db.String(255), nullable=True)
+    rule_id = db.Column(db.Integer, nullable=True)
+    instance = db.Column(db.Text, nullable=True)
+    assignee = db.Column(db.Text, nullable=True)
+    name = db.Column(db.Text, nullable=True)
+    monitor_name = db.Column(db.Text, nullable=True)
+    note = db.Column(db.Text, nullable=True)
+    triggered_at = db.Column(db.BigInteger, nullable=True)  # 毫秒时间戳
+    sort_at = db.Column(db.DateTime, nullable=False)
+    source_updated_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index("idx_alert_label_sort", "scope", "sort_at", "alert_id"),
+        db.Index("idx_alert_label_status", "scope", "status", "sort_at"),
+        db.Index("idx_alert_label_level", "scope", "level", "sort_at"),
+        db.Index("idx_alert_label_monitor", "scope", "monitor_id"),
+        db.Index("idx_alert_label_app", "scope", "app"),
+        db.Index("idx_alert_label_rule", "scope", "rule_id"),
+        db.Index("idx_alert_label_triggered", "scope", "triggered_at"),
+    )
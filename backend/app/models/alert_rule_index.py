@@ -0,0 +1,69 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app import db
+from app.models.hertzbeat_models import AlertDefine
+
+ALERT_RULE_INDEX_CHANGED_KEY = "alert_rule_index_changed"
+
+
+class AlertRuleIndex(db.Model):
+    """
+    告警规则匹配字段索引
+    alert_defines 的匹配条件保存在标签 JSON 中；这里展开为列（app、instance、source 小写），
+    用于按监控任务查找绑定规则、区分全局/绑定规则，并作为进程内规则匹配器的数据源。
+    rule_updated_at 记录展开时规则的更新时间，用于补齐 manager-go 直接写入的规则
+    """
+
+    __tablename__ = "alert_rule_index"
+
+    rule_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    monitor_id = db.Column(db.String(64), nullable=False, default="")
+    app = db.Column(db.String(100), nullable=False, default="")
+    instance = db.Column(db.String(255), nullable=False, default="")
+    metric = db.Column(db.String(100), nullable=False, default="")
+    source = db.Column(db.String(50), nullable=False, default="")
+    is_bound = db.Column(db.Boolean, nullable=False, default=False)
+    rule_updated_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index("idx_alert_rule_index_monitor", "monitor_id"),
+        db.Index("idx_alert_rule_index_match", "app", "monitor_id", "metric"),
+        db.Index("idx_alert_rule_index_bound", "is_bound"),
+    )
+
+
+def _mark_alert_rule_index_changed(target):
+    session = object_session(target)
+    if session is not None:
+        session.info[ALERT_RULE_INDEX_CHANGED_KEY] = True
+
+
+@event.listens_for(AlertDefine, "after_insert")
+@event.listens_for(AlertDefine, "after_update")
+def sync_rule_index_on_save(mapper, connection, target):
+    from app.services.alert_rule_index_service import sync_rule_index
+
+    sync_rule_index(connection, [target.id])
+    _mark_alert_rule_index_changed(target)
+
+
+@event.listens_for(AlertDefine, "after_delete")
+def delete_rule_index_on_delete(mapper, connection, target):
+    from app.services.alert_rule_index_service import delete_rule_index
+
+    delete_rule_index(connection, [target.id])
+    _mark_alert_rule_index_changed(target)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_alert_rule_matcher_after_commit(session):
+    if session.info.pop(ALERT_RULE_INDEX_CHANGED_KEY, None):
+        from app.services.alert_rule_index_service import alert_rule_matcher
+
+        alert_rule_matcher.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_alert_rule_index_change(session):
+    session.info.pop(ALERT_RULE_INDEX_CHANGED_KEY, None)
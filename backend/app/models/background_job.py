@@ -0,0 +1,110 @@
+from app import db
+from datetime import datetime
+import json
+
+
+class BackgroundJob(db.Model):
+    """
+    后台任务
+    记录导入、导出、触发器执行等长耗时操作的状态、进度与结果
+    """
+
+    __tablename__ = "background_jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False)
+    # pending/running/completed/failed/cancelled
+    status = db.Column(db.String(20), nullable=False, default="pending")
+    concurrency_key = db.Column(db.String(100), nullable=True)
+    params = db.Column(db.Text, default="{}")
+    progress = db.Column(db.Integer, default=0)  # 0-100
+    progress_data = db.Column(db.Text, default="{}")
+    result = db.Column(db.Text, nullable=True)
+    result_file = db.Column(db.String(500), nullable=True)
+    error_message = db.Column(db.Text, nullable=True)
+    cancel_requested = db.Column(db.Boolean, default=False)
+    # 执行进程（主机名:PID），重启后据此识别中断的任务
+    worker_id = db.Column(db.String(100), nullable=True)
+    # 任务独占的输入文件（JSON 列表），任务结束或取消时删除
+    input_files = db.Column(db.Text, nullable=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    created_by = db.Column(
+        db.Integer, db.ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+
+    creator = db.relationship("User")
+
+    __table_args__ = (
+        db.Index("idx_background_jobs_status", "status"),
+        db.Index("idx_background_jobs_created_by", "created_by", "created_at"),
+        db.Index("idx_background_jobs_type", "job_type", "created_at"),
+        # 同一并发键同时只能有一个未结束的任务（跨进程生效）
+        db.Index(
+            "uq_background_jobs_active_key",
+            "concurrency_key",
+            unique=True,
+            postgresql_where=db.text("status IN ('pending', 'running')"),
+            sqlite_where=db.text("status IN ('pending', 'running')"),
+        ),
+    )
+
+    ACTIVE_STATUSES = ("pending", "running")
+    FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+    @staticmethod
+    def _load(raw, default):
+        try:
+            return json.loads(raw) if raw else default
+        except Exception:
+            return default
+
+    @property
+    def is_finished(self):
+        return self.status in self.FINISHED_STATUSES
+
+    def get_params(self):
+        return self._load(self.params, {})
+
+    def get_progress_data(self):
+        return self._load(self.progress_data, {})
+
+    def get_result(self):
+        return self._load(self.result, None)
+
+    def get_input_files(self):
+        return self._load(self.input_files, [])
+
+    @property
+    def duration_seconds(self):
+        if self.started_at and self.completed_at:
+            return int((self.completed_at - self.started_at).total_seconds())
+        return None
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "job_type": self.job_type,
+            "status": self.status,
+            "concurrency_key": self.concurrency_key,
+            "params": self.get_params(),
+            "progress": self.progress or 0,
+            "progress_data": self.get_progress_data(),
+            "result": self.get_result(),
+            "has_file": bool(self.result_file),
+            "error_message": self.error_message,
+            "cancel_requested": bool(self.cancel_requested),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "completed_at": self.completed_at.isoformat()
+            if self.completed_at
+            else None,
+            "duration_seconds": self.duration_seconds,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "created_by": self.created_by,
+            "created_by_name": self.creator.username if self.creator else None,
+        }
+
+    def save(self):
+        db.session.add(self)
+        db.session.commit()
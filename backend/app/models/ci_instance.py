@@ -1,5 +1,6 @@
 from app import db
 from datetime import datetime
+from sqlalchemy import event, inspect
 import json
 from app.utils.form_config_fields import extract_form_fields
 
@@ -170,12 +171,86 @@ class CiInstance(db.Model):
         db.session.commit()
 
 
+# 编码/名称忽略大小写的等值查询（告警标签匹配 CI）走表达式索引
+db.Index("ix_ci_instances_code_lower", db.func.lower(CiInstance.code))
+db.Index("ix_ci_instances_name_lower", db.func.lower(CiInstance.name))
+
+
+class CiAttributeIndex(db.Model):
+    """CI 属性索引，由 attribute_values 展开，供属性过滤走索引"""
+
+    __tablename__ = "ci_attribute_index"
+
+    id = db.Column(db.Integer, primary_key=True)
+    ci_id = db.Column(
+        db.Integer,
+        db.ForeignKey("ci_instances.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    model_id = db.Column(db.Integer, nullable=False)
+    field_code = db.Column(db.String(100), nullable=False)
+    value_text = db.Column(db.String(255))
+    value_full = db.Column(db.Text)  # 超过 value_text 长度时的完整文本
+    value_number = db.Column(db.Float)  # 数字字段
+    value_date = db.Column(db.DateTime)  # 日期/日期时间字段
+
+    __table_args__ = (
+        db.Index("ix_ci_attr_model_field_text", "model_id", "field_code", "value_text"),
+        db.Index(
+            "ix_ci_attr_model_field_number", "model_id", "field_code", "value_number"
+        ),
+        db.Index("ix_ci_attr_model_field_date", "model_id", "field_code", "value_date"),
+        db.Index("ix_ci_attr_field_text", "field_code", "value_text"),
+    )
+
+
+@event.listens_for(CiInstance, "after_insert")
+@event.listens_for(CiInstance, "after_update")
+def sync_attribute_index_on_save(mapper, connection, target):
+    """attribute_values 或 model_id 变更时同步属性索引"""
+    from sqlalchemy.orm import object_session
+    from app.services.ci_attribute_index_service import (
+        FIELD_TYPES_CACHE_KEY,
+        load_field_types,
+        sync_ci_attribute_index,
+    )
+
+    state = inspect(target)
+    if not (
+        state.attrs.attribute_values.history.has_changes()
+        or state.attrs.model_id.history.has_changes()
+    ):
+        return
+
+    session = object_session(target)
+    cache = session.info.setdefault(FIELD_TYPES_CACHE_KEY, {}) if session else None
+    sync_ci_attribute_index(
+        connection,
+        target.id,
+        target.model_id,
+        target.get_attribute_values(),
+        load_field_types(connection, target.model_id, cache),
+    )
+
+
+@event.listens_for(CiInstance, "before_delete")
+def delete_attribute_index_on_delete(mapper, connection, target):
+    from app.services.ci_attribute_index_service import delete_ci_attribute_index
+
+    delete_ci_attribute_index(connection, [target.id])
+
+
 class CiHistory(db.Model):
     __tablename__ = "ci_history"
 
     id = db.Column(db.Integer, primary_key=True)
+    # CI 删除后历史保留，ci_id 置空
     ci_id = db.Column(
-        db.Integer, db.ForeignKey("ci_instances.id"), nullable=False, index=True
+        db.Integer,
+        db.ForeignKey("ci_instances.id", ondelete="SET NULL"),
+        nullable=True,
+        index=True,
     )
     operation = db.Column(db.String(50), nullable=False)  # CREATE/UPDATE/DELETE
     attribute_name = db.Column(db.String(100))  # 变更的属性名
@@ -190,6 +265,9 @@ class CiHistory(db.Model):
     ci = db.relationship("CiInstance", backref="histories", lazy="joined")
     operator = db.relationship("User", lazy="joined")
 
+    # 按 CI 查询历史时按时间倒序翻页
+    __table_args__ = (db.Index("ix_ci_history_ci_created", "ci_id", "created_at"),)
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -231,24 +309,48 @@ class CodeSequence(db.Model):
     @classmethod
     def get_next_value(cls, sequence_type="ci"):
         """获取下一个序号"""
-        from datetime import datetime
+        return cls.reserve_values(1, sequence_type)[0]
 
-        today = datetime.now().strftime("%Y%m%d")
-
-        sequence = cls.query.filter_by(
-            sequence_type=sequence_type, sequence_date=today
-        ).first()
+    @classmethod
+    def reserve_values(cls, count, sequence_type="ci"):
+        """
+        一次预留 count 个连续序号（单条 UPDATE 原子递增）
 
-        if not sequence:
-            sequence = cls(
-                sequence_type=sequence_type, sequence_date=today, current_value=0
-            )
-            db.session.add(sequence)
+        Returns:
+            tuple: (起始序号, 序号日期 YYYYMMDD)
+        """
+        from datetime import datetime
+        from sqlalchemy.exc import IntegrityError
 
-        sequence.current_value += 1
+        today = datetime.now().strftime("%Y%m%d")
+        table = cls.__table__
+        criteria = (table.c.sequence_type == sequence_type, table.c.sequence_date == today)
+        increment = (
+            table.update()
+            .where(*criteria)
+            .values(current_value=db.func.coalesce(table.c.current_value, 0) + count)
+        )
+
+        if db.session.execute(increment).rowcount == 0:
+            try:
+                # 保存点内插入，冲突时只回滚插入本身，不丢弃调用方未提交的数据
+                with db.session.begin_nested():
+                    db.session.execute(
+                        table.insert().values(
+                            sequence_type=sequence_type,
+                            sequence_date=today,
+                            current_value=count,
+                        )
+                    )
+            except IntegrityError:
+                # 并发创建了当日序号行，改为递增
+                db.session.execute(increment)
+
+        end_value = db.session.execute(
+            db.select(table.c.current_value).where(*criteria)
+        ).scalar()
         db.session.commit()
-
-        return sequence.current_value
+        return end_value - count + 1, today
 
     def save(self):
         db.session.add(self)
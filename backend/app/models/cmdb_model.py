@@ -100,6 +100,32 @@ def invalidate_triggers_on_model_delete(mapper, connection, target):
     )
 
 
+@event.listens_for(CmdbModel, "after_update")
+def rebuild_attribute_index_on_form_change(mapper, connection, target):
+    """数字/日期字段定义变化时重建该模型的属性索引类型化列"""
+    from sqlalchemy import inspect
+    from sqlalchemy.orm import object_session
+    from app.services.ci_attribute_index_service import (
+        FIELD_TYPES_CACHE_KEY,
+        get_typed_field_types,
+        rebuild_attribute_index,
+    )
+
+    history = inspect(target).attrs.form_config.history
+    if not history.has_changes():
+        return
+
+    session = object_session(target)
+    if session:
+        session.info.get(FIELD_TYPES_CACHE_KEY, {}).pop(target.id, None)
+
+    old_form_config = history.deleted[0] if history.deleted else None
+    if get_typed_field_types(old_form_config) != get_typed_field_types(
+        target.form_config
+    ):
+        rebuild_attribute_index(connection, target.id)
+
+
 class ModelType(db.Model):
     __tablename__ = "model_types"
 
@@ -1,7 +1,11 @@
 from app import db
 from datetime import datetime
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
 import json
 
+DEPARTMENT_TREE_CHANGED_KEY = "department_tree_changed"
+
 
 class Department(db.Model):
     __tablename__ = 'departments'
@@ -39,11 +43,9 @@ class Department(db.Model):
             self.path = f"/{self.id}/"
     
     def get_all_children_ids(self):
-        ids = []
-        for child in self.children:
-            ids.append(child.id)
-            ids.extend(child.get_all_children_ids())
-        return ids
+        from app.services.department_tree_service import get_descendant_ids
+
+        return get_descendant_ids(self.id)
     
     def to_dict(self):
         return {
@@ -161,3 +163,40 @@ class DepartmentUser(db.Model):
     def delete(self):
         db.session.delete(self)
         db.session.commit()
+
+
+def _mark_department_tree_changed(connection, target):
+    session = object_session(target)
+    if session is None:
+        return
+    # 每个事务只递增一次共享版本号，回滚时随事务一起撤销
+    if not session.info.get(DEPARTMENT_TREE_CHANGED_KEY):
+        from app.services.department_tree_service import bump_tree_version
+
+        bump_tree_version(connection)
+    session.info[DEPARTMENT_TREE_CHANGED_KEY] = True
+
+
+@event.listens_for(Department, "after_insert")
+@event.listens_for(Department, "after_delete")
+def department_tree_changed(mapper, connection, target):
+    _mark_department_tree_changed(connection, target)
+
+
+@event.listens_for(Department, "after_update")
+def department_parent_changed(mapper, connection, target):
+    if inspect(target).attrs.parent_id.history.has_changes():
+        _mark_department_tree_changed(connection, target)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_department_tree_after_commit(session):
+    if session.info.pop(DEPARTMENT_TREE_CHANGED_KEY, None):
+        from app.services.department_tree_service import invalidate_department_tree
+
+        invalidate_department_tree()
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_department_tree_change(session):
+    session.info.pop(DEPARTMENT_TREE_CHANGED_KEY, None)
@@ -5,9 +5,12 @@ HertzBeat 数据模型定义
 import json
 from datetime import datetime
 
-from sqlalchemy import CheckConstraint, Index, UniqueConstraint, ForeignKey
+from sqlalchemy import CheckConstraint, Index, UniqueConstraint, ForeignKey, event, inspect
+from sqlalchemy.orm import Session, object_session
 from app import db
 
+MONITOR_CI_BINDING_CHANGED_KEY = "monitor_ci_binding_changed"
+
 
 # ==================== 采集器管理 ====================
 
@@ -977,3 +980,37 @@ class MetricsHistory(db.Model):
     int32_value = db.Column(db.Integer, nullable=True)
     double_value = db.Column(db.Float, nullable=True)
     timestamp = db.Column(db.BigInteger, nullable=False)
+
+
+# ==================== 监控任务 CI 绑定变更 ====================
+
+
+def _mark_monitor_ci_binding_changed(target):
+    session = object_session(target)
+    if session is not None:
+        session.info[MONITOR_CI_BINDING_CHANGED_KEY] = True
+
+
+@event.listens_for(Monitor, "after_insert")
+@event.listens_for(Monitor, "after_delete")
+def monitor_ci_binding_changed(mapper, connection, target):
+    _mark_monitor_ci_binding_changed(target)
+
+
+@event.listens_for(Monitor, "after_update")
+def monitor_annotations_changed(mapper, connection, target):
+    if inspect(target).attrs.annotations_json.history.has_changes():
+        _mark_monitor_ci_binding_changed(target)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_alert_ci_index_after_commit(session):
+    if session.info.pop(MONITOR_CI_BINDING_CHANGED_KEY, None):
+        from app.services.alert_ci_index_service import alert_ci_index
+
+        alert_ci_index.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_monitor_ci_binding_change(session):
+    session.info.pop(MONITOR_CI_BINDING_CHANGED_KEY, None)
@@ -0,0 +1,27 @@
+from app import db
+
+
+class MonitorCiBinding(db.Model):
+    """
+    监控任务与 CI 的绑定
+    由 monitors.annotations_json 中的 ci_id/ci_model_id 展开，每个监控任务一行（未绑定 CI 时 ci_id 为空），
+    monitor_updated_at 记录展开时监控任务的更新时间，用于增量同步
+    """
+
+    __tablename__ = "monitor_ci_bindings"
+
+    monitor_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    ci_id = db.Column(db.Integer, nullable=True)
+    ci_model_id = db.Column(db.Integer, nullable=True)
+    monitor_name = db.Column(db.String(100), nullable=True)
+    app = db.Column(db.String(100), nullable=True)
+    monitor_updated_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (db.Index("idx_monitor_ci_bindings_ci", "ci_id", "ci_model_id"),)
+
+    def to_dict(self):
+        return {
+            "monitor_id": self.monitor_id,
+            "monitor_name": self.monitor_name,
+            "app": self.app,
+        }
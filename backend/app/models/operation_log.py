@@ -17,6 +17,10 @@ class OperationLog(db.Model):
     error_message = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.now, index=True)
     
+    __table_args__ = (
+        db.Index('ix_operation_logs_user_created', 'user_id', 'created_at'),
+    )
+    
     def save(self):
         db.session.add(self)
         db.session.commit()
@@ -6,6 +6,7 @@ Arco CMDB 平台站内通知模块
 - services.py: 业务服务
 - api.py: REST API
 - websocket.py: WebSocket事件
+- search.py: 标题/内容全文索引
 - utils.py: 工具函数
 """
 
@@ -15,6 +16,7 @@ from app.notifications.models import (
     NotificationType,
     NotificationTemplate,
     NotificationAttachment,
+    NotificationUnreadCounter,
     init_default_notification_types,
 )
 
@@ -24,5 +26,6 @@ __all__ = [
     "NotificationType",
     "NotificationTemplate",
     "NotificationAttachment",
+    "NotificationUnreadCounter",
     "init_default_notification_types",
 ]
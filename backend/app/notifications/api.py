@@ -265,10 +265,13 @@ def get_my_notifications():
             type_id=type_id,
             page=page,
             page_size=page_size,
+            cursor=request.args.get("cursor"),
         )
 
         return jsonify({"code": 200, "data": result})
 
+    except ValueError as e:
+        return jsonify({"code": 400, "message": str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"获取通知列表失败: {e}")
         return jsonify({"code": 500, "message": "获取列表失败"}), 500
@@ -435,10 +438,13 @@ def search_notifications():
             is_read=is_read,
             page=page,
             page_size=page_size,
+            cursor=request.args.get("cursor"),
         )
 
         return jsonify({"code": 200, "data": result})
 
+    except ValueError as e:
+        return jsonify({"code": 400, "message": str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"搜索通知失败: {e}")
         return jsonify({"code": 500, "message": "搜索失败"}), 500
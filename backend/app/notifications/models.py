@@ -248,6 +248,18 @@ class NotificationRecipient(db.Model):
         return data
 
 
+class NotificationUnreadCounter(db.Model):
+    """用户未读通知计数（由发送、已读/未读、删除时维护，缺失或为空时按需重算）"""
+
+    __tablename__ = "notification_unread_counters"
+
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    unread_count = db.Column(db.Integer)  # 为空表示未知，读取时重算
+    updated_at = db.Column(db.DateTime, default=get_local_now, onupdate=get_local_now)
+
+
 class NotificationAttachment(db.Model):
     """通知附件"""
 
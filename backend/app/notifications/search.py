@@ -0,0 +1,93 @@
+"""通知全文索引
+
+标题/内容关键词搜索保持子串语义（与 ILIKE '%关键词%' 一致），不同数据库结果相同：
+- PostgreSQL: 直接使用 ILIKE，由 pg_trgm 的 GIN 索引（title/content gin_trgm_ops）加速
+- SQLite: FTS5 外部内容表 notifications_fts（trigram 分词），由触发器与 notifications 同步
+
+索引由数据库迁移创建；SQLite 下 create_all 新建 notifications 表时同步创建。
+SQLite 关键词少于 3 个字符时 trigram 无法匹配，回退到 ILIKE。
+"""
+
+import logging
+from typing import Optional
+
+from sqlalchemy import event, inspect, or_, text
+
+from app import db
+from app.notifications.models import Notification
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "notifications_fts"
+SQLITE_TRIGRAM_MIN_LENGTH = 3
+
+SQLITE_DDL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, content, content='notifications', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON notifications BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON notifications BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, content ON notifications BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+)
+
+# 各数据库连接串上索引是否可用
+_availability = {}
+
+
+def _engine_key() -> str:
+    return str(db.engine.url)
+
+
+def _create_sqlite_index(connection):
+    for statement in SQLITE_DDL:
+        connection.execute(text(statement))
+    # 按 notifications 现有数据重建索引
+    connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+@event.listens_for(Notification.__table__, "after_create")
+def _notifications_table_created(target, connection, **kw):
+    """create_all 新建 notifications 表时同步建立 SQLite 触发器（表被删除时触发器随之删除）"""
+    if connection.dialect.name != "sqlite":
+        return
+    try:
+        _create_sqlite_index(connection)
+    except Exception as e:
+        logger.warning(f"创建通知全文索引失败，搜索将回退到 LIKE: {e}")
+
+
+def _index_available() -> bool:
+    key = _engine_key()
+    if key not in _availability:
+        _availability[key] = db.engine.dialect.name == "sqlite" and inspect(db.engine).has_table(
+            FTS_TABLE
+        )
+    return _availability[key]
+
+
+def keyword_filter(keyword: str):
+    """标题/内容关键词条件（子串匹配，不区分大小写）：SQLite 能走 FTS 时用 FTS，否则 ILIKE"""
+    keyword = (keyword or "").strip()
+    indexed = _indexed_filter(keyword) if keyword else None
+    if indexed is not None:
+        return indexed
+    pattern = f"%{keyword}%"
+    return or_(Notification.title.ilike(pattern), Notification.content.ilike(pattern))
+
+
+def _indexed_filter(keyword: str) -> Optional[object]:
+    if len(keyword) < SQLITE_TRIGRAM_MIN_LENGTH or not _index_available():
+        return None
+    # 整体作为短语匹配，trigram 分词下等价于子串匹配（不区分大小写）
+    phrase = '"' + keyword.replace('"', '""') + '"'
+    matched = text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :fts_query")
+    return Notification.id.in_(matched.bindparams(fts_query=phrase))
@@ -2,7 +2,9 @@
 
 from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
-from sqlalchemy import or_
+from sqlalchemy import and_, case, delete, insert, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import InvalidRequestError
 from flask import current_app
 
 from app import db
@@ -13,17 +15,28 @@ from app.notifications.models import (
     NotificationType,
     NotificationTemplate,
     NotificationAttachment,
+    NotificationUnreadCounter,
     init_default_notification_types,
     get_local_now,
 )
+from app.notifications.search import keyword_filter
 from app.notifications.utils import validate_notification_content
+from app.utils.pagination import decode_cursor, decode_time_cursor, encode_cursor
 from app.notifications.websocket import (
-    emit_to_user,
+    emit_to_all,
+    emit_to_users,
     emit_read_status,
     emit_unread_status,
     emit_read_all,
 )
 
+RECIPIENT_BATCH_SIZE = 1000
+
+
+def _chunked(items: list, size: int = RECIPIENT_BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
 
 class NotificationService:
     """通知服务类"""
@@ -38,12 +51,12 @@ class NotificationService:
         template_id: Optional[int] = None,
         variables: Optional[Dict[str, Any]] = None,
         attachments: Optional[List[Dict[str, Any]]] = None,
-    ) -> Tuple[Notification, List[NotificationRecipient]]:
+    ) -> Tuple[Notification, List[int]]:
         """向指定用户发送通知
 
         Args:
             sender_id: 发送者用户ID
-            user_ids: 接收者用户ID列表
+            user_ids: 接收者用户ID列表（非活跃用户被忽略）
             type_id: 通知类型ID
             title: 通知标题
             content: 通知内容（富文本HTML格式）
@@ -52,7 +65,29 @@ class NotificationService:
             attachments: 附件列表（可选）
 
         Returns:
-            (Notification对象, NotificationRecipient列表)
+            (Notification对象, 接收人记录ID列表)
+        """
+        return NotificationService._send(
+            sender_id, user_ids, type_id, title, content, template_id, variables, attachments
+        )
+
+    @staticmethod
+    def _send(
+        sender_id: int,
+        user_ids: List[int],
+        type_id: int,
+        title: str,
+        content: str,
+        template_id: Optional[int] = None,
+        variables: Optional[Dict[str, Any]] = None,
+        attachments: Optional[List[Dict[str, Any]]] = None,
+        broadcast: bool = False,
+        validated: bool = False,
+    ) -> Tuple[Notification, List[int]]:
+        """创建通知并扇出到接收人
+
+        broadcast 时推送到全员，此时 user_ids 须为全体活跃用户；
+        其余情况按批推送到接收人的用户房间。
         """
         is_valid, error_msg = validate_notification_content(title, content)
         if not is_valid:
@@ -102,35 +137,73 @@ class NotificationService:
                 )
                 db.session.add(attachment)
 
-        # 创建接收人记录
-        recipients = []
-        valid_user_ids = set()
-
-        for user_id in set(user_ids):
-            user = User.query.filter_by(id=user_id, status="active").first()
-            if user:
-                recipient = NotificationRecipient(
-                    notification_id=notification.id,
-                    user_id=user_id,
-                    delivery_status="pending",
-                )
-                db.session.add(recipient)
-                recipients.append(recipient)
-                valid_user_ids.add(user_id)
-
+        recipient_ids = NotificationService._create_recipients(
+            notification.id, user_ids, validated=validated
+        )
+        _adjust_unread_counters([user_id for _, user_id in recipient_ids], 1)
         db.session.commit()
 
+        # 推送内容对所有接收人相同，全员发送直接推送到命名空间
         notification_data = notification.to_dict()
-        for recipient in recipients:
-            notification_data["recipient_id"] = recipient.id
-            emit_to_user(recipient.user_id, "notification:new", notification_data)
+        if broadcast:
+            emit_to_all("notification:new", notification_data)
+        else:
+            emit_to_users(
+                [user_id for _, user_id in recipient_ids], "notification:new", notification_data
+            )
 
         current_app.logger.info(
             f"Notification sent: id={notification.id}, "
-            f"sender={sender_id}, recipients={len(recipients)}"
+            f"sender={sender_id}, recipients={len(recipient_ids)}"
         )
 
-        return notification, recipients
+        return notification, [recipient_id for recipient_id, _ in recipient_ids]
+
+    @staticmethod
+    def _create_recipients(
+        notification_id: int, user_ids: List[int], validated: bool = False
+    ) -> List[Tuple[int, int]]:
+        """批量写入接收人记录，返回 [(recipient_id, user_id)]
+
+        Args:
+            notification_id: 通知ID
+            user_ids: 接收者用户ID列表
+            validated: 用户ID已按活跃状态筛选过时跳过校验
+        """
+        user_ids = sorted({int(user_id) for user_id in user_ids if user_id})
+        if not validated:
+            active_ids = set()
+            for chunk in _chunked(user_ids):
+                rows = db.session.query(User.id).filter(
+                    User.id.in_(chunk), User.status == "active"
+                )
+                active_ids.update(row[0] for row in rows)
+            user_ids = [user_id for user_id in user_ids if user_id in active_ids]
+
+        created = []
+        now = get_local_now()
+        stmt = insert(NotificationRecipient).returning(
+            NotificationRecipient.id,
+            NotificationRecipient.user_id,
+            sort_by_parameter_order=True,
+        )
+        for chunk in _chunked(user_ids):
+            rows = db.session.execute(
+                stmt,
+                [
+                    {
+                        "notification_id": notification_id,
+                        "user_id": user_id,
+                        "is_read": False,
+                        "delivery_status": "pending",
+                        "delivery_attempts": 0,
+                        "created_at": now,
+                    }
+                    for user_id in chunk
+                ],
+            )
+            created.extend((row.id, row.user_id) for row in rows)
+        return created
 
     @staticmethod
     def send_to_department(
@@ -142,32 +215,32 @@ class NotificationService:
         template_id: Optional[int] = None,
         variables: Optional[Dict[str, Any]] = None,
         attachments: Optional[List[Dict[str, Any]]] = None,
-    ) -> Tuple[Notification, List[NotificationRecipient]]:
+    ) -> Tuple[Notification, List[int]]:
         """向部门所有成员发送通知"""
         department = Department.query.get(department_id)
         if not department:
             raise ValueError("部门不存在")
 
-        from app.models import User
-
-        members = User.query.filter_by(
-            department_id=department_id, status="active"
-        ).all()
-
-        if not members:
+        user_ids = [
+            row[0]
+            for row in db.session.query(User.id).filter_by(
+                department_id=department_id, status="active"
+            )
+        ]
+        if not user_ids:
             raise ValueError("部门没有活跃成员")
 
-        user_ids = [member.id for member in members]
-
-        return NotificationService.send_to_users(
-            sender_id=sender_id,
-            user_ids=user_ids,
-            type_id=type_id,
-            title=title,
-            content=content,
-            template_id=template_id,
-            variables=variables,
-            attachments=attachments,
+        # 部门房间成员在连接时确定，调整部门后会过期，按接收人的用户房间推送
+        return NotificationService._send(
+            sender_id,
+            user_ids,
+            type_id,
+            title,
+            content,
+            template_id,
+            variables,
+            attachments,
+            validated=True,
         )
 
     @staticmethod
@@ -179,26 +252,23 @@ class NotificationService:
         template_id: Optional[int] = None,
         variables: Optional[Dict[str, Any]] = None,
         attachments: Optional[List[Dict[str, Any]]] = None,
-    ) -> Tuple[Notification, List[NotificationRecipient]]:
+    ) -> Tuple[Notification, List[int]]:
         """发送全员广播通知"""
-        from app.models import User
-
-        users = User.query.filter_by(status="active").all()
-
-        if not users:
+        user_ids = [row[0] for row in db.session.query(User.id).filter_by(status="active")]
+        if not user_ids:
             raise ValueError("没有活跃用户")
 
-        user_ids = [user.id for user in users]
-
-        return NotificationService.send_to_users(
-            sender_id=sender_id,
-            user_ids=user_ids,
-            type_id=type_id,
-            title=title,
-            content=content,
-            template_id=template_id,
-            variables=variables,
-            attachments=attachments,
+        return NotificationService._send(
+            sender_id,
+            user_ids,
+            type_id,
+            title,
+            content,
+            template_id,
+            variables,
+            attachments,
+            broadcast=True,
+            validated=True,
         )
 
     @staticmethod
@@ -208,6 +278,7 @@ class NotificationService:
         type_id: Optional[int] = None,
         page: int = 1,
         page_size: int = 20,
+        cursor: Optional[str] = None,
     ) -> Dict[str, Any]:
         """获取用户的通知列表
 
@@ -215,8 +286,9 @@ class NotificationService:
             user_id: 用户ID
             is_read: 是否已读筛选（可选）
             type_id: 类型筛选（可选）
-            page: 页码
+            page: 页码（未传游标时使用）
             page_size: 每页数量
+            cursor: 上一页返回的 next_cursor（传入时按游标翻页，不再统计总数）
 
         Returns:
             包含通知列表和分页信息的字典
@@ -231,37 +303,72 @@ class NotificationService:
             query = query.join(Notification).filter(Notification.type_id == type_id)
 
         # 排序：未读优先，然后按时间倒序
-        query = query.order_by(
-            NotificationRecipient.is_read.asc(), NotificationRecipient.created_at.desc()
+        order_by = (
+            NotificationRecipient.is_read.asc(),
+            NotificationRecipient.created_at.desc(),
+            NotificationRecipient.id.desc(),
         )
 
-        # 分页
-        total = query.count()
-        recipients = query.offset((page - 1) * page_size).limit(page_size).all()
-
-        return {
-            "items": [r.to_dict() for r in recipients],
-            "pagination": {
-                "page": page,
-                "page_size": page_size,
-                "total": total,
-                "total_pages": (total + page_size - 1) // page_size,
-            },
-        }
+        def sort_key(recipient):
+            return [bool(recipient.is_read), recipient.created_at, recipient.id]
+
+        if cursor:
+            last_read, last_created, last_id = decode_cursor(cursor, 3)
+            last_read, last_created, last_id = (
+                bool(last_read),
+                _cursor_datetime(last_created),
+                _cursor_int(last_id),
+            )
+            same_state = and_(
+                NotificationRecipient.is_read.is_(last_read),
+                _created_before(last_created, last_id),
+            )
+            if last_read:
+                query = query.filter(same_state)
+            else:
+                # 未读之后是全部已读
+                query = query.filter(or_(same_state, NotificationRecipient.is_read.is_(True)))
+            return _keyset_page(query.order_by(*order_by), page_size, sort_key)
+
+        return _offset_page(query.order_by(*order_by), page, page_size, sort_key)
 
     @staticmethod
     def get_unread_count(user_id: int) -> int:
         """获取用户未读通知数量
 
+        读取计数表（主键查询）；计数缺失或未知时锁定计数行后重算并写入。
+
         Args:
             user_id: 用户ID
 
         Returns:
             未读数量
         """
-        return NotificationRecipient.query.filter_by(
+        counter = db.session.get(NotificationUnreadCounter, user_id)
+        if counter is not None and counter.unread_count is not None:
+            return counter.unread_count
+
+        # 发送、已读等调整都会写同一行（缺失时插入未知计数），并发事务要么先提交、
+        # 计入重算结果，要么等本事务提交后在重算结果上叠加
+        table = NotificationUnreadCounter.__table__
+        db.session.execute(
+            _counter_insert([{"user_id": user_id, "unread_count": None}]).on_conflict_do_nothing(
+                index_elements=[table.c.user_id]
+            )
+        )
+        db.session.execute(
+            select(table.c.user_id).where(table.c.user_id == user_id).with_for_update()
+        )
+        count = NotificationRecipient.query.filter_by(
             user_id=user_id, is_read=False
         ).count()
+        db.session.execute(
+            update(table)
+            .where(table.c.user_id == user_id)
+            .values(unread_count=count, updated_at=get_local_now())
+        )
+        db.session.commit()
+        return count
 
     @staticmethod
     def mark_as_read(recipient_id: int, user_id: int) -> NotificationRecipient:
@@ -281,9 +388,7 @@ class NotificationService:
         if not recipient:
             raise ValueError("通知不存在或无权限")
 
-        if not recipient.is_read:
-            recipient.mark_as_read()
-
+        if _set_read_state(recipient, True):
             # WebSocket同步
             emit_read_status(
                 recipient_id=recipient.id,
@@ -311,9 +416,7 @@ class NotificationService:
         if not recipient:
             raise ValueError("通知不存在或无权限")
 
-        if recipient.is_read:
-            recipient.mark_as_unread()
-
+        if _set_read_state(recipient, False):
             # WebSocket同步
             emit_unread_status(
                 recipient_id=recipient.id,
@@ -333,7 +436,13 @@ class NotificationService:
         Returns:
             标记为已读的数量
         """
-        # 批量更新
+        # 先锁定计数行，进行中的发送提交后再批量更新
+        db.session.execute(
+            update(NotificationUnreadCounter)
+            .where(NotificationUnreadCounter.user_id == user_id)
+            .values(unread_count=0, updated_at=get_local_now())
+            .execution_options(synchronize_session=False)
+        )
         result = NotificationRecipient.query.filter_by(
             user_id=user_id, is_read=False
         ).update({"is_read": True, "read_at": get_local_now()})
@@ -362,8 +471,18 @@ class NotificationService:
         if not recipient:
             return False
 
-        db.session.delete(recipient)
+        # 条件删除：并发的删除/已读中只有实际删除未读记录的一方调整计数
+        table = NotificationRecipient.__table__
+        criteria = (table.c.id == recipient.id, table.c.user_id == user_id)
+        unread_deleted = db.session.execute(
+            table.delete().where(*criteria, table.c.is_read.is_(False))
+        ).rowcount
+        if unread_deleted:
+            _adjust_unread_counters([user_id], -1)
+        else:
+            db.session.execute(table.delete().where(*criteria))
         db.session.commit()
+        db.session.expunge(recipient)
 
         return True
 
@@ -377,18 +496,20 @@ class NotificationService:
         is_read: Optional[bool] = None,
         page: int = 1,
         page_size: int = 20,
+        cursor: Optional[str] = None,
     ) -> Dict[str, Any]:
         """搜索通知
 
         Args:
             user_id: 用户ID
-            query: 搜索关键词（标题和内容）
+            query: 搜索关键词（标题和内容，优先走全文索引）
             date_from: 开始日期
             date_to: 结束日期
             type_id: 类型筛选
             is_read: 已读状态筛选
-            page: 页码
+            page: 页码（未传游标时使用）
             page_size: 每页数量
+            cursor: 上一页返回的 next_cursor
 
         Returns:
             搜索结果字典
@@ -401,13 +522,7 @@ class NotificationService:
 
         # 关键词搜索
         if query:
-            search_pattern = f"%{query}%"
-            base_query = base_query.filter(
-                or_(
-                    Notification.title.ilike(search_pattern),
-                    Notification.content.ilike(search_pattern),
-                )
-            )
+            base_query = base_query.filter(keyword_filter(query))
 
         # 日期范围筛选
         if date_from:
@@ -423,22 +538,151 @@ class NotificationService:
         if is_read is not None:
             base_query = base_query.filter(NotificationRecipient.is_read == is_read)
 
-        # 排序
-        base_query = base_query.order_by(Notification.created_at.desc())
-
-        # 分页
-        total = base_query.count()
-        recipients = base_query.offset((page - 1) * page_size).limit(page_size).all()
-
-        return {
-            "items": [r.to_dict() for r in recipients],
-            "pagination": {
-                "page": page,
-                "page_size": page_size,
-                "total": total,
-                "total_pages": (total + page_size - 1) // page_size,
-            },
+        # 排序：接收记录与通知同时创建，按接收记录时间排序可走 (user_id, created_at) 索引
+        order_by = (
+            NotificationRecipient.created_at.desc(),
+            NotificationRecipient.id.desc(),
+        )
+
+        def sort_key(recipient):
+            return [recipient.created_at, recipient.id]
+
+        if cursor:
+            base_query = base_query.filter(_created_before(*decode_time_cursor(cursor)))
+            return _keyset_page(base_query.order_by(*order_by), page_size, sort_key)
+
+        return _offset_page(base_query.order_by(*order_by), page, page_size, sort_key)
+
+
+def _set_read_state(recipient: NotificationRecipient, is_read: bool) -> bool:
+    """条件更新已读状态（WHERE is_read = 原状态），实际变更时在同一事务中调整计数
+
+    并发的已读/未读/删除中只有一方的 UPDATE 命中，计数不会被重复调整。
+
+    Returns:
+        是否实际变更
+    """
+    table = NotificationRecipient.__table__
+    changed = db.session.execute(
+        table.update()
+        .where(
+            table.c.id == recipient.id,
+            table.c.user_id == recipient.user_id,
+            table.c.is_read.is_(not is_read),
+        )
+        .values(is_read=is_read, read_at=get_local_now() if is_read else None)
+    ).rowcount
+    if changed:
+        _adjust_unread_counters([recipient.user_id], -1 if is_read else 1)
+    db.session.commit()
+    try:
+        db.session.refresh(recipient)
+    except InvalidRequestError:
+        # 并发删除
+        raise ValueError("通知不存在或无权限")
+    return bool(changed)
+
+
+def _counter_insert(rows: List[Dict[str, Any]]):
+    """计数表的 INSERT（PostgreSQL/SQLite 方言，支持 ON CONFLICT）"""
+    dialect = postgresql if db.session.get_bind().dialect.name == "postgresql" else sqlite
+    now = get_local_now()
+    return dialect.insert(NotificationUnreadCounter).values(
+        [dict(row, updated_at=now) for row in rows]
+    )
+
+
+def _adjust_unread_counters(user_ids: List[int], delta: int):
+    """在当前事务中调整未读计数
+
+    缺失的计数插入为未知（NULL），读取时重算；写同一行使并发的重算与调整按行锁串行。
+    """
+    table = NotificationUnreadCounter.__table__
+    new_count = table.c.unread_count + delta
+    for chunk in _chunked(sorted(set(user_ids))):
+        statement = _counter_insert(
+            [{"user_id": user_id, "unread_count": None} for user_id in chunk]
+        )
+        db.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[table.c.user_id],
+                set_={
+                    "unread_count": case((new_count < 0, 0), else_=new_count),
+                    "updated_at": statement.excluded.updated_at,
+                },
+            )
+        )
+
+
+def invalidate_unread_counters(user_ids: List[int]):
+    """删除用户的未读计数，下次读取时重算（批量删除接收记录等场景），由调用方提交"""
+    for chunk in _chunked(sorted(set(user_ids))):
+        db.session.execute(
+            delete(NotificationUnreadCounter)
+            .where(NotificationUnreadCounter.user_id.in_(chunk))
+            .execution_options(synchronize_session=False)
+        )
+
+
+def _cursor_datetime(value) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError("无效的分页游标")
+
+
+def _cursor_int(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError("无效的分页游标")
+
+
+def _created_before(created_at: datetime, recipient_id: int):
+    """(created_at, id) 倒序下位于游标之后的记录"""
+    return or_(
+        NotificationRecipient.created_at < created_at,
+        and_(
+            NotificationRecipient.created_at == created_at,
+            NotificationRecipient.id < recipient_id,
+        ),
+    )
+
+
+def _page_result(recipients: list, page_size: int, has_more: bool, sort_key) -> Dict[str, Any]:
+    return {
+        "items": [r.to_dict() for r in recipients],
+        "pagination": {
+            "page_size": page_size,
+            "has_more": has_more,
+            "next_cursor": encode_cursor(sort_key(recipients[-1]))
+            if has_more and recipients
+            else None,
+        },
+    }
+
+
+def _keyset_page(query, page_size: int, sort_key) -> Dict[str, Any]:
+    """游标翻页：多取一条判断是否还有下一页"""
+    rows = query.limit(page_size + 1).all()
+    return _page_result(rows[:page_size], page_size, len(rows) > page_size, sort_key)
+
+
+def _offset_page(query, page: int, page_size: int, sort_key) -> Dict[str, Any]:
+    """页码翻页（兼容旧调用），同时返回可继续翻页的游标"""
+    total = query.count()
+    recipients = query.offset((page - 1) * page_size).limit(page_size).all()
+    result = _page_result(
+        recipients, page_size, page * page_size < total, sort_key
+    )
+    result["pagination"].update(
+        {
+            "page": page,
+            "total": total,
+            "total_pages": (total + page_size - 1) // page_size,
         }
+    )
+    return result
 
 
 class NotificationTypeService:
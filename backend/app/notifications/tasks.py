@@ -3,92 +3,113 @@
 from datetime import timedelta
 
 from flask import current_app
-from sqlalchemy import func
+from sqlalchemy import and_, func, select
 
 from app import db
-from app.notifications.models import Notification, NotificationRecipient, get_local_now
-from app.notifications.websocket import emit_to_user
+from app.notifications.models import (
+    Notification,
+    NotificationAttachment,
+    NotificationRecipient,
+    get_local_now,
+)
+from app.notifications.services import invalidate_unread_counters
+from app.notifications.websocket import emit_to_users
+from app.tasks.retention import RetentionRun, iter_id_chunks, purge_in_chunks, update_in_chunks
 
 
 def cleanup_expired_notifications():
     """清理过期通知
     
-    每天运行一次，删除已过期的通知记录
+    每天运行一次，按块删除已过期的通知及其接收者、附件记录，每块单独提交
     """
-    try:
-        current_app.logger.info("开始清理过期通知...")
-        
-        now = get_local_now()
-        
-        expired_notifications = Notification.query.filter(
-            Notification.expires_at < now
-        ).all()
-        
-        deleted_count = 0
-        for notification in expired_notifications:
-            # 删除关联的接收者记录
-            NotificationRecipient.query.filter_by(
-                notification_id=notification.id
-            ).delete()
-            
-            # 删除通知
-            db.session.delete(notification)
-            deleted_count += 1
-        
-        db.session.commit()
-        
-        current_app.logger.info(f"清理完成，删除了 {deleted_count} 条过期通知")
-        return deleted_count
-        
-    except Exception as e:
-        db.session.rollback()
-        current_app.logger.error(f"清理过期通知失败: {e}")
-        return 0
+    current_app.logger.info("开始清理过期通知...")
+    
+    notifications = Notification.__table__
+    recipients = NotificationRecipient.__table__
+    
+    def invalidate_counters(notification_ids):
+        # 有未读记录被删除的用户，未读计数下次读取时重算
+        rows = db.session.execute(
+            select(recipients.c.user_id)
+            .where(
+                recipients.c.notification_id.in_(notification_ids),
+                recipients.c.is_read.is_(False),
+            )
+            .distinct()
+        )
+        invalidate_unread_counters([row[0] for row in rows])
+    
+    metrics = purge_in_chunks(
+        "expired_notifications",
+        notifications,
+        notifications.c.expires_at < get_local_now(),
+        dependents=(
+            recipients.c.notification_id,
+            NotificationAttachment.__table__.c.notification_id,
+        ),
+        before_delete=invalidate_counters,
+    )
+    
+    current_app.logger.info(f"清理完成，删除了 {metrics['deleted']} 条过期通知")
+    return metrics['deleted']
 
 
 def retry_failed_deliveries():
     """重试失败的推送
     
-    每小时运行一次，重试之前推送失败的通知
+    每小时运行一次，重试之前推送失败的通知：按块读取失败记录，
+    同一通知只查询并序列化一次，推送后批量更新投递状态
     """
+    current_app.logger.info("开始重试失败的推送...")
+    
+    run = RetentionRun("retry_failed_deliveries")
+    recipients = NotificationRecipient.__table__
+    one_day_ago = get_local_now() - timedelta(hours=24)
+    condition = and_(
+        recipients.c.delivery_status == 'failed',
+        recipients.c.created_at > one_day_ago,
+    )
+    
     try:
-        current_app.logger.info("开始重试失败的推送...")
-        
-        one_day_ago = get_local_now() - timedelta(hours=24)
-        
-        failed_recipients = NotificationRecipient.query.filter(
-            NotificationRecipient.delivery_status == 'failed',
-            NotificationRecipient.created_at > one_day_ago
-        ).all()
-        
-        retry_count = 0
-        for recipient in failed_recipients:
-            try:
+        for ids in iter_id_chunks(recipients, condition):
+            targets = {}
+            rows = db.session.execute(
+                select(recipients.c.id, recipients.c.notification_id, recipients.c.user_id)
+                .where(recipients.c.id.in_(ids))
+            )
+            for recipient_id, notification_id, user_id in rows:
+                targets.setdefault(notification_id, []).append((recipient_id, user_id))
+            
+            delivered = []
+            for notification in Notification.query.filter(Notification.id.in_(list(targets))):
                 # 重新推送
-                notification = Notification.query.get(recipient.notification_id)
-                if notification:
-                    notification_data = notification.to_dict()
-                    notification_data["recipient_id"] = recipient.id
-                    emit_to_user(recipient.user_id, "notification:new", notification_data)
-                    
-                    # 更新状态
-                    recipient.delivery_status = 'delivered'
-                    retry_count += 1
-                    
-            except Exception as e:
-                current_app.logger.warning(
-                    f"重试推送通知 {recipient.notification_id} 到用户 {recipient.user_id} 失败: {e}"
+                try:
+                    emit_to_users(
+                        [user_id for _, user_id in targets[notification.id]],
+                        "notification:new",
+                        notification.to_dict(),
+                    )
+                    delivered.extend(recipient_id for recipient_id, _ in targets[notification.id])
+                except Exception as e:
+                    current_app.logger.warning(f"重试推送通知 {notification.id} 失败: {e}")
+            
+            # 更新状态
+            if delivered:
+                result = db.session.execute(
+                    recipients.update()
+                    .where(recipients.c.id.in_(delivered))
+                    .values(delivery_status='delivered')
                 )
-        
-        db.session.commit()
-        
-        current_app.logger.info(f"重试完成，成功重试 {retry_count} 条通知")
-        return retry_count
-        
+                run.updated += result.rowcount
+            db.session.commit()
+            run.chunks += 1
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"重试失败推送失败: {e}")
-        return 0
+        run.error = str(e)
+    
+    metrics = run.finish()
+    current_app.logger.info(f"重试完成，成功重试 {metrics['updated']} 条通知")
+    return metrics['updated']
 
 
 def generate_notification_stats():
@@ -155,32 +176,24 @@ def generate_notification_stats():
 def archive_old_notifications():
     """归档旧通知
     
-    每周运行一次，将90天前的通知归档（软删除）
+    每周运行一次，将90天前的通知按块归档（软删除）
     """
-    try:
-        current_app.logger.info("开始归档旧通知...")
-        
-        archive_date = get_local_now() - timedelta(days=90)
-        
-        old_notifications = Notification.query.filter(
-            Notification.created_at < archive_date,
-            Notification.is_archived.is_(False)
-        ).all()
-        
-        archived_count = 0
-        for notification in old_notifications:
-            notification.is_archived = True
-            archived_count += 1
-        
-        db.session.commit()
-        
-        current_app.logger.info(f"归档完成，归档了 {archived_count} 条旧通知")
-        return archived_count
-        
-    except Exception as e:
-        db.session.rollback()
-        current_app.logger.error(f"归档旧通知失败: {e}")
-        return 0
+    current_app.logger.info("开始归档旧通知...")
+    
+    notifications = Notification.__table__
+    archive_date = get_local_now() - timedelta(days=90)
+    metrics = update_in_chunks(
+        "archive_notifications",
+        notifications,
+        and_(
+            notifications.c.created_at < archive_date,
+            notifications.c.is_archived.is_(False),
+        ),
+        {"is_archived": True},
+    )
+    
+    current_app.logger.info(f"归档完成，归档了 {metrics['updated']} 条旧通知")
+    return metrics['updated']
 
 
 # 任务调度配置
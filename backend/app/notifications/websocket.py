@@ -11,6 +11,9 @@ import functools
 # SocketIO实例将在应用初始化时设置
 socketio = None
 
+# 一次 emit 携带的用户房间数
+EMIT_ROOM_BATCH_SIZE = 500
+
 
 def init_socketio(app):
     """初始化SocketIO"""
@@ -106,14 +109,19 @@ def register_handlers():
     def handle_acknowledge(data):
         """处理客户端确认收到通知"""
         try:
+            # 房间推送的通知不含 recipient_id，按通知ID确认
             recipient_id = data.get("recipient_id")
-            if not recipient_id:
+            notification_id = data.get("notification_id") or data.get("id")
+            query = NotificationRecipient.query.filter_by(user_id=request.user_id)
+            if recipient_id:
+                query = query.filter_by(id=recipient_id)
+            elif notification_id:
+                query = query.filter_by(notification_id=notification_id)
+            else:
                 return
 
             # 更新投递状态
-            recipient = NotificationRecipient.query.filter_by(
-                id=recipient_id, user_id=request.user_id
-            ).first()
+            recipient = query.first()
 
             if recipient and recipient.delivery_status == "pending":
                 recipient.delivery_status = "delivered"
@@ -166,7 +174,7 @@ def emit_to_department(department_id: int, event: str, data: dict):
 
 
 def emit_to_users(user_ids: list, event: str, data: dict):
-    """向多个用户发送事件
+    """向多个用户发送相同事件，每次 emit 携带一批用户房间
 
     Args:
         user_ids: 用户ID列表
@@ -178,16 +186,39 @@ def emit_to_users(user_ids: list, event: str, data: dict):
         from flask import current_app
         current_app.logger.warning(f"WebSocket未初始化，跳过推送: {event}")
         return
+    rooms = [f"user:{user_id}" for user_id in dict.fromkeys(user_ids)]
     try:
-        for user_id in user_ids:
+        for i in range(0, len(rooms), EMIT_ROOM_BATCH_SIZE):
             socketio.emit(
-                event, data, room=f"user:{user_id}", namespace="/notifications"
+                event,
+                data,
+                to=rooms[i : i + EMIT_ROOM_BATCH_SIZE],
+                namespace="/notifications",
             )
     except Exception as e:
         from flask import current_app
         current_app.logger.error(f"WebSocket推送失败: {e}")
 
 
+def emit_to_all(event: str, data: dict):
+    """向所有已连接用户发送事件
+
+    Args:
+        event: 事件名称
+        data: 事件数据
+    """
+    global socketio
+    if socketio is None:
+        from flask import current_app
+        current_app.logger.warning(f"WebSocket未初始化，跳过推送: {event}")
+        return
+    try:
+        socketio.emit(event, data, namespace="/notifications")
+    except Exception as e:
+        from flask import current_app
+        current_app.logger.error(f"WebSocket推送失败: {e}")
+
+
 def broadcast_notification(notification_data: dict, recipient_ids: list = None):
     """广播通知给指定接收者
 
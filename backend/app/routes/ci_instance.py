@@ -1,21 +1,35 @@
-from flask import Blueprint, request, jsonify, send_from_directory
+from flask import Blueprint, Response, request, jsonify, send_from_directory, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from app.models.ci_instance import CiInstance, CiHistory
 from app.models.cmdb_model import CmdbModel
+from app.models.department import Department
+from app.models.user import User
 from app.models.cmdb_relation import CmdbRelation, RelationTrigger
+from app.services.relation_graph_service import relation_graph
 from app.services.relation_service import (
     create_relation_with_validation,
     RelationServiceError,
 )
+from app.services.ci_batch_service import batch_update_instances, delete_instances
+from app.services.ci_import_service import import_ci_csv
+from app.services.job_service import job_file_path, job_manager
+from app.services.ci_attribute_index_service import (
+    attribute_filter,
+    attribute_keyword_filter,
+)
 from app import db
 from app.routes.auth import log_operation
 from app.utils.code_generator import generate_ci_code_v2
 from app.utils.data_permission import filter_by_data_permissions, check_data_permission
+from app.utils.pagination import encode_cursor, time_keyset_page
 from datetime import datetime
 import os
 import json
 import csv
 import io
+import urllib.parse
+import uuid
+import zlib
 from app.utils.form_config_fields import extract_form_field_map, extract_form_fields
 
 ci_bp = Blueprint("ci", __name__, url_prefix="/api/v1/cmdb/instances")
@@ -23,6 +37,8 @@ ci_bp = Blueprint("ci", __name__, url_prefix="/api/v1/cmdb/instances")
 # 文件上传配置
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
+EXPORT_BATCH_SIZE = 1000
+
 def require_admin():
     claims = get_jwt()
     return claims.get("role") == "admin"
@@ -68,6 +84,7 @@ def sync_reference_relations(instance, old_values=None):
                         source_type="reference",
                     ).first()
                     if old_rel:
+                        relation_graph.remove_relation(old_rel)
                         db.session.delete(old_rel)
                         db.session.commit()
                 except Exception:
@@ -106,6 +123,7 @@ def get_instances():
     keyword = request.args.get("keyword", "")
     attr_field = request.args.get("attr_field", "")
     attr_value = request.args.get("attr_value", "")
+    attr_op = request.args.get("attr_op", "eq")
     page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 20, type=int)
 
@@ -121,9 +139,11 @@ def get_instances():
         query = query.filter(CiInstance.code.contains(keyword))
 
     if attr_field and attr_value:
-        query = query.filter(
-            CiInstance.attribute_values.contains(f'"{attr_field}": "{attr_value}"')
-        )
+        # 属性过滤走 ci_attribute_index 索引（attr_op 支持 eq/contains/gt/gte/lt/lte 等）
+        attr_condition = attribute_filter(attr_field, attr_value, attr_op, model_id)
+        if attr_condition is None:
+            return jsonify({"code": 400, "message": f"不支持的属性操作符: {attr_op}"}), 400
+        query = query.filter(attr_condition)
 
     query = filter_by_data_permissions(query, CiInstance)
 
@@ -300,25 +320,16 @@ def delete_instance(id):
     if not check_data_permission(instance, int(identity)):
         return jsonify({"code": 403, "message": "无权限删除此CI"}), 403
 
-    # 检查是否有关联的关系
-    out_relations_count = CmdbRelation.query.filter_by(source_ci_id=id).count()
-    in_relations_count = CmdbRelation.query.filter_by(target_ci_id=id).count()
-
-    # 删除所有关联的关系
-    if out_relations_count + in_relations_count > 0:
-        CmdbRelation.query.filter_by(source_ci_id=id).delete()
-        CmdbRelation.query.filter_by(target_ci_id=id).delete()
-        db.session.commit()
-
-    # 记录变更历史
-    _log_ci_history(
-        instance.id, "DELETE", None, None, None, identity, claims.get("username")
-    )
-
     instance_code = instance.code
     instance_name = instance.name
 
-    instance.delete()
+    # 关系与属性索引一并清理，变更历史保留并追加 DELETE 记录
+    delete_instances(
+        [id],
+        int(identity),
+        operator_name=claims.get("username"),
+        ip_address=request.remote_addr,
+    )
 
     # 记录操作日志
     log_operation(
@@ -450,43 +461,22 @@ def batch_update():
     identity = get_jwt_identity()
     claims = get_jwt()
 
-    updated_count = 0
-    for id in ids:
-        instance = CiInstance.query.get(id)
-        if not instance:
-            continue
-
-        # 校验CI是否属于指定模型
-        if instance.model_id != model_id:
-            continue
-
-        # 权限检查
-        if not require_admin() and instance.created_by != int(identity):
-            continue
-
-        # 更新属性
-        old_values = instance.get_attribute_values()
-        attr_values = instance.get_attribute_values()
-
-        for key, value in updates.items():
-            old_val = old_values.get(key)
-            attr_values[key] = value
-            _log_ci_history(
-                instance.id,
-                "UPDATE",
-                key,
-                str(old_val) if old_val is not None else None,
-                str(value),
-                int(identity),
-                claims.get("username"),
-            )
+    updated_ids = batch_update_instances(
+        ids,
+        model_id,
+        updates,
+        int(identity),
+        operator_name=claims.get("username"),
+        ip_address=request.remote_addr,
+        is_admin=require_admin(),
+    )
+    updated_count = len(updated_ids)
 
-        instance.set_attribute_values(attr_values)
-        instance.updated_by = int(identity)
-        db.session.add(instance)
-        updated_count += 1
+    # 批量语句不经过 save()，更新后的 CI 交给触发器队列统一处理
+    from app.services.trigger_service import ci_trigger_queue
 
-    db.session.commit()
+    for ci_id in updated_ids:
+        ci_trigger_queue.enqueue(ci_id)
 
     log_operation(
         int(identity),
@@ -519,27 +509,14 @@ def batch_delete():
     identity = get_jwt_identity()
     claims = get_jwt()
 
-    deleted_count = 0
-    for id in ids:
-        instance = CiInstance.query.get(id)
-        if not instance:
-            continue
-
-        # 权限检查
-        if not require_admin() and instance.created_by != int(identity):
-            continue
-
-        _log_ci_history(
-            instance.id,
-            "DELETE",
-            None,
-            None,
-            None,
-            int(identity),
-            claims.get("username"),
-        )
-        instance.delete()
-        deleted_count += 1
+    deleted = delete_instances(
+        ids,
+        int(identity),
+        is_admin=require_admin(),
+        operator_name=claims.get("username"),
+        ip_address=request.remote_addr,
+    )
+    deleted_count = len(deleted)
 
     log_operation(
         int(identity),
@@ -574,7 +551,25 @@ def get_instance_history(ci_id):
         return jsonify({"code": 403, "message": "无权限查看此CI历史"}), 403
 
     query = CiHistory.query.filter_by(ci_id=ci_id)
-    histories = query.order_by(CiHistory.created_at.desc()).all()
+
+    limit = request.args.get("limit", type=int)
+    cursor = request.args.get("cursor")
+    if limit or cursor:
+        # 游标翻页，走 (ci_id, created_at) 索引
+        try:
+            result = time_keyset_page(
+                query,
+                CiHistory.created_at,
+                CiHistory.id,
+                cursor,
+                min(limit or 20, 1000),
+                lambda h: h.to_dict(),
+            )
+        except ValueError as e:
+            return jsonify({"code": 400, "message": str(e)}), 400
+        return jsonify({"code": 200, "message": "success", "data": result})
+
+    histories = query.order_by(CiHistory.created_at.desc(), CiHistory.id.desc()).all()
 
     return jsonify(
         {"code": 200, "message": "success", "data": [h.to_dict() for h in histories]}
@@ -610,9 +605,22 @@ def get_all_history():
     if date_to:
         query = query.filter(CiHistory.created_at <= datetime.fromisoformat(date_to))
 
-    pagination = query.order_by(CiHistory.created_at.desc()).paginate(
+    cursor = request.args.get("cursor")
+    if cursor:
+        # 游标翻页：按 (created_at, id) 倒序，不统计总数
+        try:
+            result = time_keyset_page(
+                query, CiHistory.created_at, CiHistory.id, cursor, per_page, lambda h: h.to_dict()
+            )
+        except ValueError as e:
+            return jsonify({"code": 400, "message": str(e)}), 400
+        result["per_page"] = per_page
+        return jsonify({"code": 200, "message": "success", "data": result})
+
+    pagination = query.order_by(CiHistory.created_at.desc(), CiHistory.id.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
+    last = pagination.items[-1] if pagination.items else None
 
     return jsonify(
         {
@@ -623,6 +631,10 @@ def get_all_history():
                 "total": pagination.total,
                 "page": page,
                 "per_page": per_page,
+                "next_cursor": encode_cursor([last.created_at, last.id])
+                if pagination.has_next and last
+                else None,
+                "has_more": pagination.has_next,
             },
         }
     )
@@ -650,7 +662,7 @@ def search_instances():
         db.or_(
             CiInstance.code.contains(keyword),
             CiInstance.name.contains(keyword),
-            CiInstance.attribute_values.contains(keyword),
+            attribute_keyword_filter(keyword, model_id),
         )
     )
 
@@ -785,26 +797,128 @@ def export_instances():
 
     query = filter_by_data_permissions(query, CiInstance)
 
-    instances = query.all()
+    filename = f"{model.name}_CI_{datetime.now().strftime('%Y%m%d%H%M%S')}.csv"
 
-    field_defs = extract_form_fields(model.form_config)
-    if not field_defs:
-        attr_keys = set()
-        for instance in instances:
-            attr_keys.update(instance.get_attribute_values().keys())
-        field_defs = [
+    if data.get("async") or request.args.get("async"):
+        return _submit_export_job(model, query, filename, int(get_jwt_identity()))
+
+    field_defs = _export_field_defs(model, query)
+
+    if not (data.get("stream") or request.args.get("stream")):
+        return jsonify(
             {
-                "code": key,
-                "name": key,
-                "group_label": "基础属性",
-                "group_order": -1,
-                "field_order": 0,
+                "code": 200,
+                "message": "success",
+                "data": {
+                    "filename": filename,
+                    "content": "".join(_iter_export_csv(query, field_defs)),
+                },
             }
-            for key in sorted(attr_keys)
-        ]
+        )
+
+    # 流式导出：按批读取、逐块写出，内存占用与导出行数无关
+    use_gzip = bool(data.get("gzip") or request.args.get("gzip"))
+    chunks = (chunk.encode("utf-8") for chunk in _iter_export_csv(query, field_defs))
+    if use_gzip:
+        filename = f"{filename}.gz"
+        chunks = _gzip_chunks(chunks)
+    response = Response(
+        stream_with_context(chunks),
+        mimetype="application/gzip" if use_gzip else "text/csv; charset=utf-8",
+    )
+    response.headers["Content-Disposition"] = (
+        f"attachment; filename*=UTF-8''{urllib.parse.quote(filename)}"
+    )
+    return response
+
+
+def _submit_export_job(model, query, filename, user_id):
+    """后台导出：分批写入 gzip 文件，完成后通过任务下载接口获取"""
+    model_id = model.id
+
+    def run(context):
+        job_query = query.with_session(db.session())
+        job_model = db.session.get(CmdbModel, model_id)
+        field_defs = _export_field_defs(job_model, job_query)
+        total = job_query.order_by(None).count()
+        path = job_file_path(context.job_id, ".csv.gz")
+        with open(path, "wb") as f:
+            for chunk in _gzip_chunks(
+                _track_rows(_iter_export_csv(job_query, field_defs), context, total)
+            ):
+                f.write(chunk)
+        context.result_file = path
+        return {"filename": f"{filename}.gz", "row_count": total}
+
+    job = job_manager.submit(
+        "ci_export",
+        run,
+        params={"model_id": model_id, "model_name": model.name, "filename": filename},
+        created_by=user_id,
+    )
+    return jsonify({"code": 202, "message": "导出任务已提交", "data": job.to_dict()}), 202
+
+
+def _track_rows(chunks, context, total):
+    """每写出一批上报一次导出进度（_iter_export_csv 每批产出一块）"""
+    done = 0
+    for chunk in chunks:
+        yield chunk.encode("utf-8")
+        done = min(total, done + EXPORT_BATCH_SIZE)
+        context.report(progress=done * 100 // max(total, 1), exported_rows=done)
+
+
+def _iter_export_batches(query, *columns):
+    """按 ID 键集分页读取导出数据（只查询需要的列）"""
+    last_id = 0
+    while True:
+        rows = (
+            query.filter(CiInstance.id > last_id)
+            .order_by(CiInstance.id)
+            .limit(EXPORT_BATCH_SIZE)
+            .with_entities(CiInstance.id, *columns)
+            .all()
+        )
+        if not rows:
+            break
+        yield rows
+        last_id = rows[-1].id
+
+
+def _export_field_defs(model, query):
+    field_defs = extract_form_fields(model.form_config)
+    if field_defs:
+        return field_defs
+
+    attr_keys = set()
+    for rows in _iter_export_batches(query, CiInstance.attribute_values):
+        for row in rows:
+            attr_keys.update(_load_attribute_values(row.attribute_values).keys())
+    return [
+        {
+            "code": key,
+            "name": key,
+            "group_label": "基础属性",
+            "group_order": -1,
+            "field_order": 0,
+        }
+        for key in sorted(attr_keys)
+    ]
+
+
+def _load_attribute_values(raw):
+    try:
+        return json.loads(raw) if raw else {}
+    except Exception:
+        return {}
+
+
+def _iter_export_csv(query, field_defs):
+    """逐批生成 CSV 文本块"""
     output = io.StringIO()
-    headers = ["CI编码", "CI名称", "部门", "创建人", "创建时间"]
+    writer = csv.writer(output)
 
+    headers = ["CI编码", "CI名称", "部门", "创建人", "创建时间"]
     for field in field_defs:
         group_label = field.get("group_label")
         name = field.get("name") or field.get("code")
@@ -812,44 +926,67 @@ def export_instances():
             headers.append(f"{group_label}-{name}")
         else:
             headers.append(name)
-
-    writer = csv.writer(output)
     writer.writerow(headers)
 
-    for instance in instances:
-        attr_values = instance.get_attribute_values()
-        row = [
-            instance.code or "",
-            instance.name or "",
-            instance.department.name if instance.department else "",
-            instance.creator.username if instance.creator else "",
-            instance.created_at.strftime("%Y-%m-%d %H:%M:%S")
-            if instance.created_at
-            else "",
-        ]
-
-        for field in field_defs:
-            value = attr_values.get(field["code"], "")
-            if isinstance(value, list):
-                value = ",".join(map(str, value))
-            elif isinstance(value, dict):
-                value = json.dumps(value, ensure_ascii=False)
-            row.append(str(value))
-
-        writer.writerow(row)
-
-    output.seek(0)
+    department_names = {}
+    usernames = {}
+    for rows in _iter_export_batches(
+        query,
+        CiInstance.code,
+        CiInstance.name,
+        CiInstance.department_id,
+        CiInstance.created_by,
+        CiInstance.created_at,
+        CiInstance.attribute_values,
+    ):
+        missing_departments = {
+            row.department_id for row in rows if row.department_id
+        } - department_names.keys()
+        if missing_departments:
+            department_names.update(
+                db.session.query(Department.id, Department.name).filter(
+                    Department.id.in_(missing_departments)
+                )
+            )
+        missing_users = {row.created_by for row in rows if row.created_by} - usernames.keys()
+        if missing_users:
+            usernames.update(
+                db.session.query(User.id, User.username).filter(User.id.in_(missing_users))
+            )
 
-    return jsonify(
-        {
-            "code": 200,
-            "message": "success",
-            "data": {
-                "filename": f"{model.name}_CI_{datetime.now().strftime('%Y%m%d%H%M%S')}.csv",
-                "content": output.getvalue(),
-            },
-        }
-    )
+        for row in rows:
+            attr_values = _load_attribute_values(row.attribute_values)
+            values = [
+                row.code or "",
+                row.name or "",
+                department_names.get(row.department_id, ""),
+                usernames.get(row.created_by, ""),
+                row.created_at.strftime("%Y-%m-%d %H:%M:%S") if row.created_at else "",
+            ]
+            for field in field_defs:
+                value = attr_values.get(field["code"], "")
+                if isinstance(value, list):
+                    value = ",".join(map(str, value))
+                elif isinstance(value, dict):
+                    value = json.dumps(value, ensure_ascii=False)
+                values.append(str(value))
+            writer.writerow(values)
+
+        yield output.getvalue()
+        output.seek(0)
+        output.truncate(0)
+
+    if output.tell():
+        yield output.getvalue()
+
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
 
 
 @ci_bp.route("/import", methods=["POST"])
@@ -872,146 +1009,54 @@ def import_instances():
     if not model:
         return jsonify({"code": 400, "message": "模型不存在"}), 400
 
-    def normalize_header(value):
-        return (value or "").strip().replace("(必填)", "").lstrip("*").strip()
-
-    field_alias_to_code = {}
-    required_field_codes = set()
-    field_by_code = {}
-    for field in extract_form_fields(model.form_config):
-        field_by_code[field["code"]] = field
-        if field.get("is_required"):
-            required_field_codes.add(field["code"])
-        aliases = [field["code"], field["name"], f"*{field['name']}", f"*{field['name']}(必填)"]
-        for alias in aliases:
-            key = normalize_header(alias)
-            if key:
-                field_alias_to_code[key] = field["code"]
-
-    try:
-        stream = io.StringIO(file.stream.read().decode("UTF-8"), newline=None)
-        reader = csv.reader(stream)
-        try:
-            header = next(reader)
-        except StopIteration:
-            return jsonify({"code": 400, "message": "文件内容为空"}), 400
-
-        name_idx = None
-        code_idx = None
-        field_indices = {}
-
-        for i, col in enumerate(header):
-            normalized_col = normalize_header(col)
-            if normalized_col == "CI名称":
-                name_idx = i
-            elif normalized_col == "CI编码":
-                code_idx = i
-            elif normalized_col in field_alias_to_code:
-                field_code = field_alias_to_code[normalized_col]
-                field_indices[field_code] = i
-
-        success_count = 0
-        error_messages = []
-
-        for row_idx, row in enumerate(reader, start=2):
-            try:
-                if name_idx is not None and name_idx < len(row):
-                    name = row[name_idx].strip()
-                else:
-                    name = ""
-
-                code = (
-                    row[code_idx].strip()
-                    if code_idx is not None and code_idx < len(row)
-                    else ""
-                )
-
-                if not code:
-                    code = generate_ci_code_v2()
-
-                attr_values = {}
-                for field_code, idx in field_indices.items():
-                    if idx < len(row):
-                        value = row[idx].strip()
-                        field = field_by_code.get(field_code)
-                        if field and field.get("field_type") == "number" and value:
-                            try:
-                                value = int(value)
-                            except Exception:
-                                try:
-                                    value = float(value)
-                                except Exception:
-                                    pass
-                        attr_values[field_code] = value
-
-                if not name:
-                    for field in fields:
-                        if (
-                            field.get("is_required")
-                            and field.get("field_type") in ("text", "string")
-                            and field["code"] in attr_values
-                        ):
-                            name = str(attr_values[field["code"]])
-                            break
-                    if not name:
-                        name = code
-
-                # 校验模型必填属性
-                missing_required = []
-                for required_code in required_field_codes:
-                    val = attr_values.get(required_code)
-                    if val is None or str(val).strip() == "":
-                        required_name = (
-                            field_by_code.get(required_code).get("name")
-                            if field_by_code.get(required_code)
-                            else required_code
-                        )
-                        missing_required.append(required_name)
-                if missing_required:
-                    error_messages.append(
-                        f"第{row_idx}行: 必填属性不能为空({','.join(missing_required)})"
-                    )
-                    continue
-
-                instance = CiInstance(
-                    code=code,
-                    name=name,
-                    model_id=model_id,
-                    attribute_values=json.dumps(attr_values),
-                    created_by=int(identity),
-                )
-                db.session.add(instance)
-                success_count += 1
-
-            except Exception as e:
-                error_messages.append(f"第{row_idx}行: {str(e)}")
-
-        db.session.commit()
+    # 上传内容先落盘，由后台任务流式读取
+    upload_path = job_file_path(uuid.uuid4().hex, ".import.csv")
+    file.save(upload_path)
+    user_id = int(identity)
+
+    def run(context):
+        with open(upload_path, encoding="utf-8-sig", newline="") as text_stream:
+            return import_ci_csv(
+                text_stream,
+                db.session.get(CmdbModel, model_id),
+                user_id,
+                progress=lambda p: context.report(**p),
+            )
 
-        log_operation(
-            int(identity),
-            claims.get("username"),
-            "CREATE",
-            "ci_instance",
-            None,
-            f"批量导入 {success_count} 个CI",
-        )
+    job = job_manager.submit(
+        "ci_import",
+        run,
+        params={"model_id": model_id, "model_name": model.name, "filename": file.filename},
+        created_by=user_id,
+        input_files=[upload_path],
+    )
+    log_operation(
+        user_id,
+        claims.get("username"),
+        "CREATE",
+        "ci_instance",
+        None,
+        f"批量导入CI（任务 {job.id}）",
+    )
 
-        return jsonify(
-            {
-                "code": 200,
-                "message": f"导入完成，成功{success_count}条"
-                + (f"，失败{len(error_messages)}条" if error_messages else ""),
-                "data": {
-                    "success_count": success_count,
-                    "error_messages": error_messages[:10],
-                },
-            }
-        )
+    # 默认等待一段时间：小文件直接返回结果，大文件返回任务信息供轮询进度
+    wait_seconds = 0 if request.form.get("async") else None
+    job = job_manager.wait(job, wait_seconds)
+    if job.status == "failed":
+        return jsonify({"code": 400, "message": f"导入失败: {job.error_message}"}), 400
+    if job.status != "completed":
+        return jsonify({"code": 202, "message": "导入任务执行中", "data": job.to_dict()}), 202
 
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({"code": 400, "message": f"导入失败: {str(e)}"}), 400
+    result = job.get_result()
+    success_count = result["success_count"]
+    return jsonify(
+        {
+            "code": 200,
+            "message": f"导入完成，成功{success_count}条"
+            + (f"，失败{result['error_count']}条" if result["error_count"] else ""),
+            "data": {"job_id": job.id, **result},
+        }
+    )
 
 
 @ci_bp.route("/import-template", methods=["GET"])
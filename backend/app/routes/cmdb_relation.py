@@ -1,6 +1,5 @@
 from flask import Blueprint, request, jsonify, Response, current_app
 from datetime import datetime
-from collections import deque
 import csv
 import io
 from app.models.cmdb_relation import (
@@ -10,17 +9,20 @@ from app.models.cmdb_relation import (
     TriggerExecutionLog,
 )
 from app.services.trigger_service import process_trigger_for_model
+from app.services.alert_ci_index_service import alert_ci_index
+from app.services.job_service import JobConflictError, job_file_path, job_manager, model_key
+from app.services.relation_graph_service import relation_graph
+from app.services.topology_service import collect_all_relations, collect_relations_by_depth
 from app.tasks.scheduler import add_trigger_scan_job, get_scheduled_jobs, remove_trigger_scan_job
 from app.models.ci_instance import CiInstance
-from app.models.hertzbeat_models import SingleAlert, Monitor
-from app.models.department import Department
-from app.models.role import UserRole, Role
+from app.models.user import User
 from app.services.relation_service import (
     create_relation_with_validation,
     RelationServiceError,
     parse_relation_style,
 )
 from app.utils.auth import token_required, admin_required
+from app.utils.principal import principal_for
 from app.utils.decorators import log_operation
 from app import db
 import json
@@ -29,44 +31,14 @@ from apscheduler.triggers.cron import CronTrigger
 cmdb_relation_bp = Blueprint('cmdb_relation', __name__, url_prefix='/api/v1/cmdb')
 
 
-def _get_child_department_ids(parent_id):
-    children = Department.query.filter_by(parent_id=parent_id).all()
-    ids = []
-    for child in children:
-        ids.append(child.id)
-        ids.extend(_get_child_department_ids(child.id))
-    return ids
-
-
 def _get_user_data_scope(user):
-    if user.is_admin:
-        return 'all'
-
-    scopes = set()
-    user_roles = UserRole.query.filter_by(user_id=user.id).all()
-    for user_role in user_roles:
-        role = Role.query.get(user_role.role_id)
-        if not role:
-            continue
-        data_permissions = role.get_data_permissions()
-        scope = data_permissions.get('scope', 'self')
-        scopes.add(scope)
-
-    if 'all' in scopes:
-        return 'all'
-    if 'department_and_children' in scopes:
-        return 'department_and_children'
-    if 'department' in scopes:
-        return 'department'
-    return 'self'
+    return principal_for(user).data_scope
 
 
 def _get_accessible_department_ids(user, scope):
     if scope != 'department_and_children' or not user.department_id:
         return set()
-    ids = set(_get_child_department_ids(user.department_id))
-    ids.add(user.department_id)
-    return ids
+    return principal_for(user).accessible_department_ids()
 
 
 def _can_access_instance(ci, user, scope, dept_ids):
@@ -213,156 +185,6 @@ def _parse_id_list_param(name, single_name=None):
     return output
 
 
-def _collect_open_alert_ci_ids(ci_nodes):
-    ci_id_set = set()
-    ci_code_to_id = {}
-    ci_code_lower_to_id = {}
-    ci_name_lower_to_id = {}
-    for node in (ci_nodes or []):
-        try:
-            ci_id = int(node.get('id') or 0)
-        except (TypeError, ValueError):
-            ci_id = 0
-        if ci_id <= 0:
-            continue
-        ci_id_set.add(ci_id)
-        code = str(node.get('code') or '').strip()
-        if code:
-            ci_code_to_id[code] = ci_id
-            ci_code_lower_to_id[code.lower()] = ci_id
-        name = str(node.get('name') or '').strip()
-        if name:
-            ci_name_lower_to_id[name.lower()] = ci_id
-    if not ci_id_set:
-        return set()
-    open_alert_ci_ids = set()
-    alerts = SingleAlert.query.filter_by(status='firing').all()
-    monitor_ci_binding_cache = {}
-    for alert in alerts:
-        annotations = alert.annotations if hasattr(alert, 'annotations') else {}
-        labels = alert.labels if hasattr(alert, 'labels') else {}
-        if not isinstance(annotations, dict):
-            annotations = {}
-        if not isinstance(labels, dict):
-            labels = {}
-
-        ci_id_candidates = [
-            annotations.get('ci_id'),
-            annotations.get('ci.id'),
-            annotations.get('ciId'),
-            labels.get('ci_id'),
-            labels.get('ci.id'),
-            labels.get('ciId'),
-        ]
-        matched = False
-        for candidate in ci_id_candidates:
-            try:
-                ci_id = int(candidate or 0)
-            except (TypeError, ValueError):
-                ci_id = 0
-            if ci_id > 0 and ci_id in ci_id_set:
-                open_alert_ci_ids.add(ci_id)
-                matched = True
-                break
-        if matched:
-            continue
-
-        ci_code_candidates = [
-            annotations.get('ci_code'),
-            annotations.get('ci.code'),
-            annotations.get('ciCode'),
-            annotations.get('ci_name'),
-            annotations.get('ci.name'),
-            annotations.get('ciName'),
-            labels.get('ci_code'),
-            labels.get('ci.code'),
-            labels.get('ciCode'),
-            labels.get('ci_name'),
-            labels.get('ci.name'),
-            labels.get('ciName'),
-        ]
-        for candidate in ci_code_candidates:
-            code = str(candidate or '').strip()
-            if not code:
-                continue
-            ci_id = (
-                ci_code_to_id.get(code)
-                or ci_code_lower_to_id.get(code.lower())
-                or ci_name_lower_to_id.get(code.lower())
-            )
-            if ci_id:
-                open_alert_ci_ids.add(ci_id)
-                matched = True
-                break
-        if matched:
-            continue
-
-        content_text = str(getattr(alert, 'content', '') or '').strip()
-        if content_text:
-            lowered_content = content_text.lower()
-            for code, ci_id in ci_code_to_id.items():
-                if code and code.lower() in lowered_content:
-                    open_alert_ci_ids.add(ci_id)
-                    matched = True
-                    break
-            if matched:
-                continue
-            for name_lower, ci_id in ci_name_lower_to_id.items():
-                if name_lower and name_lower in lowered_content:
-                    open_alert_ci_ids.add(ci_id)
-                    break
-        if matched:
-            continue
-
-        monitor_id_candidates = [
-            annotations.get('monitor_id'),
-            annotations.get('monitor.id'),
-            annotations.get('monitorId'),
-            labels.get('monitor_id'),
-            labels.get('monitor.id'),
-            labels.get('monitorId'),
-        ]
-        monitor_id = 0
-        for candidate in monitor_id_candidates:
-            try:
-                monitor_id = int(candidate or 0)
-            except (TypeError, ValueError):
-                monitor_id = 0
-            if monitor_id > 0:
-                break
-        if monitor_id <= 0:
-            continue
-        if monitor_id in monitor_ci_binding_cache:
-            mapped_ci_id = monitor_ci_binding_cache[monitor_id]
-        else:
-            mapped_ci_id = 0
-            monitor_row = Monitor.query.get(monitor_id)
-            if monitor_row:
-                try:
-                    monitor_annotations = json.loads(monitor_row.annotations_json or '{}')
-                except Exception:
-                    monitor_annotations = {}
-                if isinstance(monitor_annotations, dict):
-                    try:
-                        candidate_ci_id = int(monitor_annotations.get('ci_id') or 0)
-                    except (TypeError, ValueError):
-                        candidate_ci_id = 0
-                    if candidate_ci_id > 0:
-                        mapped_ci_id = candidate_ci_id
-                    else:
-                        candidate_ci_code = str(monitor_annotations.get('ci_code') or '').strip()
-                        if candidate_ci_code:
-                            mapped_ci_id = (
-                                ci_code_to_id.get(candidate_ci_code)
-                                or ci_code_lower_to_id.get(candidate_ci_code.lower())
-                                or 0
-                            )
-            monitor_ci_binding_cache[monitor_id] = mapped_ci_id
-        if mapped_ci_id and mapped_ci_id in ci_id_set:
-            open_alert_ci_ids.add(mapped_ci_id)
-    return open_alert_ci_ids
-
-
 def _get_topology_depth_limit():
     try:
         depth_limit = int(current_app.config.get('CMDB_TOPOLOGY_MAX_DEPTH', 10))
@@ -371,42 +193,22 @@ def _get_topology_depth_limit():
     return max(1, depth_limit)
 
 
-def _collect_relations_by_depth(start_ci_id, max_depth, current_user, scope, dept_ids):
-    visited_nodes = {start_ci_id: 0}
-    visited_relations = set()
-    queue = deque([(start_ci_id, 0)])
-    relation_list = []
-
-    while queue:
-        current_ci_id, current_depth = queue.popleft()
-        if current_depth >= max_depth:
-            continue
-
-        source_relations = CmdbRelation.query.filter_by(source_ci_id=current_ci_id).all()
-        target_relations = CmdbRelation.query.filter_by(target_ci_id=current_ci_id).all()
-
-        for rel in source_relations + target_relations:
-            if rel.id in visited_relations:
-                continue
-            if not rel.source_ci or not rel.target_ci:
-                continue
-            if not _can_access_instance(rel.source_ci, current_user, scope, dept_ids):
-                continue
-            if not _can_access_instance(rel.target_ci, current_user, scope, dept_ids):
-                continue
-
-            visited_relations.add(rel.id)
-            relation_list.append(rel)
+def _collect_relations_by_depth(start_ci_ids, max_depth, current_user, scope, dept_ids):
+    return collect_relations_by_depth(
+        start_ci_ids,
+        max_depth,
+        can_access=lambda ci: _can_access_instance(ci, current_user, scope, dept_ids),
+        graph=relation_graph,
+    )
 
-            next_nodes = [rel.source_ci_id, rel.target_ci_id]
-            for next_ci_id in next_nodes:
-                next_depth = current_depth + 1
-                existing_depth = visited_nodes.get(next_ci_id)
-                if existing_depth is None or next_depth < existing_depth:
-                    visited_nodes[next_ci_id] = next_depth
-                    queue.append((next_ci_id, next_depth))
 
-    return relation_list
+def _collect_all_relations(current_user, scope, dept_ids, model_ids=None, node_limit=None):
+    return collect_all_relations(
+        relation_graph,
+        can_access=lambda ci: _can_access_instance(ci, current_user, scope, dept_ids),
+        model_ids=model_ids,
+        node_limit=node_limit,
+    )
 
 
 def _match_ci_keyword(ci, keyword=''):
@@ -666,7 +468,7 @@ def get_instance_relations(id):
     nodes.append(_build_ci_node(ci, is_center=True))
     
     relation_pool = _collect_relations_by_depth(
-        start_ci_id=id,
+        start_ci_ids=[id],
         max_depth=depth,
         current_user=current_user,
         scope=scope,
@@ -845,7 +647,9 @@ def delete_relation(id):
     if not _can_access_instance(relation.target_ci, current_user, scope, dept_ids):
         return jsonify({'code': 403, 'message': '无权限删除该关系'}), 403
 
-    relation.delete()
+    relation_graph.remove_relation(relation)
+    db.session.delete(relation)
+    db.session.commit()
     
     return jsonify({
         'code': 200,
@@ -876,38 +680,29 @@ def get_topology():
     
     # 如果指定了 CI ID，从这些 CI 开始按 depth 展开并去重
     if ci_ids:
-        all_relations = []
-        center_cis = []
-        relation_ids = set()
-        for ci_id in ci_ids:
-            center_ci = CiInstance.query.get(ci_id)
-            if center_ci and not _can_access_instance(center_ci, current_user, scope, dept_ids):
+        center_ci_map = {
+            ci.id: ci for ci in CiInstance.query.filter(CiInstance.id.in_(ci_ids)).all()
+        }
+        center_cis = [center_ci_map[ci_id] for ci_id in ci_ids if ci_id in center_ci_map]
+        for center_ci in center_cis:
+            if not _can_access_instance(center_ci, current_user, scope, dept_ids):
                 return jsonify({'code': 403, 'message': '无权限查看此CI'}), 403
-            if center_ci:
-                center_cis.append(center_ci)
-            related_relations = _collect_relations_by_depth(
-                start_ci_id=ci_id,
-                max_depth=depth,
-                current_user=current_user,
-                scope=scope,
-                dept_ids=dept_ids,
-            )
-            for rel in related_relations:
-                if rel.id in relation_ids:
-                    continue
-                relation_ids.add(rel.id)
-                all_relations.append(rel)
+        all_relations = _collect_relations_by_depth(
+            start_ci_ids=ci_ids,
+            max_depth=depth,
+            current_user=current_user,
+            scope=scope,
+            dept_ids=dept_ids,
+        )
     else:
-        all_relations = []
         center_cis = []
-        for rel in CmdbRelation.query.all():
-            if not rel.source_ci or not rel.target_ci:
-                continue
-            if not _can_access_instance(rel.source_ci, current_user, scope, dept_ids):
-                continue
-            if not _can_access_instance(rel.target_ci, current_user, scope, dept_ids):
-                continue
-            all_relations.append(rel)
+        all_relations = _collect_all_relations(
+            current_user,
+            scope,
+            dept_ids,
+            model_ids=model_ids,
+            node_limit=500 if not (model_ids or keyword.strip()) else None,
+        )
 
     topology_nodes, topology_edges = _build_topology_data(
         all_relations=all_relations,
@@ -951,7 +746,7 @@ def get_topology():
             topology_nodes.append(_build_ci_node(ci, is_center=False))
             existing_ids.add(ci.id)
 
-    open_alert_ci_ids = _collect_open_alert_ci_ids(topology_nodes)
+    open_alert_ci_ids = alert_ci_index.open_alert_ci_ids(node.get('id') for node in topology_nodes)
     for node in topology_nodes:
         node['has_open_alert'] = node.get('id') in open_alert_ci_ids
     
@@ -990,34 +785,64 @@ def export_topology():
     dept_ids = _get_accessible_department_ids(current_user, scope)
 
     if ci_ids:
-        all_relations = []
-        relation_ids = set()
-        for ci_id in ci_ids:
-            center_ci = CiInstance.query.get(ci_id)
-            if center_ci and not _can_access_instance(center_ci, current_user, scope, dept_ids):
+        for center_ci in CiInstance.query.filter(CiInstance.id.in_(ci_ids)).all():
+            if not _can_access_instance(center_ci, current_user, scope, dept_ids):
                 return jsonify({'code': 403, 'message': '无权限查看此CI'}), 403
-            related_relations = _collect_relations_by_depth(
-                start_ci_id=ci_id,
-                max_depth=depth,
-                current_user=current_user,
-                scope=scope,
-                dept_ids=dept_ids,
-            )
-            for rel in related_relations:
-                if rel.id in relation_ids:
-                    continue
-                relation_ids.add(rel.id)
-                all_relations.append(rel)
+
+    filename_suffix = datetime.now().strftime('%Y%m%d%H%M%S')
+    # 当前无 xlsx 依赖，excel 格式也返回 CSV 文件，便于 Excel 打开
+    filename = f'topology_{filename_suffix}.csv'
+
+    if request.args.get('async') in ('1', 'true'):
+        user_id = current_user.id
+
+        def run(context):
+            user = db.session.get(User, user_id)
+            user_scope = _get_user_data_scope(user)
+            path = job_file_path(context.job_id, '.csv')
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                edge_count = _write_topology_csv(
+                    f, user, user_scope, _get_accessible_department_ids(user, user_scope),
+                    ci_ids, model_ids, keyword, depth,
+                )
+            context.result_file = path
+            return {'filename': filename, 'edge_count': edge_count}
+
+        job = job_manager.submit(
+            'topology_export',
+            run,
+            params={'ci_ids': ci_ids, 'model_ids': model_ids, 'depth': depth, 'filename': filename},
+            created_by=user_id,
+        )
+        return jsonify({'code': 202, 'message': '导出任务已提交', 'data': job.to_dict()}), 202
+
+    output = io.StringIO()
+    _write_topology_csv(output, current_user, scope, dept_ids, ci_ids, model_ids, keyword, depth)
+    content = output.getvalue()
+    output.close()
+
+    response = Response(
+        content,
+        mimetype='text/csv; charset=utf-8'
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+
+def _write_topology_csv(output, current_user, scope, dept_ids, ci_ids, model_ids, keyword, depth):
+    """收集拓扑关系并写出 CSV，返回写出的关系数"""
+    if ci_ids:
+        all_relations = _collect_relations_by_depth(
+            start_ci_ids=ci_ids,
+            max_depth=depth,
+            current_user=current_user,
+            scope=scope,
+            dept_ids=dept_ids,
+        )
     else:
-        all_relations = []
-        for rel in CmdbRelation.query.all():
-            if not rel.source_ci or not rel.target_ci:
-                continue
-            if not _can_access_instance(rel.source_ci, current_user, scope, dept_ids):
-                continue
-            if not _can_access_instance(rel.target_ci, current_user, scope, dept_ids):
-                continue
-            all_relations.append(rel)
+        all_relations = _collect_all_relations(
+            current_user, scope, dept_ids, model_ids=model_ids
+        )
 
     _, edges = _build_topology_data(
         all_relations=all_relations,
@@ -1026,7 +851,6 @@ def export_topology():
         limit_nodes=False,
     )
 
-    output = io.StringIO()
     writer = csv.writer(output)
     writer.writerow([
         'relation_id',
@@ -1045,8 +869,10 @@ def export_topology():
         'created_at',
     ])
 
+    relation_map = {rel.id: rel for rel in all_relations}
+    count = 0
     for edge in edges:
-        rel = next((r for r in all_relations if r.id == edge['id']), None)
+        rel = relation_map.get(edge['id'])
         if not rel or not rel.source_ci or not rel.target_ci:
             continue
         writer.writerow([
@@ -1065,23 +891,8 @@ def export_topology():
             rel.source_type,
             rel.created_at.isoformat() if rel.created_at else '',
         ])
-
-    content = output.getvalue()
-    output.close()
-
-    filename_suffix = datetime.now().strftime('%Y%m%d%H%M%S')
-    if export_format == 'excel':
-        # 当前无 xlsx 依赖，excel 格式先返回 CSV 文件，便于 Excel 打开
-        filename = f'topology_{filename_suffix}.csv'
-    else:
-        filename = f'topology_{filename_suffix}.csv'
-
-    response = Response(
-        content,
-        mimetype='text/csv; charset=utf-8'
-    )
-    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
-    return response
+        count += 1
+    return count
 
 # ==================== 关系触发器管理 ====================
 
@@ -1307,15 +1118,38 @@ def toggle_relation_trigger(id):
 @admin_required
 @log_operation(operation_type='UPDATE', operation_object='relation_trigger')
 def execute_relation_trigger(id):
-    """立即执行当前触发器，重建源模型下实例关系"""
+    """立即执行当前触发器，重建源模型下实例关系（后台任务，超过等待时间后返回任务信息）"""
     trigger = RelationTrigger.query.get_or_404(id)
-    result = process_trigger_for_model(trigger)
+    trigger_id = trigger.id
+
+    def run(context):
+        return process_trigger_for_model(
+            db.session.get(RelationTrigger, trigger_id), progress=context.report
+        )
+
+    try:
+        job = job_manager.submit(
+            'trigger_run',
+            run,
+            concurrency_key=model_key(trigger.source_model_id),
+            params={'trigger_id': trigger.id, 'trigger_name': trigger.name},
+            created_by=request.current_user.id,
+        )
+    except JobConflictError as e:
+        return jsonify({'code': 409, 'message': e.message}), 409
+
+    job = job_manager.wait(job)
+    if job.status == 'failed':
+        return jsonify({'code': 500, 'message': f'执行失败: {job.error_message}'}), 500
+    if job.status != 'completed':
+        return jsonify({'code': 202, 'message': '任务执行中', 'data': job.to_dict()}), 202
     return jsonify({
         'code': 200,
         'message': '执行完成',
         'data': {
             'trigger_id': trigger.id,
             'trigger_name': trigger.name,
-            **result,
+            'job_id': job.id,
+            **job.get_result(),
         }
     })
@@ -1,41 +1,44 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from app.models import CustomView, CustomViewNode, CustomViewNodePermission, Role, CmdbModel, CiInstance
-from flask_jwt_extended import get_jwt_identity, jwt_required, verify_jwt_in_request
-from app.models.user import User
-from app.utils.cache import cache, cached, invalidate_cache
+from flask_jwt_extended import jwt_required, verify_jwt_in_request
+from app.utils.cache import cache, cached, invalidate_tags
+from app.utils.principal import get_principal
+from app.services.ci_attribute_index_service import (
+    attribute_filter,
+    attribute_keyword_filter,
+    compile_filter_conditions,
+)
 import math
 import time
 
 custom_view_bp = Blueprint("custom_view", __name__, url_prefix="/api/v1")
 
 
-def get_current_user():
-    """获取当前用户"""
+def _get_current_principal():
     try:
         verify_jwt_in_request(optional=True)
-        identity = get_jwt_identity()
-        if identity:
-            return User.query.get(int(identity))
+        return get_principal()
     except Exception:
-        pass
-    return None
+        return None
+
+
+def get_current_user():
+    """获取当前用户"""
+    principal = _get_current_principal()
+    return principal.user if principal else None
 
 
 def check_permission(permission_code):
     """检查当前用户是否有权限"""
-    current_user = get_current_user()
-    if not current_user:
+    principal = _get_current_principal()
+    if not principal:
         return False
     
-    if current_user.is_admin:
+    if principal.is_admin:
         return True
     
-    # 通过 role_links 获取用户的角色
-    for user_role in current_user.role_links:
-        if user_role.role and user_role.role.has_permission(permission_code):
-            return True
-    return False
+    return principal.has_permission(permission_code)
 
 
 @custom_view_bp.route("/custom-views/my", methods=["GET"])
@@ -339,7 +342,7 @@ def create_node():
     db.session.commit()
     
     # 清除该视图的缓存
-    invalidate_cache(f"view_nodes_tree:{view_id}")
+    invalidate_tags(f"view:{view_id}")
     
     return jsonify({
         "code": 201,
@@ -408,7 +411,7 @@ def update_node(node_id):
     db.session.commit()
     
     # 清除该视图的缓存
-    invalidate_cache(f"view_nodes_tree:{node.view_id}")
+    invalidate_tags(f"view:{node.view_id}")
     
     return jsonify({
         "code": 200,
@@ -440,7 +443,7 @@ def delete_node(node_id):
     db.session.commit()
     
     # 清除该视图的缓存
-    invalidate_cache(f"view_nodes_tree:{view_id}")
+    invalidate_tags(f"view:{view_id}")
     
     return jsonify({
         "code": 200,
@@ -504,28 +507,17 @@ def get_node_cis(node_id):
         return jsonify({"code": 404, "message": "节点不存在"}), 404
     
     view = node.view
-    current_user = get_current_user()
-    
+    principal = _get_current_principal()
     has_view_permission = False
-    if current_user and current_user.is_admin:
+    if principal and principal.is_admin:
         has_view_permission = True
-    elif current_user:
-        # 获取用户的所有角色ID
-        user_role_ids = [ur.role_id for ur in current_user.role_links]
-        # 检查是否有视图的查看权限
-        from app.models.role import Role
-        for role_id in user_role_ids:
-            role = Role.query.get(role_id)
-            if role and role.has_permission(f"custom-view:{view.code}:view"):
-                has_view_permission = True
-                break
-            # 检查节点权限
-            for perm in node.role_permissions.all():
-                if role_id == perm.role_id:
-                    has_view_permission = True
-                    break
-            if has_view_permission:
-                break
+    elif principal:
+        # 检查是否有视图的查看权限或节点权限
+        has_view_permission = principal.has_permission(
+            f"custom-view:{view.code}:view"
+        ) or node.role_permissions.filter(
+            CustomViewNodePermission.role_id.in_(principal.role_ids)
+        ).count() > 0
     
     if not has_view_permission:
         return jsonify({"code": 403, "message": "无权限"}), 403
@@ -574,122 +566,30 @@ def get_node_cis(node_id):
     attr_field = request.args.get("attr_field", "")
     attr_value = request.args.get("attr_value", "")
     
-    # 获取所有该模型的CI实例
+    # 节点条件、关键字与属性筛选统一编译为 SQL，在数据库侧完成计数与分页
     query = CiInstance.query.filter_by(model_id=model_id)
-    
-    # 先获取所有记录（因为属性存储在JSON字段中，需要在Python中过滤）
-    all_instances = query.all()
-    filtered_instances = []
-    
-    for ci in all_instances:
-        # 获取属性值
-        attrs = ci.get_attribute_values()
-        
-        # 检查关键字搜索
-        if keyword:
-            keyword_match = (
-                keyword.lower() in ci.code.lower() or
-                keyword.lower() in (ci.name or "").lower() or
-                any(keyword.lower() in str(v).lower() for v in attrs.values())
+
+    if keyword:
+        query = query.filter(
+            db.or_(
+                CiInstance.code.icontains(keyword, autoescape=True),
+                CiInstance.name.icontains(keyword, autoescape=True),
+                attribute_keyword_filter(keyword, model_id, ignore_case=True),
             )
-            if not keyword_match:
-                continue
-        
-        # 检查前端传递的属性筛选条件
-        if attr_field and attr_value:
-            field_value = attrs.get(attr_field)
-            if field_value is None or attr_value.lower() not in str(field_value).lower():
-                continue
-        
-        # 检查节点配置的筛选条件
-        condition_match = True
-        for condition in conditions:
-            field = condition.get("field")
-            operator = condition.get("operator")
-            value = condition.get("value")
-            
-            if not field or value is None or value == "":
-                continue
-            
-            # 获取字段值（优先从attributes中获取）
-            field_value = attrs.get(field)
-            
-            # 执行条件判断
-            if operator == "eq":
-                if str(field_value) != str(value):
-                    condition_match = False
-                    break
-            elif operator == "ne":
-                if str(field_value) == str(value):
-                    condition_match = False
-                    break
-            elif operator == "contains":
-                if value.lower() not in str(field_value).lower():
-                    condition_match = False
-                    break
-            elif operator == "not_contains":
-                if value.lower() in str(field_value).lower():
-                    condition_match = False
-                    break
-            elif operator == "gt":
-                try:
-                    if float(field_value) <= float(value):
-                        condition_match = False
-                        break
-                except (ValueError, TypeError):
-                    condition_match = False
-                    break
-            elif operator == "gte":
-                try:
-                    if float(field_value) < float(value):
-                        condition_match = False
-                        break
-                except (ValueError, TypeError):
-                    condition_match = False
-                    break
-            elif operator == "lt":
-                try:
-                    if float(field_value) >= float(value):
-                        condition_match = False
-                        break
-                except (ValueError, TypeError):
-                    condition_match = False
-                    break
-            elif operator == "lte":
-                try:
-                    if float(field_value) > float(value):
-                        condition_match = False
-                        break
-                except (ValueError, TypeError):
-                    condition_match = False
-                    break
-            elif operator == "in":
-                if isinstance(value, list):
-                    if str(field_value) not in [str(v) for v in value]:
-                        condition_match = False
-                        break
-                else:
-                    if str(field_value) != str(value):
-                        condition_match = False
-                        break
-            elif operator == "not_in":
-                if isinstance(value, list):
-                    if str(field_value) in [str(v) for v in value]:
-                        condition_match = False
-                        break
-                else:
-                    if str(field_value) == str(value):
-                        condition_match = False
-                        break
-        
-        if condition_match:
-            filtered_instances.append(ci)
-    
-    # 分页
-    total = len(filtered_instances)
-    start_idx = (page - 1) * page_size
-    end_idx = start_idx + page_size
-    items = filtered_instances[start_idx:end_idx]
+        )
+
+    if attr_field and attr_value:
+        query = query.filter(attribute_filter(attr_field, attr_value, "contains", model_id))
+
+    query = query.filter(*compile_filter_conditions(conditions, model_id))
+
+    total = query.count()
+    items = (
+        query.order_by(CiInstance.id)
+        .offset(max(page - 1, 0) * page_size)
+        .limit(page_size)
+        .all()
+    )
     
     return jsonify({
         "code": 200,
@@ -850,6 +750,7 @@ def register_view_permissions():
                     db.session.add(child_perm)
     
     db.session.commit()
+    invalidate_tags(f"view:{view_id}")
     
     return jsonify({
         "code": 200,
@@ -905,6 +806,7 @@ def unregister_view_permissions():
                 db.session.delete(perm)
     
     db.session.commit()
+    invalidate_tags(f"view:{view_id}")
     
     return jsonify({
         "code": 200,
@@ -958,7 +860,7 @@ def grant_node_permission(node_id):
     db.session.commit()
     
     # 清除该视图的缓存
-    invalidate_cache(f"view_nodes_tree:{node.view_id}")
+    invalidate_tags(f"view:{node.view_id}")
     
     return jsonify({
         "code": 201,
@@ -997,7 +899,7 @@ def revoke_node_permission(node_id, role_id):
     db.session.commit()
     
     # 清除该视图的缓存
-    invalidate_cache(f"view_nodes_tree:{node.view_id}")
+    invalidate_tags(f"view:{node.view_id}")
     
     return jsonify({
         "code": 200,
@@ -1031,18 +933,12 @@ def get_view_nodes_tree(view_id):
             "cached": True
         })
     
+    principal = _get_current_principal()
     has_view_permission = False
-    if current_user and current_user.is_admin:
+    if principal and principal.is_admin:
         has_view_permission = True
-    elif current_user:
-        # 获取用户的所有角色ID
-        user_role_ids = [ur.role_id for ur in current_user.role_links]
-        from app.models.role import Role
-        for role_id in user_role_ids:
-            role = Role.query.get(role_id)
-            if role and role.has_permission(f"custom-view:{view.code}:view"):
-                has_view_permission = True
-                break
+    elif principal:
+        has_view_permission = principal.has_permission(f"custom-view:{view.code}:view")
     
     result = []
     
@@ -1060,7 +956,7 @@ def get_view_nodes_tree(view_id):
             return jsonify({"code": 403, "message": "无权限"}), 403
         
         # 批量查询权限，减少数据库往返
-        user_role_ids = [ur.role_id for ur in current_user.role_links]
+        user_role_ids = list(principal.role_ids)
         
         # 一次性查询所有有权限的节点ID
         permitted_node_ids = set()
@@ -1113,7 +1009,12 @@ def get_view_nodes_tree(view_id):
                 result.append(filtered)
     
     # 缓存结果（5分钟）
-    cache.set(cache_key, result, expire_seconds=300)
+    cache.set(
+        cache_key,
+        result,
+        expire_seconds=300,
+        tags=[f"view:{view_id}", f"user:{user_id}"],
+    )
     
     return jsonify({
         "code": 200,
@@ -0,0 +1,112 @@
+"""
+后台任务 API 路由
+提供任务列表、进度查询、取消与结果文件下载接口；进度同时通过 WebSocket job:progress 事件推送
+"""
+
+import os
+
+from flask import Blueprint, jsonify, request, send_file
+from flask_jwt_extended import jwt_required
+
+from app.models.background_job import BackgroundJob
+from app.services.job_service import job_manager
+from app.utils.principal import get_principal
+
+job_bp = Blueprint("job", __name__, url_prefix="/api/v1/jobs")
+
+
+def _get_visible_job(job_id):
+    """返回 (任务, 错误响应)；非管理员只能访问自己提交的任务"""
+    job = BackgroundJob.query.get(job_id)
+    if not job:
+        return None, (jsonify({"code": 404, "message": "任务不存在"}), 404)
+    principal = get_principal()
+    if not principal or (not principal.is_admin and job.created_by != principal.user_id):
+        return None, (jsonify({"code": 403, "message": "无权限访问此任务"}), 403)
+    return job, None
+
+
+@job_bp.route("", methods=["GET"])
+@jwt_required()
+def get_jobs():
+    """获取任务列表"""
+    page = request.args.get("page", 1, type=int)
+    page_size = min(request.args.get("page_size", 20, type=int), 100)
+    job_type = request.args.get("job_type")
+    status = request.args.get("status")
+
+    principal = get_principal()
+    if not principal:
+        return jsonify({"code": 401, "message": "用户不存在"}), 401
+
+    query = BackgroundJob.query
+    if not principal.is_admin:
+        query = query.filter_by(created_by=principal.user_id)
+    if job_type:
+        query = query.filter_by(job_type=job_type)
+    if status:
+        query = query.filter_by(status=status)
+
+    total = query.count()
+    jobs = (
+        query.order_by(BackgroundJob.created_at.desc(), BackgroundJob.id.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+        .all()
+    )
+    return jsonify(
+        {
+            "code": 200,
+            "message": "success",
+            "data": [job.to_dict() for job in jobs],
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+        }
+    )
+
+
+@job_bp.route("/<int:job_id>", methods=["GET"])
+@jwt_required()
+def get_job(job_id):
+    """获取任务状态与进度"""
+    job, error = _get_visible_job(job_id)
+    if error:
+        return error
+    return jsonify({"code": 200, "message": "success", "data": job.to_dict()})
+
+
+@job_bp.route("/<int:job_id>/cancel", methods=["POST"])
+@jwt_required()
+def cancel_job(job_id):
+    """取消任务"""
+    job, error = _get_visible_job(job_id)
+    if error:
+        return error
+    if job.is_finished:
+        return jsonify({"code": 400, "message": "任务已结束"}), 400
+    job = job_manager.cancel(job)
+    return jsonify({"code": 200, "message": "已请求取消", "data": job.to_dict()})
+
+
+@job_bp.route("/<int:job_id>/download", methods=["GET"])
+@jwt_required()
+def download_job_file(job_id):
+    """下载任务结果文件"""
+    job, error = _get_visible_job(job_id)
+    if error:
+        return error
+    result = job.get_result()
+    if not isinstance(result, dict):
+        result = {}
+    # 结果文件被保留任务清理后 result_file 置空，结果中仍保留文件名
+    if job.status != "completed" or not (job.result_file or result.get("filename")):
+        return jsonify({"code": 400, "message": "任务没有可下载的文件"}), 400
+    if not job.result_file or not os.path.exists(job.result_file):
+        return jsonify({"code": 404, "message": "文件已过期"}), 404
+
+    return send_file(
+        job.result_file,
+        as_attachment=True,
+        download_name=result.get("filename") or os.path.basename(job.result_file),
+    )
@@ -2,6 +2,7 @@ from flask import Blueprint, jsonify, request
 import json
 
 from app.models.config import SystemConfig
+from app.services.license_status_service import license_status_cache
 from app.services.manager_api_service import manager_api_service, ManagerError
 
 license_bp = Blueprint("license", __name__, url_prefix="/api/v1/license")
@@ -75,4 +76,5 @@ def upload_license():
     except Exception:
         # 同步失败不影响上传成功；登录拦截会优先读取 manager-go 实时状态。
         pass
+    license_status_cache.invalidate()
     return jsonify({"code": 200, "message": "success", "data": data})
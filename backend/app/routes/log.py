@@ -1,12 +1,21 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt
-from app import db
 from app.models.operation_log import OperationLog
-from app.models.config import SystemConfig
-from datetime import datetime, timedelta
+from app.tasks.retention import purge_operation_logs
+from app.utils.pagination import encode_cursor, time_keyset_page
+from datetime import datetime
+import csv
+import io
+import zipfile
+import zlib
 
 log_bp = Blueprint('log', __name__, url_prefix='/api/v1/logs')
 
+EXPORT_BATCH_SIZE = 1000
+EXPORT_HEADERS = ['ID', '用户名', '操作类型', '操作对象', '操作描述', 'IP地址', '状态', '时间']
+# 按日期分区导出时的分区粒度
+PARTITION_FORMATS = {'day': '%Y-%m-%d', 'month': '%Y-%m'}
+
 def require_admin():
     claims = get_jwt()
     return claims.get('role') == 'admin'
@@ -38,7 +47,20 @@ def get_logs():
     if status:
         query = query.filter(OperationLog.status == status)
     
-    query = query.order_by(OperationLog.created_at.desc())
+    cursor = request.args.get('cursor')
+    if cursor:
+        # 游标翻页：按 (created_at, id) 倒序，不统计总数
+        try:
+            result = time_keyset_page(
+                query, OperationLog.created_at, OperationLog.id, cursor, per_page,
+                lambda log: log.to_dict()
+            )
+        except ValueError as e:
+            return jsonify({'code': 400, 'message': str(e)}), 400
+        result['per_page'] = per_page
+        return jsonify({'code': 200, 'data': result})
+    
+    query = query.order_by(OperationLog.created_at.desc(), OperationLog.id.desc())
     
     pagination = query.paginate(page=page, per_page=per_page, error_out=False)
     
@@ -49,10 +71,20 @@ def get_logs():
             'total': pagination.total,
             'page': page,
             'per_page': per_page,
-            'total_pages': pagination.pages
+            'total_pages': pagination.pages,
+            'next_cursor': _page_cursor(pagination),
+            'has_more': pagination.has_next
         }
     })
 
+
+def _page_cursor(pagination):
+    """页码翻页时同时返回游标，客户端可从任意页切换到游标翻页"""
+    if not pagination.has_next or not pagination.items:
+        return None
+    last = pagination.items[-1]
+    return encode_cursor([last.created_at, last.id])
+
 @log_bp.route('/export', methods=['GET'])
 @jwt_required()
 def export_logs():
@@ -75,19 +107,150 @@ def export_logs():
     if status:
         query = query.filter(OperationLog.status == status)
     
-    logs = query.order_by(OperationLog.created_at.desc()).all()
+    query = query.order_by(OperationLog.created_at.desc(), OperationLog.id.desc())
     
-    csv_data = 'ID,用户名,操作类型,操作对象,操作描述,IP地址,状态,时间\n'
-    for log in logs:
-        csv_data += f'{log.id},{log.username},{log.operation_type},{log.operation_object},"{log.operation_desc}",{log.ip_address},{log.status},{log.created_at}\n'
+    partition = request.args.get('partition')
+    if partition and partition not in PARTITION_FORMATS:
+        return jsonify({'code': 400, 'message': 'partition 仅支持 day 或 month'}), 400
     
-    return jsonify({
-        'code': 200,
-        'message': '导出成功',
-        'data': {
-            'csv': csv_data
-        }
-    })
+    stream = _flag('stream') or bool(partition)
+    if not stream:
+        return jsonify({
+            'code': 200,
+            'message': '导出成功',
+            'data': {
+                'csv': ''.join(_iter_log_csv(_iter_log_rows(query)))
+            }
+        })
+    
+    # 流式导出：按批读取、逐块写出，内存占用与导出行数无关
+    filename = f"logs_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    if partition:
+        filename = f'{filename}.zip'
+        mimetype = 'application/zip'
+        chunks = _iter_partitioned_zip(_iter_log_rows(query), PARTITION_FORMATS[partition])
+    elif _flag('gzip'):
+        filename = f'{filename}.csv.gz'
+        mimetype = 'application/gzip'
+        chunks = _gzip_chunks(
+            chunk.encode('utf-8') for chunk in _iter_log_csv(_iter_log_rows(query))
+        )
+    else:
+        filename = f'{filename}.csv'
+        mimetype = 'text/csv; charset=utf-8'
+        chunks = (chunk.encode('utf-8') for chunk in _iter_log_csv(_iter_log_rows(query)))
+    
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+
+def _flag(name):
+    return request.args.get(name, '').lower() in ('1', 'true', 'yes')
+
+
+def _iter_log_rows(query):
+    """按批流式读取导出列（PostgreSQL 使用服务端游标）"""
+    return query.with_entities(
+        OperationLog.id,
+        OperationLog.username,
+        OperationLog.operation_type,
+        OperationLog.operation_object,
+        OperationLog.operation_desc,
+        OperationLog.ip_address,
+        OperationLog.status,
+        OperationLog.created_at,
+    ).yield_per(EXPORT_BATCH_SIZE)
+
+
+def _csv_values(row):
+    return [
+        row.id,
+        row.username or '',
+        row.operation_type or '',
+        row.operation_object or '',
+        row.operation_desc or '',
+        row.ip_address or '',
+        row.status or '',
+        row.created_at or '',
+    ]
+
+
+def _iter_log_csv(rows):
+    """逐批生成 CSV 文本块（csv 模块负责引号、逗号与换行的转义）"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(EXPORT_HEADERS)
+    for index, row in enumerate(rows, 1):
+        writer.writerow(_csv_values(row))
+        if index % EXPORT_BATCH_SIZE == 0:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate(0)
+    if output.tell():
+        yield output.getvalue()
+
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+class _ChunkSink(io.RawIOBase):
+    """zipfile 的只写输出，写入的字节由生成器取走"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _iter_partitioned_zip(rows, date_format):
+    """按日期分区导出：每个日/月一个 CSV 文件，逐块写出 zip"""
+    sink = _ChunkSink()
+    text = io.StringIO()
+    writer = csv.writer(text)
+    current_key = None
+    member = None
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for index, row in enumerate(rows, 1):
+            key = row.created_at.strftime(date_format) if row.created_at else 'unknown'
+            if key != current_key:
+                if member is not None:
+                    member.write(text.getvalue().encode('utf-8'))
+                    member.close()
+                text.seek(0)
+                text.truncate(0)
+                member = archive.open(f'logs_{key}.csv', 'w', force_zip64=True)
+                writer.writerow(EXPORT_HEADERS)
+                current_key = key
+            writer.writerow(_csv_values(row))
+            if index % EXPORT_BATCH_SIZE == 0:
+                member.write(text.getvalue().encode('utf-8'))
+                text.seek(0)
+                text.truncate(0)
+                data = sink.drain()
+                if data:
+                    yield data
+        if member is not None:
+            member.write(text.getvalue().encode('utf-8'))
+            member.close()
+    yield sink.drain()
+
 
 @log_bp.route('/clean', methods=['POST'])
 @jwt_required()
@@ -95,13 +258,12 @@ def clean_logs():
     if not require_admin():
         return jsonify({'code': 403, 'message': '无权限清理日志'}), 403
     
-    retention_days = int(SystemConfig.get_value('log_retention_days', '30'))
-    cutoff_date = datetime.now() - timedelta(days=retention_days)
-    
-    deleted = OperationLog.query.filter(OperationLog.created_at < cutoff_date).delete()
-    db.session.commit()
+    metrics = purge_operation_logs()
+    if metrics['error']:
+        return jsonify({'code': 500, 'message': '清理日志失败', 'data': metrics}), 500
     
     return jsonify({
         'code': 200,
-        'message': f'已清理 {deleted} 条日志'
+        'message': f'已清理 {metrics["deleted"]} 条日志',
+        'data': metrics
     })
@@ -1,9 +1,10 @@
 from functools import wraps
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 import json
 
 from flask import Blueprint, current_app, jsonify, make_response, request
 from flask_jwt_extended import get_jwt_identity, jwt_required
+from sqlalchemy import insert, update
 
 from app import db
 from app.models import (
@@ -16,11 +17,14 @@ from app.models import (
     SingleAlert,
     AlertHistory,
     AlertDefine,
+    AlertRuleIndex,
     AlertNotification,
     AlertTimelineEvent,
     NoticeRule,
 )
+from app.utils.cache import cache
 from app.utils.data_permission import filter_by_data_permissions
+from app.utils.principal import get_principal
 from app.notifications.websocket import socketio
 from app.services.alert_timeline_service import (
     append_base_events,
@@ -34,12 +38,23 @@ from app.services.alert_timeline_service import (
 from app.services.alert_query_service import (
     extract_alert_item,
     extract_rule_id,
-    filter_alert_items,
 )
+from app.services.alert_label_index_service import (
+    SCOPE_CURRENT,
+    SCOPE_HISTORY,
+    query_alert_page,
+)
+from app.services.alert_rollup_service import hourly_alert_trend, top_alert_monitors
 from app.services.alert_notification_service import (
     list_system_notifications_for_alert,
     notification_from_model,
 )
+from app.services.alert_rule_index_service import (
+    alert_rule_matcher,
+    bound_rule_names,
+    reindex_rules,
+    rule_scope_filter,
+)
 from app.services.alert_rule_match_service import resolve_rule_for_alert
 from app.services.alert_action_service import (
     apply_acknowledge,
@@ -59,12 +74,18 @@ from app.services.default_alert_policies import (
     service_default_alert_rules,
     webserver_default_alert_rules,
 )
+from app.services.ci_attribute_index_service import attribute_filter
 from app.services.manager_api_service import ManagerError, manager_api_service
+from app.services.monitor_ci_binding_service import (
+    ensure_monitor_bindings_fresh,
+    load_ci_bindings,
+    monitored_ci_filter,
+    sync_monitor_bindings,
+)
 from app.services.monitoring_target_helpers import (
     _apply_recovery_config_to_labels,
     _extract_notice_rule_ids,
     _extract_yaml_list_section,
-    _hourly_alert_trend,
     _json_dump,
     _json_load,
     _mysql_default_alert_rules,
@@ -82,46 +103,32 @@ from app.services.monitoring_target_helpers import (
     _to_bool,
     _to_float,
     _to_int,
-    _top_alert_monitors,
 )
 
 
 monitoring_target_bp = Blueprint("monitoring_target", __name__, url_prefix="/api/v1/monitoring")
 
+DASHBOARD_MONITOR_CACHE_KEY = "monitoring_dashboard:monitor_summary"
+# 批量应用模板默认规则：每块监控任务数；超过 FETCH_LIMIT 个监控任务时一次拉取列表
+DEFAULT_RULE_APPLY_CHUNK_SIZE = 200
+MONITOR_PAYLOAD_FETCH_LIMIT = 20
+
 
 def _auth_header() -> str:
     return request.headers.get("Authorization", "")
 
 
-def _has_permission(permissions: set[str], target: str) -> bool:
-    if "*" in permissions or target in permissions:
-        return True
-    for item in permissions:
-        if item.endswith("*") and target.startswith(item[:-1]):
-            return True
-        if item.endswith(":*") and target.startswith(item[:-1]):
-            return True
-    return False
-
-
 def require_any_permission(*required: str):
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
-            identity = get_jwt_identity()
-            user = User.query.get(int(identity)) if identity else None
-            if not user:
+            principal = get_principal()
+            if not principal:
                 return jsonify({"code": 401, "message": "用户未登录"}), 401
-            if user.is_admin:
+            if principal.is_admin:
                 return fn(*args, **kwargs)
 
-            permissions = set()
-            for role_link in user.role_links:
-                if role_link.role:
-                    permissions.update(role_link.role.get_menu_permissions())
-
-            allowed = any(_has_permission(permissions, permission) for permission in required)
-            if not allowed:
+            if not principal.has_any_permission(*required):
                 return jsonify({"code": 403, "message": "无权限访问"}), 403
             return fn(*args, **kwargs)
 
@@ -169,6 +176,16 @@ def _manager_call(method: str, path: str, payload=None, params=None, fallback=No
         return response
 
 
+def _sync_target_binding(response, monitor_id: int):
+    """监控任务创建/更新/删除成功后同步其 CI 绑定，失败时留给下次增量同步"""
+    if getattr(response, "status_code", 200) >= 300 or monitor_id <= 0:
+        return
+    try:
+        sync_monitor_bindings([monitor_id])
+    except Exception as exc:
+        current_app.logger.warning("[MonitoringProxy] sync ci binding failed monitor=%s: %s", monitor_id, exc)
+
+
 def _fetch_manager_payload(path: str, params=None):
     try:
         return manager_api_service.request(
@@ -183,6 +200,32 @@ def _fetch_manager_payload(path: str, params=None):
         raise
 
 
+def _dashboard_monitor_summary() -> dict:
+    """
+    监控任务总数与健康数，按 DASHBOARD_MONITOR_CACHE_SECONDS 短时缓存（同一用户的大盘自动刷新共用）
+
+    manager 按调用方凭据返回可见的监控任务，缓存键带上当前用户。
+    """
+    try:
+        ttl = int(current_app.config.get("DASHBOARD_MONITOR_CACHE_SECONDS", 90))
+    except (TypeError, ValueError):
+        ttl = 90
+    cache_key = f"{DASHBOARD_MONITOR_CACHE_KEY}:{get_jwt_identity()}"
+    summary = cache.get(cache_key) if ttl > 0 else None
+    if summary is not None:
+        return summary
+
+    monitor_payload = _fetch_manager_payload("/api/v1/monitors", params={"page": 1, "page_size": 5000})
+    monitors = _normalize_items(monitor_payload)
+    summary = {
+        "total": _safe_total(monitor_payload, monitors),
+        "healthy": sum(1 for item in monitors if _monitor_is_healthy(item)),
+    }
+    if ttl > 0:
+        cache.set(cache_key, summary, expire_seconds=ttl)
+    return summary
+
+
 def _fetch_manager_payload_any(candidates: list[tuple[str, dict | None]]):
     for path, params in candidates:
         payload = _fetch_manager_payload(path, params=params)
@@ -329,6 +372,45 @@ def _list_response(items: list[dict], total: int, page: int, page_size: int):
     )
 
 
+def _indexed_alert_response(scope: str, page: int, page_size: int):
+    """带筛选条件的告警列表：在 alert_label_index 上筛选、计数与分页，再按 ID 取告警行"""
+    try:
+        result = query_alert_page(
+            scope,
+            request.args,
+            page,
+            page_size,
+            parse_rfc3339_to_ms=_parse_rfc3339_to_ms,
+        )
+    except ValueError as e:
+        return jsonify({"code": 400, "message": str(e)}), 400
+    items = [
+        extract_alert_item(
+            row_id=row.id,
+            labels_json=row.labels_json,
+            annotations_json=row.annotations_json,
+            content=row.content,
+            status=row.status,
+            start_at=row.start_at,
+            end_at=row.end_at,
+            created_at=row.created_at,
+            json_load=_json_load,
+            ms_to_rfc3339=_ms_to_rfc3339,
+            now_ms_provider=_now_ms,
+        )
+        for row in result["rows"]
+    ]
+    data = {
+        "items": items,
+        "total": result["total"],
+        "page": page,
+        "page_size": page_size,
+        "next_cursor": result["next_cursor"],
+        "has_more": result["next_cursor"] is not None,
+    }
+    return jsonify({"code": 200, "data": data})
+
+
 def _normalize_ci_filter_values(raw) -> dict[str, str]:
     if not isinstance(raw, dict):
         return {}
@@ -341,46 +423,6 @@ def _normalize_ci_filter_values(raw) -> dict[str, str]:
     return normalized
 
 
-def _monitor_ci_binding_map(model_id: int | None = None) -> dict[int, list[dict]]:
-    rows = Monitor.query.all()
-    result: dict[int, list[dict]] = {}
-    for row in rows:
-        annotations = _json_load(row.annotations_json, {})
-        if not isinstance(annotations, dict):
-            continue
-        try:
-            ci_id = int(annotations.get("ci_id") or 0)
-        except (TypeError, ValueError):
-            ci_id = 0
-        if ci_id <= 0:
-            continue
-        try:
-            binding_model_id = int(annotations.get("ci_model_id") or 0)
-        except (TypeError, ValueError):
-            binding_model_id = 0
-        if model_id and binding_model_id and binding_model_id != model_id:
-            continue
-        result.setdefault(ci_id, []).append(
-            {
-                "monitor_id": row.id,
-                "monitor_name": row.name,
-                "app": row.app,
-            }
-        )
-    return result
-
-
-def _ci_matches_filters(attributes: dict, filters: dict[str, str]) -> bool:
-    if not filters:
-        return True
-    attrs = attributes if isinstance(attributes, dict) else {}
-    for field, keyword in filters.items():
-        value = attrs.get(field)
-        if keyword.lower() not in str(value or "").lower():
-            return False
-    return True
-
-
 def _monitor_target_ci_option_item(instance: CiInstance, monitored_rows: list[dict], model: CmdbModel | None) -> dict:
     attrs = instance.get_attribute_values()
     key_field_codes = model.key_field_codes if model else []
@@ -658,6 +700,25 @@ def _monitor_payload(monitor_id: int) -> dict:
     return {}
 
 
+def _monitor_payloads(monitor_ids: list[int]) -> dict[int, dict]:
+    """批量获取监控任务详情：数量较多时取一次列表，列表中缺失的再逐个获取"""
+    payloads: dict[int, dict] = {}
+    if len(monitor_ids) > MONITOR_PAYLOAD_FETCH_LIMIT:
+        listing = _fetch_manager_payload("/api/v1/monitors", params={"page": 1, "page_size": 10000})
+        wanted = set(monitor_ids)
+        for item in _normalize_items(listing):
+            try:
+                monitor_id = int(item.get("id") or 0)
+            except (TypeError, ValueError):
+                continue
+            if monitor_id in wanted:
+                payloads[monitor_id] = item
+    for monitor_id in monitor_ids:
+        if monitor_id not in payloads:
+            payloads[monitor_id] = _monitor_payload(monitor_id)
+    return payloads
+
+
 def _rule_match_monitor(row: AlertDefine, monitor: dict) -> bool:
     labels = _json_load(row.labels_json, {})
     if not isinstance(labels, dict):
@@ -822,117 +883,140 @@ def _load_monitor_default_alert_rules(monitor: dict) -> list[dict]:
     return os_default_alert_rules(app)
 
 
-def _apply_default_rules_for_monitor(monitor_id: int, monitor: dict | None = None) -> dict:
-    monitor = monitor or _monitor_payload(monitor_id)
-    if not monitor:
-        raise ValueError("监控任务不存在")
+def _default_rule_fields(monitor_id: int, app: str, monitor_target: str, item: dict) -> dict:
+    """模板默认规则 -> 绑定到监控任务的 AlertDefine 列值（不含 name）"""
+    notice_rule_ids = item.get("notice_rule_ids") if isinstance(item.get("notice_rule_ids"), list) else []
+    notice_rule_ids = [int(v) for v in notice_rule_ids if isinstance(v, int) or str(v).strip().isdigit()]
+    notice_rule_ids = [v for v in notice_rule_ids if v > 0]
+    # 兼容旧字段，仅配置了 notice_rule_id 时自动补全数组
+    raw_notice_rule_id = item.get("notice_rule_id")
+    if not notice_rule_ids and raw_notice_rule_id is not None:
+        try:
+            parsed_notice_rule_id = int(raw_notice_rule_id)
+            if parsed_notice_rule_id > 0:
+                notice_rule_ids = [parsed_notice_rule_id]
+        except (TypeError, ValueError):
+            notice_rule_ids = []
+    notice_rule_id = notice_rule_ids[0] if notice_rule_ids else None
+    escalation_config_raw = ""
+    if "escalation_config" in item:
+        escalation_config_raw, _ = _normalize_escalation_config(item.get("escalation_config"))
+        escalation_config_raw = escalation_config_raw or ""
 
-    app = str(monitor.get("app") or "").strip().lower()
-    defaults = _load_monitor_default_alert_rules(monitor)
-    if not defaults:
-        raise ValueError("当前模板未配置默认告警策略")
-    monitor_target = str(monitor.get("target") or "")
-    existing_rows = (
-        AlertDefine.query.filter(
-            db.or_(
-                AlertDefine.labels_json.ilike(f'%"monitor_id":{monitor_id}%'),
-                AlertDefine.labels_json.ilike(f'%"monitor_id":"{monitor_id}"%'),
-            )
-        )
-        .order_by(AlertDefine.id.asc())
-        .all()
-    )
-    existing_map: dict[str, AlertDefine] = {}
-    for row in existing_rows:
-        labels = _json_load(row.labels_json, {})
-        if not isinstance(labels, dict):
-            continue
-        if str(labels.get("monitor_id") or "").strip() != str(monitor_id):
-            continue
-        existing_map[row.name] = row
-
-    created = 0
-    updated = 0
-    for item in defaults:
-        notice_rule_ids = item.get("notice_rule_ids") if isinstance(item.get("notice_rule_ids"), list) else []
-        notice_rule_ids = [int(v) for v in notice_rule_ids if isinstance(v, int) or str(v).strip().isdigit()]
-        notice_rule_ids = [v for v in notice_rule_ids if v > 0]
-        # 兼容旧字段，仅配置了 notice_rule_id 时自动补全数组
-        raw_notice_rule_id = item.get("notice_rule_id")
-        if not notice_rule_ids and raw_notice_rule_id is not None:
-            try:
-                parsed_notice_rule_id = int(raw_notice_rule_id)
-                if parsed_notice_rule_id > 0:
-                    notice_rule_ids = [parsed_notice_rule_id]
-            except (TypeError, ValueError):
-                notice_rule_ids = []
-        notice_rule_id = notice_rule_ids[0] if notice_rule_ids else None
-        escalation_config_raw = ""
-        if "escalation_config" in item:
-            escalation_config_raw, _ = _normalize_escalation_config(item.get("escalation_config"))
-            escalation_config_raw = escalation_config_raw or ""
-
-        labels = {
-            "monitor_id": monitor_id,
-            "app": app,
-            "instance": monitor_target,
-            "metric": item["metric"],
-            "operator": item["operator"],
-            "threshold": item["threshold"],
-            "severity": item["level"],
-            "source": "template_default",
-        }
-        _apply_recovery_config_to_labels(labels, item)
-        annotations = {
-            "summary": item["name"],
-            "template": item["template"],
-            "app": app,
-        }
-        row = existing_map.get(item["name"])
-        if row is None:
-            row = AlertDefine(
-                name=item["name"],
-                type=item["type"],
-                expr=item["expr"],
-                period=item["period"],
-                times=item["times"],
-                labels_json=_json_dump(labels),
-                annotations_json=_json_dump(annotations),
-                template=item["template"],
-                enabled=bool(item["enabled"]),
-                notice_rule_id=notice_rule_id,
-                notice_rule_ids_json=_json_dump(notice_rule_ids),
-                escalation_config=escalation_config_raw,
-                creator="python-web",
-                modifier="python-web",
-            )
-            db.session.add(row)
-            created += 1
-        else:
-            row.type = item["type"]
-            row.expr = item["expr"]
-            row.period = item["period"]
-            row.times = item["times"]
-            row.labels_json = _json_dump(labels)
-            row.annotations_json = _json_dump(annotations)
-            row.template = item["template"]
-            row.enabled = bool(item["enabled"])
-            row.notice_rule_id = notice_rule_id
-            row.notice_rule_ids_json = _json_dump(notice_rule_ids)
-            row.escalation_config = escalation_config_raw
-            row.modifier = "python-web"
-            row.updated_at = _now_naive_utc()
-            updated += 1
-    db.session.commit()
-    return {
+    labels = {
         "monitor_id": monitor_id,
         "app": app,
-        "created": created,
-        "updated": updated,
-        "total": created + updated,
+        "instance": monitor_target,
+        "metric": item["metric"],
+        "operator": item["operator"],
+        "threshold": item["threshold"],
+        "severity": item["level"],
+        "source": "template_default",
+    }
+    _apply_recovery_config_to_labels(labels, item)
+    annotations = {
+        "summary": item["name"],
+        "template": item["template"],
+        "app": app,
+    }
+    return {
+        "type": item["type"],
+        "expr": item["expr"],
+        "period": item["period"],
+        "times": item["times"],
+        "labels_json": _json_dump(labels),
+        "annotations_json": _json_dump(annotations),
+        "template": item["template"],
+        "enabled": bool(item["enabled"]),
+        "notice_rule_id": notice_rule_id,
+        "notice_rule_ids_json": _json_dump(notice_rule_ids),
+        "escalation_config": escalation_config_raw,
+        "modifier": "python-web",
     }
 
 
+def _apply_default_rules_bulk(monitors: dict[int, dict]) -> tuple[dict[int, dict], list[dict]]:
+    """
+    批量为监控任务应用模板默认告警规则
+
+    默认规则按 (模板, 应用类型) 只解析一次；已绑定规则一次查出后在内存中计算新增/更新，
+    每 DEFAULT_RULE_APPLY_CHUNK_SIZE 个监控任务批量写入并提交一次，某块失败只影响该块。
+
+    Returns:
+        tuple: ({监控任务 ID: 结果}, [失败项])
+    """
+    defaults_by_source: dict[tuple, list[dict]] = {}
+    plans = []
+    failed: list[dict] = []
+    for monitor_id, monitor in monitors.items():
+        app = str(monitor.get("app") or "").strip().lower()
+        source_key = (str(monitor.get("template_id")), app)
+        if source_key not in defaults_by_source:
+            defaults_by_source[source_key] = _load_monitor_default_alert_rules(monitor)
+        defaults = defaults_by_source[source_key]
+        if not defaults:
+            failed.append({"monitor_id": monitor_id, "reason": "当前模板未配置默认告警策略"})
+            continue
+        plans.append((monitor_id, app, str(monitor.get("target") or ""), defaults))
+
+    results: dict[int, dict] = {}
+    for start in range(0, len(plans), DEFAULT_RULE_APPLY_CHUNK_SIZE):
+        chunk = plans[start : start + DEFAULT_RULE_APPLY_CHUNK_SIZE]
+        chunk_results = {}
+        try:
+            existing = bound_rule_names(monitor_id for monitor_id, *_ in chunk)
+            now = _now_naive_utc()
+            inserts: list[dict] = []
+            updates: list[dict] = []
+            for monitor_id, app, monitor_target, defaults in chunk:
+                existing_map = existing.get(str(monitor_id), {})
+                created = 0
+                updated = 0
+                for item in defaults:
+                    fields = _default_rule_fields(monitor_id, app, monitor_target, item)
+                    rule_id = existing_map.get(item["name"])
+                    if rule_id is None:
+                        inserts.append({"name": item["name"], "creator": "python-web", **fields})
+                        created += 1
+                    else:
+                        updates.append({"id": rule_id, "updated_at": now, **fields})
+                        updated += 1
+                chunk_results[monitor_id] = {
+                    "monitor_id": monitor_id,
+                    "app": app,
+                    "created": created,
+                    "updated": updated,
+                    "total": created + updated,
+                }
+            rule_ids = [row["id"] for row in updates]
+            if inserts:
+                rule_ids.extend(
+                    db.session.execute(
+                        insert(AlertDefine).returning(AlertDefine.id), inserts
+                    ).scalars()
+                )
+            if updates:
+                db.session.execute(update(AlertDefine), updates)
+            reindex_rules(rule_ids)
+            db.session.commit()
+        except Exception as exc:
+            db.session.rollback()
+            failed.extend({"monitor_id": plan[0], "reason": str(exc)} for plan in chunk)
+            continue
+        results.update(chunk_results)
+    return results, failed
+
+
+def _apply_default_rules_for_monitor(monitor_id: int, monitor: dict | None = None) -> dict:
+    monitor = monitor or _monitor_payload(monitor_id)
+    if not monitor:
+        raise ValueError("监控任务不存在")
+    results, failed = _apply_default_rules_bulk({monitor_id: monitor})
+    if failed:
+        raise ValueError(failed[0]["reason"])
+    return results[monitor_id]
+
+
 @monitoring_target_bp.route("/targets", methods=["GET"])
 @jwt_required()
 @require_any_permission("monitoring:target", "monitoring:list")
@@ -971,25 +1055,26 @@ def list_target_ci_options():
         }
     )
 
+    ensure_monitor_bindings_fresh()
     query = CiInstance.query.filter_by(model_id=model_id)
     query = filter_by_data_permissions(query, CiInstance)
-    instances = query.order_by(CiInstance.created_at.desc()).all()
-    monitored_map = _monitor_ci_binding_map(model_id)
-
-    filtered_items: list[dict] = []
-    for instance in instances:
-        attrs = instance.get_attribute_values()
-        monitored_rows = monitored_map.get(instance.id, [])
-        if scope != "all" and monitored_rows:
-            continue
-        if not _ci_matches_filters(attrs, filters):
-            continue
-        filtered_items.append(_monitor_target_ci_option_item(instance, monitored_rows, model))
+    if scope != "all":
+        query = query.filter(~monitored_ci_filter(model_id))
+    for field, keyword in filters.items():
+        query = query.filter(attribute_filter(field, keyword, "contains", model_id))
 
-    total = len(filtered_items)
-    start = (page - 1) * per_page
-    end = start + per_page
-    page_items = filtered_items[start:end]
+    total = query.count()
+    instances = (
+        query.order_by(CiInstance.created_at.desc(), CiInstance.id.desc())
+        .offset((page - 1) * per_page)
+        .limit(per_page)
+        .all()
+    )
+    monitored_map = load_ci_bindings([instance.id for instance in instances], model_id)
+    page_items = [
+        _monitor_target_ci_option_item(instance, monitored_map.get(instance.id, []), model)
+        for instance in instances
+    ]
     return jsonify(
         {
             "code": 200,
@@ -1044,9 +1129,6 @@ def create_target():
             payload["target"] = f"ci:{payload.get('ci_id')}"
 
     response = _manager_call("POST", "/api/v1/monitors", payload=payload)
-    if not apply_default_alerts:
-        return response
-
     status_code = getattr(response, "status_code", 200)
     if status_code >= 300:
         return response
@@ -1060,7 +1142,8 @@ def create_target():
         except (TypeError, ValueError):
             monitor_id = 0
 
-    if monitor_id <= 0:
+    _sync_target_binding(response, monitor_id)
+    if not apply_default_alerts or monitor_id <= 0:
         return response
 
     try:
@@ -1126,14 +1209,18 @@ def test_target_connectivity(monitor_id: int):
 def update_target(monitor_id: int):
     payload = _merge_ci_labels(request.get_json() or {})
     payload = _normalize_http_api_payload(payload)
-    return _manager_call("PUT", f"/api/v1/monitors/{monitor_id}", payload=payload)
+    response = _manager_call("PUT", f"/api/v1/monitors/{monitor_id}", payload=payload)
+    _sync_target_binding(response, monitor_id)
+    return response
 
 
 @monitoring_target_bp.route("/targets/<int:monitor_id>", methods=["DELETE"])
 @jwt_required()
 @require_any_permission("monitoring:target:delete", "monitoring:list:delete")
 def delete_target(monitor_id: int):
-    return _manager_call("DELETE", f"/api/v1/monitors/{monitor_id}", params=request.args.to_dict())
+    response = _manager_call("DELETE", f"/api/v1/monitors/{monitor_id}", params=request.args.to_dict())
+    _sync_target_binding(response, monitor_id)
+    return response
 
 
 @monitoring_target_bp.route("/targets/<int:monitor_id>/enable", methods=["PATCH"])
@@ -1301,17 +1388,19 @@ def list_target_alert_rules(monitor_id: int):
     monitor = _monitor_payload(monitor_id)
     if not monitor:
         return jsonify({"code": 404, "message": "监控任务不存在"}), 404
-    rows = AlertDefine.query.order_by(AlertDefine.updated_at.desc(), AlertDefine.id.desc()).all()
+    page, page_size = _page_args()
+    rule_ids = list(alert_rule_matcher.iter_rule_ids(monitor))
+    page_ids, total = _paginate_items(rule_ids, page, page_size)
+    rows = {row.id: row for row in AlertDefine.query.filter(AlertDefine.id.in_(page_ids))} if page_ids else {}
     items = []
-    for row in rows:
-        if not _rule_match_monitor(row, monitor):
+    for rule_id in page_ids:
+        row = rows.get(rule_id)
+        if row is None:
             continue
         item = _rule_from_model(row)
         item["scope"] = _rule_scope(row, monitor_id)
         items.append(item)
-    page, page_size = _page_args()
-    page_items, total = _paginate_items(items, page, page_size)
-    return _list_response(page_items, total, page, page_size)
+    return _list_response(items, total, page, page_size)
 
 
 @monitoring_target_bp.route("/targets/<int:monitor_id>/alerts/rules", methods=["POST"])
@@ -1579,7 +1668,9 @@ def apply_template_alert_rules(template_id: int):
         except (TypeError, ValueError):
             pass
 
+    monitor_payloads = None
     if not monitor_ids:
+        monitor_payloads = {}
         monitor_payload = _fetch_manager_payload("/api/v1/monitors", params={"page": 1, "page_size": 10000})
         for item in _normalize_items(monitor_payload):
             try:
@@ -1588,6 +1679,7 @@ def apply_template_alert_rules(template_id: int):
                 continue
             if monitor_id <= 0:
                 continue
+            monitor_payloads[monitor_id] = item
             monitor_template_id = item.get("template_id")
             if monitor_template_id is not None:
                 try:
@@ -1612,17 +1704,18 @@ def apply_template_alert_rules(template_id: int):
                     "updated": 0,
                     "applied": 0,
                     "failed": [],
+                    "results": [],
                 },
             }
         )
 
-    created = 0
-    updated = 0
-    applied = 0
     failed: list[dict] = []
     expected_app = str(template.app or "").strip().lower()
+    if monitor_payloads is None:
+        monitor_payloads = _monitor_payloads(monitor_ids)
+    targets: dict[int, dict] = {}
     for monitor_id in monitor_ids:
-        monitor = _monitor_payload(monitor_id)
+        monitor = monitor_payloads.get(monitor_id)
         if not monitor:
             failed.append({"monitor_id": monitor_id, "reason": "监控任务不存在"})
             continue
@@ -1641,16 +1734,13 @@ def apply_template_alert_rules(template_id: int):
         if expected_app and app and app != expected_app:
             failed.append({"monitor_id": monitor_id, "reason": "监控任务应用类型与模板不匹配"})
             continue
+        targets[monitor_id] = monitor
 
-        try:
-            result = _apply_default_rules_for_monitor(monitor_id, monitor)
-        except Exception as exc:
-            failed.append({"monitor_id": monitor_id, "reason": str(exc)})
-            continue
-
-        created += int(result.get("created") or 0)
-        updated += int(result.get("updated") or 0)
-        applied += 1
+    results, apply_failed = _apply_default_rules_bulk(targets)
+    failed.extend(apply_failed)
+    created = sum(result["created"] for result in results.values())
+    updated = sum(result["updated"] for result in results.values())
+    applied = len(results)
 
     return jsonify(
         {
@@ -1663,6 +1753,7 @@ def apply_template_alert_rules(template_id: int):
                 "updated": updated,
                 "applied": applied,
                 "failed": failed,
+                "results": [results[monitor_id] for monitor_id in monitor_ids if monitor_id in results],
             },
         }
     )
@@ -1713,17 +1804,15 @@ def list_current_alerts():
         key not in {"page", "page_size", "status"} and str(value).strip()
         for key, value in request.args.items()
     )
-    if not has_advanced_filters:
-        total = query.count()
-        rows = (
-            query.order_by(SingleAlert.updated_at.desc(), SingleAlert.id.desc())
-            .offset((page - 1) * page_size)
-            .limit(page_size)
-            .all()
-        )
-    else:
-        rows = query.order_by(SingleAlert.updated_at.desc(), SingleAlert.id.desc()).all()
-        total = None
+    if has_advanced_filters:
+        return _indexed_alert_response(SCOPE_CURRENT, page, page_size)
+    total = query.count()
+    rows = (
+        query.order_by(SingleAlert.updated_at.desc(), SingleAlert.id.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+        .all()
+    )
     items = [
         extract_alert_item(
             row_id=row.id,
@@ -1740,16 +1829,7 @@ def list_current_alerts():
         )
         for row in rows
     ]
-    items = filter_alert_items(
-        items,
-        query_args=request.args,
-        parse_rfc3339_to_ms=_parse_rfc3339_to_ms,
-    )
-    if total is None:
-        page_items, total = _paginate_items(items, page, page_size)
-    else:
-        page_items = items
-    return _list_response(page_items, total, page, page_size)
+    return _list_response(items, total, page, page_size)
 
 
 @monitoring_target_bp.route("/alerts/history", methods=["GET"])
@@ -1762,17 +1842,15 @@ def list_history_alerts():
         for key, value in request.args.items()
     )
     query = AlertHistory.query
-    if not has_advanced_filters:
-        total = query.count()
-        rows = (
-            query.order_by(AlertHistory.created_at.desc(), AlertHistory.id.desc())
-            .offset((page - 1) * page_size)
-            .limit(page_size)
-            .all()
-        )
-    else:
-        rows = query.order_by(AlertHistory.created_at.desc(), AlertHistory.id.desc()).all()
-        total = None
+    if has_advanced_filters:
+        return _indexed_alert_response(SCOPE_HISTORY, page, page_size)
+    total = query.count()
+    rows = (
+        query.order_by(AlertHistory.created_at.desc(), AlertHistory.id.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+        .all()
+    )
     items = [
         extract_alert_item(
             row_id=row.id,
@@ -1789,16 +1867,7 @@ def list_history_alerts():
         )
         for row in rows
     ]
-    items = filter_alert_items(
-        items,
-        query_args=request.args,
-        parse_rfc3339_to_ms=_parse_rfc3339_to_ms,
-    )
-    if total is None:
-        page_items, total = _paginate_items(items, page, page_size)
-    else:
-        page_items = items
-    return _list_response(page_items, total, page, page_size)
+    return _list_response(items, total, page, page_size)
 
 
 @monitoring_target_bp.route("/alerts/<int:alert_id>", methods=["GET"])
@@ -2053,9 +2122,7 @@ def get_alert_rule(alert_id: int):
         alert_id,
         labels=labels,
         annotations=annotations,
-        json_load=_json_load,
         monitor_payload_loader=_monitor_payload,
-        rule_match_monitor=_rule_match_monitor,
     )
 
     if not rule:
@@ -2230,28 +2297,20 @@ def list_alert_rules():
                 AlertDefine.labels_json.ilike(f"%{q}%"),
             )
         )
-    rows = query.order_by(AlertDefine.updated_at.desc(), AlertDefine.id.desc()).all()
+    # 默认仅展示全局告警规则，实例绑定规则在“监控任务详情-告警”里管理
+    scope_filter = rule_scope_filter(scope)
+    if scope_filter is not None:
+        alert_rule_matcher.ensure_fresh()
+        query = query.join(AlertRuleIndex, AlertRuleIndex.rule_id == AlertDefine.id).filter(scope_filter)
     page, page_size = _page_args()
-    items = []
-    for row in rows:
-        item = _rule_from_model(row)
-        labels = item.get("labels") if isinstance(item, dict) else {}
-        monitor_id = ""
-        source = ""
-        instance = ""
-        if isinstance(labels, dict):
-            monitor_id = str(labels.get("monitor_id") or "").strip()
-            source = str(labels.get("source") or "").strip().lower()
-            instance = str(labels.get("instance") or "").strip()
-        is_bound_rule = bool(monitor_id) or source in {"template_default", "instance_override", "target"} or bool(instance)
-        # 默认仅展示全局告警规则，实例绑定规则在“监控任务详情-告警”里管理
-        if scope == "global" and is_bound_rule:
-            continue
-        if scope == "bound" and (not is_bound_rule):
-            continue
-        items.append(item)
-    page_items, total = _paginate_items(items, page, page_size)
-    return _list_response(page_items, total, page, page_size)
+    total = query.count()
+    rows = (
+        query.order_by(AlertDefine.updated_at.desc(), AlertDefine.id.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+        .all()
+    )
+    return _list_response([_rule_from_model(row) for row in rows], total, page, page_size)
 
 
 @monitoring_target_bp.route("/alert-rules", methods=["POST"])
@@ -2454,43 +2513,17 @@ def publish_alert_event():
 @require_any_permission("monitoring:dashboard", "monitoring:dashboard:view")
 def monitoring_dashboard():
     try:
-        monitor_payload = _fetch_manager_payload("/api/v1/monitors", params={"page": 1, "page_size": 5000})
+        monitor_summary = _dashboard_monitor_summary()
     except ManagerError as e:
         return jsonify({"code": e.status, "message": e.message, "error_code": e.code}), e.status
 
-    monitors = _normalize_items(monitor_payload)
-    current_rows = (
+    recent_rows = (
         SingleAlert.query.filter_by(status="firing")
         .order_by(SingleAlert.updated_at.desc(), SingleAlert.id.desc())
-        .limit(200)
-        .all()
-    )
-    current_alerts = [
-        extract_alert_item(
-            row_id=row.id,
-            labels_json=row.labels_json,
-            annotations_json=row.annotations_json,
-            content=row.content,
-            status=row.status,
-            start_at=row.start_at,
-            end_at=row.end_at,
-            created_at=row.created_at,
-            json_load=_json_load,
-            ms_to_rfc3339=_ms_to_rfc3339,
-            now_ms_provider=_now_ms,
-        )
-        for row in current_rows
-    ]
-
-    now_naive = _now_naive_utc()
-    start_naive = now_naive - timedelta(hours=24)
-    history_rows = (
-        AlertHistory.query.filter(AlertHistory.created_at >= start_naive)
-        .order_by(AlertHistory.created_at.desc(), AlertHistory.id.desc())
-        .limit(2000)
+        .limit(8)
         .all()
     )
-    history_alerts = [
+    recent_alerts = [
         extract_alert_item(
             row_id=row.id,
             labels_json=row.labels_json,
@@ -2504,18 +2537,17 @@ def monitoring_dashboard():
             ms_to_rfc3339=_ms_to_rfc3339,
             now_ms_provider=_now_ms,
         )
-        for row in history_rows
+        for row in recent_rows
     ]
 
-    total_monitors = _safe_total(monitor_payload, monitors)
-    healthy_monitors = sum(1 for item in monitors if _monitor_is_healthy(item))
+    total_monitors = monitor_summary["total"]
+    healthy_monitors = monitor_summary["healthy"]
     unhealthy_monitors = max(total_monitors - healthy_monitors, 0)
     open_alerts = SingleAlert.query.filter_by(status="firing").count()
 
     success_rate = round((healthy_monitors / total_monitors * 100), 2) if total_monitors > 0 else 100.0
-    success_rate_trend = _hourly_alert_trend(history_alerts)
-    for item in success_rate_trend:
-        item["value"] = success_rate
+    alert_trend = hourly_alert_trend()
+    success_rate_trend = [{"time": item["time"], "value": success_rate} for item in alert_trend]
 
     data = {
         "overview": {
@@ -2528,14 +2560,22 @@ def monitoring_dashboard():
             {"name": "正常", "value": healthy_monitors},
             {"name": "异常", "value": unhealthy_monitors},
         ],
-        "alert_trend": _hourly_alert_trend(history_alerts),
+        "alert_trend": alert_trend,
         "success_rate_trend": success_rate_trend,
-        "top_alert_monitors": _top_alert_monitors(current_alerts),
-        "recent_alerts": current_alerts[:8],
+        "top_alert_monitors": top_alert_monitors(),
+        "recent_alerts": recent_alerts,
     }
     return jsonify({"code": 200, "data": data})
 
 
+@monitoring_target_bp.route("/manager/stats", methods=["GET"])
+@jwt_required()
+@require_any_permission("monitoring:collector", "monitoring:collector:view")
+def get_manager_client_stats():
+    """Manager 客户端的熔断状态、连接池及各接口耗时直方图"""
+    return jsonify({"code": 200, "data": manager_api_service.stats()})
+
+
 @monitoring_target_bp.route("/collectors", methods=["GET"])
 @jwt_required()
 @require_any_permission("monitoring:collector", "monitoring:collector:view")
@@ -121,6 +121,8 @@ def update_role(id):
         role.set_data_permissions(data['data_permissions'])
     
     role.save()
+    # 角色权限变化后，该角色下用户的视图树缓存失效
+    invalidate_tags(*[f"user:{ur.user_id}" for ur in role.user_roles])
     
     # 记录操作日志
     identity = get_jwt_identity()
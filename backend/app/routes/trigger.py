@@ -3,7 +3,7 @@
 提供触发器管理和批量扫描相关接口
 """
 
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 from app import db
@@ -13,8 +13,9 @@ from app.models.cmdb_relation import (
     BatchScanTask,
 )
 from app.models.cmdb_model import CmdbModel
+from app.services.job_service import JobConflictError, job_manager, model_key
 from app.tasks.batch_scan import (
-    batch_scan_model,
+    run_batch_scan,
     get_model_scan_tasks,
     get_all_scan_tasks,
 )
@@ -170,20 +171,23 @@ def trigger_batch_scan(model_id):
     if not model:
         return jsonify({"code": 404, "message": "模型不存在"}), 404
 
-    from threading import Thread
+    user_id = int(get_jwt_identity())
 
-    user_id = get_jwt_identity()
-    app = current_app._get_current_object()
+    def run(context):
+        return run_batch_scan(model_id, "manual", user_id, progress=context.report)
 
-    def run():
-        with app.app_context():
-            batch_scan_model(model_id, "manual", int(user_id))
+    try:
+        job = job_manager.submit(
+            "batch_scan",
+            run,
+            concurrency_key=model_key(model_id),
+            params={"model_id": model_id, "model_name": model.name},
+            created_by=user_id,
+        )
+    except JobConflictError as e:
+        return jsonify({"code": 409, "message": e.message}), 409
 
-    thread = Thread(target=run)
-    thread.daemon = True
-    thread.start()
-
-    return jsonify({"code": 202, "message": "任务已触发"}), 202
+    return jsonify({"code": 202, "message": "任务已触发", "data": job.to_dict()}), 202
 
 
 @trigger_bp.route("/models/<int:model_id>/batch-scan", methods=["GET"])
@@ -0,0 +1,292 @@
+"""
+告警关联 CI 索引服务模块
+进程级 firing 告警 -> CI 映射，拓扑叠加告警状态时只做 ci_id 查表
+
+告警由 manager-go 写入，这里不依赖写入方回调：每次使用前读取 firing 告警的 ID 集合
+（走 status 索引），只解析新出现的告警并移除已恢复的告警。告警到 CI 的匹配顺序与
+原实现一致：CI ID 标签 -> CI 编码/名称标签 -> 告警内容中出现的编码/名称 -> 监控任务绑定的 CI。
+编码/名称标签与告警内容都在告警入索引时解析：内容中以词边界起止的片段（最多 MAX_SPAN_WORDS 个词，
+中日韩字符每字算一个词）作为候选，按 lower(code)/lower(name) 表达式索引等值查询，
+因此含空格、冒号的名称也能命中；拓扑叠加只按 ci_id 查表。
+监控任务的 CI 绑定变更后整体重建；CI 编码/名称变更由定期重建兜底。
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+from typing import Iterable
+
+from flask import current_app
+from sqlalchemy import func, or_
+
+from app import db
+from app.models.ci_instance import CiInstance
+from app.models.hertzbeat_models import Monitor, SingleAlert
+
+logger = logging.getLogger(__name__)
+
+LOAD_CHUNK_SIZE = 500
+DEFAULT_REFRESH_SECONDS = 5
+DEFAULT_REBUILD_SECONDS = 300
+
+CI_ID_KEYS = ("ci_id", "ci.id", "ciId")
+CI_KEY_KEYS = ("ci_code", "ci.code", "ciCode", "ci_name", "ci.name", "ciName")
+MONITOR_ID_KEYS = ("monitor_id", "monitor.id", "monitorId")
+# 内容中的词：ASCII 字母数字及 _-，非 ASCII 字符（如中文）每字一个词
+CONTENT_WORD_PATTERN = re.compile(r"[0-9a-z_\-]+|[^\x00-\x7f\s]")
+MAX_SPAN_WORDS = 8
+MAX_SPAN_LENGTH = 200  # 与 CI 名称长度上限一致
+
+
+def _chunked(items: list, size: int = LOAD_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _json_dict(raw) -> dict:
+    try:
+        value = json.loads(raw or "{}")
+    except Exception:
+        return {}
+    return value if isinstance(value, dict) else {}
+
+
+def _positive_int(value) -> int:
+    try:
+        value = int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+    return value if value > 0 else 0
+
+
+def _config_seconds(key: str, default: float) -> float:
+    try:
+        return float(current_app.config.get(key, default))
+    except (RuntimeError, TypeError, ValueError):
+        return default
+
+
+def _content_spans(content: str) -> list:
+    """内容中以词边界起止的片段，按起始位置、由长到短排列"""
+    words = [(m.start(), m.end()) for m in CONTENT_WORD_PATTERN.finditer(content)]
+    spans = []
+    for i, (start, _) in enumerate(words):
+        for _, end in reversed(words[i : i + MAX_SPAN_WORDS]):
+            if end - start <= MAX_SPAN_LENGTH:
+                spans.append(content[start:end])
+    return spans
+
+
+class _AlertKeys:
+    """单条告警中可用于匹配 CI 的线索"""
+
+    __slots__ = ("alert_id", "ci_ids", "ci_keys", "spans", "monitor_id")
+
+    def __init__(self, alert_id: int, labels: dict, annotations: dict, content):
+        self.alert_id = alert_id
+        sources = (annotations, labels)
+        self.ci_ids = [
+            _positive_int(source.get(key)) for source in sources for key in CI_ID_KEYS
+        ]
+        self.ci_keys = [
+            str(source.get(key) or "").strip() for source in sources for key in CI_KEY_KEYS
+        ]
+        self.spans = _content_spans(str(content or "").strip().lower())
+        self.monitor_id = 0
+        for source in sources:
+            for key in MONITOR_ID_KEYS:
+                self.monitor_id = _positive_int(source.get(key))
+                if self.monitor_id:
+                    break
+            if self.monitor_id:
+                break
+
+
+class _CiLookup:
+    """一批告警涉及的 CI 编码/名称一次查询（走 lower(code)/lower(name) 表达式索引）"""
+
+    def __init__(self, ci_ids: set, keys: set):
+        self.existing_ids = set()
+        self.by_code = {}
+        self.by_code_lower = {}
+        self.by_name_lower = {}
+        lowers = sorted({key.lower() for key in keys if key})
+        for chunk in _chunked(sorted(ci_ids)):
+            rows = db.session.query(CiInstance.id).filter(CiInstance.id.in_(chunk))
+            self.existing_ids.update(row[0] for row in rows)
+        for chunk in _chunked(lowers):
+            rows = db.session.query(CiInstance.id, CiInstance.code, CiInstance.name).filter(
+                or_(
+                    func.lower(CiInstance.code).in_(chunk),
+                    func.lower(CiInstance.name).in_(chunk),
+                )
+            )
+            for ci_id, code, name in rows:
+                code = (code or "").strip()
+                name = (name or "").strip()
+                if code:
+                    self.by_code.setdefault(code, ci_id)
+                    self.by_code_lower.setdefault(code.lower(), ci_id)
+                if name:
+                    self.by_name_lower.setdefault(name.lower(), ci_id)
+
+    def code_or_name(self, key: str) -> int:
+        return (
+            self.by_code.get(key)
+            or self.by_code_lower.get(key.lower())
+            or self.by_name_lower.get(key.lower())
+            or 0
+        )
+
+
+class AlertCiIndex:
+    """进程级告警 -> CI 索引"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._alert_ci = {}  # alert_id -> ci_id（0 表示未匹配到 CI）
+        self._ci_alerts = {}  # ci_id -> {alert_id}
+        self._checked_at = None
+        self._built_at = None
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def ensure_fresh(self):
+        """同步 firing 告警集合；超过重建间隔或被失效时整体重建"""
+        with self._lock:
+            now = time.monotonic()
+            rebuild_seconds = _config_seconds(
+                "ALERT_CI_INDEX_REBUILD_SECONDS", DEFAULT_REBUILD_SECONDS
+            )
+            if self._built_at is None or now - self._built_at >= rebuild_seconds:
+                self._alert_ci = {}
+                self._ci_alerts = {}
+                self._built_at = now
+            elif self._checked_at is not None and now - self._checked_at < _config_seconds(
+                "ALERT_CI_INDEX_REFRESH_SECONDS", DEFAULT_REFRESH_SECONDS
+            ):
+                return
+            self._checked_at = now
+            self._sync()
+
+    def open_alert_ci_ids(self, ci_ids: Iterable) -> set:
+        """给定 CI 中存在 firing 告警的 CI ID"""
+        self.ensure_fresh()
+        result = set()
+        for ci_id in ci_ids:
+            ci_id = _positive_int(ci_id)
+            if ci_id and self._ci_alerts.get(ci_id):
+                result.add(ci_id)
+        return result
+
+    # ---------- 同步 ----------
+
+    def _sync(self):
+        firing_ids = set(
+            row[0] for row in db.session.query(SingleAlert.id).filter(SingleAlert.status == "firing")
+        )
+        for alert_id in set(self._alert_ci) - firing_ids:
+            self._remove(alert_id)
+        new_ids = sorted(firing_ids - set(self._alert_ci))
+        for chunk in _chunked(new_ids):
+            self._index_alerts(chunk)
+
+    def _remove(self, alert_id: int):
+        ci_id = self._alert_ci.pop(alert_id, 0)
+        alerts = self._ci_alerts.get(ci_id)
+        if alerts is not None:
+            alerts.discard(alert_id)
+            if not alerts:
+                self._ci_alerts.pop(ci_id, None)
+
+    def _index_alerts(self, alert_ids: list):
+        rows = db.session.query(
+            SingleAlert.id,
+            SingleAlert.labels_json,
+            SingleAlert.annotations_json,
+            SingleAlert.content,
+        ).filter(SingleAlert.id.in_(alert_ids))
+        alerts = [
+            _AlertKeys(alert_id, _json_dict(labels_json), _json_dict(annotations_json), content)
+            for alert_id, labels_json, annotations_json, content in rows
+        ]
+        monitor_bindings = self._monitor_bindings({a.monitor_id for a in alerts if a.monitor_id})
+
+        ci_ids = {ci_id for a in alerts for ci_id in a.ci_ids if ci_id}
+        keys = {key for a in alerts for key in a.ci_keys if key}
+        keys.update(span for a in alerts for span in a.spans)
+        for bound_id, bound_code in monitor_bindings.values():
+            if bound_id:
+                ci_ids.add(bound_id)
+            elif bound_code:
+                keys.add(bound_code)
+        lookup = _CiLookup(ci_ids, keys)
+
+        for alert in alerts:
+            ci_id = (
+                self._match_labels(alert, lookup)
+                or self._match_content(alert, lookup)
+                or self._match_monitor(alert, lookup, monitor_bindings)
+            )
+            self._alert_ci[alert.alert_id] = ci_id
+            if ci_id:
+                self._ci_alerts.setdefault(ci_id, set()).add(alert.alert_id)
+
+    @staticmethod
+    def _match_labels(alert: _AlertKeys, lookup: _CiLookup) -> int:
+        for ci_id in alert.ci_ids:
+            if ci_id and ci_id in lookup.existing_ids:
+                return ci_id
+        for key in alert.ci_keys:
+            if key:
+                ci_id = lookup.code_or_name(key)
+                if ci_id:
+                    return ci_id
+        return 0
+
+    @staticmethod
+    def _match_content(alert: _AlertKeys, lookup: _CiLookup) -> int:
+        """内容中出现的编码优先于名称，同类取最靠前、最长的片段"""
+        for span in alert.spans:
+            ci_id = lookup.by_code_lower.get(span)
+            if ci_id:
+                return ci_id
+        for span in alert.spans:
+            ci_id = lookup.by_name_lower.get(span)
+            if ci_id:
+                return ci_id
+        return 0
+
+    @staticmethod
+    def _match_monitor(alert: _AlertKeys, lookup: _CiLookup, monitor_bindings: dict) -> int:
+        bound_id, bound_code = monitor_bindings.get(alert.monitor_id, (0, ""))
+        if bound_id:
+            return bound_id if bound_id in lookup.existing_ids else 0
+        if bound_code:
+            return lookup.by_code.get(bound_code) or lookup.by_code_lower.get(
+                bound_code.lower(), 0
+            )
+        return 0
+
+    @staticmethod
+    def _monitor_bindings(monitor_ids: set) -> dict:
+        """monitor_id -> (ci_id, ci_code)"""
+        bindings = {}
+        for chunk in _chunked(sorted(monitor_ids)):
+            rows = db.session.query(Monitor.id, Monitor.annotations_json).filter(
+                Monitor.id.in_(chunk)
+            )
+            for monitor_id, annotations_json in rows:
+                annotations = _json_dict(annotations_json)
+                bindings[monitor_id] = (
+                    _positive_int(annotations.get("ci_id")),
+                    str(annotations.get("ci_code") or "").strip(),
+                )
+        return bindings
+
+
+alert_ci_index = AlertCiIndex()
@@ -0,0 +1,362 @@
+"""
+告警筛选索引服务模块
+single_alerts / alert_history 由 manager-go 写入，筛选字段在标签 JSON 中。这里把筛选字段展开到
+alert_label_index：当前告警按 updated_at 与已展开时间比对增量同步，历史告警只追加（按 ID 水位），
+保留任务删除的旧历史按最小 ID 清理。告警中心的筛选、计数与分页因此都在 SQL 中完成。
+
+首次回填与大批量追赶由后台定时任务（sync_alert_labels）完成；请求内只做有上限的增量同步，
+且另一线程正在同步时直接跳过，不阻塞请求。
+"""
+
+import logging
+import threading
+import time
+from typing import Iterable, Mapping, Optional
+
+from flask import current_app
+from sqlalchemy import and_, exists, false, func, or_, select
+
+from app import db
+from app.models.alert_label_index import AlertLabelIndex
+from app.models.hertzbeat_models import AlertHistory, SingleAlert
+from app.services.alert_query_service import extract_alert_item
+from app.services.monitoring_target_helpers import _json_load
+from app.utils.pagination import decode_time_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+SYNC_CHUNK_SIZE = 500
+DEFAULT_SYNC_SECONDS = 5
+DEFAULT_REQUEST_SYNC_LIMIT = 2000
+SCOPE_CURRENT = "current"
+SCOPE_HISTORY = "history"
+
+_sync_lock = threading.Lock()
+_last_sync_at = None
+
+
+def _chunked(items: list, size: int = SYNC_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _lower(value, length: Optional[int] = None) -> Optional[str]:
+    text = str(value or "").strip().lower()
+    if not text:
+        return None
+    return text[:length] if length else text
+
+
+def _label_row(scope: str, row, sort_at, source_updated_at=None) -> dict:
+    # 与告警中心列表使用同一提取规则；triggered_at 保留毫秒值
+    item = extract_alert_item(
+        row_id=row.id,
+        labels_json=row.labels_json,
+        annotations_json=row.annotations_json,
+        content=row.content,
+        status=row.status,
+        start_at=row.start_at,
+        end_at=row.end_at,
+        created_at=row.created_at,
+        json_load=_json_load,
+        ms_to_rfc3339=lambda value: value,
+        now_ms_provider=lambda: 0,
+    )
+    return {
+        "scope": scope,
+        "alert_id": row.id,
+        "status": item["status"],
+        "level": _lower(item["level"], 50),
+        "monitor_id": item["monitor_id"],
+        "app": _lower(item["app"], 100),
+        "metric": _lower(item["metric"], 255),
+        "rule_id": item["rule_id"],
+        "instance": _lower(item["instance"]),
+        "assignee": _lower(item["assignee"]),
+        "name": _lower(item["name"]),
+        "monitor_name": _lower(item["monitor_name"]),
+        "note": _lower(item["note"]),
+        "triggered_at": item["triggered_at"] or None,
+        "sort_at": sort_at,
+        "source_updated_at": source_updated_at,
+    }
+
+
+def _replace_rows(connection, scope: str, rows: list):
+    index = AlertLabelIndex.__table__
+    for chunk in _chunked(rows):
+        connection.execute(
+            index.delete().where(
+                index.c.scope == scope,
+                index.c.alert_id.in_([row["alert_id"] for row in chunk]),
+            )
+        )
+        connection.execute(index.insert(), chunk)
+
+
+def sync_current_labels(
+    alert_ids: Optional[Iterable[int]] = None, limit: Optional[int] = None
+) -> int:
+    """
+    同步当前告警的筛选字段
+
+    Args:
+        alert_ids: 只同步指定告警；为空时按 updated_at 增量同步全部
+        limit: 增量同步时最多展开的告警数，其余留到下次
+
+    Returns:
+        int: 重新展开的告警数
+    """
+    index = AlertLabelIndex.__table__
+    alerts = SingleAlert.__table__
+    joined = alerts.outerjoin(
+        index, and_(index.c.scope == SCOPE_CURRENT, index.c.alert_id == alerts.c.id)
+    )
+
+    stale = index.delete().where(
+        index.c.scope == SCOPE_CURRENT,
+        ~exists(select(alerts.c.id).where(alerts.c.id == index.c.alert_id)),
+    )
+    changed = select(alerts).select_from(joined)
+    if alert_ids is not None:
+        alert_ids = sorted({int(alert_id) for alert_id in alert_ids if alert_id})
+        if not alert_ids:
+            return 0
+        stale = stale.where(index.c.alert_id.in_(alert_ids))
+        changed = changed.where(alerts.c.id.in_(alert_ids))
+    else:
+        changed = changed.where(
+            or_(
+                index.c.alert_id.is_(None),
+                index.c.source_updated_at.is_(None),
+                index.c.source_updated_at != alerts.c.updated_at,
+            )
+        )
+        if limit:
+            changed = changed.order_by(alerts.c.id).limit(limit)
+
+    try:
+        connection = db.session.connection()
+        connection.execute(stale)
+        rows = [
+            _label_row(SCOPE_CURRENT, row, row.updated_at, row.updated_at)
+            for row in connection.execute(changed)
+        ]
+        _replace_rows(connection, SCOPE_CURRENT, rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(rows)
+
+
+def sync_history_labels(limit: Optional[int] = None) -> int:
+    """
+    追加新写入的历史告警，清理已被删除的旧历史
+
+    Args:
+        limit: 最多追加的历史告警数，为空时追加全部
+
+    Returns:
+        int: 新增数
+    """
+    index = AlertLabelIndex.__table__
+    history = AlertHistory.__table__
+    added = 0
+    try:
+        connection = db.session.connection()
+        min_id = connection.execute(select(func.min(history.c.id))).scalar()
+        purge = index.delete().where(index.c.scope == SCOPE_HISTORY)
+        if min_id is not None:
+            purge = purge.where(index.c.alert_id < min_id)
+        connection.execute(purge)
+
+        last_id = connection.execute(
+            select(func.max(index.c.alert_id)).where(index.c.scope == SCOPE_HISTORY)
+        ).scalar() or 0
+        while not limit or added < limit:
+            chunk_size = min(SYNC_CHUNK_SIZE, limit - added) if limit else SYNC_CHUNK_SIZE
+            rows = connection.execute(
+                select(history)
+                .where(history.c.id > last_id)
+                .order_by(history.c.id)
+                .limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+            connection.execute(
+                index.insert(),
+                [_label_row(SCOPE_HISTORY, row, row.created_at) for row in rows],
+            )
+            added += len(rows)
+            last_id = rows[-1].id
+            # 回填历史时分块提交
+            db.session.commit()
+            connection = db.session.connection()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return added
+
+
+def sync_alert_labels() -> dict:
+    """后台定时任务：不限量同步当前与历史告警（含首次回填），与请求内同步互斥"""
+    with _sync_lock:
+        current = sync_current_labels()
+        history = sync_history_labels()
+    return {"current": current, "history": history}
+
+
+def ensure_alert_labels_fresh():
+    """
+    距上次同步超过 ALERT_LABEL_SYNC_SECONDS 时做一次有上限的增量同步
+
+    每次最多展开 ALERT_LABEL_REQUEST_SYNC_LIMIT 条，积压由后台任务追赶；
+    其他线程正在同步时直接返回。
+    """
+    global _last_sync_at
+    try:
+        interval = float(current_app.config.get("ALERT_LABEL_SYNC_SECONDS", DEFAULT_SYNC_SECONDS))
+        limit = int(
+            current_app.config.get("ALERT_LABEL_REQUEST_SYNC_LIMIT", DEFAULT_REQUEST_SYNC_LIMIT)
+        )
+    except (RuntimeError, TypeError, ValueError):
+        interval = DEFAULT_SYNC_SECONDS
+        limit = DEFAULT_REQUEST_SYNC_LIMIT
+
+    if not _sync_lock.acquire(blocking=False):
+        return
+    try:
+        now = time.monotonic()
+        if _last_sync_at is not None and now - _last_sync_at < interval:
+            return
+        try:
+            sync_current_labels(limit=limit)
+            sync_history_labels(limit=limit)
+        except Exception as e:
+            logger.error(f"同步告警筛选索引失败: {e}")
+            return
+        _last_sync_at = now
+    finally:
+        _sync_lock.release()
+
+
+def _filter_criteria(scope: str, query_args: Mapping[str, str], parse_rfc3339_to_ms) -> list:
+    """与 filter_alert_items 一致的筛选条件"""
+
+    def arg(key: str) -> str:
+        return str(query_args.get(key) or "").strip()
+
+    def contains(column, value: str):
+        return column.contains(value.lower(), autoescape=True)
+
+    def int_equals(column, value: str):
+        try:
+            return column == int(value)
+        except ValueError:
+            return false()
+
+    criteria = [AlertLabelIndex.scope == scope]
+    status = arg("status").lower()
+    if scope == SCOPE_CURRENT and not status:
+        status = "open"
+    if status in {"open", "closed"}:
+        criteria.append(AlertLabelIndex.status == status)
+    if arg("level"):
+        criteria.append(AlertLabelIndex.level == arg("level").lower())
+    if arg("monitor_id"):
+        criteria.append(int_equals(AlertLabelIndex.monitor_id, arg("monitor_id")))
+    if arg("app"):
+        criteria.append(AlertLabelIndex.app == arg("app").lower())
+    if arg("metric"):
+        criteria.append(AlertLabelIndex.metric == arg("metric").lower())
+    if arg("rule_id"):
+        criteria.append(int_equals(AlertLabelIndex.rule_id, arg("rule_id")))
+    if arg("name"):
+        criteria.append(contains(AlertLabelIndex.name, arg("name")))
+    if arg("monitor_name"):
+        criteria.append(contains(AlertLabelIndex.monitor_name, arg("monitor_name")))
+    if arg("instance"):
+        criteria.append(contains(AlertLabelIndex.instance, arg("instance")))
+    if arg("assignee"):
+        criteria.append(contains(AlertLabelIndex.assignee, arg("assignee")))
+    if arg("q"):
+        criteria.append(
+            or_(
+                *(
+                    contains(column, arg("q"))
+                    for column in (
+                        AlertLabelIndex.name,
+                        AlertLabelIndex.monitor_name,
+                        AlertLabelIndex.metric,
+                        AlertLabelIndex.assignee,
+                        AlertLabelIndex.note,
+                    )
+                )
+            )
+        )
+    start_ms = parse_rfc3339_to_ms(query_args.get("start_at"))
+    end_ms = parse_rfc3339_to_ms(query_args.get("end_at"))
+    if start_ms:
+        criteria.append(AlertLabelIndex.triggered_at >= start_ms)
+    if end_ms:
+        criteria.append(AlertLabelIndex.triggered_at <= end_ms)
+    return criteria
+
+
+def query_alert_page(
+    scope: str,
+    query_args: Mapping[str, str],
+    page: int,
+    page_size: int,
+    parse_rfc3339_to_ms,
+) -> dict:
+    """
+    按筛选条件取一页告警
+
+    传入 cursor 时按 (sort_at, alert_id) 游标翻页且不统计总数，否则按页码翻页并在库内计数。
+
+    Returns:
+        dict: {"rows": 告警行（SingleAlert/AlertHistory，按列表顺序）, "total", "next_cursor"}
+
+    Raises:
+        ValueError: 游标无效
+    """
+    ensure_alert_labels_fresh()
+    model = SingleAlert if scope == SCOPE_CURRENT else AlertHistory
+    criteria = _filter_criteria(scope, query_args, parse_rfc3339_to_ms)
+    query = db.session.query(AlertLabelIndex.alert_id, AlertLabelIndex.sort_at).filter(*criteria)
+
+    cursor = str(query_args.get("cursor") or "").strip()
+    total = None
+    offset = 0
+    if cursor:
+        sort_at, alert_id = decode_time_cursor(cursor)
+        query = query.filter(
+            or_(
+                AlertLabelIndex.sort_at < sort_at,
+                and_(AlertLabelIndex.sort_at == sort_at, AlertLabelIndex.alert_id < alert_id),
+            )
+        )
+    else:
+        total = query.count()
+        offset = (page - 1) * page_size
+    keys = (
+        query.order_by(AlertLabelIndex.sort_at.desc(), AlertLabelIndex.alert_id.desc())
+        .offset(offset)
+        .limit(page_size + 1)
+        .all()
+    )
+    has_more = len(keys) > page_size
+    keys = keys[:page_size]
+
+    ids = [key.alert_id for key in keys]
+    by_id = {row.id: row for row in model.query.filter(model.id.in_(ids))} if ids else {}
+    return {
+        "rows": [by_id[alert_id] for alert_id in ids if alert_id in by_id],
+        "total": total,
+        "next_cursor": encode_cursor([keys[-1].sort_at, keys[-1].alert_id])
+        if has_more and keys
+        else None,
+    }
@@ -0,0 +1,257 @@
+"""
+告警汇总服务模块
+监控大盘不再逐条解析告警 JSON：历史告警按触发小时汇总到 alert_hourly_rollups，
+当前告警的排行直接在 alert_label_index 上分组计数。
+汇总以 last_alert_id 为水位，每次只重算有新告警落入的小时（先删后插，可重复执行）。
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from flask import current_app
+from sqlalchemy import Text, cast, func, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.alert_hourly_rollup import AlertHourlyRollup
+from app.models.alert_label_index import AlertLabelIndex
+from app.models.hertzbeat_models import SingleAlert
+from app.services.alert_label_index_service import (
+    SCOPE_CURRENT,
+    SCOPE_HISTORY,
+    ensure_alert_labels_fresh,
+)
+from app.services.alert_query_service import extract_alert_item
+from app.services.monitoring_target_helpers import _json_load
+
+logger = logging.getLogger(__name__)
+
+HOUR_MS = 3600 * 1000
+BUCKET_CHUNK_SIZE = 100
+DEFAULT_SYNC_SECONDS = 15
+DEFAULT_RETENTION_DAYS = 30
+
+_sync_lock = threading.Lock()
+_last_sync_at = None
+
+
+def _config_number(key: str, default):
+    try:
+        return type(default)(current_app.config.get(key, default))
+    except (RuntimeError, TypeError, ValueError):
+        return default
+
+
+def _cutoff_ms(retention_days: int) -> int:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    return int(cutoff.timestamp() * 1000) // HOUR_MS * HOUR_MS
+
+
+def _bucket_expr():
+    triggered_at = AlertLabelIndex.triggered_at
+    return triggered_at - triggered_at % HOUR_MS
+
+
+def _rollup_select(buckets: list):
+    """按小时及各维度汇总指定小时内的历史告警"""
+    bucket = _bucket_expr()
+    dimensions = [
+        bucket,
+        func.coalesce(AlertLabelIndex.monitor_id, 0),
+        func.coalesce(func.substr(AlertLabelIndex.monitor_name, 1, 255), ""),
+        func.coalesce(AlertLabelIndex.level, ""),
+        func.coalesce(AlertLabelIndex.app, ""),
+    ]
+    return (
+        select(*dimensions, func.count(), func.max(AlertLabelIndex.alert_id))
+        .where(
+            AlertLabelIndex.scope == SCOPE_HISTORY,
+            AlertLabelIndex.triggered_at >= min(buckets),
+            AlertLabelIndex.triggered_at < max(buckets) + HOUR_MS,
+            bucket.in_(buckets),
+        )
+        .group_by(*dimensions)
+    )
+
+
+def sync_alert_rollups(retention_days: Optional[int] = None) -> int:
+    """
+    把水位之后的历史告警汇总进小时汇总表
+
+    只重算有新告警的小时，早于保留天数的小时不再汇总。
+
+    Returns:
+        int: 重算的小时数
+    """
+    if retention_days is None:
+        retention_days = _config_number("ALERT_ROLLUP_RETENTION_DAYS", DEFAULT_RETENTION_DAYS)
+    rollups = AlertHourlyRollup.__table__
+    watermark = db.session.query(func.max(AlertHourlyRollup.last_alert_id)).scalar() or 0
+    bucket = _bucket_expr()
+    buckets = [
+        row[0]
+        for row in db.session.query(bucket)
+        .filter(
+            AlertLabelIndex.scope == SCOPE_HISTORY,
+            AlertLabelIndex.alert_id > watermark,
+            AlertLabelIndex.triggered_at >= _cutoff_ms(retention_days),
+        )
+        .distinct()
+        .order_by(bucket)
+    ]
+    if not buckets:
+        return 0
+
+    try:
+        for i in range(0, len(buckets), BUCKET_CHUNK_SIZE):
+            chunk = buckets[i : i + BUCKET_CHUNK_SIZE]
+            db.session.execute(rollups.delete().where(rollups.c.bucket_ms.in_(chunk)))
+            db.session.execute(
+                insert(rollups).from_select(
+                    [
+                        "bucket_ms",
+                        "monitor_id",
+                        "monitor_name",
+                        "level",
+                        "app",
+                        "alert_count",
+                        "last_alert_id",
+                    ],
+                    _rollup_select(chunk),
+                )
+            )
+        db.session.commit()
+    except IntegrityError:
+        # 其他进程同时汇总了相同的小时，本次放弃，下次同步时重算
+        db.session.rollback()
+        return 0
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(buckets)
+
+
+def ensure_alert_rollups_fresh():
+    """距上次汇总超过 ALERT_ROLLUP_SYNC_SECONDS 时同步告警索引并增量汇总"""
+    global _last_sync_at
+    interval = _config_number("ALERT_ROLLUP_SYNC_SECONDS", float(DEFAULT_SYNC_SECONDS))
+
+    # 其他请求正在汇总时直接读取现有汇总，不排队等待
+    if not _sync_lock.acquire(blocking=False):
+        return
+    try:
+        now = time.monotonic()
+        if _last_sync_at is not None and now - _last_sync_at < interval:
+            return
+        ensure_alert_labels_fresh()
+        try:
+            sync_alert_rollups()
+        except Exception as e:
+            logger.error(f"汇总告警统计失败: {e}")
+            return
+        _last_sync_at = now
+    finally:
+        _sync_lock.release()
+
+
+def hourly_alert_trend(hours: int = 24) -> list[dict]:
+    """最近 hours 个小时（UTC，含当前小时）的告警数，格式同 _hourly_alert_trend"""
+    ensure_alert_rollups_fresh()
+    hour_floor = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    points = [hour_floor - timedelta(hours=hours - 1 - i) for i in range(hours)]
+    first_ms = int(points[0].timestamp() * 1000)
+    counts = dict(
+        db.session.query(AlertHourlyRollup.bucket_ms, func.sum(AlertHourlyRollup.alert_count))
+        .filter(AlertHourlyRollup.bucket_ms >= first_ms)
+        .group_by(AlertHourlyRollup.bucket_ms)
+        .all()
+    )
+    return [
+        {"time": point.strftime("%H:00"), "value": int(counts.get(int(point.timestamp() * 1000)) or 0)}
+        for point in points
+    ]
+
+
+def _monitor_key(monitor_name, instance, monitor_id) -> Optional[str]:
+    """排行分组键：监控名称 -> 实例 -> 监控任务 ID（名称为占位符 "-" 时视为缺失）"""
+    if monitor_name and monitor_name != "-":
+        return monitor_name
+    if instance:
+        return instance
+    return str(monitor_id) if monitor_id is not None else None
+
+
+def top_alert_monitors(limit: int = 10) -> list[dict]:
+    """当前告警数最多的监控对象，格式同 _top_alert_monitors"""
+    ensure_alert_labels_fresh()
+    alert_count = func.count()
+    group_key = func.coalesce(
+        func.nullif(AlertLabelIndex.monitor_name, "-"),
+        func.nullif(AlertLabelIndex.instance, ""),
+        cast(AlertLabelIndex.monitor_id, Text),
+    )
+    rows = (
+        db.session.query(group_key, alert_count, func.max(AlertLabelIndex.alert_id))
+        .filter(
+            AlertLabelIndex.scope == SCOPE_CURRENT,
+            AlertLabelIndex.status == "open",
+            group_key.isnot(None),
+        )
+        .group_by(group_key)
+        .order_by(alert_count.desc(), func.max(AlertLabelIndex.alert_id).desc())
+        .limit(limit)
+        .all()
+    )
+    # 索引中的名称为小写，展示名取该组最新一条告警
+    sample_ids = [row[2] for row in rows]
+    samples = (
+        {alert.id: alert for alert in SingleAlert.query.filter(SingleAlert.id.in_(sample_ids))}
+        if sample_ids
+        else {}
+    )
+    result = []
+    for key, count, sample_id in rows:
+        name = key
+        sample = samples.get(sample_id)
+        if sample is not None:
+            item = extract_alert_item(
+                row_id=sample.id,
+                labels_json=sample.labels_json,
+                annotations_json=sample.annotations_json,
+                content=sample.content,
+                status=sample.status,
+                start_at=sample.start_at,
+                end_at=sample.end_at,
+                created_at=sample.created_at,
+                json_load=_json_load,
+                ms_to_rfc3339=lambda value: value,
+                now_ms_provider=lambda: 0,
+            )
+            name = _monitor_key(item["monitor_name"], item["instance"], item["monitor_id"]) or key
+        result.append({"name": name, "value": count})
+    return result
+
+
+def purge_alert_rollups(retention_days: Optional[int] = None) -> int:
+    """删除早于保留天数的汇总行（保留水位所在行），返回删除行数"""
+    if retention_days is None:
+        retention_days = _config_number("ALERT_ROLLUP_RETENTION_DAYS", DEFAULT_RETENTION_DAYS)
+    rollups = AlertHourlyRollup.__table__
+    watermark = db.session.query(func.max(AlertHourlyRollup.last_alert_id)).scalar()
+    if watermark is None:
+        return 0
+    try:
+        result = db.session.execute(
+            rollups.delete().where(
+                rollups.c.bucket_ms < _cutoff_ms(retention_days),
+                rollups.c.last_alert_id < watermark,
+            )
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return result.rowcount
@@ -0,0 +1,260 @@
+"""
+告警规则索引服务模块
+alert_defines 的匹配条件（monitor_id/app/instance/metric/source）展开到 alert_rule_index：
+ORM 写入时由模型事件同步，manager-go 直接写入的规则按 updated_at 定期补齐。
+进程级匹配器按 (app, monitor_id, metric) 分桶编译规则，告警反查规则、监控任务规则列表
+只查几个桶，不再逐条解析全部规则的标签。
+"""
+
+import heapq
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Iterable, Iterator, Optional
+
+from flask import current_app
+from sqlalchemy import exists, func, or_, select
+
+from app import db
+from app.models.alert_rule_index import ALERT_RULE_INDEX_CHANGED_KEY, AlertRuleIndex
+from app.models.hertzbeat_models import AlertDefine
+
+logger = logging.getLogger(__name__)
+
+SYNC_CHUNK_SIZE = 500
+DEFAULT_REFRESH_SECONDS = 5
+BOUND_RULE_SOURCES = {"template_default", "instance_override", "target"}
+
+
+def _chunked(items: list, size: int = SYNC_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _json_dict(raw) -> dict:
+    try:
+        value = json.loads(raw or "{}")
+    except Exception:
+        return {}
+    return value if isinstance(value, dict) else {}
+
+
+def _text(value, length: int, lower: bool = False) -> str:
+    text = str(value or "").strip()
+    return (text.lower() if lower else text)[:length]
+
+
+def rule_index_values(rule_id: int, labels_json, annotations_json, updated_at) -> dict:
+    """规则标签 -> 索引列（与原 _rule_match_monitor / list_alert_rules 的判断一致）"""
+    labels = _json_dict(labels_json)
+    annotations = _json_dict(annotations_json)
+    monitor_id = _text(labels.get("monitor_id"), 64)
+    instance = _text(labels.get("instance"), 255, lower=True)
+    source = _text(labels.get("source"), 50, lower=True)
+    return {
+        "rule_id": rule_id,
+        "monitor_id": monitor_id,
+        "app": _text(labels.get("app"), 100, lower=True),
+        "instance": instance,
+        "metric": _text(labels.get("metric") or annotations.get("metric"), 100),
+        "source": source,
+        "is_bound": bool(monitor_id) or source in BOUND_RULE_SOURCES or bool(instance),
+        "rule_updated_at": updated_at,
+    }
+
+
+def sync_rule_index(connection, rule_ids: Iterable[int]):
+    """按规则当前内容重写索引行（在调用方事务中执行）"""
+    rule_ids = sorted({int(rule_id) for rule_id in rule_ids if rule_id})
+    index = AlertRuleIndex.__table__
+    rules = AlertDefine.__table__
+    for chunk in _chunked(rule_ids):
+        rows = connection.execute(
+            select(rules.c.id, rules.c.labels_json, rules.c.annotations_json, rules.c.updated_at)
+            .where(rules.c.id.in_(chunk))
+        ).all()
+        connection.execute(index.delete().where(index.c.rule_id.in_(chunk)))
+        if rows:
+            connection.execute(index.insert(), [rule_index_values(*row) for row in rows])
+
+
+def delete_rule_index(connection, rule_ids: Iterable[int]):
+    index = AlertRuleIndex.__table__
+    rule_ids = [int(rule_id) for rule_id in rule_ids if rule_id]
+    for chunk in _chunked(rule_ids):
+        connection.execute(index.delete().where(index.c.rule_id.in_(chunk)))
+
+
+def sync_alert_rule_index() -> int:
+    """补齐未经 ORM 写入的规则：删除孤儿索引行，重建缺失或 updated_at 变化的行；返回重建数"""
+    index = AlertRuleIndex.__table__
+    rules = AlertDefine.__table__
+    try:
+        connection = db.session.connection()
+        connection.execute(
+            index.delete().where(~exists(select(rules.c.id).where(rules.c.id == index.c.rule_id)))
+        )
+        changed = [
+            row[0]
+            for row in connection.execute(
+                select(rules.c.id)
+                .select_from(rules.outerjoin(index, index.c.rule_id == rules.c.id))
+                .where(
+                    or_(
+                        index.c.rule_id.is_(None),
+                        index.c.rule_updated_at.is_(None),
+                        index.c.rule_updated_at != rules.c.updated_at,
+                    )
+                )
+            )
+        ]
+        sync_rule_index(connection, changed)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(changed)
+
+
+def reindex_rules(rule_ids: Iterable[int]):
+    """批量写入（不触发 ORM 事件）后在当前事务中同步索引，提交后使匹配器失效"""
+    sync_rule_index(db.session.connection(), rule_ids)
+    db.session.info[ALERT_RULE_INDEX_CHANGED_KEY] = True
+
+
+def bound_rule_names(monitor_ids: Iterable) -> dict:
+    """{监控任务 ID: {规则名: 规则 ID}}，同名规则取 ID 最大者"""
+    alert_rule_matcher.ensure_fresh()
+    keys = sorted({str(monitor_id) for monitor_id in monitor_ids})
+    result = {}
+    for chunk in _chunked(keys):
+        rows = (
+            db.session.query(AlertRuleIndex.monitor_id, AlertDefine.name, AlertDefine.id)
+            .join(AlertDefine, AlertDefine.id == AlertRuleIndex.rule_id)
+            .filter(AlertRuleIndex.monitor_id.in_(chunk))
+            .order_by(AlertDefine.id)
+        )
+        for monitor_id, name, rule_id in rows:
+            result.setdefault(monitor_id, {})[name] = rule_id
+    return result
+
+
+def rule_scope_filter(scope: str):
+    """告警规则列表的全局/绑定筛选条件（需 join AlertRuleIndex）"""
+    if scope == "global":
+        return AlertRuleIndex.is_bound.is_(False)
+    if scope == "bound":
+        return AlertRuleIndex.is_bound.is_(True)
+    return None
+
+
+def _config_seconds(key: str, default: float) -> float:
+    try:
+        return float(current_app.config.get(key, default))
+    except (RuntimeError, TypeError, ValueError):
+        return default
+
+
+def _sort_key(rule_id: int, updated_at) -> tuple:
+    # 与 order_by(updated_at desc, id desc) 一致，升序取即为优先级顺序
+    return (-(updated_at.timestamp()) if updated_at else float("inf"), -rule_id)
+
+
+class AlertRuleMatcher:
+    """进程级规则匹配器：(app, monitor_id) -> metric -> [(排序键, rule_id, instance)]"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._buckets = {}
+        self._apps = set()
+        self._signature = None
+        self._checked_at = None
+
+    def invalidate(self):
+        with self._lock:
+            self._signature = None
+
+    def ensure_fresh(self):
+        """被失效或超过刷新间隔且索引签名变化时重新编译"""
+        with self._lock:
+            now = time.monotonic()
+            if (
+                self._signature is not None
+                and self._checked_at is not None
+                and now - self._checked_at
+                < _config_seconds("ALERT_RULE_INDEX_REFRESH_SECONDS", DEFAULT_REFRESH_SECONDS)
+            ):
+                return
+            self._checked_at = now
+            try:
+                sync_alert_rule_index()
+            except Exception as e:
+                logger.error(f"同步告警规则索引失败: {e}")
+            signature = tuple(
+                db.session.query(
+                    func.count(AlertRuleIndex.rule_id),
+                    func.max(AlertRuleIndex.rule_id),
+                    func.sum(AlertRuleIndex.rule_id),
+                    func.max(AlertRuleIndex.rule_updated_at),
+                ).one()
+            )
+            if signature != self._signature:
+                self._compile()
+                self._signature = signature
+
+    def _compile(self):
+        buckets = defaultdict(lambda: defaultdict(list))
+        rows = db.session.query(
+            AlertRuleIndex.rule_id,
+            AlertRuleIndex.app,
+            AlertRuleIndex.monitor_id,
+            AlertRuleIndex.metric,
+            AlertRuleIndex.instance,
+            AlertRuleIndex.rule_updated_at,
+        )
+        for rule_id, app, monitor_id, metric, instance, updated_at in rows:
+            buckets[(app, monitor_id)][metric].append((_sort_key(rule_id, updated_at), rule_id, instance))
+        for by_metric in buckets.values():
+            for entries in by_metric.values():
+                entries.sort()
+        self._buckets = {key: dict(by_metric) for key, by_metric in buckets.items()}
+        self._apps = {app for app, _ in self._buckets}
+
+    def iter_rule_ids(self, monitor: Optional[dict], metric: str = "") -> Iterator[int]:
+        """
+        按优先级（updated_at、id 倒序）返回匹配监控任务的规则 ID
+
+        规则的 monitor_id 为空或等于监控任务 ID；app/instance 为空、监控任务对应值为空或两者相等；
+        传入 metric 时规则 metric 为空或相等。
+        """
+        self.ensure_fresh()
+        monitor = monitor or {}
+        monitor_id = str(monitor.get("id") or "").strip()
+        app = str(monitor.get("app") or "").strip().lower()
+        target = str(monitor.get("target") or "").strip().lower()
+        metric = str(metric or "").strip()
+
+        apps = (app, "") if app else self._apps
+        monitor_ids = {monitor_id, ""}
+        lists = []
+        for rule_app in apps:
+            for rule_monitor_id in monitor_ids:
+                by_metric = self._buckets.get((rule_app, rule_monitor_id))
+                if not by_metric:
+                    continue
+                if metric:
+                    lists.extend(by_metric[key] for key in (metric, "") if key in by_metric)
+                else:
+                    lists.extend(by_metric.values())
+        for _, rule_id, instance in heapq.merge(*lists):
+            if instance and target and instance != target:
+                continue
+            yield rule_id
+
+    def match(self, monitor: Optional[dict], metric: str = "") -> Optional[int]:
+        return next(self.iter_rule_ids(monitor, metric), None)
+
+
+alert_rule_matcher = AlertRuleMatcher()
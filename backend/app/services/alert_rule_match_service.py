@@ -4,6 +4,7 @@ from typing import Callable
 
 from app.models import AlertDefine, AlertNotification
 from app.services.alert_query_service import extract_rule_id
+from app.services.alert_rule_index_service import alert_rule_matcher
 
 
 def resolve_rule_for_alert(
@@ -11,9 +12,7 @@ def resolve_rule_for_alert(
     *,
     labels: dict,
     annotations: dict,
-    json_load: Callable[[str | None, dict], dict],
     monitor_payload_loader: Callable[[int], dict],
-    rule_match_monitor: Callable[[AlertDefine, dict], bool],
 ) -> tuple[AlertDefine | None, str | None]:
     if not isinstance(labels, dict):
         labels = {}
@@ -54,16 +53,9 @@ def resolve_rule_for_alert(
 
     if not rule and monitor_id:
         monitor = monitor_payload_loader(monitor_id)
-        for row_rule in AlertDefine.query.order_by(AlertDefine.updated_at.desc(), AlertDefine.id.desc()).all():
-            if not rule_match_monitor(row_rule, monitor):
-                continue
-            rule_labels = json_load(row_rule.labels_json, {})
-            rule_annotations = json_load(row_rule.annotations_json, {})
-            rule_metric = str(rule_labels.get("metric") or rule_annotations.get("metric") or "").strip()
-            if alert_metric and rule_metric and alert_metric != rule_metric:
-                continue
-            rule = row_rule
+        matched_id = alert_rule_matcher.match(monitor, alert_metric)
+        if matched_id:
+            rule = AlertDefine.query.get(matched_id)
             matched_by = "heuristic"
-            break
 
     return rule, matched_by
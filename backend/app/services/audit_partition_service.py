@@ -0,0 +1,153 @@
+"""
+审计表分区服务模块
+PostgreSQL 上 operation_logs / ci_history 按 created_at 做月度范围分区（迁移 b4c5d6e7f8a9 完成转换），
+这里负责提前创建后续月份的分区，并在保留任务中整块删除过期月份的分区。
+其他数据库或未分区的表上各函数不做任何操作，保留任务回退为分块删除。
+"""
+
+import logging
+import re
+from datetime import date, datetime
+from typing import List, Tuple
+
+from sqlalchemy import text
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = ("operation_logs", "ci_history")
+DEFAULT_MONTHS_AHEAD = 2
+# 分区名：<表名>_pYYYYMM
+PARTITION_SUFFIX = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def _month_start(value: date, offset: int = 0) -> date:
+    month_index = value.year * 12 + value.month - 1 + offset
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def is_partitioned(table: str) -> bool:
+    """表是否为 PostgreSQL 分区表"""
+    if db.engine.dialect.name != "postgresql":
+        return False
+    row = db.session.execute(
+        text(
+            "SELECT c.relkind FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE c.relname = :name AND n.nspname = current_schema()"
+        ),
+        {"name": table},
+    ).first()
+    return bool(row and row[0] == "p")
+
+
+def list_partitions(table: str) -> List[Tuple[str, date]]:
+    """[(分区名, 月份首日)]，按月份升序（不含默认分区）"""
+    rows = db.session.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = :name"
+        ),
+        {"name": table},
+    )
+    partitions = []
+    for (name,) in rows:
+        match = PARTITION_SUFFIX.search(name)
+        if match and name.startswith(f"{table}_p"):
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def _default_partition(table: str) -> str:
+    return f"{table}_default"
+
+
+def _create_partition(table: str, month: date):
+    """
+    创建月度分区
+
+    默认分区中已有该月数据时（如调度器停摆期间写入），直接 CREATE 会失败：
+    先摘下默认分区，建好月度分区后把该月数据搬入，再挂回默认分区。
+    """
+    name = partition_name(table, month)
+    start, end = month.isoformat(), _month_start(month, 1).isoformat()
+    default = _default_partition(table)
+    bounds = {"start": start, "end": end}
+    has_default = db.session.execute(
+        text("SELECT to_regclass(:name) IS NOT NULL"), {"name": default}
+    ).scalar()
+    moving = has_default and db.session.execute(
+        text(
+            f"SELECT EXISTS (SELECT 1 FROM {default} "
+            f"WHERE created_at >= :start AND created_at < :end)"
+        ),
+        bounds,
+    ).scalar()
+
+    if moving:
+        db.session.execute(text(f"ALTER TABLE {table} DETACH PARTITION {default}"))
+    db.session.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+    )
+    if moving:
+        moved = db.session.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {default} "
+                f"WHERE created_at >= :start AND created_at < :end RETURNING *) "
+                f"INSERT INTO {table} SELECT * FROM moved"
+            ),
+            bounds,
+        ).rowcount
+        db.session.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT"))
+        logger.info(f"已将 {moved} 行从 {default} 移入 {name}")
+
+
+def ensure_partitions(months_ahead: int = DEFAULT_MONTHS_AHEAD) -> int:
+    """为分区表创建当月及之后 months_ahead 个月的分区，返回新建数量；单月失败回滚后继续"""
+    created = 0
+    today = date.today()
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(table):
+            continue
+        existing = {month for _, month in list_partitions(table)}
+        for offset in range(months_ahead + 1):
+            month = _month_start(today, offset)
+            if month in existing:
+                continue
+            try:
+                _create_partition(table, month)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"创建分区 {partition_name(table, month)} 失败: {e}")
+                continue
+            created += 1
+    if created:
+        logger.info(f"已创建 {created} 个审计表分区")
+    return created
+
+
+def drop_partitions_before(table: str, cutoff: datetime) -> List[str]:
+    """删除整月都早于 cutoff 的分区，返回已删除的分区名"""
+    if not is_partitioned(table):
+        return []
+    cutoff_month = _month_start(cutoff.date())
+    dropped = []
+    for name, month in list_partitions(table):
+        if month >= cutoff_month:
+            break
+        db.session.execute(text(f"DROP TABLE IF EXISTS {name}"))
+        dropped.append(name)
+    db.session.commit()
+    if dropped:
+        logger.info(f"已删除 {table} 过期分区: {', '.join(dropped)}")
+    return dropped
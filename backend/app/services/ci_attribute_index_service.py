@@ -0,0 +1,375 @@
+"""
+CI 属性索引服务模块
+将 CiInstance.attribute_values 中的 JSON 属性展开到 ci_attribute_index 表，
+数字/日期字段额外写入类型化列，使属性等值与范围过滤可以走索引。
+value_text 只保存前 255 个字符用于索引，更长的值在 value_full 中保存完整文本。
+"""
+
+import json
+import math
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import and_, false, or_, select
+
+from app.models.ci_instance import CiAttributeIndex, CiInstance
+from app.models.cmdb_model import CmdbModel
+from app.utils.form_config_fields import extract_form_fields
+
+INDEX_TEXT_MAX_LENGTH = 255
+DATE_FIELD_TYPES = {"date", "datetime"}
+FIELD_TYPES_CACHE_KEY = "ci_attribute_field_types"
+REBUILD_BATCH_SIZE = 1000
+
+
+def get_field_types(form_config: Any) -> dict:
+    """从模型表单配置中提取字段编码到字段类型的映射"""
+    return {
+        field["code"]: field.get("field_type", "text")
+        for field in extract_form_fields(form_config)
+    }
+
+
+def get_typed_field_types(form_config: Any) -> dict:
+    """只保留需要按字段类型写入类型化列的日期字段"""
+    return {
+        code: field_type
+        for code, field_type in get_field_types(form_config).items()
+        if field_type in DATE_FIELD_TYPES
+    }
+
+
+def to_index_text(value: Any) -> str:
+    """属性值转换为索引文本（与视图筛选中的 str() 比较语义保持一致）"""
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def _text_columns(text: str) -> dict:
+    if len(text) > INDEX_TEXT_MAX_LENGTH:
+        return {"value_text": text[:INDEX_TEXT_MAX_LENGTH], "value_full": text}
+    return {"value_text": text, "value_full": None}
+
+
+def to_index_number(value: Any) -> Optional[float]:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        number = float(str(value).strip()) if isinstance(value, str) else float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def to_index_date(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    if not isinstance(value, str) or not value.strip():
+        return None
+    raw = value.strip().replace("Z", "+00:00")
+    try:
+        parsed = datetime.fromisoformat(raw)
+    except ValueError:
+        try:
+            parsed = datetime.strptime(raw, "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            return None
+    # 统一存为无时区时间，与其他 DateTime 列一致
+    return parsed.replace(tzinfo=None)
+
+
+def build_index_rows(
+    ci_id: int, model_id: int, values: dict, field_types: Optional[dict] = None
+) -> list:
+    """
+    将属性字典展开为索引行
+
+    多值属性（多选、复选框）按元素各写一行，None 值不写入；
+    日期列仅对表单中的日期/日期时间字段写入。
+
+    Args:
+        ci_id: CI ID
+        model_id: 模型 ID
+        values: 属性值字典
+        field_types: 字段编码 -> 字段类型
+
+    Returns:
+        list: 可直接用于批量插入的字典列表
+    """
+    if not isinstance(values, dict):
+        return []
+    field_types = field_types or {}
+
+    rows = []
+    for field_code, raw_value in values.items():
+        if not field_code or raw_value is None:
+            continue
+        field_type = field_types.get(field_code)
+        items = raw_value if isinstance(raw_value, list) else [raw_value]
+        for item in items:
+            if item is None:
+                continue
+            # 数字列对所有可解析为数字的值写入，保持与 float() 比较语义一致
+            value_number = to_index_number(item)
+            value_date = to_index_date(item) if field_type in DATE_FIELD_TYPES else None
+            rows.append(
+                {
+                    "ci_id": ci_id,
+                    "model_id": model_id,
+                    "field_code": str(field_code)[:100],
+                    **_text_columns(to_index_text(item)),
+                    "value_number": value_number,
+                    "value_date": value_date,
+                }
+            )
+    return rows
+
+
+def load_field_types(connection, model_id: int, cache: Optional[dict] = None) -> dict:
+    """读取模型的类型化字段，cache 用于同一会话内复用"""
+    if cache is not None and model_id in cache:
+        return cache[model_id]
+    form_config = connection.execute(
+        select(CmdbModel.form_config).where(CmdbModel.id == model_id)
+    ).scalar()
+    field_types = get_typed_field_types(form_config)
+    if cache is not None:
+        cache[model_id] = field_types
+    return field_types
+
+
+def sync_ci_attribute_index(
+    connection,
+    ci_id: int,
+    model_id: int,
+    values: dict,
+    field_types: Optional[dict] = None,
+):
+    """重写单个 CI 的属性索引行（在 flush 中通过 connection 执行）"""
+    sync_ci_attribute_index_bulk(
+        connection, [(ci_id, model_id, values)], {model_id: field_types or {}}
+    )
+
+
+def sync_ci_attribute_index_bulk(connection, items: list, field_types_by_model: dict):
+    """
+    批量重写多个 CI 的属性索引行
+
+    Args:
+        connection: 数据库连接
+        items: (ci_id, model_id, values) 列表
+        field_types_by_model: 模型 ID -> 类型化字段映射
+    """
+    if not items:
+        return
+    table = CiAttributeIndex.__table__
+    ci_ids = [item[0] for item in items]
+    connection.execute(table.delete().where(table.c.ci_id.in_(ci_ids)))
+
+    rows = []
+    for ci_id, model_id, values in items:
+        rows.extend(
+            build_index_rows(ci_id, model_id, values, field_types_by_model.get(model_id))
+        )
+    if rows:
+        connection.execute(table.insert(), rows)
+
+
+def delete_ci_attribute_index(connection, ci_ids: list):
+    if not ci_ids:
+        return
+    table = CiAttributeIndex.__table__
+    connection.execute(table.delete().where(table.c.ci_id.in_(list(ci_ids))))
+
+
+def rebuild_attribute_index(
+    connection, model_id: Optional[int] = None, ci_ids: Optional[list] = None
+) -> int:
+    """
+    按模型重建属性索引（用于历史数据回填、模型表单字段类型变更）
+
+    Args:
+        connection: 数据库连接
+        model_id: 模型 ID，为空时重建全部
+        ci_ids: 只重建这些 CI
+
+    Returns:
+        int: 处理的 CI 数量
+    """
+    model_query = select(CmdbModel.id, CmdbModel.form_config)
+    if model_id:
+        model_query = model_query.where(CmdbModel.id == model_id)
+    field_types_by_model = {
+        row.id: get_typed_field_types(row.form_config)
+        for row in connection.execute(model_query)
+    }
+
+    ci_table = CiInstance.__table__
+    total = 0
+    last_id = 0
+    while True:
+        stmt = (
+            select(ci_table.c.id, ci_table.c.model_id, ci_table.c.attribute_values)
+            .where(ci_table.c.id > last_id)
+            .order_by(ci_table.c.id)
+            .limit(REBUILD_BATCH_SIZE)
+        )
+        if model_id:
+            stmt = stmt.where(ci_table.c.model_id == model_id)
+        if ci_ids is not None:
+            stmt = stmt.where(ci_table.c.id.in_(ci_ids))
+        batch = connection.execute(stmt).fetchall()
+        if not batch:
+            break
+
+        items = []
+        for row in batch:
+            try:
+                values = json.loads(row.attribute_values) if row.attribute_values else {}
+            except Exception:
+                values = {}
+            items.append((row.id, row.model_id, values))
+        sync_ci_attribute_index_bulk(connection, items, field_types_by_model)
+        total += len(batch)
+        last_id = batch[-1].id
+    return total
+
+
+def _index_subquery(field_code: str, model_id: Optional[int], *criteria):
+    stmt = select(CiAttributeIndex.ci_id).where(
+        CiAttributeIndex.field_code == field_code, *criteria
+    )
+    if model_id:
+        stmt = stmt.where(CiAttributeIndex.model_id == model_id)
+    return stmt
+
+
+def _text_equals(text: str):
+    """文本等值：前缀命中 value_text 索引，超长值再比较完整文本"""
+    if len(text) > INDEX_TEXT_MAX_LENGTH:
+        return and_(
+            CiAttributeIndex.value_text == text[:INDEX_TEXT_MAX_LENGTH],
+            CiAttributeIndex.value_full == text,
+        )
+    return and_(CiAttributeIndex.value_text == text, CiAttributeIndex.value_full.is_(None))
+
+
+def _text_in(texts: list):
+    short = [text for text in texts if len(text) <= INDEX_TEXT_MAX_LENGTH]
+    criteria = [_text_equals(text) for text in texts if len(text) > INDEX_TEXT_MAX_LENGTH]
+    if short:
+        criteria.append(
+            and_(CiAttributeIndex.value_text.in_(short), CiAttributeIndex.value_full.is_(None))
+        )
+    return or_(*criteria) if criteria else false()
+
+
+def _text_contains(keyword: str, ignore_case: bool = True):
+    """文本包含：value_text 截断时在完整文本中查找"""
+    if ignore_case:
+        return or_(
+            CiAttributeIndex.value_text.icontains(keyword, autoescape=True),
+            CiAttributeIndex.value_full.icontains(keyword, autoescape=True),
+        )
+    return or_(
+        CiAttributeIndex.value_text.contains(keyword, autoescape=True),
+        CiAttributeIndex.value_full.contains(keyword, autoescape=True),
+    )
+
+
+def _range_criterion(operator: str, value: Any):
+    number = to_index_number(value)
+    if number is not None:
+        column, bound = CiAttributeIndex.value_number, number
+    else:
+        bound = to_index_date(value)
+        if bound is None:
+            return None
+        column = CiAttributeIndex.value_date
+
+    if operator == "gt":
+        return column > bound
+    if operator == "gte":
+        return column >= bound
+    if operator == "lt":
+        return column < bound
+    return column <= bound
+
+
+def attribute_filter(
+    field_code: str, value: Any, operator: str = "eq", model_id: Optional[int] = None
+):
+    """
+    编译单个属性条件为 CiInstance 上的 SQL 谓词
+
+    支持 eq/ne/contains/not_contains/gt/gte/lt/lte/in/not_in，
+    未知操作符返回 None，由调用方忽略该条件。
+
+    Args:
+        field_code: 属性字段编码
+        value: 比较值
+        operator: 操作符
+        model_id: 模型 ID（用于命中 model_id 前缀的复合索引）
+    """
+    if operator in ("in", "not_in") and not isinstance(value, list):
+        operator = "eq" if operator == "in" else "ne"
+
+    if operator in ("eq", "ne"):
+        subquery = _index_subquery(field_code, model_id, _text_equals(to_index_text(value)))
+    elif operator in ("contains", "not_contains"):
+        subquery = _index_subquery(field_code, model_id, _text_contains(str(value)))
+    elif operator in ("in", "not_in"):
+        subquery = _index_subquery(
+            field_code, model_id, _text_in([to_index_text(item) for item in value])
+        )
+    elif operator in ("gt", "gte", "lt", "lte"):
+        criterion = _range_criterion(operator, value)
+        if criterion is None:
+            return false()
+        return CiInstance.id.in_(_index_subquery(field_code, model_id, criterion))
+    else:
+        return None
+
+    if operator in ("ne", "not_contains", "not_in"):
+        return CiInstance.id.not_in(subquery)
+    return CiInstance.id.in_(subquery)
+
+
+def attribute_keyword_filter(
+    keyword: str, model_id: Optional[int] = None, ignore_case: bool = False
+):
+    """任意属性值包含关键字的 SQL 谓词"""
+    subquery = select(CiAttributeIndex.ci_id).where(_text_contains(keyword, ignore_case))
+    if model_id:
+        subquery = subquery.where(CiAttributeIndex.model_id == model_id)
+    return CiInstance.id.in_(subquery)
+
+
+def compile_filter_conditions(conditions: list, model_id: Optional[int] = None) -> list:
+    """
+    将自定义视图节点的 filter_config.conditions 编译为 SQL 谓词列表
+
+    值为空或操作符不支持的条件被忽略，与原先的内存过滤行为一致。
+
+    Args:
+        conditions: [{"field", "operator", "value"}] 条件列表
+        model_id: 模型 ID
+
+    Returns:
+        list: 可直接传给 query.filter(*predicates) 的谓词
+    """
+    predicates = []
+    for condition in conditions or []:
+        if not isinstance(condition, dict):
+            continue
+        field = condition.get("field")
+        value = condition.get("value")
+        if not field or value is None or value == "":
+            continue
+        predicate = attribute_filter(
+            field, value, condition.get("operator") or "eq", model_id
+        )
+        if predicate is not None:
+            predicates.append(predicate)
+    return predicates
@@ -0,0 +1,226 @@
+"""
+CI 批量操作服务模块
+批量更新/删除一次 IN 查询读取目标行，在内存中计算属性变更，
+历史、属性索引、关系清理与主表写入都以批量语句完成，并在同一事务内提交。
+删除 CI 时变更历史保留（ci_id 置空），并追加一条记录 CI 名称与编码的 DELETE 历史。
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import bindparam, or_
+
+from app import db
+from app.models.ci_instance import CiHistory, CiInstance
+from app.models.cmdb_model import CmdbModel
+from app.models.cmdb_relation import CmdbRelation, TriggerExecutionLog
+from app.services.ci_attribute_index_service import (
+    delete_ci_attribute_index,
+    get_typed_field_types,
+    sync_ci_attribute_index_bulk,
+)
+from app.services.relation_graph_service import relation_graph
+
+logger = logging.getLogger(__name__)
+
+BATCH_CHUNK_SIZE = 500
+
+
+def _chunked(items: list, size: int = BATCH_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _decode_attributes(raw: Optional[str]) -> dict:
+    try:
+        values = json.loads(raw) if raw else {}
+    except Exception:
+        return {}
+    return values if isinstance(values, dict) else {}
+
+
+def _load_rows(ids: list, *columns, model_id: Optional[int] = None) -> list:
+    rows = []
+    for chunk in _chunked(sorted(set(ids))):
+        query = db.session.query(CiInstance.id, CiInstance.created_by, *columns).filter(
+            CiInstance.id.in_(chunk)
+        )
+        if model_id is not None:
+            query = query.filter(CiInstance.model_id == model_id)
+        rows.extend(query.all())
+    return rows
+
+
+def batch_update_instances(
+    ids: list,
+    model_id: int,
+    updates: dict,
+    operator_id: int,
+    operator_name: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    is_admin: bool = False,
+) -> list:
+    """
+    批量更新 CI 属性
+
+    Args:
+        ids: CI ID 列表（不属于该模型或无权限的 CI 跳过）
+        model_id: 模型 ID
+        updates: 属性编码 -> 新值
+        operator_id: 操作人
+        operator_name: 操作人用户名
+        ip_address: 请求 IP
+        is_admin: 是否管理员（非管理员只能更新自己创建的 CI）
+
+    Returns:
+        list: 实际更新的 CI ID
+    """
+    rows = _load_rows(ids, CiInstance.attribute_values, model_id=model_id)
+    if not is_admin:
+        rows = [row for row in rows if row.created_by == operator_id]
+    if not rows:
+        return []
+
+    now = datetime.now()
+    params = []
+    index_items = []
+    histories = []
+    for row in rows:
+        attr_values = _decode_attributes(row.attribute_values)
+        for key, value in updates.items():
+            old_val = attr_values.get(key)
+            attr_values[key] = value
+            histories.append(
+                {
+                    "ci_id": row.id,
+                    "operation": "UPDATE",
+                    "attribute_name": key,
+                    "old_value": str(old_val) if old_val is not None else None,
+                    "new_value": str(value),
+                    "operator_id": operator_id,
+                    "operator_name": operator_name,
+                    "ip_address": ip_address,
+                    "created_at": now,
+                }
+            )
+        params.append(
+            {
+                "_id": row.id,
+                "_attribute_values": json.dumps(attr_values, ensure_ascii=False),
+            }
+        )
+        index_items.append((row.id, model_id, attr_values))
+
+    table = CiInstance.__table__
+    stmt = (
+        table.update()
+        .where(table.c.id == bindparam("_id"))
+        .values(
+            attribute_values=bindparam("_attribute_values"),
+            updated_by=operator_id,
+            updated_at=now,
+        )
+    )
+    form_config = db.session.query(CmdbModel.form_config).filter_by(id=model_id).scalar()
+    try:
+        connection = db.session.connection()
+        connection.execute(stmt, params)
+        connection.execute(CiHistory.__table__.insert(), histories)
+        # 批量语句不触发 ORM 事件，属性索引在同一事务内重写
+        sync_ci_attribute_index_bulk(
+            connection, index_items, {model_id: get_typed_field_types(form_config)}
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return [row.id for row in rows]
+
+
+def delete_instances(
+    ids: list,
+    operator_id: int,
+    is_admin: bool = True,
+    operator_name: Optional[str] = None,
+    ip_address: Optional[str] = None,
+) -> list:
+    """
+    批量删除 CI，连同关系、属性索引与触发器日志一起清理，变更历史保留
+
+    Args:
+        ids: CI ID 列表
+        operator_id: 操作人（非管理员只能删除自己创建的 CI）
+        is_admin: 是否管理员
+        operator_name: 操作人用户名
+        ip_address: 请求 IP
+
+    Returns:
+        list: [(id, code, name)] 实际删除的 CI
+    """
+    rows = _load_rows(ids, CiInstance.code, CiInstance.name)
+    if not is_admin:
+        rows = [row for row in rows if row.created_by == operator_id]
+    if not rows:
+        return []
+
+    ci_ids = [row.id for row in rows]
+    now = datetime.now()
+    histories = [
+        {
+            "ci_id": row.id,
+            "operation": "DELETE",
+            "attribute_name": None,
+            # ci_id 随后置空，名称与编码留作审计线索
+            "old_value": f"{row.name} ({row.code})",
+            "new_value": None,
+            "operator_id": operator_id,
+            "operator_name": operator_name,
+            "ip_address": ip_address,
+            "created_at": now,
+        }
+        for row in rows
+    ]
+    history = CiHistory.__table__
+    relation_edges = []
+    try:
+        db.session.execute(history.insert(), histories)
+        for chunk in _chunked(ci_ids):
+            relation_filter = or_(
+                CmdbRelation.source_ci_id.in_(chunk), CmdbRelation.target_ci_id.in_(chunk)
+            )
+            edges = (
+                db.session.query(
+                    CmdbRelation.id,
+                    CmdbRelation.source_ci_id,
+                    CmdbRelation.target_ci_id,
+                    CmdbRelation.relation_type_id,
+                )
+                .filter(relation_filter)
+                .all()
+            )
+            relation_edges.extend(tuple(edge) for edge in edges)
+            CmdbRelation.query.filter(relation_filter).delete(synchronize_session=False)
+            TriggerExecutionLog.query.filter(
+                TriggerExecutionLog.source_ci_id.in_(chunk)
+            ).delete(synchronize_session=False)
+            TriggerExecutionLog.query.filter(
+                TriggerExecutionLog.target_ci_id.in_(chunk)
+            ).update({"target_ci_id": None}, synchronize_session=False)
+            # 与 ON DELETE SET NULL 一致，显式置空以兼容未启用外键约束的数据库
+            db.session.execute(
+                history.update().where(history.c.ci_id.in_(chunk)).values(ci_id=None)
+            )
+            delete_ci_attribute_index(db.session.connection(), chunk)
+            CiInstance.query.filter(CiInstance.id.in_(chunk)).delete(
+                synchronize_session=False
+            )
+        # 同一关系可能两端都被删除，按关系 ID 去重
+        relation_graph.record_changes(removed=list(dict.fromkeys(relation_edges)))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return [(row.id, row.code, row.name) for row in rows]
@@ -0,0 +1,387 @@
+"""
+CI 批量导入服务模块
+流式读取 CSV 并按批处理：每批一次预留编码、按列校验必填属性、批量插入并提交；
+全部写入后对新 CI 统一执行一次引用关系与规则触发器的集合化处理
+"""
+
+import csv
+import json
+import logging
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.ci_instance import CiInstance
+from app.models.cmdb_model import CmdbModel
+from app.models.cmdb_relation import RelationTrigger
+from app.services.ci_attribute_index_service import (
+    get_typed_field_types,
+    sync_ci_attribute_index_bulk,
+)
+from app.services.relation_service import RelationServiceError, create_relations_bulk
+from app.services.trigger_service import (
+    TriggerMatcher,
+    _chunked,
+    load_source_items,
+    sync_trigger_relations,
+)
+from app.utils.code_generator import generate_ci_codes
+from app.utils.form_config_fields import extract_form_fields
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = 1000
+
+
+class CiImportError(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+
+def normalize_header(value) -> str:
+    return (value or "").strip().replace("(必填)", "").lstrip("*").strip()
+
+
+class ImportSchema:
+    """模型表单字段的导入映射：表头别名、必填字段、数字字段"""
+
+    def __init__(self, model: CmdbModel):
+        self.fields = extract_form_fields(model.form_config)
+        self.field_by_code = {field["code"]: field for field in self.fields}
+        self.required_codes = [f["code"] for f in self.fields if f.get("is_required")]
+        self.number_codes = {
+            f["code"] for f in self.fields if f.get("field_type") == "number"
+        }
+        # 名称为空时依次尝试必填文本字段
+        self.name_fallback_codes = [
+            f["code"]
+            for f in self.fields
+            if f.get("is_required") and f.get("field_type") in ("text", "string")
+        ]
+        self.alias_to_code = {}
+        for field in self.fields:
+            aliases = [
+                field["code"],
+                field["name"],
+                f"*{field['name']}",
+                f"*{field['name']}(必填)",
+            ]
+            for alias in aliases:
+                key = normalize_header(alias)
+                if key:
+                    self.alias_to_code[key] = field["code"]
+
+    def field_name(self, code: str) -> str:
+        field = self.field_by_code.get(code)
+        return field.get("name") if field else code
+
+    def resolve_header(self, header: list) -> tuple:
+        """返回 (名称列, 编码列, 字段编码 -> 列号)"""
+        name_idx = code_idx = None
+        field_indices = {}
+        for i, col in enumerate(header):
+            normalized_col = normalize_header(col)
+            if normalized_col == "CI名称":
+                name_idx = i
+            elif normalized_col == "CI编码":
+                code_idx = i
+            elif normalized_col in self.alias_to_code:
+                field_indices[self.alias_to_code[normalized_col]] = i
+        return name_idx, code_idx, field_indices
+
+
+def _to_number(value: str):
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+
+def _cell(row: list, idx: Optional[int]) -> str:
+    return row[idx].strip() if idx is not None and idx < len(row) else ""
+
+
+def _is_blank(value) -> bool:
+    return value is None or str(value).strip() == ""
+
+
+class CiImporter:
+    """
+    一次导入任务
+
+    Args:
+        model: 目标模型
+        user_id: 导入人
+        chunk_size: 每批行数
+        progress: 进度回调，接收 progress 字典快照
+    """
+
+    def __init__(
+        self,
+        model: CmdbModel,
+        user_id: int,
+        chunk_size: Optional[int] = None,
+        progress: Optional[Callable[[dict], None]] = None,
+    ):
+        self.model = model
+        self.user_id = user_id
+        self.chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+        self.schema = ImportSchema(model)
+        self.typed_field_types = {model.id: get_typed_field_types(model.form_config)}
+        self._progress_callback = progress
+        self.created_ids = []
+        self.error_messages = []
+        self.progress = {
+            "stage": "loading",
+            "processed_rows": 0,
+            "success_count": 0,
+            "error_count": 0,
+            "relation_created_count": 0,
+        }
+        self._seen_codes = set()
+
+    def _report(self, **changes):
+        self.progress.update(changes)
+        self.progress["error_count"] = len(self.error_messages)
+        if self._progress_callback:
+            self._progress_callback(dict(self.progress))
+
+    def _error(self, row_idx: int, message: str):
+        self.error_messages.append(f"第{row_idx}行: {message}")
+
+    def run(self, text_stream: Iterable[str]) -> dict:
+        reader = csv.reader(text_stream)
+        try:
+            header = next(reader)
+        except StopIteration:
+            raise CiImportError("文件内容为空")
+        columns = self.schema.resolve_header(header)
+
+        row_idx = 1
+        chunk = []
+        try:
+            for row_idx, row in enumerate(reader, start=2):
+                if not any(cell.strip() for cell in row):
+                    continue
+                chunk.append((row_idx, row))
+                if len(chunk) >= self.chunk_size:
+                    self._load_chunk(chunk, columns)
+                    chunk = []
+        except (csv.Error, UnicodeDecodeError) as e:
+            # 已提交的批次保留，报告解析中断位置
+            self.error_messages.append(f"第{row_idx + 1}行起文件解析失败: {e}")
+        if chunk:
+            self._load_chunk(chunk, columns)
+
+        self._report(stage="relations")
+        self._process_relations()
+        self._report(stage="finished")
+        return self.result()
+
+    def result(self) -> dict:
+        return {
+            "success_count": self.progress["success_count"],
+            "error_count": len(self.error_messages),
+            "relation_created_count": self.progress["relation_created_count"],
+            "error_messages": list(self.error_messages),
+        }
+
+    # ---------- 写入 ----------
+
+    def _parse_chunk(self, chunk: list, columns: tuple) -> list:
+        name_idx, code_idx, field_indices = columns
+        records = []
+        for row_idx, row in chunk:
+            attrs = {}
+            for field_code, idx in field_indices.items():
+                if idx < len(row):
+                    value = row[idx].strip()
+                    if value and field_code in self.schema.number_codes:
+                        value = _to_number(value)
+                    attrs[field_code] = value
+            records.append(
+                {
+                    "row_idx": row_idx,
+                    "name": _cell(row, name_idx),
+                    "code": _cell(row, code_idx),
+                    "attrs": attrs,
+                }
+            )
+        return records
+
+    def _validate_chunk(self, records: list) -> list:
+        # 按列检查必填属性，结果按行汇总
+        missing = {}
+        for code in self.schema.required_codes:
+            for index, record in enumerate(records):
+                if _is_blank(record["attrs"].get(code)):
+                    missing.setdefault(index, []).append(self.schema.field_name(code))
+
+        explicit_codes = {r["code"] for r in records if r["code"]}
+        existing_codes = set()
+        for codes in _chunked(sorted(explicit_codes)):
+            existing_codes.update(
+                row[0]
+                for row in db.session.query(CiInstance.code).filter(
+                    CiInstance.code.in_(codes)
+                )
+            )
+
+        valid = []
+        for index, record in enumerate(records):
+            if index in missing:
+                self._error(
+                    record["row_idx"], f"必填属性不能为空({','.join(missing[index])})"
+                )
+                continue
+            code = record["code"]
+            if code:
+                if len(code) > 16:
+                    self._error(record["row_idx"], f"CI编码过长: {code}")
+                    continue
+                if code in existing_codes:
+                    self._error(record["row_idx"], f"CI编码已存在: {code}")
+                    continue
+                if code in self._seen_codes:
+                    self._error(record["row_idx"], f"CI编码在文件中重复: {code}")
+                    continue
+                self._seen_codes.add(code)
+            valid.append(record)
+        return valid
+
+    def _load_chunk(self, chunk: list, columns: tuple):
+        records = self._validate_chunk(self._parse_chunk(chunk, columns))
+
+        without_code = [r for r in records if not r["code"]]
+        for record, code in zip(without_code, generate_ci_codes(len(without_code))):
+            record["code"] = code
+
+        rows = []
+        for record in records:
+            attrs = record["attrs"]
+            name = record["name"]
+            if not name:
+                name = next(
+                    (
+                        str(attrs[code])
+                        for code in self.schema.name_fallback_codes
+                        if code in attrs
+                    ),
+                    record["code"],
+                )
+            rows.append(
+                {
+                    "code": record["code"],
+                    "name": name,
+                    "model_id": self.model.id,
+                    "attribute_values": json.dumps(attrs),
+                    "created_by": self.user_id,
+                }
+            )
+
+        if rows:
+            stmt = insert(CiInstance).returning(
+                CiInstance.id, sort_by_parameter_order=True
+            )
+            try:
+                ids = list(db.session.execute(stmt, rows).scalars())
+                # Core 批量插入不触发 ORM 事件，属性索引在同一事务内写入
+                sync_ci_attribute_index_bulk(
+                    db.session.connection(),
+                    [
+                        (ci_id, self.model.id, record["attrs"])
+                        for ci_id, record in zip(ids, records)
+                    ],
+                    self.typed_field_types,
+                )
+                db.session.commit()
+            except IntegrityError as e:
+                db.session.rollback()
+                logger.error(f"CI 批量导入写入失败: {e}")
+                for record in records:
+                    self._error(record["row_idx"], "写入失败（编码冲突）")
+                ids = []
+            self.created_ids.extend(ids)
+
+        self._report(
+            processed_rows=self.progress["processed_rows"] + len(chunk),
+            success_count=len(self.created_ids),
+        )
+
+    # ---------- 关系 ----------
+
+    def _process_relations(self):
+        if not self.created_ids:
+            return
+        triggers = RelationTrigger.query.filter(
+            RelationTrigger.source_model_id == self.model.id,
+            RelationTrigger.is_active.is_(True),
+        ).all()
+        if not triggers:
+            return
+        reference_triggers = [t for t in triggers if t.trigger_type == "reference"]
+        rule_triggers = [t for t in triggers if t.trigger_type != "reference"]
+
+        matcher = TriggerMatcher()
+        created = 0
+        for ci_ids in _chunked(self.created_ids):
+            items = load_source_items(self.model.id, ci_ids)
+            created += self._sync_reference_relations(items, reference_triggers)
+            if rule_triggers:
+                try:
+                    created += sync_trigger_relations(
+                        items, rule_triggers, matcher, log_skipped=False
+                    )["created_count"]
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"导入后执行触发器失败: {e}")
+            self._report(relation_created_count=created)
+
+    def _sync_reference_relations(self, items: list, triggers: list) -> int:
+        """与 sync_reference_relations 相同的规则：引用字段值为目标 CI ID"""
+        candidates = []
+        for trigger in triggers:
+            try:
+                condition = (
+                    json.loads(trigger.trigger_condition)
+                    if trigger.trigger_condition
+                    else {}
+                )
+            except Exception:
+                continue
+            source_field = condition.get("source_field")
+            if not source_field:
+                continue
+            for ci_id, attrs in items:
+                value = attrs.get(source_field)
+                if not value:
+                    continue
+                try:
+                    candidates.append((ci_id, int(value), trigger.relation_type_id))
+                except (TypeError, ValueError):
+                    continue
+
+        outcomes = create_relations_bulk(list(dict.fromkeys(candidates)), "reference")
+        return sum(1 for o in outcomes if not isinstance(o, RelationServiceError))
+
+
+def import_ci_csv(
+    text_stream: Iterable[str],
+    model: CmdbModel,
+    user_id: int,
+    chunk_size: Optional[int] = None,
+    progress: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    导入 CSV 文本流
+
+    Returns:
+        dict: success_count/error_count/relation_created_count/error_messages（完整）
+    """
+    return CiImporter(model, user_id, chunk_size, progress).run(text_stream)
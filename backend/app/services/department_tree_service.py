@@ -0,0 +1,128 @@
+"""
+部门树服务模块
+一次查询加载部门父子关系并按版本缓存，下级部门查询在内存中完成
+
+部门树用于数据权限判断，各进程的缓存以 system_configs 中的共享版本号为键：
+部门增删或调整上级时在同一事务中递增版本号，其他进程下次读取即按新版本重载。
+"""
+
+from collections import defaultdict
+from typing import Optional
+
+from flask import current_app, g, has_request_context
+from sqlalchemy import BigInteger, Text, cast
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.config import SystemConfig
+from app.models.department import Department
+from app.utils.cache import cache, invalidate_tags
+
+DEPARTMENT_TREE_CACHE_KEY = "department_tree"
+DEPARTMENT_TREE_TAG = "departments"
+DEPARTMENT_TREE_VERSION_KEY = "department_tree_version"
+DEFAULT_CACHE_SECONDS = 300
+
+
+def _cache_seconds() -> int:
+    try:
+        return int(
+            current_app.config.get("DEPARTMENT_TREE_CACHE_SECONDS", DEFAULT_CACHE_SECONDS)
+        )
+    except (RuntimeError, TypeError, ValueError):
+        return DEFAULT_CACHE_SECONDS
+
+
+def bump_tree_version(connection):
+    """在部门变更所在事务中递增共享版本号"""
+    table = SystemConfig.__table__
+    bump = (
+        table.update()
+        .where(table.c.config_key == DEPARTMENT_TREE_VERSION_KEY)
+        .values(config_value=cast(cast(table.c.config_value, BigInteger) + 1, Text))
+    )
+    if connection.execute(bump).rowcount == 0:
+        try:
+            with connection.begin_nested():
+                connection.execute(
+                    table.insert().values(config_key=DEPARTMENT_TREE_VERSION_KEY, config_value="1")
+                )
+        except IntegrityError:
+            # 其他进程同时写入了首个版本号
+            connection.execute(bump)
+
+
+def _tree_version() -> str:
+    """共享版本号；同一请求内只查询一次"""
+    if has_request_context() and "department_tree_version" in g:
+        return g.department_tree_version
+    table = SystemConfig.__table__
+    version = db.session.execute(
+        db.select(table.c.config_value).where(table.c.config_key == DEPARTMENT_TREE_VERSION_KEY)
+    ).scalar() or "0"
+    if has_request_context():
+        g.department_tree_version = version
+    return version
+
+
+def load_children_map() -> dict:
+    """parent_id -> [child_id]（按 id 排序）"""
+    ttl = _cache_seconds()
+    cache_key = f"{DEPARTMENT_TREE_CACHE_KEY}:{_tree_version()}" if ttl > 0 else None
+    children_map = cache.get(cache_key) if cache_key else None
+    if children_map is not None:
+        return children_map
+
+    children_map = defaultdict(list)
+    rows = db.session.query(Department.id, Department.parent_id).order_by(Department.id)
+    for dept_id, parent_id in rows:
+        if parent_id:
+            children_map[parent_id].append(dept_id)
+    children_map = dict(children_map)
+    if cache_key:
+        cache.set(
+            cache_key,
+            children_map,
+            expire_seconds=ttl,
+            tags=[DEPARTMENT_TREE_TAG],
+        )
+    return children_map
+
+
+def get_descendant_ids(department_id: Optional[int]) -> list:
+    """
+    获取全部下级部门 ID（不含自身），深度优先顺序
+
+    Args:
+        department_id: 部门 ID
+    """
+    if not department_id:
+        return []
+    children_map = load_children_map()
+    ids = []
+    visited = {department_id}
+    stack = list(reversed(children_map.get(department_id, [])))
+    while stack:
+        dept_id = stack.pop()
+        # 防御脏数据中的环
+        if dept_id in visited:
+            continue
+        visited.add(dept_id)
+        ids.append(dept_id)
+        stack.extend(reversed(children_map.get(dept_id, [])))
+    return ids
+
+
+def get_subtree_ids(department_id: Optional[int]) -> set:
+    """部门自身及全部下级部门 ID"""
+    if not department_id:
+        return set()
+    ids = set(get_descendant_ids(department_id))
+    ids.add(department_id)
+    return ids
+
+
+def invalidate_department_tree():
+    if has_request_context():
+        g.pop("department_tree_version", None)
+    invalidate_tags(DEPARTMENT_TREE_TAG)
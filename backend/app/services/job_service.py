@@ -0,0 +1,510 @@
+"""
+后台任务服务模块
+有界线程池执行导入、导出、触发器扫描等长耗时操作：
+- 每个任务写入 background_jobs 记录状态、进度与结果，并通过 WebSocket 推送进度
+- 同一并发键（如 model:{id}）同时只允许一个任务执行：进程内集合快速拒绝，
+  跨进程由未结束任务上的部分唯一索引保证
+- 任务在进度上报点检查取消请求，协作式取消
+- 任务独占的输入文件在任务结束或未开始即取消时删除；进程重启后中断的任务标记为失败
+- 过期的结果文件与任务记录由保留任务定期清理
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+
+from flask import current_app
+from sqlalchemy import and_, select
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.background_job import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKER_COUNT = 4
+DEFAULT_PROGRESS_INTERVAL = 1.0
+DEFAULT_SYNC_WAIT_SECONDS = 20
+DEFAULT_RESULT_RETENTION_DAYS = 7
+DEFAULT_RETENTION_DAYS = 90
+JOB_FILE_FOLDER = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "uploads", "jobs")
+)
+
+
+class JobCancelled(Exception):
+    """任务已被取消"""
+
+
+class JobConflictError(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+
+def model_key(model_id: int) -> str:
+    """模型级并发键：触发器执行与批量扫描互斥"""
+    return f"model:{model_id}"
+
+
+def job_file_path(job_id: int, suffix: str) -> str:
+    os.makedirs(JOB_FILE_FOLDER, exist_ok=True)
+    return os.path.join(JOB_FILE_FOLDER, f"job_{job_id}{suffix}")
+
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _remove_files(paths):
+    for path in paths or ():
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"删除任务文件失败 {path}: {e}")
+
+
+def _emit(job: BackgroundJob):
+    if not job.created_by:
+        return
+    try:
+        from app.notifications.websocket import emit_to_user
+
+        emit_to_user(job.created_by, "job:progress", job.to_dict())
+    except Exception as e:
+        logger.debug(f"推送任务进度失败: {e}")
+
+
+class JobContext:
+    """
+    传给任务函数的上下文
+
+    report() 应在批次边界（已提交之后）调用：按间隔写入进度并检查取消请求。
+    """
+
+    def __init__(self, job_id: int, cancel_event: threading.Event, interval: float):
+        self.job_id = job_id
+        self._cancel_event = cancel_event
+        self._interval = interval
+        self._last_flush = 0.0
+        self._progress = 0
+        self._data = {}
+        self.result_file = None
+
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    def report(self, progress: Optional[int] = None, force: bool = False, **data):
+        """
+        上报进度
+
+        Args:
+            progress: 完成百分比 0-100
+            force: 忽略间隔立即写入
+            data: 进度明细（如 processed_rows）
+        """
+        if progress is not None:
+            self._progress = max(0, min(100, int(progress)))
+        self._data.update(data)
+
+        now = time.monotonic()
+        if force or now - self._last_flush >= self._interval:
+            self._last_flush = now
+            self._flush()
+        self.check_cancelled()
+
+    def _flush(self):
+        job = db.session.get(BackgroundJob, self.job_id)
+        if job is None:
+            return
+        db.session.refresh(job)
+        job.progress = self._progress
+        job.progress_data = json.dumps(self._data, ensure_ascii=False, default=str)
+        if job.cancel_requested:
+            # 其他进程发起的取消
+            self._cancel_event.set()
+        db.session.commit()
+        _emit(job)
+
+
+class JobManager:
+    """进程内任务调度：有界线程池 + 并发键"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._worker_count = DEFAULT_WORKER_COUNT
+        self._active_keys = set()
+        self._cancel_events = {}
+        self._futures = {}
+
+    def init_app(self, app):
+        self._worker_count = int(app.config.get("JOB_WORKER_COUNT", DEFAULT_WORKER_COUNT))
+        app.extensions["job_manager"] = self
+
+    def _cfg(self, key: str, default: Any) -> Any:
+        try:
+            return current_app.config.get(key, default)
+        except RuntimeError:
+            return default
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._worker_count, thread_name_prefix="job"
+                )
+            return self._executor
+
+    # ---------- 并发键 ----------
+
+    def try_acquire(self, key: Optional[str]) -> bool:
+        if not key:
+            return True
+        with self._lock:
+            if key in self._active_keys:
+                return False
+            self._active_keys.add(key)
+            return True
+
+    def release(self, key: Optional[str]):
+        if not key:
+            return
+        with self._lock:
+            self._active_keys.discard(key)
+
+    @staticmethod
+    def _key_active(key: Optional[str]) -> bool:
+        """是否存在相同并发键的未结束任务（含其他进程提交的任务）"""
+        if not key:
+            return False
+        return (
+            db.session.query(BackgroundJob.id)
+            .filter(
+                BackgroundJob.concurrency_key == key,
+                BackgroundJob.status.in_(BackgroundJob.ACTIVE_STATUSES),
+            )
+            .first()
+            is not None
+        )
+
+    @contextmanager
+    def hold_key(self, key: Optional[str]):
+        """非阻塞占用并发键（有相同键的未结束任务时也视为占用失败），yield 是否占用成功"""
+        acquired = self.try_acquire(key)
+        if acquired and self._key_active(key):
+            self.release(key)
+            acquired = False
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self.release(key)
+
+    # ---------- 提交与执行 ----------
+
+    def submit(
+        self,
+        job_type: str,
+        func: Callable[[JobContext], Any],
+        concurrency_key: Optional[str] = None,
+        params: Optional[dict] = None,
+        created_by: Optional[int] = None,
+        input_files: Optional[list] = None,
+    ) -> BackgroundJob:
+        """
+        提交任务
+
+        Args:
+            job_type: 任务类型
+            func: 任务函数，接收 JobContext，返回可 JSON 序列化的结果
+            concurrency_key: 并发键，相同键的任务不能同时执行
+            params: 任务参数（仅用于展示）
+            created_by: 提交人
+            input_files: 任务独占的输入文件，任务结束、取消或提交失败时删除
+
+        Raises:
+            JobConflictError: 相同并发键的任务正在执行
+        """
+        input_files = list(input_files or [])
+        if not self.try_acquire(concurrency_key):
+            _remove_files(input_files)
+            raise JobConflictError("已有相同任务正在执行，请稍后再试")
+
+        try:
+            job = BackgroundJob(
+                job_type=job_type,
+                status="pending",
+                concurrency_key=concurrency_key,
+                params=json.dumps(params or {}, ensure_ascii=False, default=str),
+                created_by=created_by,
+                worker_id=_worker_id(),
+                input_files=json.dumps(input_files) if input_files else None,
+            )
+            db.session.add(job)
+            db.session.commit()
+        except IntegrityError:
+            # 其他进程已提交相同并发键的任务（未结束任务上的唯一索引）
+            db.session.rollback()
+            self.release(concurrency_key)
+            _remove_files(input_files)
+            raise JobConflictError("已有相同任务正在执行，请稍后再试")
+        except Exception:
+            self.release(concurrency_key)
+            _remove_files(input_files)
+            raise
+
+        cancel_event = threading.Event()
+        with self._lock:
+            self._cancel_events[job.id] = cancel_event
+
+        app = current_app._get_current_object()
+        if self._cfg("JOB_RUN_INLINE", False):
+            self._run(app, job.id, func, concurrency_key, cancel_event, input_files)
+            db.session.refresh(job)
+        else:
+            future = self._get_executor().submit(
+                self._run, app, job.id, func, concurrency_key, cancel_event, input_files
+            )
+            with self._lock:
+                self._futures[job.id] = future
+        return job
+
+    def submit_task(self, func: Callable, *args):
+        """在任务线程池中执行不需要任务记录的轻量后台操作"""
+        app = current_app._get_current_object()
+
+        def run():
+            with app.app_context():
+                try:
+                    func(*args)
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"后台操作执行失败: {e}")
+
+        if self._cfg("JOB_RUN_INLINE", False):
+            run()
+        else:
+            self._get_executor().submit(run)
+
+    def _finish(self, job_id: int, status: str, **fields) -> Optional[BackgroundJob]:
+        job = db.session.get(BackgroundJob, job_id)
+        if job is None:
+            return None
+        job.status = status
+        job.completed_at = datetime.now()
+        for name, value in fields.items():
+            setattr(job, name, value)
+        db.session.commit()
+        return job
+
+    def _run(self, app, job_id, func, concurrency_key, cancel_event, input_files=()):
+        with app.app_context():
+            job = None
+            try:
+                job = db.session.get(BackgroundJob, job_id)
+                if job is None:
+                    return
+                if job.cancel_requested or cancel_event.is_set():
+                    job = self._finish(job_id, "cancelled")
+                    return
+
+                job.status = "running"
+                job.started_at = datetime.now()
+                db.session.commit()
+                _emit(job)
+
+                context = JobContext(
+                    job_id,
+                    cancel_event,
+                    float(app.config.get("JOB_PROGRESS_INTERVAL", DEFAULT_PROGRESS_INTERVAL)),
+                )
+                result = func(context)
+                job = self._finish(
+                    job_id,
+                    "completed",
+                    progress=100,
+                    result=json.dumps(result, ensure_ascii=False, default=str),
+                    result_file=context.result_file,
+                )
+            except JobCancelled:
+                db.session.rollback()
+                job = self._finish(job_id, "cancelled")
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"后台任务 {job_id} 执行失败: {e}")
+                job = self._finish(job_id, "failed", error_message=str(e))
+            finally:
+                _remove_files(input_files)
+                if job is not None:
+                    _emit(job)
+                self.release(concurrency_key)
+                with self._lock:
+                    self._cancel_events.pop(job_id, None)
+                    self._futures.pop(job_id, None)
+
+    # ---------- 查询与控制 ----------
+
+    def wait(self, job: BackgroundJob, timeout: Optional[float] = None) -> BackgroundJob:
+        """
+        等待任务结束（最多 timeout 秒），返回刷新后的任务记录
+
+        Args:
+            job: 任务记录
+            timeout: 等待秒数，默认 JOB_SYNC_WAIT_SECONDS
+        """
+        if timeout is None:
+            timeout = float(self._cfg("JOB_SYNC_WAIT_SECONDS", DEFAULT_SYNC_WAIT_SECONDS))
+        with self._lock:
+            future = self._futures.get(job.id)
+        if future is not None and timeout > 0:
+            wait_futures([future], timeout=timeout)
+        db.session.refresh(job)
+        return job
+
+    def cancel(self, job: BackgroundJob) -> BackgroundJob:
+        """请求取消任务；未开始的任务直接标记为已取消"""
+        if job.is_finished:
+            return job
+        job.cancel_requested = True
+        pending = job.status == "pending"
+        if pending:
+            job.status = "cancelled"
+            job.completed_at = datetime.now()
+        db.session.commit()
+        if pending:
+            # 任务不会再执行，输入文件在此删除
+            _remove_files(job.get_input_files())
+        with self._lock:
+            cancel_event = self._cancel_events.get(job.id)
+        if cancel_event is not None:
+            cancel_event.set()
+        _emit(job)
+        return job
+
+    def _worker_alive(self, job: BackgroundJob) -> bool:
+        host, _, pid = (job.worker_id or "").rpartition(":")
+        if host != socket.gethostname():
+            # 其他主机上的任务由该主机上的进程自行处理
+            return bool(host)
+        try:
+            pid = int(pid)
+        except ValueError:
+            return False
+        if pid == os.getpid():
+            with self._lock:
+                return job.id in self._cancel_events
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def recover_interrupted_jobs(self) -> int:
+        """
+        启动时把执行进程已退出的未完成任务标记为失败，并删除其输入文件
+
+        Returns:
+            int: 标记的任务数
+        """
+        jobs = BackgroundJob.query.filter(
+            BackgroundJob.status.in_(("pending", "running"))
+        ).all()
+        interrupted = [job for job in jobs if not self._worker_alive(job)]
+        for job in interrupted:
+            job.status = "failed"
+            job.error_message = "服务重启，任务已中断"
+            job.completed_at = datetime.now()
+        db.session.commit()
+        for job in interrupted:
+            _remove_files(job.get_input_files())
+        return len(interrupted)
+
+
+job_manager = JobManager()
+
+
+def purge_job_results(
+    result_retention_days: Optional[int] = None, retention_days: Optional[int] = None
+) -> dict:
+    """
+    清理过期的任务结果文件与任务记录
+
+    - 结束超过 JOB_RESULT_RETENTION_DAYS 天的任务：删除结果文件并清空 result_file，下载时提示文件已过期
+    - 结束超过 JOB_RETENTION_DAYS 天的任务：删除任务记录（连同残留的文件）
+
+    Returns:
+        dict: 两个阶段的运行统计
+    """
+    # app.tasks 包导入本模块，保留任务工具在此延迟导入
+    from app.tasks.retention import RetentionRun, iter_id_chunks, purge_in_chunks
+
+    if result_retention_days is None:
+        result_retention_days = int(
+            current_app.config.get("JOB_RESULT_RETENTION_DAYS", DEFAULT_RESULT_RETENTION_DAYS)
+        )
+    if retention_days is None:
+        retention_days = int(current_app.config.get("JOB_RETENTION_DAYS", DEFAULT_RETENTION_DAYS))
+    now = datetime.now()
+    jobs = BackgroundJob.__table__
+    finished = jobs.c.status.in_(BackgroundJob.FINISHED_STATUSES)
+
+    def job_files(ids):
+        rows = db.session.execute(
+            select(jobs.c.result_file, jobs.c.input_files).where(jobs.c.id.in_(ids))
+        )
+        paths = []
+        for result_file, input_files in rows:
+            if result_file:
+                paths.append(result_file)
+            paths.extend(BackgroundJob._load(input_files, []))
+        return paths
+
+    run = RetentionRun("background_job_files")
+    try:
+        for ids in iter_id_chunks(
+            jobs,
+            and_(
+                finished,
+                jobs.c.result_file.isnot(None),
+                jobs.c.completed_at < now - timedelta(days=result_retention_days),
+            ),
+        ):
+            paths = job_files(ids)
+            result = db.session.execute(
+                jobs.update().where(jobs.c.id.in_(ids)).values(result_file=None)
+            )
+            db.session.commit()
+            # 提交后再删文件，提交失败时记录仍指向可下载的文件
+            _remove_files(paths)
+            run.updated += result.rowcount
+            run.chunks += 1
+    except Exception as e:
+        db.session.rollback()
+        run.error = str(e)
+
+    return {
+        "files": run.finish(),
+        "jobs": purge_in_chunks(
+            "background_jobs",
+            jobs,
+            and_(finished, jobs.c.completed_at < now - timedelta(days=retention_days)),
+            before_delete=lambda ids: _remove_files(job_files(ids)),
+            archive=False,
+        ),
+    }
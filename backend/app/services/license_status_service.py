@@ -0,0 +1,164 @@
+"""
+License 状态缓存服务模块
+before_request 授权拦截读取本地缓存，只有冷启动或缓存过旧时才同步访问 manager-go
+"""
+
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 30
+DEFAULT_MAX_STALE_SECONDS = 300
+
+
+def parse_expire_time(expire_raw: str) -> Optional[datetime]:
+    if not expire_raw:
+        return None
+    try:
+        return datetime.fromisoformat(expire_raw.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            return datetime.strptime(expire_raw, "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            return None
+
+
+def _is_past(expire_at: datetime) -> bool:
+    now = datetime.now(expire_at.tzinfo) if expire_at.tzinfo else datetime.now()
+    return now > expire_at
+
+
+def _license_status(has_license: bool, expired: bool = False, expire_time: str = "") -> Dict[str, Any]:
+    return {"has_license": has_license, "expired": expired, "expire_time": expire_time}
+
+
+def load_license_status() -> Dict[str, Any]:
+    """读取授权状态：优先 manager-go 实时状态，不可达时回退本地配置"""
+    # 优先读取 manager-go 的实时授权状态（适配 PG + manager(sqlite) 的部署）。
+    try:
+        from app.services.manager_api_service import manager_api_service
+
+        status = manager_api_service.request("GET", "/api/v1/license/status") or {}
+        return _license_status(
+            bool(status.get("has_license")),
+            bool(status.get("expired")),
+            str(status.get("expire_time") or "").strip(),
+        )
+    except Exception:
+        pass
+
+    # manager-go 不可达时，回退本地配置判定，避免全站不可用。
+    from app.models.config import SystemConfig
+
+    claims_raw = SystemConfig.get_value("license_claims_json", "")
+    if not claims_raw:
+        return _license_status(False)
+    try:
+        claims = json.loads(claims_raw)
+    except Exception:
+        return _license_status(False)
+    expire_raw = str(claims.get("expire_time") or "").strip()
+    expire_at = parse_expire_time(expire_raw)
+    if not expire_at:
+        return _license_status(False)
+    return _license_status(True, _is_past(expire_at), expire_raw)
+
+
+class LicenseStatusCache:
+    """
+    进程内授权状态缓存
+
+    - TTL 内直接返回缓存
+    - 超过 TTL 但未超过最大陈旧时间：返回旧值并在后台线程重新校验
+    - 冷启动或过于陈旧：同步加载
+    - 缓存的到期时间已过时立即按过期处理，不等待 TTL
+    """
+
+    def __init__(self, loader: Optional[Callable[[], Dict[str, Any]]] = None):
+        self._loader = loader or load_license_status
+        self._lock = threading.Lock()
+        self._status = None
+        self._expire_at = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._refreshing = False
+
+    def _cfg(self, key: str, default: Any) -> Any:
+        try:
+            return current_app.config.get(key, default)
+        except RuntimeError:
+            return default
+
+    def _store(self, status: Dict[str, Any], generation: int):
+        with self._lock:
+            # 加载期间发生过失效（如上传了新 License）时丢弃旧结果
+            if generation != self._generation:
+                return
+            self._status = dict(status)
+            self._expire_at = parse_expire_time(status.get("expire_time") or "")
+            self._loaded_at = time.monotonic()
+
+    def _load(self) -> Dict[str, Any]:
+        with self._lock:
+            generation = self._generation
+        status = self._loader()
+        self._store(status, generation)
+        return dict(status)
+
+    def _refresh_in_background(self, app):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                with app.app_context():
+                    self._load()
+            except Exception as e:
+                logger.warning(f"后台刷新 License 状态失败: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _apply_expiry(self, status: Dict[str, Any], expire_at: Optional[datetime]) -> Dict[str, Any]:
+        if status.get("has_license") and not status.get("expired") and expire_at and _is_past(expire_at):
+            status["expired"] = True
+        return status
+
+    def get_status(self) -> Dict[str, Any]:
+        ttl = float(self._cfg("LICENSE_STATUS_CACHE_SECONDS", DEFAULT_TTL_SECONDS))
+        max_stale = float(self._cfg("LICENSE_STATUS_MAX_STALE_SECONDS", DEFAULT_MAX_STALE_SECONDS))
+        with self._lock:
+            status = dict(self._status) if self._status is not None else None
+            expire_at = self._expire_at
+            age = time.monotonic() - self._loaded_at
+
+        if status is None or age >= max_stale:
+            return self._load()
+        if age >= ttl:
+            try:
+                app = current_app._get_current_object()
+            except RuntimeError:
+                return self._load()
+            self._refresh_in_background(app)
+        return self._apply_expiry(status, expire_at)
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._status = None
+            self._expire_at = None
+            self._loaded_at = 0.0
+
+
+license_status_cache = LicenseStatusCache()
@@ -1,13 +1,34 @@
+import gzip
+import http.client
 import json
+import os
+import re
+import threading
 import time
 import urllib.error
 import urllib.parse
 import urllib.request
+from collections import deque
 from dataclasses import dataclass
 from typing import Any, Dict, Optional
 
 from flask import current_app
 
+DEFAULT_POOL_SIZE = 10
+DEFAULT_POOL_IDLE_SECONDS = 30
+# 请求耗时直方图的桶上限（毫秒），最后一桶为 +Inf
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# 路径中的数字/UUID 段归并为 {id}，避免每个监控任务一条统计
+PATH_ID_SEGMENT = re.compile(r"/(\d+|[0-9a-fA-F-]{32,36})(?=/|$)")
+# 复用的空闲连接可能已被服务端关闭，此类错误换新连接重发一次
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+# 请求已写出后连接断开时，只有幂等方法可以重发
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class RequestSentError(ConnectionError):
+    """非幂等请求已写出后连接断开，服务端可能已处理，不能重发"""
+
 
 @dataclass
 class ManagerError(Exception):
@@ -16,11 +37,133 @@ class ManagerError(Exception):
     message: str
 
 
+class _ConnectionPool:
+    """
+    按 (scheme, host, port) 复用 keep-alive 连接
+    每个连接同一时刻只承载一个请求（读完响应才归还，不做管线化）；
+    空闲连接最多保留 max_size 个，超过 idle_seconds 未使用的丢弃；fork 后的子进程不复用父进程的连接
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._pid = os.getpid()
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+
+    def acquire(self, key: tuple, timeout: float, idle_seconds: float):
+        scheme, host, port = key
+        now = time.monotonic()
+        with self._lock:
+            if self._pid != os.getpid():
+                self._idle = {}
+                self._pid = os.getpid()
+            idle = self._idle.get(key)
+            while idle:
+                conn, released_at = idle.pop()
+                if now - released_at < idle_seconds and conn.sock is not None:
+                    self.reused += 1
+                    conn.sock.settimeout(timeout)
+                    return conn, True
+                conn.close()
+                self.discarded += 1
+            self.created += 1
+        conn_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return conn_class(host, port, timeout=timeout), False
+
+    def release(self, key: tuple, conn, max_size: int):
+        with self._lock:
+            idle = self._idle.setdefault(key, deque())
+            if self._pid == os.getpid() and len(idle) < max_size:
+                idle.append((conn, time.monotonic()))
+                return
+            self.discarded += 1
+        conn.close()
+
+    def discard(self, conn):
+        conn.close()
+        with self._lock:
+            self.discarded += 1
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn, _ in connections:
+                conn.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "idle": sum(len(connections) for connections in self._idle.values()),
+                "created": self.created,
+                "reused": self.reused,
+                "discarded": self.discarded,
+            }
+
+
+class _LatencyStats:
+    """按 方法 + 归并路径 统计请求耗时直方图"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    @staticmethod
+    def endpoint(method: str, path: str) -> str:
+        return f"{method.upper()} {PATH_ID_SEGMENT.sub('/{id}', path)}"
+
+    def observe(self, endpoint: str, elapsed_ms: float, error: bool):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = {
+                    "count": 0,
+                    "errors": 0,
+                    "sum_ms": 0.0,
+                    "max_ms": 0.0,
+                    "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                }
+            stats["count"] += 1
+            stats["errors"] += 1 if error else 0
+            stats["sum_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            index = next(
+                (i for i, bound in enumerate(LATENCY_BUCKETS_MS) if elapsed_ms <= bound),
+                len(LATENCY_BUCKETS_MS),
+            )
+            stats["buckets"][index] += 1
+
+    def snapshot(self) -> dict:
+        labels = [f"le_{bound}" for bound in LATENCY_BUCKETS_MS] + ["le_inf"]
+        with self._lock:
+            return {
+                endpoint: {
+                    "count": stats["count"],
+                    "errors": stats["errors"],
+                    "avg_ms": round(stats["sum_ms"] / stats["count"], 2) if stats["count"] else 0.0,
+                    "max_ms": round(stats["max_ms"], 2),
+                    "buckets": dict(zip(labels, stats["buckets"])),
+                }
+                for endpoint, stats in self._endpoints.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+
 class ManagerAPIService:
     def __init__(self):
+        # 熔断状态会被多个请求线程同时读写，统一在 _lock 内变更
+        self._lock = threading.Lock()
         self._state = "closed"  # closed | open | half_open
         self._failure_count = 0
         self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._pool = _ConnectionPool()
+        self._latency = _LatencyStats()
         self._transport = self._default_transport
 
     def _cfg(self, key: str, default: Any) -> Any:
@@ -32,30 +175,57 @@ class ManagerAPIService:
     def _base_url(self) -> str:
         return str(self._cfg("GO_MANAGER_URL", "http://127.0.0.1:8080")).rstrip("/")
 
-    def _before_request(self, path: str = "") -> None:
-        if self._state != "open":
-            return
-        # License 上传/状态查询属于解阻接口，熔断打开时也允许尝试直连上游。
-        if path.startswith("/api/v1/license/"):
-            self._state = "half_open"
-            return
-        recovery = int(self._cfg("GO_MANAGER_CB_RECOVERY_SECONDS", 30))
-        if time.time() - self._opened_at >= recovery:
-            self._state = "half_open"
-            return
-        raise ManagerError(status=503, code="UPSTREAM_UNAVAILABLE", message="Go Manager circuit open")
+    # ---------- 熔断 ----------
+
+    def _before_request(self, path: str = "") -> bool:
+        """熔断打开时拒绝请求；返回本次请求是否为半开状态下的探测请求"""
+        with self._lock:
+            # License 上传/状态查询属于解阻接口，熔断打开时也允许尝试直连上游。
+            if path.startswith("/api/v1/license/"):
+                if self._state == "open":
+                    self._state = "half_open"
+                return False
+            if self._state == "closed":
+                return False
+            if self._state == "open":
+                recovery = int(self._cfg("GO_MANAGER_CB_RECOVERY_SECONDS", 30))
+                if time.time() - self._opened_at < recovery:
+                    raise ManagerError(status=503, code="UPSTREAM_UNAVAILABLE", message="Go Manager circuit open")
+                self._state = "half_open"
+            # 半开状态同一时刻只放行一个探测请求
+            if self._probe_in_flight:
+                raise ManagerError(status=503, code="UPSTREAM_UNAVAILABLE", message="Go Manager circuit half-open")
+            self._probe_in_flight = True
+            return True
+
+    def _after_request(self, probe: bool) -> None:
+        if probe:
+            with self._lock:
+                self._probe_in_flight = False
 
     def _on_success(self) -> None:
-        self._state = "closed"
-        self._failure_count = 0
-        self._opened_at = 0.0
+        with self._lock:
+            self._state = "closed"
+            self._failure_count = 0
+            self._opened_at = 0.0
 
     def _on_failure(self) -> None:
-        self._failure_count += 1
         threshold = int(self._cfg("GO_MANAGER_CB_FAILURE_THRESHOLD", 3))
-        if self._failure_count >= threshold:
-            self._state = "open"
-            self._opened_at = time.time()
+        with self._lock:
+            self._failure_count += 1
+            if self._state == "half_open" or self._failure_count >= threshold:
+                self._state = "open"
+                self._opened_at = time.time()
+
+    # ---------- 传输 ----------
+
+    def _use_system_proxy(self) -> bool:
+        return str(self._cfg("GO_MANAGER_USE_SYSTEM_PROXY", "false")).strip().lower() in {
+            "1",
+            "true",
+            "yes",
+            "on",
+        }
 
     def _default_transport(
         self,
@@ -64,33 +234,106 @@ class ManagerAPIService:
         data: Optional[bytes],
         headers: Dict[str, str],
         timeout: float,
-    ) -> tuple[int, bytes]:
+    ) -> tuple[int, Dict[str, str], bytes]:
+        """发送请求并返回 (状态码, 响应头, 响应体)；gzip 响应体已解压"""
+        headers = {**headers, "Accept-Encoding": "gzip"}
+        if self._use_system_proxy():
+            status, raw_headers, raw = self._urllib_transport(method, url, data, headers, timeout)
+        else:
+            # Manager 是内网服务，默认直连，避免 localhost 被系统代理劫持导致 503。
+            status, raw_headers, raw = self._pooled_transport(method, url, data, headers, timeout)
+        if raw_headers.get("Content-Encoding", "").lower() == "gzip":
+            raw = gzip.decompress(raw)
+            raw_headers = {
+                k: v for k, v in raw_headers.items() if k not in {"Content-Encoding", "Content-Length"}
+            }
+        return status, raw_headers, raw
+
+    def _pooled_transport(
+        self,
+        method: str,
+        url: str,
+        data: Optional[bytes],
+        headers: Dict[str, str],
+        timeout: float,
+    ) -> tuple[int, Dict[str, str], bytes]:
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme or "http"
+        key = (scheme, parts.hostname, parts.port or (443 if scheme == "https" else 80))
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        pool_size = int(self._cfg("GO_MANAGER_POOL_SIZE", DEFAULT_POOL_SIZE))
+        idle_seconds = float(self._cfg("GO_MANAGER_POOL_IDLE_SECONDS", DEFAULT_POOL_IDLE_SECONDS))
+
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        while True:
+            conn, reused = self._pool.acquire(key, timeout, idle_seconds)
+            written = False
+            try:
+                conn.request(method, target, body=data, headers=headers)
+                written = True
+                resp = conn.getresponse()
+                raw = resp.read()
+            except STALE_CONNECTION_ERRORS as e:
+                self._pool.discard(conn)
+                if written and not idempotent:
+                    raise RequestSentError(f"连接在请求写出后断开: {e}") from e
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                self._pool.discard(conn)
+                raise
+            raw_headers = {k: v for k, v in resp.getheaders()}
+            if resp.will_close:
+                self._pool.discard(conn)
+            else:
+                self._pool.release(key, conn, pool_size)
+            return resp.status, raw_headers, raw
+
+    @staticmethod
+    def _urllib_transport(
+        method: str,
+        url: str,
+        data: Optional[bytes],
+        headers: Dict[str, str],
+        timeout: float,
+    ) -> tuple[int, Dict[str, str], bytes]:
         req = urllib.request.Request(url=url, method=method, data=data, headers=headers)
-        use_system_proxy = str(self._cfg("GO_MANAGER_USE_SYSTEM_PROXY", "false")).strip().lower() in {
-            "1",
-            "true",
-            "yes",
-            "on",
-        }
-        if use_system_proxy:
+        try:
             with urllib.request.urlopen(req, timeout=timeout) as resp:
-                return resp.status, resp.read()
-        # Manager 是内网服务，默认直连，避免 localhost 被系统代理劫持导致 503。
-        opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
-        with opener.open(req, timeout=timeout) as resp:
-            return resp.status, resp.read()
+                return resp.status, {k: v for k, v in resp.headers.items()}, resp.read()
+        except urllib.error.HTTPError as e:
+            raw = e.read() if e.fp else b""
+            return e.code, {k: v for k, v in (e.headers or {}).items()}, raw
 
-    def request(
+    # ---------- 请求 ----------
+
+    def _send(
         self,
         method: str,
         path: str,
-        payload: Optional[dict] = None,
-        params: Optional[dict] = None,
-        auth_header: Optional[str] = None,
-        timeout_seconds: Optional[float] = None,
-    ) -> Any:
-        self._before_request(path)
+        payload: Optional[dict],
+        params: Optional[dict],
+        auth_header: Optional[str],
+        timeout_seconds: Optional[float],
+    ) -> tuple[int, Dict[str, str], bytes]:
+        probe = self._before_request(path)
+        try:
+            return self._send_with_retries(method, path, payload, params, auth_header, timeout_seconds)
+        finally:
+            self._after_request(probe)
 
+    def _send_with_retries(
+        self,
+        method: str,
+        path: str,
+        payload: Optional[dict],
+        params: Optional[dict],
+        auth_header: Optional[str],
+        timeout_seconds: Optional[float],
+    ) -> tuple[int, Dict[str, str], bytes]:
         url = self._base_url() + path
         if params:
             q = urllib.parse.urlencode(params)
@@ -106,57 +349,60 @@ class ManagerAPIService:
         if payload is not None:
             body = json.dumps(payload).encode("utf-8")
 
+        endpoint = self._latency.endpoint(method, path)
         last_error: Optional[ManagerError] = None
         for attempt in range(max_retries + 1):
+            started = time.monotonic()
             try:
-                status, raw = self._transport(method, url, body, headers, timeout)
-                data = self._decode(raw)
-                if status >= 400:
-                    code = "UPSTREAM_ERROR"
-                    message = "Go Manager error"
-                    if isinstance(data, dict):
-                        err = data.get("error", {})
-                        if isinstance(err, dict):
-                            code = err.get("code", code)
-                            message = err.get("message", message)
-                    raise ManagerError(status=status, code=code, message=message)
-                self._on_success()
-                return data
-            except ManagerError as e:
-                retriable = e.status >= 500
-                last_error = e
-                if not retriable or attempt == max_retries:
-                    break
-                time.sleep(0.05 * (attempt + 1))
-            except urllib.error.HTTPError as e:
-                raw = e.read() if e.fp else b""
-                data = self._decode(raw)
-                code = "UPSTREAM_ERROR"
-                message = str(e)
-                if isinstance(data, dict):
-                    err = data.get("error", {})
-                    if isinstance(err, dict):
-                        code = err.get("code", code)
-                        message = err.get("message", message)
-                last_error = ManagerError(status=e.code, code=code, message=message)
-                # 4xx 直接透传，不计入上游不可用；5xx 允许重试
-                if e.code < 500 or attempt == max_retries:
-                    break
-                self._on_failure()
-                time.sleep(0.05 * (attempt + 1))
-            except (urllib.error.URLError, TimeoutError) as e:
+                status, raw_headers, raw = self._transport(method, url, body, headers, timeout)
+            except (OSError, http.client.HTTPException) as e:
+                self._latency.observe(endpoint, (time.monotonic() - started) * 1000, error=True)
                 self._on_failure()
                 last_error = ManagerError(status=503, code="UPSTREAM_UNAVAILABLE", message=str(e))
-                if attempt == max_retries:
+                if attempt == max_retries or isinstance(e, RequestSentError):
                     break
                 time.sleep(0.05 * (attempt + 1))
+                continue
+
+            self._latency.observe(endpoint, (time.monotonic() - started) * 1000, error=status >= 500)
+            if status < 400:
+                self._on_success()
+                return status, raw_headers, raw
+
+            data = self._decode(raw)
+            code = "UPSTREAM_ERROR"
+            message = "Go Manager error"
+            if isinstance(data, dict):
+                err = data.get("error", {})
+                if isinstance(err, dict):
+                    code = err.get("code", code)
+                    message = err.get("message", message)
+            last_error = ManagerError(status=status, code=code, message=message)
+            # 4xx 直接透传，不计入上游不可用；5xx 允许重试
+            if status < 500:
+                self._on_success()
+                break
+            self._on_failure()
+            if attempt == max_retries:
+                break
+            time.sleep(0.05 * (attempt + 1))
 
         if last_error is None:
             last_error = ManagerError(status=500, code="INTERNAL_ERROR", message="unknown manager client error")
-        if last_error.status >= 500:
-            self._on_failure()
         raise last_error
 
+    def request(
+        self,
+        method: str,
+        path: str,
+        payload: Optional[dict] = None,
+        params: Optional[dict] = None,
+        auth_header: Optional[str] = None,
+        timeout_seconds: Optional[float] = None,
+    ) -> Any:
+        _, _, raw = self._send(method, path, payload, params, auth_header, timeout_seconds)
+        return self._decode(raw)
+
     def request_raw(
         self,
         method: str,
@@ -166,75 +412,17 @@ class ManagerAPIService:
         auth_header: Optional[str] = None,
         timeout_seconds: Optional[float] = None,
     ) -> tuple[int, Dict[str, str], bytes]:
-        self._before_request(path)
+        return self._send(method, path, payload, params, auth_header, timeout_seconds)
 
-        url = self._base_url() + path
-        if params:
-            q = urllib.parse.urlencode(params)
-            url = f"{url}?{q}"
-
-        timeout = float(timeout_seconds if timeout_seconds is not None else self._cfg("GO_MANAGER_TIMEOUT_SECONDS", 3))
-        max_retries = int(self._cfg("GO_MANAGER_MAX_RETRIES", 2))
-        headers = {"Content-Type": "application/json"}
-        if auth_header:
-            headers["Authorization"] = auth_header
-
-        body = None
-        if payload is not None:
-            body = json.dumps(payload).encode("utf-8")
-
-        last_error: Optional[ManagerError] = None
-        for attempt in range(max_retries + 1):
-            req = urllib.request.Request(url=url, method=method, data=body, headers=headers)
-            try:
-                with urllib.request.urlopen(req, timeout=timeout) as resp:
-                    status = resp.status
-                    raw = resp.read()
-                    raw_headers = {k: v for k, v in resp.headers.items()}
-                if status >= 400:
-                    data = self._decode(raw)
-                    code = "UPSTREAM_ERROR"
-                    message = "Go Manager error"
-                    if isinstance(data, dict):
-                        err = data.get("error", {})
-                        if isinstance(err, dict):
-                            code = err.get("code", code)
-                            message = err.get("message", message)
-                    raise ManagerError(status=status, code=code, message=message)
-                self._on_success()
-                return status, raw_headers, raw
-            except ManagerError as e:
-                retriable = e.status >= 500
-                last_error = e
-                if not retriable or attempt == max_retries:
-                    break
-                time.sleep(0.05 * (attempt + 1))
-            except urllib.error.HTTPError as e:
-                raw = e.read() if e.fp else b""
-                data = self._decode(raw)
-                code = "UPSTREAM_ERROR"
-                message = "Go Manager error"
-                if isinstance(data, dict):
-                    err = data.get("error", {})
-                    if isinstance(err, dict):
-                        code = err.get("code", code)
-                        message = err.get("message", message)
-                last_error = ManagerError(status=e.code, code=code, message=message)
-                if e.code < 500 or attempt == max_retries:
-                    break
-                time.sleep(0.05 * (attempt + 1))
-            except (urllib.error.URLError, TimeoutError) as e:
-                self._on_failure()
-                last_error = ManagerError(status=503, code="UPSTREAM_UNAVAILABLE", message=str(e))
-                if attempt == max_retries:
-                    break
-                time.sleep(0.05 * (attempt + 1))
-
-        if last_error is None:
-            last_error = ManagerError(status=500, code="INTERNAL_ERROR", message="unknown manager client error")
-        if last_error.status >= 500:
-            self._on_failure()
-        raise last_error
+    def stats(self) -> dict:
+        """熔断状态、连接池与各接口耗时直方图"""
+        with self._lock:
+            circuit = {"state": self._state, "failure_count": self._failure_count}
+        return {
+            "circuit": circuit,
+            "pool": self._pool.stats(),
+            "endpoints": self._latency.snapshot(),
+        }
 
     @staticmethod
     def _decode(raw: bytes) -> Any:
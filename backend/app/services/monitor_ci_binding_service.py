@@ -0,0 +1,174 @@
+"""
+监控任务 CI 绑定服务模块
+monitors 表由 manager-go 写入，CI 绑定保存在 annotations_json 中。这里把绑定展开到
+monitor_ci_bindings 表：按 monitors.updated_at 与已展开时间比对做增量同步，
+已删除的监控任务一次反连接删除，查询“未监控 CI”时在 SQL 中做反连接
+"""
+
+import json
+import logging
+import threading
+import time
+from typing import Iterable, Optional
+
+from flask import current_app
+from sqlalchemy import and_, exists, or_, select
+
+from app import db
+from app.models.ci_instance import CiInstance
+from app.models.hertzbeat_models import Monitor
+from app.models.monitor_ci_binding import MonitorCiBinding
+
+logger = logging.getLogger(__name__)
+
+SYNC_CHUNK_SIZE = 500
+DEFAULT_SYNC_SECONDS = 30
+
+_sync_lock = threading.Lock()
+_last_sync_at = None
+
+
+def _chunked(items: list, size: int = SYNC_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _positive_int(value) -> Optional[int]:
+    try:
+        value = int(value or 0)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def _binding_row(monitor_id, name, app, annotations_json, updated_at) -> dict:
+    try:
+        annotations = json.loads(annotations_json or "{}")
+    except Exception:
+        annotations = {}
+    if not isinstance(annotations, dict):
+        annotations = {}
+    return {
+        "monitor_id": monitor_id,
+        "ci_id": _positive_int(annotations.get("ci_id")),
+        "ci_model_id": _positive_int(annotations.get("ci_model_id")),
+        "monitor_name": name,
+        "app": app,
+        "monitor_updated_at": updated_at,
+    }
+
+
+def sync_monitor_bindings(monitor_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    同步监控任务的 CI 绑定
+
+    Args:
+        monitor_ids: 只同步指定监控任务（创建/更新/删除后调用）；为空时增量同步全部
+
+    Returns:
+        int: 重新展开的监控任务数
+    """
+    binding = MonitorCiBinding.__table__
+    monitor = Monitor.__table__
+
+    stale = binding.delete().where(
+        ~exists(select(monitor.c.id).where(monitor.c.id == binding.c.monitor_id))
+    )
+    changed = select(
+        monitor.c.id,
+        monitor.c.name,
+        monitor.c.app,
+        monitor.c.annotations_json,
+        monitor.c.updated_at,
+    ).select_from(monitor.outerjoin(binding, binding.c.monitor_id == monitor.c.id))
+    if monitor_ids is not None:
+        monitor_ids = sorted({int(mid) for mid in monitor_ids if mid})
+        if not monitor_ids:
+            return 0
+        stale = stale.where(binding.c.monitor_id.in_(monitor_ids))
+        changed = changed.where(monitor.c.id.in_(monitor_ids))
+    else:
+        changed = changed.where(
+            or_(
+                binding.c.monitor_id.is_(None),
+                binding.c.monitor_updated_at.is_(None),
+                binding.c.monitor_updated_at != monitor.c.updated_at,
+            )
+        )
+
+    try:
+        connection = db.session.connection()
+        connection.execute(stale)
+        rows = [_binding_row(*row) for row in connection.execute(changed)]
+        for chunk in _chunked(rows):
+            connection.execute(
+                binding.delete().where(
+                    binding.c.monitor_id.in_([row["monitor_id"] for row in chunk])
+                )
+            )
+            connection.execute(binding.insert(), chunk)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(rows)
+
+
+def ensure_monitor_bindings_fresh():
+    """距上次同步超过 MONITOR_CI_BINDING_SYNC_SECONDS 时做一次增量同步"""
+    global _last_sync_at
+    try:
+        interval = float(
+            current_app.config.get("MONITOR_CI_BINDING_SYNC_SECONDS", DEFAULT_SYNC_SECONDS)
+        )
+    except (RuntimeError, TypeError, ValueError):
+        interval = DEFAULT_SYNC_SECONDS
+
+    # 其他请求正在同步时直接使用现有绑定，不排队等待
+    if not _sync_lock.acquire(blocking=False):
+        return
+    try:
+        now = time.monotonic()
+        if _last_sync_at is not None and now - _last_sync_at < interval:
+            return
+        try:
+            sync_monitor_bindings()
+        except Exception as e:
+            logger.error(f"同步监控任务 CI 绑定失败: {e}")
+            return
+        _last_sync_at = now
+    finally:
+        _sync_lock.release()
+
+
+def _binding_criteria(model_id: Optional[int]):
+    criteria = [MonitorCiBinding.ci_id == CiInstance.id]
+    if model_id:
+        # 未记录模型的绑定视为匹配任意模型
+        criteria.append(
+            or_(MonitorCiBinding.ci_model_id.is_(None), MonitorCiBinding.ci_model_id == model_id)
+        )
+    return and_(*criteria)
+
+
+def monitored_ci_filter(model_id: Optional[int] = None):
+    """CiInstance 上的谓词：CI 已被监控任务绑定（取反即未监控）"""
+    return exists(select(MonitorCiBinding.monitor_id).where(_binding_criteria(model_id)))
+
+
+def load_ci_bindings(ci_ids: Iterable[int], model_id: Optional[int] = None) -> dict:
+    """ci_id -> [{monitor_id, monitor_name, app}]"""
+    ci_ids = sorted({int(ci_id) for ci_id in ci_ids if ci_id})
+    result = {}
+    for chunk in _chunked(ci_ids):
+        query = MonitorCiBinding.query.filter(MonitorCiBinding.ci_id.in_(chunk))
+        if model_id:
+            query = query.filter(
+                or_(
+                    MonitorCiBinding.ci_model_id.is_(None),
+                    MonitorCiBinding.ci_model_id == model_id,
+                )
+            )
+        for row in query.order_by(MonitorCiBinding.monitor_id):
+            result.setdefault(row.ci_id, []).append(row.to_dict())
+    return result
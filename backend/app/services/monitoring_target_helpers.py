@@ -1,5 +1,4 @@
-from collections import Counter
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 import json
 import re
 
@@ -51,33 +50,6 @@ def _monitor_is_healthy(item: dict) -> bool:
     return True
 
 
-def _hourly_alert_trend(history_alerts: list[dict]) -> list[dict]:
-    now = datetime.now(timezone.utc)
-    hour_floor = now.replace(minute=0, second=0, microsecond=0)
-    points = [hour_floor - timedelta(hours=23 - i) for i in range(24)]
-    counts = {point: 0 for point in points}
-
-    for alert in history_alerts:
-        ts = _parse_time(alert.get("triggered_at"))
-        if not ts:
-            continue
-        bucket = ts.replace(minute=0, second=0, microsecond=0)
-        if bucket in counts:
-            counts[bucket] += 1
-
-    return [{"time": point.strftime("%H:00"), "value": counts[point]} for point in points]
-
-
-def _top_alert_monitors(current_alerts: list[dict], limit: int = 10) -> list[dict]:
-    counter: Counter[str] = Counter()
-    for alert in current_alerts:
-        key = alert.get("monitor_name") or alert.get("instance") or alert.get("monitor_id")
-        if key is None:
-            continue
-        counter[str(key)] += 1
-    return [{"name": name, "value": value} for name, value in counter.most_common(limit)]
-
-
 def _paginate_items(items: list[dict], page: int, page_size: int) -> tuple[list[dict], int]:
     total = len(items)
     start = (page - 1) * page_size
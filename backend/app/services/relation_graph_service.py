@@ -0,0 +1,241 @@
+"""
+关系图缓存服务模块
+进程级 CI 邻接索引，供拓扑接口在内存中遍历
+
+邻接表以 ci_id -> array('q') 存储 (relation_id, peer_id, relation_type_id) 三元组，
+首次使用时懒加载，关系增删后增量更新。各进程通过 system_configs 中的共享版本号
+判断本地副本是否过期：写入方在自己的事务中递增版本号，提交后再增量更新本地副本；
+读取方发现不一致即整体重载。
+"""
+
+import threading
+from array import array
+from typing import Iterable
+
+from sqlalchemy import BigInteger, Text, cast, event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models.cmdb_relation import CmdbRelation
+from app.models.config import SystemConfig
+
+GRAPH_VERSION_KEY = "cmdb_relation_graph_version"
+GRAPH_CHANGES_KEY = "cmdb_relation_graph_changes"
+LOAD_BATCH_SIZE = 5000
+
+
+def _remove_triple(adjacency: dict, ci_id: int, relation_id: int):
+    items = adjacency.get(ci_id)
+    if not items:
+        return
+    for i in range(0, len(items), 3):
+        if items[i] == relation_id:
+            del items[i : i + 3]
+            break
+    if not items:
+        adjacency.pop(ci_id, None)
+
+
+class RelationGraph:
+    """进程级关系邻接索引"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._out = {}
+        self._in = {}
+        self._version = None
+
+    # ---------- 共享版本号 ----------
+
+    @staticmethod
+    def _read_shared_version() -> int:
+        table = SystemConfig.__table__
+        value = db.session.execute(
+            db.select(table.c.config_value).where(table.c.config_key == GRAPH_VERSION_KEY)
+        ).scalar()
+        try:
+            return int(value or 0)
+        except (TypeError, ValueError):
+            return 0
+
+    @staticmethod
+    def _bump_shared_version() -> int:
+        """在当前事务中递增共享版本号（行锁持有到调用方提交），返回新版本号"""
+        table = SystemConfig.__table__
+        bump = (
+            table.update()
+            .where(table.c.config_key == GRAPH_VERSION_KEY)
+            .values(config_value=cast(cast(table.c.config_value, BigInteger) + 1, Text))
+        )
+        if db.session.execute(bump).rowcount == 0:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(
+                        table.insert().values(config_key=GRAPH_VERSION_KEY, config_value="1")
+                    )
+            except IntegrityError:
+                # 其他进程同时写入了首个版本号
+                db.session.execute(bump)
+        version = db.session.execute(
+            db.select(table.c.config_value).where(table.c.config_key == GRAPH_VERSION_KEY)
+        ).scalar()
+        return int(version)
+
+    # ---------- 加载与失效 ----------
+
+    def _load(self):
+        version = self._read_shared_version()
+        out_adjacency = {}
+        in_adjacency = {}
+        rows = (
+            db.session.query(
+                CmdbRelation.id,
+                CmdbRelation.source_ci_id,
+                CmdbRelation.target_ci_id,
+                CmdbRelation.relation_type_id,
+            )
+            .order_by(CmdbRelation.id)
+            .yield_per(LOAD_BATCH_SIZE)
+        )
+        for relation_id, source_id, target_id, relation_type_id in rows:
+            out_adjacency.setdefault(source_id, array("q")).extend(
+                (relation_id, target_id, relation_type_id)
+            )
+            in_adjacency.setdefault(target_id, array("q")).extend(
+                (relation_id, source_id, relation_type_id)
+            )
+        self._out = out_adjacency
+        self._in = in_adjacency
+        self._version = version
+
+    def ensure_fresh(self):
+        """本地副本缺失或共享版本号变化时重新加载"""
+        with self._lock:
+            if self._version is None or self._read_shared_version() != self._version:
+                self._load()
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+
+    @property
+    def version(self):
+        return self._version
+
+    # ---------- 增量更新 ----------
+
+    def record_changes(self, added: Iterable = (), removed: Iterable = ()):
+        """
+        在关系变更所在事务提交前调用：递增共享版本号，提交后再增量更新本地副本
+
+        事务回滚时本地副本不变，共享版本号也随之回滚。
+
+        Args:
+            added: 新增关系 (relation_id, source_ci_id, target_ci_id, relation_type_id)
+            removed: 删除关系，格式同上
+        """
+        added = list(added)
+        removed = list(removed)
+        if not added and not removed:
+            return
+        version = self._bump_shared_version()
+        db.session.info.setdefault(GRAPH_CHANGES_KEY, []).append((self, version, added, removed))
+
+    def _apply_committed(self, version: int, added: list, removed: list):
+        with self._lock:
+            # 期间有其他进程写入时无法保证增量正确，等待下次使用时整体重载
+            if self._version is None or version != self._version + 1:
+                self._version = None
+                return
+
+            for relation_id, source_id, target_id, _ in removed:
+                _remove_triple(self._out, source_id, relation_id)
+                _remove_triple(self._in, target_id, relation_id)
+            for relation_id, source_id, target_id, relation_type_id in added:
+                _remove_triple(self._out, source_id, relation_id)
+                _remove_triple(self._in, target_id, relation_id)
+                self._out.setdefault(source_id, array("q")).extend(
+                    (relation_id, target_id, relation_type_id)
+                )
+                self._in.setdefault(target_id, array("q")).extend(
+                    (relation_id, source_id, relation_type_id)
+                )
+            self._version = version
+
+    def add_relation(self, relation: CmdbRelation):
+        self.record_changes(added=[relation_edge(relation)])
+
+    def remove_relation(self, relation: CmdbRelation):
+        self.record_changes(removed=[relation_edge(relation)])
+
+    # ---------- 查询 ----------
+
+    def edges_of(self, ci_id: int) -> list:
+        """CI 的全部关系 (relation_id, source_ci_id, target_ci_id, relation_type_id)"""
+        edges = []
+        items = self._out.get(ci_id, ())
+        for i in range(0, len(items), 3):
+            edges.append((items[i], ci_id, items[i + 1], items[i + 2]))
+        items = self._in.get(ci_id, ())
+        for i in range(0, len(items), 3):
+            edges.append((items[i], items[i + 1], ci_id, items[i + 2]))
+        return edges
+
+    def relation_ids_within_depth(self, start_ci_ids: Iterable[int], max_depth: int) -> set:
+        """不考虑权限时，起点 max_depth 层以内可达的全部关系 ID"""
+        self.ensure_fresh()
+        with self._lock:
+            visited_nodes = set(start_ci_ids)
+            frontier = list(visited_nodes)
+            relation_ids = set()
+            depth = 0
+            while frontier and depth < max_depth:
+                next_frontier = []
+                for ci_id in frontier:
+                    for adjacency in (self._out, self._in):
+                        items = adjacency.get(ci_id, ())
+                        for i in range(0, len(items), 3):
+                            relation_ids.add(items[i])
+                            peer_id = items[i + 1]
+                            if peer_id not in visited_nodes:
+                                visited_nodes.add(peer_id)
+                                next_frontier.append(peer_id)
+                frontier = next_frontier
+                depth += 1
+            return relation_ids
+
+    def all_edges(self) -> list:
+        """按关系 ID 排序的全部关系 (relation_id, source_ci_id, target_ci_id, relation_type_id)"""
+        self.ensure_fresh()
+        with self._lock:
+            edges = []
+            for source_id, items in self._out.items():
+                for i in range(0, len(items), 3):
+                    edges.append((items[i], source_id, items[i + 1], items[i + 2]))
+        edges.sort()
+        return edges
+
+
+def relation_edge(relation: CmdbRelation) -> tuple:
+    return (
+        relation.id,
+        relation.source_ci_id,
+        relation.target_ci_id,
+        relation.relation_type_id,
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def apply_relation_graph_changes(session):
+    for graph, version, added, removed in session.info.pop(GRAPH_CHANGES_KEY, ()):
+        graph._apply_committed(version, added, removed)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_relation_graph_changes(session):
+    session.info.pop(GRAPH_CHANGES_KEY, None)
+
+
+# 全局关系图实例
+relation_graph = RelationGraph()
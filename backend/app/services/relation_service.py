@@ -1,10 +1,12 @@
 from typing import Any
 
+from sqlalchemy import insert, or_
 from sqlalchemy.exc import IntegrityError
 
 from app import db
 from app.models.ci_instance import CiInstance
 from app.models.cmdb_relation import CmdbRelation, RelationType
+from app.services.relation_graph_service import relation_graph
 
 
 class RelationServiceError(Exception):
@@ -110,9 +112,166 @@ def create_relation_with_validation(
     )
     db.session.add(relation)
     try:
+        db.session.flush()
+        relation_graph.add_relation(relation)
         db.session.commit()
     except IntegrityError:
         db.session.rollback()
         raise RelationServiceError("该关系已存在", 400)
 
     return relation
+
+
+BULK_CHUNK_SIZE = 500
+
+
+def _chunked(items: list, size: int = BULK_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def create_relations_bulk(candidates: list, source_type: str = "manual") -> list:
+    """
+    集合化批量创建关系，约束检查与 create_relation_with_validation 一致
+
+    现有关系、CI 存在性与关系类型各按批次一次查询，候选之间按顺序互相约束
+    （等价于逐条创建），通过校验的关系一次批量插入。
+
+    Args:
+        candidates: [(source_ci_id, target_ci_id, relation_type_id)]
+        source_type: 关系来源
+
+    Returns:
+        list: 与 candidates 一一对应，成功为关系 ID，失败为 RelationServiceError
+    """
+    results = [None] * len(candidates)
+    if not candidates:
+        return results
+
+    ci_ids = sorted({c[0] for c in candidates} | {c[1] for c in candidates})
+    type_ids = sorted({c[2] for c in candidates})
+
+    existing_ci_ids = set()
+    for chunk in _chunked(ci_ids):
+        existing_ci_ids.update(
+            row[0]
+            for row in db.session.query(CiInstance.id).filter(CiInstance.id.in_(chunk))
+        )
+    relation_types = {
+        row.id: row
+        for row in db.session.query(
+            RelationType.id,
+            RelationType.direction,
+            RelationType.cardinality,
+            RelationType.allow_self_loop,
+        ).filter(RelationType.id.in_(type_ids))
+    }
+
+    # 源端或目标端涉及候选 CI 的现有关系：用于去重、反向重复与基数检查
+    pairs = set()
+    source_used = set()
+    target_used = set()
+
+    def add_existing(rows):
+        for source_id, target_id, relation_type_id in rows:
+            pairs.add((source_id, target_id, relation_type_id))
+            source_used.add((source_id, relation_type_id))
+            target_used.add((target_id, relation_type_id))
+
+    relation_columns = (
+        CmdbRelation.source_ci_id,
+        CmdbRelation.target_ci_id,
+        CmdbRelation.relation_type_id,
+    )
+    for chunk in _chunked(ci_ids):
+        add_existing(
+            db.session.query(*relation_columns).filter(
+                CmdbRelation.relation_type_id.in_(type_ids),
+                or_(
+                    CmdbRelation.source_ci_id.in_(chunk),
+                    CmdbRelation.target_ci_id.in_(chunk),
+                ),
+            )
+        )
+
+    accepted = []
+    for index, (source_id, target_id, relation_type_id) in enumerate(candidates):
+        relation_type = relation_types.get(relation_type_id)
+        if (
+            source_id not in existing_ci_ids
+            or target_id not in existing_ci_ids
+            or relation_type is None
+        ):
+            results[index] = RelationServiceError("资源不存在", 404)
+            continue
+
+        error = None
+        if (source_id, target_id, relation_type_id) in pairs:
+            error = "该关系已存在"
+        elif (
+            relation_type.direction == "bidirectional"
+            and (target_id, source_id, relation_type_id) in pairs
+        ):
+            error = "双向关系已存在（反向重复）"
+        elif not relation_type.allow_self_loop and source_id == target_id:
+            error = "不允许创建自环关系"
+        elif relation_type.cardinality == "one_one" and (
+            source_id,
+            relation_type_id,
+        ) in source_used:
+            error = "源端已有此类型关系（1:1限制）"
+        elif (
+            relation_type.cardinality in ("one_one", "one_many")
+            and (target_id, relation_type_id) in target_used
+        ):
+            error = (
+                "目标端已有此类型关系（1:1限制）"
+                if relation_type.cardinality == "one_one"
+                else "目标端已有此类型关系（1:N限制）"
+            )
+        if error:
+            results[index] = RelationServiceError(error, 400)
+            continue
+
+        add_existing([(source_id, target_id, relation_type_id)])
+        accepted.append(index)
+
+    if not accepted:
+        return results
+
+    rows = [
+        {
+            "source_ci_id": candidates[index][0],
+            "target_ci_id": candidates[index][1],
+            "relation_type_id": candidates[index][2],
+            "source_type": source_type,
+        }
+        for index in accepted
+    ]
+    stmt = insert(CmdbRelation).returning(CmdbRelation.id, sort_by_parameter_order=True)
+    try:
+        relation_ids = []
+        for chunk in _chunked(rows):
+            relation_ids.extend(db.session.execute(stmt, chunk).scalars())
+        relation_graph.record_changes(
+            added=[
+                (relation_id, *candidates[index])
+                for index, relation_id in zip(accepted, relation_ids)
+            ]
+        )
+        db.session.commit()
+    except IntegrityError:
+        # 与并发写入冲突时回退为逐条创建，由唯一约束给出准确结果
+        db.session.rollback()
+        for index in accepted:
+            try:
+                results[index] = create_relation_with_validation(
+                    *candidates[index], source_type=source_type
+                ).id
+            except RelationServiceError as e:
+                results[index] = e
+        return results
+
+    for index, relation_id in zip(accepted, relation_ids):
+        results[index] = relation_id
+    return results
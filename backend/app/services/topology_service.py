@@ -0,0 +1,213 @@
+"""
+拓扑遍历服务模块
+按层批量查询关系，深度受限地展开 CI 拓扑
+"""
+
+from collections import defaultdict
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.models.ci_instance import CiInstance
+from app.models.cmdb_relation import CmdbRelation
+
+FRONTIER_CHUNK_SIZE = 500
+
+
+def relation_query_with_endpoints():
+    """关系查询，源/目标 CI（含模型、部门）与关系类型一次性预加载"""
+    return CmdbRelation.query.options(
+        joinedload(CmdbRelation.source_ci).joinedload(CiInstance.model),
+        joinedload(CmdbRelation.source_ci).joinedload(CiInstance.department),
+        joinedload(CmdbRelation.target_ci).joinedload(CiInstance.model),
+        joinedload(CmdbRelation.target_ci).joinedload(CiInstance.department),
+        joinedload(CmdbRelation.relation_type),
+    )
+
+
+def load_relations_by_ids(relation_ids: Iterable[int]) -> list:
+    """按 ID 分块加载关系（预加载两端 CI 及其模型、部门与关系类型），按 ID 排序"""
+    relation_ids = sorted(relation_ids)
+    relations = []
+    for i in range(0, len(relation_ids), FRONTIER_CHUNK_SIZE):
+        chunk = relation_ids[i : i + FRONTIER_CHUNK_SIZE]
+        relations.extend(
+            relation_query_with_endpoints()
+            .filter(CmdbRelation.id.in_(chunk))
+            .order_by(CmdbRelation.id)
+            .all()
+        )
+    return relations
+
+
+def load_ci_access_rows(ci_ids: Iterable[int]) -> dict:
+    """只查询权限判断所需列：ci_id -> (id, model_id, department_id, created_by)"""
+    ci_ids = list(ci_ids)
+    rows = {}
+    for i in range(0, len(ci_ids), FRONTIER_CHUNK_SIZE):
+        chunk = ci_ids[i : i + FRONTIER_CHUNK_SIZE]
+        for row in db.session.query(
+            CiInstance.id,
+            CiInstance.model_id,
+            CiInstance.department_id,
+            CiInstance.created_by,
+        ).filter(CiInstance.id.in_(chunk)):
+            rows[row.id] = row
+    return rows
+
+
+def _memory_frontier_loader(relations: list) -> Callable:
+    relations_by_ci = defaultdict(list)
+    for rel in relations:
+        relations_by_ci[rel.source_ci_id].append(rel)
+        if rel.target_ci_id != rel.source_ci_id:
+            relations_by_ci[rel.target_ci_id].append(rel)
+
+    def load(frontier: list) -> list:
+        loaded = {}
+        for ci_id in frontier:
+            for rel in relations_by_ci.get(ci_id, ()):
+                loaded[rel.id] = rel
+        return [loaded[relation_id] for relation_id in sorted(loaded)]
+
+    return load
+
+
+def _load_frontier_relations(frontier: list) -> list:
+    relations = []
+    for i in range(0, len(frontier), FRONTIER_CHUNK_SIZE):
+        chunk = frontier[i : i + FRONTIER_CHUNK_SIZE]
+        relations.extend(
+            relation_query_with_endpoints()
+            .filter(
+                db.or_(
+                    CmdbRelation.source_ci_id.in_(chunk),
+                    CmdbRelation.target_ci_id.in_(chunk),
+                )
+            )
+            .order_by(CmdbRelation.id)
+            .all()
+        )
+    return relations
+
+
+def collect_relations_by_depth(
+    start_ci_ids: Iterable[int],
+    max_depth: int,
+    can_access: Optional[Callable] = None,
+    graph=None,
+) -> list:
+    """
+    从一个或多个起点 CI 出发做深度受限的广度遍历
+
+    每一层只发起一次（按 IN 分块的）批量查询，结果与逐个起点遍历后取并集一致：
+    某条关系被收录，当且仅当它的一端距最近起点的层数小于 max_depth，
+    且两端 CI 均可访问；不可访问的关系不参与继续展开。
+
+    Args:
+        start_ci_ids: 起点 CI ID 列表
+        max_depth: 最大展开层数
+        can_access: CI 访问判定函数，为空时不做过滤
+        graph: 关系图缓存；提供时先在内存中求出候选关系，再一次性按 ID 加载
+
+    Returns:
+        list: 关系列表（已预加载两端 CI 及其模型、部门与关系类型）
+    """
+    start_ci_ids = list(start_ci_ids)
+    load_frontier = _load_frontier_relations
+    if graph is not None:
+        candidate_ids = graph.relation_ids_within_depth(start_ci_ids, max_depth)
+        load_frontier = _memory_frontier_loader(load_relations_by_ids(candidate_ids))
+
+    visited_nodes = set()
+    frontier = []
+    for ci_id in start_ci_ids:
+        if ci_id not in visited_nodes:
+            visited_nodes.add(ci_id)
+            frontier.append(ci_id)
+
+    visited_relations = set()
+    relation_list = []
+    depth = 0
+    while frontier and depth < max_depth:
+        next_frontier = []
+        for rel in load_frontier(frontier):
+            if rel.id in visited_relations:
+                continue
+            if not rel.source_ci or not rel.target_ci:
+                continue
+            if can_access and not (
+                can_access(rel.source_ci) and can_access(rel.target_ci)
+            ):
+                continue
+
+            visited_relations.add(rel.id)
+            relation_list.append(rel)
+
+            for next_ci_id in (rel.source_ci_id, rel.target_ci_id):
+                if next_ci_id not in visited_nodes:
+                    visited_nodes.add(next_ci_id)
+                    next_frontier.append(next_ci_id)
+
+        frontier = next_frontier
+        depth += 1
+
+    return relation_list
+
+
+def collect_all_relations(
+    graph,
+    can_access: Optional[Callable] = None,
+    model_ids: Optional[Iterable[int]] = None,
+    node_limit: Optional[int] = None,
+) -> list:
+    """
+    全局拓扑：基于关系图缓存在内存中完成权限与模型过滤，只加载需要展示的关系
+
+    node_limit 与拓扑截断规则一致（按关系顺序取前 N 个节点），
+    此时只加载至少一端落在这 N 个节点内的关系。
+
+    Args:
+        graph: 关系图缓存
+        can_access: 作用于 (id, model_id, department_id, created_by) 行的访问判定函数
+        model_ids: 模型过滤，关系任一端属于这些模型即保留
+        node_limit: 节点数量上限
+    """
+    edges = graph.all_edges()
+    ci_ids = set()
+    for _, source_id, target_id, _ in edges:
+        ci_ids.add(source_id)
+        ci_ids.add(target_id)
+    ci_rows = load_ci_access_rows(ci_ids)
+    model_id_set = set(model_ids or [])
+
+    selected = []
+    for relation_id, source_id, target_id, _ in edges:
+        source = ci_rows.get(source_id)
+        target = ci_rows.get(target_id)
+        if not source or not target:
+            continue
+        if can_access and not (can_access(source) and can_access(target)):
+            continue
+        if (
+            model_id_set
+            and source.model_id not in model_id_set
+            and target.model_id not in model_id_set
+        ):
+            continue
+        selected.append((relation_id, source_id, target_id))
+
+    if node_limit:
+        limited_nodes = set()
+        for _, source_id, target_id in selected:
+            for ci_id in (source_id, target_id):
+                if len(limited_nodes) < node_limit:
+                    limited_nodes.add(ci_id)
+        selected = [
+            edge
+            for edge in selected
+            if edge[1] in limited_nodes or edge[2] in limited_nodes
+        ]
+
+    return load_relations_by_ids([edge[0] for edge in selected])
@@ -5,10 +5,9 @@
 
 import json
 import logging
-from typing import Optional
-from threading import Thread
+from typing import Callable, Optional
+from threading import Lock
 from collections import defaultdict
-from flask import current_app
 
 from app import db
 from app.models.cmdb_relation import (
@@ -17,8 +16,10 @@ from app.models.cmdb_relation import (
     CmdbRelation,
 )
 from app.models.ci_instance import CiInstance
+from app.services.relation_graph_service import relation_graph
 from app.services.relation_service import (
     create_relation_with_validation,
+    create_relations_bulk,
     RelationServiceError,
 )
 
@@ -75,6 +76,69 @@ def get_matching_triggers(ci: CiInstance) -> list:
     return triggers
 
 
+MATCH_CHUNK_SIZE = 500
+
+
+def _parse_condition_fields(trigger: RelationTrigger) -> tuple:
+    condition = (
+        json.loads(trigger.trigger_condition) if trigger.trigger_condition else {}
+    )
+    return condition.get("source_field"), condition.get("target_field")
+
+
+def _decode_attributes(raw: Optional[str]) -> dict:
+    try:
+        values = json.loads(raw) if raw else {}
+    except Exception:
+        return {}
+    return values if isinstance(values, dict) else {}
+
+
+def _chunked(items: list, size: int = MATCH_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+class TriggerMatcher:
+    """
+    触发器哈希匹配器
+
+    按 (目标模型, 目标字段) 构建一次 值 -> 目标 CI ID 列表 的哈希索引，
+    在同一次扫描内被所有源 CI 复用，匹配成本从 O(N×M) 降为 O(N+M)。
+    """
+
+    def __init__(self):
+        self._indexes = {}
+
+    def get_index(self, target_model_id: int, target_field: str) -> dict:
+        key = (target_model_id, target_field)
+        if key not in self._indexes:
+            index = defaultdict(list)
+            rows = db.session.query(CiInstance.id, CiInstance.attribute_values).filter(
+                CiInstance.model_id == target_model_id
+            )
+            for ci_id, raw in rows:
+                target_value = _decode_attributes(raw).get(target_field)
+                if target_value is not None:
+                    index[str(target_value)].append(ci_id)
+            self._indexes[key] = index
+        return self._indexes[key]
+
+    def match(self, attrs: dict, trigger: RelationTrigger) -> list:
+        """返回源属性在触发器目标模型上匹配到的目标 CI ID 列表"""
+        source_field, target_field = _parse_condition_fields(trigger)
+        if not source_field or not target_field:
+            logger.warning(f"触发器 {trigger.id} 条件不完整")
+            return []
+
+        source_value = attrs.get(source_field)
+        if source_value is None:
+            return []
+
+        index = self.get_index(trigger.target_model_id, target_field)
+        return list(index.get(str(source_value), []))
+
+
 def match_trigger_condition(ci: CiInstance, trigger: RelationTrigger) -> list:
     """
     精确值匹配触发条件，查找目标 CI
@@ -87,36 +151,163 @@ def match_trigger_condition(ci: CiInstance, trigger: RelationTrigger) -> list:
         list: 匹配的目标 CI 列表
     """
     try:
-        condition = (
-            json.loads(trigger.trigger_condition) if trigger.trigger_condition else {}
+        target_ids = TriggerMatcher().match(ci.get_attribute_values(), trigger)
+        if not target_ids:
+            return []
+        return CiInstance.query.filter(CiInstance.id.in_(target_ids)).all()
+    except Exception as e:
+        logger.error(f"匹配触发器条件失败: {e}")
+        return []
+
+
+def load_source_items(model_id: int, ci_ids: Optional[list] = None) -> list:
+    """
+    读取源模型 CI 的 (ID, 属性字典) 列表，只查询必要列
+
+    Args:
+        model_id: 源模型 ID
+        ci_ids: 限定的 CI ID 列表
+
+    Returns:
+        list: [(ci_id, attrs)]
+    """
+    query = db.session.query(CiInstance.id, CiInstance.attribute_values).filter(
+        CiInstance.model_id == model_id
+    )
+    if ci_ids is not None:
+        query = query.filter(CiInstance.id.in_(ci_ids))
+    return [
+        (ci_id, _decode_attributes(raw)) for ci_id, raw in query.order_by(CiInstance.id)
+    ]
+
+
+def sync_trigger_relations(
+    source_items: list,
+    triggers: list,
+    matcher: Optional[TriggerMatcher] = None,
+    log_skipped: bool = True,
+    success_message: str = "关系创建成功",
+) -> dict:
+    """
+    集合化执行触发器：批量匹配、批量比对现有规则关系并清理过期关系
+
+    Args:
+        source_items: [(源 CI ID, 属性字典)]
+        triggers: 同一源模型下的触发器列表
+        matcher: 跨批次复用的匹配器
+        log_skipped: 是否记录跳过日志并统计未匹配的触发器
+        success_message: 创建成功日志内容
+
+    Returns:
+        dict: created_count/skipped_count/failed_count 统计
+    """
+    result = {"created_count": 0, "skipped_count": 0, "failed_count": 0}
+    if not source_items or not triggers:
+        return result
+
+    matcher = matcher or TriggerMatcher()
+    source_ids = [ci_id for ci_id, _ in source_items]
+    relation_type_ids = {t.relation_type_id for t in triggers}
+    governed_keys = {(t.relation_type_id, t.target_model_id) for t in triggers}
+
+    matches = []
+    expected = set()
+    for ci_id, attrs in source_items:
+        for trigger in triggers:
+            target_ids = matcher.match(attrs, trigger)
+            matches.append((trigger, ci_id, target_ids))
+            for target_id in target_ids:
+                expected.add((ci_id, trigger.relation_type_id, target_id))
+
+    # 一次查询取出这批源 CI 的相关关系：过期规则关系批量删除，其余用于去重
+    existing = set()
+    stale_edges = []
+    for chunk in _chunked(source_ids):
+        rows = (
+            db.session.query(
+                CmdbRelation.id,
+                CmdbRelation.source_ci_id,
+                CmdbRelation.target_ci_id,
+                CmdbRelation.relation_type_id,
+                CmdbRelation.source_type,
+                CiInstance.model_id,
+            )
+            .join(CiInstance, CmdbRelation.target_ci_id == CiInstance.id)
+            .filter(
+                CmdbRelation.source_ci_id.in_(chunk),
+                CmdbRelation.relation_type_id.in_(relation_type_ids),
+            )
+            .all()
         )
-        source_field = condition.get("source_field")
-        target_field = condition.get("target_field")
+        for row in rows:
+            key = (row.source_ci_id, row.relation_type_id, row.target_ci_id)
+            if (
+                row.source_type == "rule"
+                and (row.relation_type_id, row.model_id) in governed_keys
+                and key not in expected
+            ):
+                stale_edges.append(
+                    (row.id, row.source_ci_id, row.target_ci_id, row.relation_type_id)
+                )
+            else:
+                existing.add(key)
 
-        if not source_field or not target_field:
-            logger.warning(f"触发器 {trigger.id} 条件不完整")
-            return []
+    for chunk in _chunked([edge[0] for edge in stale_edges]):
+        CmdbRelation.query.filter(CmdbRelation.id.in_(chunk)).delete(
+            synchronize_session=False
+        )
+    relation_graph.record_changes(removed=stale_edges)
+    db.session.commit()
 
-        ci_attrs = ci.get_attribute_values()
-        source_value = ci_attrs.get(source_field)
+    logs = []
 
-        if source_value is None:
-            return []
+    def add_log(trigger_id, source_ci_id, target_ci_id, status, message):
+        logs.append(
+            TriggerExecutionLog(
+                trigger_id=trigger_id,
+                source_ci_id=source_ci_id,
+                target_ci_id=target_ci_id,
+                status=status,
+                message=message,
+            )
+        )
 
-        target_cis = CiInstance.query.filter_by(model_id=trigger.target_model_id).all()
+    pending = []
+    for trigger, ci_id, target_ids in matches:
+        if not target_ids:
+            if log_skipped:
+                add_log(trigger.id, ci_id, None, "skipped", "未找到匹配的目标 CI")
+                result["skipped_count"] += 1
+            continue
 
-        matched = []
-        for target_ci in target_cis:
-            target_attrs = target_ci.get_attribute_values()
-            target_value = target_attrs.get(target_field)
+        for target_id in target_ids:
+            key = (ci_id, trigger.relation_type_id, target_id)
+            if key in existing:
+                if log_skipped:
+                    add_log(trigger.id, ci_id, target_id, "skipped", "关系已存在")
+                result["skipped_count"] += 1
+                continue
+            existing.add(key)
+            pending.append((trigger, ci_id, target_id))
 
-            if target_value is not None and str(target_value) == str(source_value):
-                matched.append(target_ci)
+    outcomes = create_relations_bulk(
+        [(ci_id, target_id, trigger.relation_type_id) for trigger, ci_id, target_id in pending],
+        source_type="rule",
+    )
+    for (trigger, ci_id, target_id), outcome in zip(pending, outcomes):
+        if isinstance(outcome, RelationServiceError):
+            logger.error(f"创建关系失败: {outcome}")
+            if log_skipped:
+                add_log(trigger.id, ci_id, target_id, "skipped", outcome.message)
+            result["skipped_count"] += 1
+            continue
+        add_log(trigger.id, ci_id, target_id, "success", success_message)
+        result["created_count"] += 1
 
-        return matched
-    except Exception as e:
-        logger.error(f"匹配触发器条件失败: {e}")
-        return []
+    if logs:
+        db.session.add_all(logs)
+        db.session.commit()
+    return result
 
 
 def create_relation_with_skip_duplicate(
@@ -175,87 +366,14 @@ def process_ci_triggers(ci: CiInstance) -> dict:
     triggers = get_matching_triggers(ci)
     result["total_triggers"] = len(triggers)
 
-    # 先计算当前 CI 在每个(关系类型, 目标模型)维度下应存在的目标集合，
-    # 用于清理不再匹配的旧规则关系（source_type=rule）。
-    expected_targets_by_key = defaultdict(set)
-    matched_targets_by_trigger = {}
-
-    for trigger in triggers:
-        try:
-            target_cis = match_trigger_condition(ci, trigger)
-            matched_targets_by_trigger[trigger.id] = target_cis
-
-            key = (trigger.relation_type_id, trigger.target_model_id)
-            for target_ci in target_cis:
-                expected_targets_by_key[key].add(target_ci.id)
-        except Exception as e:
-            logger.error(f"预计算触发器 {trigger.id} 匹配目标失败: {e}")
-            matched_targets_by_trigger[trigger.id] = []
-
-    for relation_type_id, target_model_id in {
-        (t.relation_type_id, t.target_model_id) for t in triggers
-    }:
-        existing_relations = (
-            CmdbRelation.query.join(CiInstance, CmdbRelation.target_ci_id == CiInstance.id)
-            .filter(
-                CmdbRelation.source_ci_id == ci.id,
-                CmdbRelation.relation_type_id == relation_type_id,
-                CmdbRelation.source_type == "rule",
-                CiInstance.model_id == target_model_id,
-            )
-            .all()
-        )
-        expected_target_ids = expected_targets_by_key.get(
-            (relation_type_id, target_model_id), set()
+    try:
+        result.update(
+            sync_trigger_relations([(ci.id, ci.get_attribute_values())], triggers)
         )
-        for relation in existing_relations:
-            if relation.target_ci_id not in expected_target_ids:
-                db.session.delete(relation)
-    db.session.commit()
-
-    for trigger in triggers:
-        try:
-            target_cis = matched_targets_by_trigger.get(trigger.id, [])
-
-            if not target_cis:
-                log_trigger_execution(
-                    trigger_id=trigger.id,
-                    source_ci_id=ci.id,
-                    target_ci_id=None,
-                    status="skipped",
-                    message="未找到匹配的目标 CI",
-                )
-                result["skipped_count"] += 1
-                continue
-
-            for target_ci in target_cis:
-                relation, created = create_relation_with_skip_duplicate(
-                    source_ci_id=ci.id,
-                    target_ci_id=target_ci.id,
-                    relation_type_id=trigger.relation_type_id,
-                )
-
-                if created:
-                    log_trigger_execution(
-                        trigger_id=trigger.id,
-                        source_ci_id=ci.id,
-                        target_ci_id=target_ci.id,
-                        status="success",
-                        message="关系创建成功",
-                    )
-                    result["created_count"] += 1
-                else:
-                    log_trigger_execution(
-                        trigger_id=trigger.id,
-                        source_ci_id=ci.id,
-                        target_ci_id=target_ci.id,
-                        status="skipped",
-                        message="关系已存在",
-                    )
-                    result["skipped_count"] += 1
-
-        except Exception as e:
-            logger.error(f"处理触发器 {trigger.id} 失败: {e}")
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"处理 CI {ci.id} 触发器失败: {e}")
+        for trigger in triggers:
             log_trigger_execution(
                 trigger_id=trigger.id,
                 source_ci_id=ci.id,
@@ -263,7 +381,7 @@ def process_ci_triggers(ci: CiInstance) -> dict:
                 status="failed",
                 message=str(e),
             )
-            result["failed_count"] += 1
+        result["failed_count"] += len(triggers)
 
     return result
 
@@ -284,61 +402,11 @@ def process_single_trigger(ci: CiInstance, trigger: RelationTrigger) -> dict:
         return result
 
     try:
-        target_cis = match_trigger_condition(ci, trigger)
-        expected_target_ids = {target_ci.id for target_ci in target_cis}
-
-        existing_relations = (
-            CmdbRelation.query.join(CiInstance, CmdbRelation.target_ci_id == CiInstance.id)
-            .filter(
-                CmdbRelation.source_ci_id == ci.id,
-                CmdbRelation.relation_type_id == trigger.relation_type_id,
-                CmdbRelation.source_type == "rule",
-                CiInstance.model_id == trigger.target_model_id,
-            )
-            .all()
+        result.update(
+            sync_trigger_relations([(ci.id, ci.get_attribute_values())], [trigger])
         )
-
-        for relation in existing_relations:
-            if relation.target_ci_id not in expected_target_ids:
-                db.session.delete(relation)
-        db.session.commit()
-
-        if not target_cis:
-            log_trigger_execution(
-                trigger_id=trigger.id,
-                source_ci_id=ci.id,
-                target_ci_id=None,
-                status="skipped",
-                message="未找到匹配的目标 CI",
-            )
-            result["skipped_count"] += 1
-            return result
-
-        for target_ci in target_cis:
-            relation, created = create_relation_with_skip_duplicate(
-                source_ci_id=ci.id,
-                target_ci_id=target_ci.id,
-                relation_type_id=trigger.relation_type_id,
-            )
-            if created:
-                log_trigger_execution(
-                    trigger_id=trigger.id,
-                    source_ci_id=ci.id,
-                    target_ci_id=target_ci.id,
-                    status="success",
-                    message="关系创建成功",
-                )
-                result["created_count"] += 1
-            else:
-                log_trigger_execution(
-                    trigger_id=trigger.id,
-                    source_ci_id=ci.id,
-                    target_ci_id=target_ci.id,
-                    status="skipped",
-                    message="关系已存在",
-                )
-                result["skipped_count"] += 1
     except Exception as exc:
+        db.session.rollback()
         logger.error(f"执行触发器 {trigger.id} 失败: {exc}")
         log_trigger_execution(
             trigger_id=trigger.id,
@@ -352,9 +420,15 @@ def process_single_trigger(ci: CiInstance, trigger: RelationTrigger) -> dict:
     return result
 
 
-def process_trigger_for_model(trigger: RelationTrigger) -> dict:
+def process_trigger_for_model(
+    trigger: RelationTrigger, progress: Optional[Callable[..., None]] = None
+) -> dict:
     """
     对指定触发器的源模型下全部 CI 执行一次关系重建。
+
+    Args:
+        trigger: 触发器
+        progress: 进度回调，每批结束后调用，可抛出 JobCancelled 中止执行
     """
     result = {
         "processed_ci_count": 0,
@@ -365,13 +439,24 @@ def process_trigger_for_model(trigger: RelationTrigger) -> dict:
     if not trigger or not trigger.source_model_id:
         return result
 
-    source_cis = CiInstance.query.filter_by(model_id=trigger.source_model_id).all()
-    for ci in source_cis:
-        per_ci = process_single_trigger(ci, trigger)
-        result["processed_ci_count"] += 1
-        result["created_count"] += per_ci["created_count"]
-        result["skipped_count"] += per_ci["skipped_count"]
-        result["failed_count"] += per_ci["failed_count"]
+    matcher = TriggerMatcher()
+    source_items = load_source_items(trigger.source_model_id)
+    for chunk in _chunked(source_items):
+        try:
+            per_chunk = sync_trigger_relations(chunk, [trigger], matcher)
+        except Exception as exc:
+            db.session.rollback()
+            logger.error(f"执行触发器 {trigger.id} 失败: {exc}")
+            per_chunk = {"created_count": 0, "skipped_count": 0, "failed_count": len(chunk)}
+        result["processed_ci_count"] += len(chunk)
+        result["created_count"] += per_chunk["created_count"]
+        result["skipped_count"] += per_chunk["skipped_count"]
+        result["failed_count"] += per_chunk["failed_count"]
+        if progress:
+            progress(
+                progress=result["processed_ci_count"] * 100 // len(source_items),
+                **result,
+            )
     return result
 
 
@@ -379,6 +464,8 @@ def execute_scheduled_trigger(trigger_id: int) -> dict:
     """
     供 APScheduler 调用的触发器定时扫描入口。
     """
+    from app.services.job_service import job_manager, model_key
+
     trigger = RelationTrigger.query.get(trigger_id)
     if not trigger or not trigger.is_active:
         return {
@@ -387,19 +474,89 @@ def execute_scheduled_trigger(trigger_id: int) -> dict:
             "skipped_count": 0,
             "failed_count": 0,
         }
-    return process_trigger_for_model(trigger)
+    with job_manager.hold_key(model_key(trigger.source_model_id)) as acquired:
+        if not acquired:
+            logger.warning(f"模型 {trigger.source_model_id} 正在执行扫描，跳过触发器 {trigger_id}")
+            return {
+                "processed_ci_count": 0,
+                "created_count": 0,
+                "skipped_count": 0,
+                "failed_count": 0,
+            }
+        return process_trigger_for_model(trigger)
+
+
+class CiTriggerQueue:
+    """
+    CI 保存后的触发器处理队列
 
+    保存时只登记 CI ID；同一时间最多一个后台批处理在任务线程池中运行，
+    按模型分批集合化执行触发器，批量编辑大量 CI 时不会为每个 CI 创建线程。
+    """
 
-def process_ci_triggers_async(ci_id: int) -> None:
-    app = current_app._get_current_object()
+    def __init__(self):
+        self._lock = Lock()
+        self._pending = set()
+        self._draining = False
 
-    def run():
-        with app.app_context():
-            ci = CiInstance.query.get(ci_id)
-            if not ci:
+    def enqueue(self, ci_id: int):
+        from app.services.job_service import job_manager
+
+        with self._lock:
+            self._pending.add(ci_id)
+            if self._draining:
                 return
-            process_ci_triggers(ci)
+            self._draining = True
+        job_manager.submit_task(self._drain)
+
+    def _take(self) -> list:
+        with self._lock:
+            ci_ids = sorted(self._pending)
+            self._pending.clear()
+            if not ci_ids:
+                self._draining = False
+            return ci_ids
+
+    def _drain(self):
+        try:
+            while True:
+                ci_ids = self._take()
+                if not ci_ids:
+                    return
+                self._process(ci_ids)
+        except Exception:
+            with self._lock:
+                self._draining = False
+            raise
+
+    def _process(self, ci_ids: list):
+        ids_by_model = defaultdict(list)
+        for chunk in _chunked(ci_ids):
+            for ci_id, model_id in db.session.query(
+                CiInstance.id, CiInstance.model_id
+            ).filter(CiInstance.id.in_(chunk)):
+                ids_by_model[model_id].append(ci_id)
+
+        for model_id, model_ci_ids in ids_by_model.items():
+            triggers = RelationTrigger.query.filter(
+                RelationTrigger.source_model_id == model_id,
+                RelationTrigger.is_active.is_(True),
+            ).all()
+            if not triggers:
+                continue
+            matcher = TriggerMatcher()
+            for chunk in _chunked(model_ci_ids):
+                try:
+                    sync_trigger_relations(
+                        load_source_items(model_id, chunk), triggers, matcher
+                    )
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"处理 CI 触发器失败: model_id={model_id}, error={e}")
 
-    thread = Thread(target=run)
-    thread.daemon = True
-    thread.start()
+
+ci_trigger_queue = CiTriggerQueue()
+
+
+def process_ci_triggers_async(ci_id: int) -> None:
+    ci_trigger_queue.enqueue(ci_id)
@@ -5,32 +5,21 @@
 
 import logging
 from datetime import datetime
-from threading import Lock
-from collections import defaultdict
+from typing import Callable, Optional
 
 from app import db
-from app.models.cmdb_relation import BatchScanTask, RelationTrigger, CmdbRelation
+from app.models.cmdb_relation import BatchScanTask, RelationTrigger
 from app.models.ci_instance import CiInstance
+from app.services.job_service import JobCancelled, job_manager, model_key
 from app.services.trigger_service import (
-    match_trigger_condition,
-    create_relation_with_skip_duplicate,
-    log_trigger_execution,
+    TriggerMatcher,
+    load_source_items,
+    sync_trigger_relations,
 )
 
 logger = logging.getLogger(__name__)
 
-BATCH_SIZE = 100
-
-_scan_locks = {}
-_lock_manager = Lock()
-
-
-def _get_model_lock(model_id: int):
-    """获取模型级别的锁"""
-    with _lock_manager:
-        if model_id not in _scan_locks:
-            _scan_locks[model_id] = Lock()
-        return _scan_locks[model_id]
+BATCH_SIZE = 500
 
 
 def create_batch_scan_task(
@@ -76,7 +65,7 @@ def batch_scan_model(
     model_id: int, trigger_source: str = "scheduled", created_by: int = None
 ) -> dict:
     """
-    批量扫描模型的 CI 并创建关系
+    批量扫描模型的 CI 并创建关系（占用模型并发键，供定时任务调用）
 
     Args:
         model_id: 模型 ID
@@ -85,12 +74,31 @@ def batch_scan_model(
     Returns:
         dict: 扫描结果统计
     """
-    lock = _get_model_lock(model_id)
+    with job_manager.hold_key(model_key(model_id)) as acquired:
+        if not acquired:
+            logger.warning(f"模型 {model_id} 扫描任务已被锁定，跳过")
+            return {"status": "skipped", "message": "任务已被锁定"}
+        return run_batch_scan(model_id, trigger_source, created_by)
+
+
+def run_batch_scan(
+    model_id: int,
+    trigger_source: str = "scheduled",
+    created_by: int = None,
+    progress: Optional[Callable[..., None]] = None,
+) -> dict:
+    """
+    执行批量扫描（调用方负责占用模型并发键）
 
-    if not lock.acquire(blocking=False):
-        logger.warning(f"模型 {model_id} 扫描任务已被锁定，跳过")
-        return {"status": "skipped", "message": "任务已被锁定"}
+    Args:
+        model_id: 模型 ID
+        trigger_source: 触发来源
+        created_by: 创建人 ID
+        progress: 进度回调，每批结束后调用，可抛出 JobCancelled 中止扫描
 
+    Returns:
+        dict: 扫描结果统计
+    """
     try:
         task = create_batch_scan_task(
             model_id=model_id, trigger_source=trigger_source, created_by=created_by
@@ -110,8 +118,8 @@ def batch_scan_model(
             db.session.commit()
             return {"status": "completed", "message": "没有活跃的触发器"}
 
-        cis = CiInstance.query.filter_by(model_id=model_id).all()
-        task.total_count = len(cis)
+        source_items = load_source_items(model_id)
+        task.total_count = len(source_items)
         db.session.commit()
 
         result = {
@@ -121,75 +129,30 @@ def batch_scan_model(
             "failed_count": 0,
         }
 
-        for i in range(0, len(cis), BATCH_SIZE):
-            batch = cis[i : i + BATCH_SIZE]
-
-            for ci in batch:
-                try:
-                    expected_targets_by_key = defaultdict(set)
-                    matched_targets_by_trigger = {}
-
-                    for trigger in triggers:
-                        target_cis = match_trigger_condition(ci, trigger)
-                        matched_targets_by_trigger[trigger.id] = target_cis
-                        key = (trigger.relation_type_id, trigger.target_model_id)
-                        for target_ci in target_cis:
-                            expected_targets_by_key[key].add(target_ci.id)
-
-                    for relation_type_id, target_model_id in {
-                        (t.relation_type_id, t.target_model_id) for t in triggers
-                    }:
-                        existing_relations = (
-                            CmdbRelation.query.join(
-                                CiInstance, CmdbRelation.target_ci_id == CiInstance.id
-                            )
-                            .filter(
-                                CmdbRelation.source_ci_id == ci.id,
-                                CmdbRelation.relation_type_id == relation_type_id,
-                                CmdbRelation.source_type == "rule",
-                                CiInstance.model_id == target_model_id,
-                            )
-                            .all()
-                        )
-                        expected_target_ids = expected_targets_by_key.get(
-                            (relation_type_id, target_model_id), set()
-                        )
-                        for relation in existing_relations:
-                            if relation.target_ci_id not in expected_target_ids:
-                                db.session.delete(relation)
-
-                    db.session.commit()
-
-                    for trigger in triggers:
-                        target_cis = matched_targets_by_trigger.get(trigger.id, [])
-
-                        if not target_cis:
-                            continue
-
-                        for target_ci in target_cis:
-                            relation, created = create_relation_with_skip_duplicate(
-                                source_ci_id=ci.id,
-                                target_ci_id=target_ci.id,
-                                relation_type_id=trigger.relation_type_id,
-                            )
-
-                            if created:
-                                result["created_count"] += 1
-                                log_trigger_execution(
-                                    trigger_id=trigger.id,
-                                    source_ci_id=ci.id,
-                                    target_ci_id=target_ci.id,
-                                    status="success",
-                                    message="批量扫描创建关系成功",
-                                )
-                            else:
-                                result["skipped_count"] += 1
-
-                except Exception as e:
-                    logger.error(f"处理 CI {ci.id} 失败: {e}")
-                    result["failed_count"] += 1
-
-                result["processed_count"] += 1
+        # 目标值哈希索引在整次扫描内复用，每批源 CI 一次性比对现有关系
+        matcher = TriggerMatcher()
+        for i in range(0, len(source_items), BATCH_SIZE):
+            batch = source_items[i : i + BATCH_SIZE]
+
+            try:
+                batch_result = sync_trigger_relations(
+                    batch,
+                    triggers,
+                    matcher,
+                    log_skipped=False,
+                    success_message="批量扫描创建关系成功",
+                )
+                result["created_count"] += batch_result["created_count"]
+                result["skipped_count"] += batch_result["skipped_count"]
+                result["failed_count"] += batch_result["failed_count"]
+            except Exception as e:
+                db.session.rollback()
+                logger.error(
+                    f"处理 CI {batch[0][0]}-{batch[-1][0]} 失败: {e}"
+                )
+                result["failed_count"] += len(batch)
+
+            result["processed_count"] += len(batch)
 
             task.processed_count = result["processed_count"]
             task.created_count = result["created_count"]
@@ -197,6 +160,12 @@ def batch_scan_model(
             task.failed_count = result["failed_count"]
             db.session.commit()
 
+            if progress:
+                progress(
+                    progress=result["processed_count"] * 100 // max(task.total_count, 1),
+                    **result,
+                )
+
         task.status = "completed"
         task.completed_at = datetime.now()
         db.session.commit()
@@ -208,6 +177,12 @@ def batch_scan_model(
         logger.warning(f"批量扫描跳过: {e}")
         return {"status": "skipped", "message": str(e)}
 
+    except JobCancelled:
+        task.status = "cancelled"
+        task.completed_at = datetime.now()
+        db.session.commit()
+        raise
+
     except Exception as e:
         logger.error(f"批量扫描失败: model_id={model_id}, error={e}")
 
@@ -219,9 +194,6 @@ def batch_scan_model(
 
         return {"status": "failed", "message": str(e)}
 
-    finally:
-        lock.release()
-
 
 def get_running_task_for_model(model_id: int) -> BatchScanTask:
     """
@@ -0,0 +1,324 @@
+"""
+数据保留任务模块
+按主键分块删除/归档过期数据，每块单独提交，避免长事务长时间锁表；
+可选把删除前的行写入 gzip 压缩的 JSON Lines 归档文件
+"""
+
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Iterable, Optional
+
+from flask import current_app
+from sqlalchemy import select
+
+from app import db
+from app.services.audit_partition_service import drop_partitions_before, ensure_partitions
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+_metrics_lock = threading.Lock()
+_last_runs = {}
+_app = None
+
+
+def _chunk_size() -> int:
+    try:
+        size = int(current_app.config.get("RETENTION_CHUNK_SIZE", DEFAULT_CHUNK_SIZE))
+    except (RuntimeError, TypeError, ValueError):
+        size = DEFAULT_CHUNK_SIZE
+    return size if size > 0 else DEFAULT_CHUNK_SIZE
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return value
+
+
+class RetentionRun:
+    """单次保留任务的统计"""
+
+    def __init__(self, job: str):
+        self.job = job
+        self.started_at = datetime.now()
+        self._started = time.monotonic()
+        self.deleted = 0
+        self.updated = 0
+        self.archived = 0
+        self.chunks = 0
+        self.archive_file = None
+        self.error = None
+
+    def to_dict(self) -> dict:
+        return {
+            "job": self.job,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": int((time.monotonic() - self._started) * 1000),
+            "deleted": self.deleted,
+            "updated": self.updated,
+            "archived": self.archived,
+            "chunks": self.chunks,
+            "archive_file": self.archive_file,
+            "error": self.error,
+        }
+
+    def finish(self) -> dict:
+        metrics = self.to_dict()
+        with _metrics_lock:
+            _last_runs[self.job] = metrics
+        if self.error:
+            logger.error(f"保留任务 {self.job} 失败: {metrics}")
+        else:
+            logger.info(f"保留任务 {self.job} 完成: {metrics}")
+        return metrics
+
+
+class ArchiveWriter:
+    """删除前的行写入 <RETENTION_ARCHIVE_DIR>/<job>-<时间>.jsonl.gz，首次写入时创建文件"""
+
+    def __init__(self, run: RetentionRun, archive_dir: str):
+        self.run = run
+        self.archive_dir = archive_dir
+        self._file = None
+
+    def write(self, table, rows: Iterable):
+        for row in rows:
+            if self._file is None:
+                os.makedirs(self.archive_dir, exist_ok=True)
+                filename = f"{self.run.job}-{datetime.now():%Y%m%d%H%M%S}.jsonl.gz"
+                self.run.archive_file = os.path.join(self.archive_dir, filename)
+                self._file = gzip.open(self.run.archive_file, "at", encoding="utf-8")
+            record = {key: _json_value(value) for key, value in row._mapping.items()}
+            record["_table"] = table.name
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.run.archived += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _archive_dir(archive: Optional[bool]) -> Optional[str]:
+    directory = current_app.config.get("RETENTION_ARCHIVE_DIR")
+    if archive is False or not directory:
+        return None
+    return directory
+
+
+def iter_id_chunks(table, condition, chunk_size: Optional[int] = None):
+    """按主键升序分块取满足条件的 ID（以上一块最大 ID 为起点，处理后仍满足条件的行不会重复返回）"""
+    chunk_size = chunk_size or _chunk_size()
+    last_id = None
+    while True:
+        stmt = select(table.c.id).where(condition)
+        if last_id is not None:
+            stmt = stmt.where(table.c.id > last_id)
+        ids = [row[0] for row in db.session.execute(stmt.order_by(table.c.id).limit(chunk_size))]
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def purge_in_chunks(
+    job: str,
+    table,
+    condition,
+    dependents: Iterable = (),
+    before_delete: Optional[Callable[[list], None]] = None,
+    archive: Optional[bool] = None,
+    chunk_size: Optional[int] = None,
+) -> dict:
+    """
+    分块删除满足条件的行
+
+    Args:
+        job: 任务名（统计与归档文件名）
+        table: 目标表
+        condition: 删除条件
+        dependents: 先于目标行删除的子表外键列，如 NotificationRecipient.__table__.c.notification_id
+        before_delete: 每块删除前的回调，参数为该块 ID 列表（在同一事务中执行）
+        archive: False 不归档；默认在配置了 RETENTION_ARCHIVE_DIR 时归档目标行
+        chunk_size: 每块行数，默认 RETENTION_CHUNK_SIZE
+
+    Returns:
+        dict: 本次运行统计
+    """
+    run = RetentionRun(job)
+    archive_dir = _archive_dir(archive)
+    writer = ArchiveWriter(run, archive_dir) if archive_dir else None
+    try:
+        for ids in iter_id_chunks(table, condition, chunk_size):
+            if writer is not None:
+                writer.write(table, db.session.execute(select(table).where(table.c.id.in_(ids))))
+            if before_delete is not None:
+                before_delete(ids)
+            for column in dependents:
+                db.session.execute(column.table.delete().where(column.in_(ids)))
+            result = db.session.execute(table.delete().where(table.c.id.in_(ids)))
+            db.session.commit()
+            run.deleted += result.rowcount
+            run.chunks += 1
+    except Exception as e:
+        db.session.rollback()
+        run.error = str(e)
+    finally:
+        if writer is not None:
+            writer.close()
+    return run.finish()
+
+
+def update_in_chunks(job: str, table, condition, values: dict, chunk_size: Optional[int] = None) -> dict:
+    """分块更新满足条件的行（如软归档），每块单独提交"""
+    run = RetentionRun(job)
+    try:
+        for ids in iter_id_chunks(table, condition, chunk_size):
+            result = db.session.execute(table.update().where(table.c.id.in_(ids)).values(**values))
+            db.session.commit()
+            run.updated += result.rowcount
+            run.chunks += 1
+    except Exception as e:
+        db.session.rollback()
+        run.error = str(e)
+    return run.finish()
+
+
+def get_retention_metrics() -> dict:
+    """各保留任务最近一次运行的统计"""
+    with _metrics_lock:
+        return {job: dict(metrics) for job, metrics in _last_runs.items()}
+
+
+# ---------- 操作日志 ----------
+
+
+def purge_operation_logs(retention_days: Optional[int] = None, archive: Optional[bool] = None) -> dict:
+    """删除超过保留天数（默认系统配置 log_retention_days）的操作日志"""
+    from app.models.config import SystemConfig
+    from app.models.operation_log import OperationLog
+
+    if retention_days is None:
+        retention_days = int(SystemConfig.get_value("log_retention_days", "30"))
+    cutoff_date = datetime.now() - timedelta(days=retention_days)
+    table = OperationLog.__table__
+
+    # 月度分区表先整块删除过期月份（需要归档时逐行归档删除）
+    dropped = []
+    if _archive_dir(archive) is None:
+        try:
+            dropped = drop_partitions_before(table.name, cutoff_date)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"删除操作日志过期分区失败: {e}")
+    metrics = purge_in_chunks(
+        "operation_logs", table, table.c.created_at < cutoff_date, archive=archive
+    )
+    metrics["dropped_partitions"] = dropped
+    return metrics
+
+
+# ---------- 调度 ----------
+
+
+def _scheduled_tasks() -> list:
+    from app.notifications.tasks import SCHEDULED_TASKS
+    from app.services.alert_label_index_service import sync_alert_labels
+    from app.services.alert_rollup_service import purge_alert_rollups
+    from app.services.job_service import purge_job_results
+
+    tasks = SCHEDULED_TASKS + [
+        {
+            "id": "ensure_audit_partitions",
+            "func": ensure_partitions,
+            "trigger": "cron",
+            "hour": 0,  # 每天凌晨0点30分运行
+            "minute": 30,
+        },
+        {
+            "id": "purge_operation_logs",
+            "func": purge_operation_logs,
+            "trigger": "cron",
+            "hour": 2,  # 每天凌晨2点30分运行
+            "minute": 30,
+        },
+        {
+            "id": "purge_alert_rollups",
+            "func": purge_alert_rollups,
+            "trigger": "cron",
+            "hour": 2,  # 每天凌晨2点45分运行
+            "minute": 45,
+        },
+        {
+            "id": "purge_job_results",
+            "func": purge_job_results,
+            "trigger": "cron",
+            "hour": 3,  # 每天凌晨3点运行
+            "minute": 0,
+        },
+    ]
+    # 定期追赶告警筛选索引（含首次回填），间隔为 0 时不注册
+    label_sync_seconds = float(
+        _app.config.get("ALERT_LABEL_BACKGROUND_SYNC_SECONDS", 60) if _app is not None else 60
+    )
+    if label_sync_seconds > 0:
+        tasks.append(
+            {
+                "id": "sync_alert_labels",
+                "func": sync_alert_labels,
+                "trigger": "interval",
+                "seconds": label_sync_seconds,
+            }
+        )
+    return tasks
+
+
+def run_scheduled_task(task_id: str):
+    """APScheduler 任务入口：在应用上下文中执行保留任务"""
+    task = next((t for t in _scheduled_tasks() if t["id"] == task_id), None)
+    if task is None or _app is None:
+        logger.warning(f"未找到保留任务或应用未初始化: {task_id}")
+        return None
+    with _app.app_context():
+        try:
+            return task["func"]()
+        finally:
+            db.session.remove()
+
+
+def register_retention_jobs(scheduler, app):
+    """把通知与操作日志的保留任务注册到调度器"""
+    global _app
+    _app = app
+    tasks = _scheduled_tasks()
+    for task in tasks:
+        trigger_args = {k: v for k, v in task.items() if k not in ("id", "func", "trigger")}
+        try:
+            scheduler.add_job(
+                run_scheduled_task,
+                trigger=task["trigger"],
+                id=f"retention_{task['id']}",
+                args=[task["id"]],
+                replace_existing=True,
+                **trigger_args,
+            )
+        except Exception as e:
+            logger.error(f"注册保留任务失败 {task['id']}: {e}")
+
+    # 持久化任务库中已停用的任务（如间隔配置为 0）一并移除
+    registered = {f"retention_{task['id']}" for task in tasks}
+    for job in scheduler.get_jobs():
+        if job.id.startswith("retention_") and job.id not in registered:
+            scheduler.remove_job(job.id)
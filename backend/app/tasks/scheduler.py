@@ -45,6 +45,10 @@ def init_scheduler(app=None):
             scheduler.start()
             logger.info("APScheduler 调度器已启动")
             load_batch_scan_jobs()
+
+        from app.tasks.retention import register_retention_jobs
+
+        register_retention_jobs(scheduler, app)
     else:
         scheduler.start()
         logger.info("APScheduler 调度器已启动")
@@ -1,7 +1,7 @@
 from functools import wraps
 from flask import request, jsonify
 import jwt
-from app.models.user import User
+from app.utils.principal import get_principal
 from config import Config
 
 def token_required(f):
@@ -23,10 +23,10 @@ def token_required(f):
             user_id = data.get('sub') or data.get('user_id')
             if not user_id:
                 return jsonify({'code': 401, 'message': 'Invalid token'}), 401
-            current_user = User.query.get(int(user_id))
-            if not current_user:
+            principal = get_principal(int(user_id))
+            if not principal:
                 return jsonify({'code': 401, 'message': 'User not found'}), 401
-            request.current_user = current_user
+            request.current_user = principal.user
         except jwt.ExpiredSignatureError:
             return jsonify({'code': 401, 'message': 'Token has expired'}), 401
         except jwt.InvalidTokenError:
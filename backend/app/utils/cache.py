@@ -1,76 +1,364 @@
-"""缓存工具模块 - 提供简单的内存缓存功能"""
+"""缓存工具模块 - 提供有界内存缓存与可选的 Redis 共享缓存
+
+- MemoryCache：进程内 LRU 缓存，按条目数与估算字节数限制容量
+- RedisCache：多个 worker 共享的缓存，失效操作对所有进程立即生效
+- 两者都支持标签失效（如 view:{id}、user:{id}）与命中/未命中/淘汰计数
+
+应用启动时由 init_cache(app) 按配置选择后端，未配置时使用内存缓存。
+"""
+import logging
+import pickle
+import sys
+import threading
 import time
+from collections import OrderedDict
 from functools import wraps
-from typing import Any, Optional, Callable
+from typing import Any, Callable, Iterable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+TAG_TTL_SECONDS = 24 * 3600
+
 
+def _estimate_size(value: Any) -> int:
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class CacheStats:
+    """缓存计数器"""
 
-class SimpleCache:
-    """简单的内存缓存实现"""
-    
     def __init__(self):
-        self._cache = {}
-        self._expire_time = {}
-    
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.errors = 0
+
+    def incr(self, name: str, amount: int = 1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def reset(self):
+        with self._lock:
+            self.hits = self.misses = self.evictions = self.expirations = self.errors = 0
+
+    def to_dict(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class MemoryCache:
+    """进程内 LRU 缓存"""
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._lock = threading.RLock()
+        # key -> (value, expire_at, size, tags)
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._bytes = 0
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry[2]
+        for tag in entry[3]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    self._tags.pop(tag, None)
+
+    def _evict(self):
+        while self._entries and (
+            (self.max_entries and len(self._entries) > self.max_entries)
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.stats.incr("evictions")
+
     def get(self, key: str) -> Any:
         """获取缓存值"""
-        if key in self._cache:
-            if time.time() < self._expire_time.get(key, 0):
-                return self._cache[key]
-            else:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.incr("misses")
+                return None
+            if time.time() >= entry[1]:
                 # 过期，删除缓存
-                self.delete(key)
-        return None
-    
-    def set(self, key: str, value: Any, expire_seconds: int = 300):
+                self._remove(key)
+                self.stats.incr("expirations")
+                self.stats.incr("misses")
+                return None
+            self._entries.move_to_end(key)
+            self.stats.incr("hits")
+            return entry[0]
+
+    def set(self, key: str, value: Any, expire_seconds: int = 300, tags: Optional[Iterable[str]] = None):
         """设置缓存值"""
-        self._cache[key] = value
-        self._expire_time[key] = time.time() + expire_seconds
-    
+        tags = tuple(set(tags or ()))
+        size = _estimate_size(value) if self.max_bytes else 0
+        if self.max_bytes and size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, time.time() + expire_seconds, size, tags)
+            self._bytes += size
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            self._evict()
+
     def delete(self, key: str):
         """删除缓存"""
-        self._cache.pop(key, None)
-        self._expire_time.pop(key, None)
-    
+        with self._lock:
+            self._remove(key)
+
     def delete_pattern(self, pattern: str):
-        """删除匹配模式的缓存"""
-        keys_to_delete = [k for k in self._cache.keys() if pattern in k]
-        for key in keys_to_delete:
-            self.delete(key)
-    
+        """删除键中包含指定子串的缓存"""
+        with self._lock:
+            for key in [k for k in self._entries if pattern in k]:
+                self._remove(key)
+
+    def invalidate_tags(self, *tags: str):
+        """删除带有任一标签的缓存"""
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+
     def clear(self):
         """清空缓存"""
-        self._cache.clear()
-        self._expire_time.clear()
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def info(self) -> dict:
+        with self._lock:
+            data = {
+                "backend": self.backend,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+        data.update(self.stats.to_dict())
+        return data
+
+
+class RedisCache:
+    """基于 Redis 的共享缓存，值以 pickle 序列化，标签以集合记录键名"""
+
+    backend = "redis"
+
+    def __init__(self, client, key_prefix: str = "itops:cache:", max_bytes: int = DEFAULT_MAX_BYTES):
+        self.client = client
+        self.key_prefix = key_prefix
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+
+    def _key(self, key: str) -> str:
+        return f"{self.key_prefix}{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.key_prefix}tag:{tag}"
+
+    def _on_error(self, action: str, error: Exception):
+        self.stats.incr("errors")
+        logger.warning(f"Redis 缓存{action}失败: {error}")
+
+    def get(self, key: str) -> Any:
+        """获取缓存值，Redis 不可用时视为未命中"""
+        try:
+            raw = self.client.get(self._key(key))
+        except Exception as e:
+            self._on_error("读取", e)
+            self.stats.incr("misses")
+            return None
+        if raw is None:
+            self.stats.incr("misses")
+            return None
+        try:
+            value = pickle.loads(raw)
+        except Exception:
+            self.stats.incr("misses")
+            return None
+        self.stats.incr("hits")
+        return value
+
+    def set(self, key: str, value: Any, expire_seconds: int = 300, tags: Optional[Iterable[str]] = None):
+        """设置缓存值"""
+        try:
+            raw = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return
+        if self.max_bytes and len(raw) > self.max_bytes:
+            return
+        full_key = self._key(key)
+        try:
+            pipe = self.client.pipeline()
+            pipe.setex(full_key, max(int(expire_seconds), 1), raw)
+            for tag in set(tags or ()):
+                tag_key = self._tag_key(tag)
+                pipe.sadd(tag_key, full_key)
+                # 标签集合只记录键名，保留时间不短于其中的缓存项
+                pipe.expire(tag_key, max(int(expire_seconds), TAG_TTL_SECONDS))
+            pipe.execute()
+        except Exception as e:
+            self._on_error("写入", e)
+
+    def delete(self, key: str):
+        """删除缓存"""
+        try:
+            self.client.delete(self._key(key))
+        except Exception as e:
+            self._on_error("删除", e)
+
+    def delete_pattern(self, pattern: str):
+        """删除键中包含指定子串的缓存（SCAN 遍历，仅用于兼容旧调用）"""
+        try:
+            keys = list(self.client.scan_iter(match=f"{self.key_prefix}*{pattern}*", count=500))
+            if keys:
+                self.client.delete(*keys)
+        except Exception as e:
+            self._on_error("删除", e)
+
+    def invalidate_tags(self, *tags: str):
+        """删除带有任一标签的缓存"""
+        try:
+            for tag in tags:
+                tag_key = self._tag_key(tag)
+                keys = self.client.smembers(tag_key)
+                self.client.delete(tag_key, *keys)
+        except Exception as e:
+            self._on_error("失效", e)
+
+    def clear(self):
+        """清空本前缀下的全部缓存"""
+        self.delete_pattern("")
+
+    def info(self) -> dict:
+        data = {"backend": self.backend, "key_prefix": self.key_prefix}
+        data.update(self.stats.to_dict())
+        return data
+
+
+class CacheProxy:
+    """全局缓存入口，转发到启动时选定的后端"""
+
+    def __init__(self, backend=None):
+        self._backend = backend or MemoryCache()
+
+    @property
+    def backend(self):
+        return self._backend
+
+    def configure(self, backend):
+        self._backend = backend
+
+    def get(self, key: str) -> Any:
+        return self._backend.get(key)
+
+    def set(self, key: str, value: Any, expire_seconds: int = 300, tags: Optional[Iterable[str]] = None):
+        self._backend.set(key, value, expire_seconds, tags=tags)
+
+    def delete(self, key: str):
+        self._backend.delete(key)
+
+    def delete_pattern(self, pattern: str):
+        self._backend.delete_pattern(pattern)
+
+    def invalidate_tags(self, *tags: str):
+        self._backend.invalidate_tags(*tags)
+
+    def clear(self):
+        self._backend.clear()
+
+    def info(self) -> dict:
+        return self._backend.info()
 
 
 # 全局缓存实例
-cache = SimpleCache()
+cache = CacheProxy()
+
+
+def init_cache(app):
+    """根据配置初始化缓存后端
+
+    CACHE_TYPE=redis 时使用 CACHE_REDIS_URL 指向的 Redis（多 worker 共享），
+    连接失败时回退为进程内缓存。
+    """
+    max_entries = int(app.config.get("CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+    max_bytes = int(app.config.get("CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+    backend = None
+    if str(app.config.get("CACHE_TYPE", "memory")).lower() == "redis":
+        try:
+            import redis
 
+            client = redis.from_url(app.config.get("CACHE_REDIS_URL") or "redis://localhost:6379/0")
+            client.ping()
+            backend = RedisCache(
+                client,
+                key_prefix=app.config.get("CACHE_KEY_PREFIX", "itops:cache:"),
+                max_bytes=max_bytes,
+            )
+        except Exception as e:
+            logger.warning(f"Redis 缓存不可用，回退为进程内缓存: {e}")
+    if backend is None:
+        backend = MemoryCache(max_entries=max_entries, max_bytes=max_bytes)
+    cache.configure(backend)
+    return cache
 
-def cached(expire_seconds: int = 300, key_prefix: str = ""):
+
+def cached(
+    expire_seconds: int = 300,
+    key_prefix: str = "",
+    tags: Optional[Union[Iterable[str], Callable[..., Iterable[str]]]] = None,
+):
     """缓存装饰器
-    
+
     Args:
         expire_seconds: 缓存过期时间（秒）
         key_prefix: 缓存键前缀
+        tags: 缓存标签，或接收被装饰函数参数并返回标签列表的函数
     """
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         def wrapper(*args, **kwargs):
             # 生成缓存键
             cache_key = f"{key_prefix}:{func.__name__}:{str(args)}:{str(kwargs)}"
-            
+
             # 尝试从缓存获取
             cached_value = cache.get(cache_key)
             if cached_value is not None:
                 return cached_value
-            
+
             # 执行函数
             result = func(*args, **kwargs)
-            
+
             # 存入缓存
-            cache.set(cache_key, result, expire_seconds)
-            
+            entry_tags = tags(*args, **kwargs) if callable(tags) else tags
+            cache.set(cache_key, result, expire_seconds, tags=entry_tags)
+
             return result
         return wrapper
     return decorator
@@ -79,3 +367,8 @@ def cached(expire_seconds: int = 300, key_prefix: str = ""):
 def invalidate_cache(pattern: str):
     """使匹配模式的缓存失效"""
     cache.delete_pattern(pattern)
+
+
+def invalidate_tags(*tags: str):
+    """使带有任一标签的缓存失效"""
+    cache.invalidate_tags(*tags)
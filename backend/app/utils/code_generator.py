@@ -58,3 +58,16 @@ def generate_ci_code_v2():
     code = f"CI{today}{seq_part}"
     
     return code
+
+
+def generate_ci_codes(count):
+    """
+    批量生成序号编码，整批只更新一次序号表
+    格式与 generate_ci_code_v2 相同
+    """
+    if count <= 0:
+        return []
+
+    start, sequence_date = CodeSequence.reserve_values(count, 'ci')
+    prefix = f"CI{sequence_date[2:]}"
+    return [f"{prefix}{str(value).zfill(8)}" for value in range(start, start + count)]
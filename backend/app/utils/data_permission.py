@@ -1,12 +1,11 @@
-from flask_jwt_extended import get_jwt_identity, get_jwt
-from app.models.user import User
-from app.models.department import Department
-from app.models.role import Role, UserRole
+from flask_jwt_extended import get_jwt
+from app.services.department_tree_service import get_descendant_ids
+from app.utils.principal import get_principal
 
 def get_current_user():
-    """获取当前用户"""
-    identity = get_jwt_identity()
-    return User.query.get(int(identity))
+    """获取当前用户（同一请求内只查询一次）"""
+    principal = get_principal()
+    return principal.user if principal else None
 
 def is_super_admin():
     """检查是否是超级管理员"""
@@ -19,39 +18,24 @@ def get_user_data_scope():
     获取用户的数据权限范围
     返回: 'all', 'department', 'department_and_children', 'self'
     """
-    user = get_current_user()
-    if not user:
+    principal = get_principal()
+    if not principal:
         return 'self'
     
-    if user.role == 'admin':
+    if principal.user.role == 'admin':
         return 'all'
     
-    scopes = set()
-    user_roles = UserRole.query.filter_by(user_id=user.id).all()
-    for ur in user_roles:
-        role = Role.query.get(ur.role_id)
-        if role:
-            data_perms = role.get_data_permissions()
-            scope = data_perms.get('scope', 'self')
-            scopes.add(scope)
-    
     # 权限优先级: all > department_and_children > department > self
-    if 'all' in scopes:
-        return 'all'
-    if 'department_and_children' in scopes:
-        return 'department_and_children'
-    if 'department' in scopes:
-        return 'department'
-    
-    return 'self'
+    return principal.role_data_scope
 
 def filter_by_data_permissions(query, model_class):
     """
     根据用户数据权限过滤查询
     """
-    user = get_current_user()
-    if not user:
+    principal = get_principal()
+    if not principal:
         return query.filter(model_class.id == -1)
+    user = principal.user
     
     if user.role == 'admin':
         return query
@@ -67,12 +51,9 @@ def filter_by_data_permissions(query, model_class):
         return query.filter(model_class.created_by == user.id)
     
     elif scope == 'department_and_children':
-        if user.department_id:
-            dept = Department.query.get(user.department_id)
-            if dept:
-                child_depts = get_child_department_ids(dept.id)
-                child_depts.append(user.department_id)
-                return query.filter(model_class.department_id.in_(child_depts))
+        dept_ids = principal.accessible_department_ids()
+        if dept_ids:
+            return query.filter(model_class.department_id.in_(dept_ids))
         return query.filter(model_class.created_by == user.id)
     
     else:
@@ -80,21 +61,17 @@ def filter_by_data_permissions(query, model_class):
 
 def get_child_department_ids(parent_id):
     """获取子部门ID列表"""
-    children = Department.query.filter_by(parent_id=parent_id).all()
-    ids = []
-    for child in children:
-        ids.append(child.id)
-        ids.extend(get_child_department_ids(child.id))
-    return ids
+    return get_descendant_ids(parent_id)
 
 def check_data_permission(instance, user_id):
     """
     检查用户是否有操作某条数据的权限
     返回: True/False
     """
-    user = User.query.get(user_id)
-    if not user:
+    principal = get_principal(user_id)
+    if not principal:
         return False
+    user = principal.user
     
     if user.role == 'admin':
         return True
@@ -110,11 +87,8 @@ def check_data_permission(instance, user_id):
         return instance.created_by == user_id
     
     elif scope == 'department_and_children':
-        if user.department_id:
-            child_depts = get_child_department_ids(user.department_id)
-            child_depts.append(user.department_id)
-            if instance.department_id in child_depts:
-                return True
+        if instance.department_id in principal.accessible_department_ids():
+            return True
         return instance.created_by == user_id
     
     else:
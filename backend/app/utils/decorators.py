@@ -1,19 +1,17 @@
 from functools import wraps
 from flask import request, jsonify
-from flask_jwt_extended import get_jwt_identity
 from app.models.operation_log import OperationLog
-from app.models import User
+from app.utils.principal import get_principal
 
 
 def admin_required(f):
-    """要求管理员权限的装饰器"""
+    """要求管理员权限的装饰器（管理员标识取自请求主体，同一请求内只解析一次）"""
 
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
+        principal = get_principal()
 
-        if not user or not user.is_admin:
+        if not principal or not principal.is_admin:
             return jsonify({"code": 403, "message": "需要管理员权限"}), 403
 
         return f(*args, **kwargs)
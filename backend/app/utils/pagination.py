@@ -0,0 +1,105 @@
+"""键集（游标）分页工具
+
+按 (created_at, id) 倒序翻页：下一页从上一页最后一条记录之后开始，
+不使用 OFFSET，也不统计总数，翻页耗时与页码无关。
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(values: list) -> str:
+    """把排序键编码为分页游标
+
+    Args:
+        values: 最后一条记录的排序键（datetime 会转为ISO字符串）
+
+    Returns:
+        URL安全的游标字符串
+    """
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """解析分页游标
+
+    Args:
+        cursor: encode_cursor 生成的游标
+        size: 排序键个数
+
+    Returns:
+        排序键列表
+
+    Raises:
+        ValueError: 游标无效
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("无效的分页游标")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("无效的分页游标")
+    return values
+
+
+def decode_time_cursor(cursor: str) -> tuple:
+    """解析 (created_at, id) 游标"""
+    created_at, row_id = decode_cursor(cursor, 2)
+    try:
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError):
+        raise ValueError("无效的分页游标")
+
+
+def time_keyset_page(
+    query,
+    created_column,
+    id_column,
+    cursor: Optional[str],
+    limit: int,
+    serialize: Callable[[Any], dict],
+) -> Dict[str, Any]:
+    """按 (created_at, id) 倒序取一页
+
+    Args:
+        query: 已应用筛选条件的查询
+        created_column: 时间列
+        id_column: 主键列
+        cursor: 上一页返回的 next_cursor，为空时取第一页
+        limit: 每页数量
+        serialize: 记录转字典
+
+    Returns:
+        {"items", "next_cursor", "has_more"}
+
+    Raises:
+        ValueError: 游标无效
+    """
+    if cursor:
+        created_at, row_id = decode_time_cursor(cursor)
+        query = query.filter(
+            or_(
+                created_column < created_at,
+                and_(created_column == created_at, id_column < row_id),
+            )
+        )
+    rows = query.order_by(created_column.desc(), id_column.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            [getattr(last, created_column.key), getattr(last, id_column.key)]
+        )
+    return {
+        "items": [serialize(row) for row in rows],
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+    }
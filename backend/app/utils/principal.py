@@ -0,0 +1,242 @@
+"""请求主体（Principal）模块
+
+每个请求只解析一次当前用户、角色、菜单权限与数据权限范围，结果保存在 flask.g 上；
+角色与权限部分额外写入短 TTL 缓存（标签 user:{id}），角色、用户角色或用户信息
+变更提交后自动失效。
+"""
+import json
+from typing import Iterable, Optional
+
+from flask import current_app, g, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app import db
+from app.models.role import Role, UserRole
+from app.models.user import User
+from app.utils.cache import cache, invalidate_tags
+
+PRINCIPAL_CACHE_PREFIX = "principal"
+PENDING_USERS_KEY = "principal_invalidate_user_ids"
+DEFAULT_CACHE_SECONDS = 60
+
+# 权限优先级: all > department_and_children > department > self
+SCOPE_PRIORITY = ("all", "department_and_children", "department")
+
+
+def merge_data_scopes(scopes: Iterable[str]) -> str:
+    scopes = set(scopes)
+    for scope in SCOPE_PRIORITY:
+        if scope in scopes:
+            return scope
+    return "self"
+
+
+class PermissionMatcher:
+    """预编译的菜单权限匹配：精确集合 + 通配前缀元组"""
+
+    def __init__(self, permissions: Iterable[str]):
+        self.permissions = frozenset(p for p in permissions if isinstance(p, str))
+        self._prefixes = tuple(p[:-1] for p in self.permissions if p.endswith("*"))
+
+    def matches(self, permission: str) -> bool:
+        if permission in self.permissions:
+            return True
+        return bool(self._prefixes) and permission.startswith(self._prefixes)
+
+
+class Principal:
+    """当前请求的用户、角色与权限"""
+
+    def __init__(self, user: User, role_ids, role_codes, permissions, role_data_scope: str):
+        self.user = user
+        self.user_id = user.id
+        self.role_ids = tuple(role_ids)
+        self.role_codes = frozenset(role_codes)
+        self.permission_matcher = PermissionMatcher(permissions)
+        self.role_data_scope = role_data_scope
+        self._accessible_department_ids = None
+
+    @property
+    def permissions(self) -> frozenset:
+        return self.permission_matcher.permissions
+
+    @property
+    def is_admin(self) -> bool:
+        """与 User.is_admin 一致：用户角色字段为 admin 或拥有 admin 角色"""
+        return self.user.role == "admin" or "admin" in self.role_codes
+
+    @property
+    def data_scope(self) -> str:
+        if self.is_admin:
+            return "all"
+        return self.role_data_scope
+
+    def has_permission(self, permission: str) -> bool:
+        return self.permission_matcher.matches(permission)
+
+    def has_any_permission(self, *permissions: str) -> bool:
+        return any(self.permission_matcher.matches(p) for p in permissions)
+
+    def accessible_department_ids(self) -> set:
+        """本部门及全部下级部门 ID（department_and_children 范围使用）"""
+        if self._accessible_department_ids is None:
+            from app.services.department_tree_service import get_subtree_ids
+
+            self._accessible_department_ids = get_subtree_ids(self.user.department_id)
+        return set(self._accessible_department_ids)
+
+
+def _cache_seconds() -> int:
+    try:
+        return int(current_app.config.get("PRINCIPAL_CACHE_SECONDS", DEFAULT_CACHE_SECONDS))
+    except (RuntimeError, TypeError, ValueError):
+        return DEFAULT_CACHE_SECONDS
+
+
+def _parse_json(raw, default):
+    """与 Role.get_menu_permissions/get_data_permissions 的容错解析一致"""
+    try:
+        value = json.loads(raw) if raw else default
+    except Exception:
+        return default
+    return value if isinstance(value, type(default)) else default
+
+
+def _load_role_data(user_id: int) -> dict:
+    rows = (
+        db.session.query(Role.id, Role.code, Role.menu_permissions, Role.data_permissions)
+        .join(UserRole, UserRole.role_id == Role.id)
+        .filter(UserRole.user_id == user_id)
+        .all()
+    )
+    role_ids, role_codes, permissions, scopes = [], [], set(), set()
+    for row in rows:
+        role_ids.append(row.id)
+        role_codes.append(row.code)
+        permissions.update(_parse_json(row.menu_permissions, []))
+        scopes.add(_parse_json(row.data_permissions, {}).get("scope", "self"))
+    return {
+        "role_ids": role_ids,
+        "role_codes": role_codes,
+        "permissions": sorted(p for p in permissions if isinstance(p, str)),
+        "role_data_scope": merge_data_scopes(scopes),
+    }
+
+
+def build_principal(user: User) -> Principal:
+    """构建主体，角色部分优先读取缓存"""
+    ttl = _cache_seconds()
+    cache_key = f"{PRINCIPAL_CACHE_PREFIX}:{user.id}"
+    role_data = cache.get(cache_key) if ttl > 0 else None
+    if role_data is None:
+        role_data = _load_role_data(user.id)
+        if ttl > 0:
+            cache.set(cache_key, role_data, expire_seconds=ttl, tags=[f"user:{user.id}"])
+    return Principal(
+        user,
+        role_data["role_ids"],
+        role_data["role_codes"],
+        role_data["permissions"],
+        role_data["role_data_scope"],
+    )
+
+
+def _identity_from_jwt() -> Optional[int]:
+    try:
+        from flask_jwt_extended import get_jwt_identity
+
+        identity = get_jwt_identity()
+        return int(identity) if identity else None
+    except Exception:
+        return None
+
+
+def get_principal(user_id: Optional[int] = None) -> Optional[Principal]:
+    """
+    获取请求主体；同一请求内只构建一次
+
+    Args:
+        user_id: 用户 ID，为空时取 JWT 身份
+    """
+    if user_id is None:
+        user_id = _identity_from_jwt()
+    if not user_id:
+        return None
+    user_id = int(user_id)
+
+    principal = g.get("principal") if has_app_context() else None
+    if principal is not None and principal.user_id == user_id:
+        return principal
+
+    user = db.session.get(User, user_id)
+    if not user:
+        return None
+    principal = build_principal(user)
+    if has_app_context() and g.get("principal") is None:
+        g.principal = principal
+    return principal
+
+
+def principal_for(user: User) -> Principal:
+    """已持有用户对象时获取主体（与当前请求主体相同则复用）"""
+    principal = g.get("principal") if has_app_context() else None
+    if principal is not None and principal.user_id == user.id:
+        return principal
+    return build_principal(user)
+
+
+def invalidate_principal(*user_ids: int):
+    invalidate_tags(*[f"user:{user_id}" for user_id in user_ids])
+
+
+# ---------- 变更后自动失效 ----------
+
+
+def _mark_user(target, user_id):
+    session = object_session(target)
+    if session is not None and user_id:
+        session.info.setdefault(PENDING_USERS_KEY, set()).add(user_id)
+
+
+@event.listens_for(UserRole, "after_insert")
+@event.listens_for(UserRole, "after_delete")
+def _user_role_changed(mapper, connection, target):
+    _mark_user(target, target.user_id)
+
+
+@event.listens_for(Role, "after_update")
+def _role_changed(mapper, connection, target):
+    state = inspect(target)
+    if not any(
+        state.attrs[name].history.has_changes()
+        for name in ("code", "menu_permissions", "data_permissions")
+    ):
+        return
+    user_ids = connection.execute(
+        db.select(UserRole.user_id).where(UserRole.role_id == target.id)
+    ).scalars()
+    for user_id in user_ids:
+        _mark_user(target, user_id)
+
+
+@event.listens_for(User, "after_update")
+def _user_changed(mapper, connection, target):
+    state = inspect(target)
+    if any(
+        state.attrs[name].history.has_changes()
+        for name in ("role", "department_id", "status", "deleted_at")
+    ):
+        _mark_user(target, target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    user_ids = session.info.pop(PENDING_USERS_KEY, None)
+    if user_ids:
+        invalidate_principal(*user_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop(PENDING_USERS_KEY, None)
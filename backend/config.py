@@ -34,9 +34,42 @@ class Config:
     SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS
     SESSION_COOKIE_HTTPONLY = True
 
+    # Application cache: "memory" (per-process LRU) or "redis" (shared by workers)
+    CACHE_TYPE = os.environ.get("CACHE_TYPE", "memory")
+    CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL") or os.environ.get("REDIS_URL") or "redis://localhost:6379/0"
+    CACHE_KEY_PREFIX = "itops:cache:"
+    CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "10000"))
+    CACHE_MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+    # Per-user role/permission cache (invalidated on role or user changes)
+    PRINCIPAL_CACHE_SECONDS = int(os.environ.get("PRINCIPAL_CACHE_SECONDS", "60"))
+    DEPARTMENT_TREE_CACHE_SECONDS = int(os.environ.get("DEPARTMENT_TREE_CACHE_SECONDS", "300"))
+
     PAGE_DEFAULT_SIZE = 20
     PAGE_MAX_SIZE = 100
     CMDB_TOPOLOGY_MAX_DEPTH = int(os.environ.get("CMDB_TOPOLOGY_MAX_DEPTH", "10"))
+    # Alert -> CI correlation index used by the topology overlay: firing alerts are
+    # re-synced at most every REFRESH seconds and fully rebuilt every REBUILD seconds
+    ALERT_CI_INDEX_REFRESH_SECONDS = float(os.environ.get("ALERT_CI_INDEX_REFRESH_SECONDS", "5"))
+    ALERT_CI_INDEX_REBUILD_SECONDS = float(os.environ.get("ALERT_CI_INDEX_REBUILD_SECONDS", "300"))
+    # Monitor -> CI bindings are expanded into monitor_ci_bindings; incremental re-sync interval
+    MONITOR_CI_BINDING_SYNC_SECONDS = float(os.environ.get("MONITOR_CI_BINDING_SYNC_SECONDS", "30"))
+    # Alert label columns used by alert-center filters are synced into alert_label_index
+    ALERT_LABEL_SYNC_SECONDS = float(os.environ.get("ALERT_LABEL_SYNC_SECONDS", "5"))
+    # Rows synced per alert-center request; backfill and larger backlogs are left to the
+    # background sync job, which runs every BACKGROUND_SYNC seconds (0 disables it)
+    ALERT_LABEL_REQUEST_SYNC_LIMIT = int(os.environ.get("ALERT_LABEL_REQUEST_SYNC_LIMIT", "2000"))
+    ALERT_LABEL_BACKGROUND_SYNC_SECONDS = float(
+        os.environ.get("ALERT_LABEL_BACKGROUND_SYNC_SECONDS", "60")
+    )
+    # Dashboard: hourly alert rollups are refreshed at most every SYNC seconds and kept
+    # for RETENTION days; the manager monitor health summary is cached for CACHE seconds,
+    # kept well above the 30s NOC auto-refresh so consecutive refreshes share one manager call
+    ALERT_ROLLUP_SYNC_SECONDS = float(os.environ.get("ALERT_ROLLUP_SYNC_SECONDS", "15"))
+    ALERT_ROLLUP_RETENTION_DAYS = int(os.environ.get("ALERT_ROLLUP_RETENTION_DAYS", "30"))
+    DASHBOARD_MONITOR_CACHE_SECONDS = int(os.environ.get("DASHBOARD_MONITOR_CACHE_SECONDS", "90"))
+    # Alert rule matcher: other workers' rule changes are picked up within REFRESH seconds
+    ALERT_RULE_INDEX_REFRESH_SECONDS = float(os.environ.get("ALERT_RULE_INDEX_REFRESH_SECONDS", "5"))
 
     # SocketIO configuration
     SOCKETIO_CORS_ALLOWED_ORIGINS = ["http://localhost:3000", "http://localhost:5173"]
@@ -47,6 +80,11 @@ class Config:
     NOTIFICATION_MAX_RETRY_ATTEMPTS = 3
     NOTIFICATION_RETRY_DELAYS = [60, 300, 900]  # 1min, 5min, 15min
 
+    # Retention jobs delete/archive in primary-key chunks, committing each chunk
+    RETENTION_CHUNK_SIZE = int(os.environ.get("RETENTION_CHUNK_SIZE", "1000"))
+    # When set, purged rows are written to <dir>/<job>-<timestamp>.jsonl.gz before deletion
+    RETENTION_ARCHIVE_DIR = os.environ.get("RETENTION_ARCHIVE_DIR") or None
+
     # Go Manager API integration
     GO_MANAGER_URL = os.environ.get("GO_MANAGER_URL", "http://127.0.0.1:8080")
     GO_MANAGER_TIMEOUT_SECONDS = float(os.environ.get("GO_MANAGER_TIMEOUT_SECONDS", "3"))
@@ -54,6 +92,24 @@ class Config:
     GO_MANAGER_CB_FAILURE_THRESHOLD = int(os.environ.get("GO_MANAGER_CB_FAILURE_THRESHOLD", "3"))
     GO_MANAGER_CB_RECOVERY_SECONDS = int(os.environ.get("GO_MANAGER_CB_RECOVERY_SECONDS", "30"))
     GO_MANAGER_USE_SYSTEM_PROXY = os.environ.get("GO_MANAGER_USE_SYSTEM_PROXY", "false")
+    # Keep-alive connections kept idle per manager host; idle ones older than the timeout are dropped
+    GO_MANAGER_POOL_SIZE = int(os.environ.get("GO_MANAGER_POOL_SIZE", "10"))
+    GO_MANAGER_POOL_IDLE_SECONDS = float(os.environ.get("GO_MANAGER_POOL_IDLE_SECONDS", "30"))
+
+    # Background jobs (imports, exports, trigger runs)
+    JOB_WORKER_COUNT = int(os.environ.get("JOB_WORKER_COUNT", "4"))
+    # Synchronous endpoints wait this long before answering 202 with the job for polling
+    JOB_SYNC_WAIT_SECONDS = float(os.environ.get("JOB_SYNC_WAIT_SECONDS", "20"))
+    JOB_PROGRESS_INTERVAL = float(os.environ.get("JOB_PROGRESS_INTERVAL", "1"))
+    JOB_RUN_INLINE = False
+    # Export result files are deleted this many days after the job finishes (downloads then
+    # report the file as expired); finished job records are deleted after JOB_RETENTION_DAYS
+    JOB_RESULT_RETENTION_DAYS = int(os.environ.get("JOB_RESULT_RETENTION_DAYS", "7"))
+    JOB_RETENTION_DAYS = int(os.environ.get("JOB_RETENTION_DAYS", "90"))
+
+    # License status cache used by the request guard
+    LICENSE_STATUS_CACHE_SECONDS = int(os.environ.get("LICENSE_STATUS_CACHE_SECONDS", "30"))
+    LICENSE_STATUS_MAX_STALE_SECONDS = int(os.environ.get("LICENSE_STATUS_MAX_STALE_SECONDS", "300"))
 
 
 class DevelopmentConfig(Config):
@@ -69,6 +125,22 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
     SQLALCHEMY_ECHO = False
+    CACHE_TYPE = "memory"
+    # Each test uses a fresh database; do not carry license status across tests
+    LICENSE_STATUS_CACHE_SECONDS = 0
+    LICENSE_STATUS_MAX_STALE_SECONDS = 0
+    PRINCIPAL_CACHE_SECONDS = 0
+    DEPARTMENT_TREE_CACHE_SECONDS = 0
+    ALERT_CI_INDEX_REFRESH_SECONDS = 0
+    ALERT_CI_INDEX_REBUILD_SECONDS = 0
+    MONITOR_CI_BINDING_SYNC_SECONDS = 0
+    ALERT_LABEL_SYNC_SECONDS = 0
+    ALERT_LABEL_BACKGROUND_SYNC_SECONDS = 0
+    ALERT_ROLLUP_SYNC_SECONDS = 0
+    DASHBOARD_MONITOR_CACHE_SECONDS = 0
+    ALERT_RULE_INDEX_REFRESH_SECONDS = 0
+    # Run background jobs in the calling thread
+    JOB_RUN_INLINE = True
 
 
 config = {
@@ -0,0 +1,48 @@
+"""add monitor ci bindings table
+
+Revision ID: a3b4c5d6e7f8
+Revises: f2a3b4c5d6e7
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "a3b4c5d6e7f8"
+down_revision = "f2a3b4c5d6e7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "monitor_ci_bindings" in inspector.get_table_names():
+        return
+
+    op.create_table(
+        "monitor_ci_bindings",
+        sa.Column("monitor_id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("ci_id", sa.Integer(), nullable=True),
+        sa.Column("ci_model_id", sa.Integer(), nullable=True),
+        sa.Column("monitor_name", sa.String(length=100), nullable=True),
+        sa.Column("app", sa.String(length=100), nullable=True),
+        sa.Column("monitor_updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("monitor_id"),
+    )
+    op.create_index(
+        "idx_monitor_ci_bindings_ci", "monitor_ci_bindings", ["ci_id", "ci_model_id"]
+    )
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "monitor_ci_bindings" not in inspector.get_table_names():
+        return
+
+    index_names = {idx["name"] for idx in inspector.get_indexes("monitor_ci_bindings")}
+    if "idx_monitor_ci_bindings_ci" in index_names:
+        op.drop_index("idx_monitor_ci_bindings_ci", table_name="monitor_ci_bindings")
+    op.drop_table("monitor_ci_bindings")
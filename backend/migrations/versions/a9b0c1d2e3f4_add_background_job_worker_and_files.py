@@ -0,0 +1,42 @@
+"""add worker and input files to background jobs
+
+Revision ID: a9b0c1d2e3f4
+Revises: f8a9b0c1d2e3
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "a9b0c1d2e3f4"
+down_revision = "f8a9b0c1d2e3"
+branch_labels = None
+depends_on = None
+
+COLUMNS = {
+    "worker_id": sa.String(length=100),
+    "input_files": sa.Text(),
+}
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "background_jobs" not in inspector.get_table_names():
+        return
+    existing = {col["name"] for col in inspector.get_columns("background_jobs")}
+    for name, column_type in COLUMNS.items():
+        if name not in existing:
+            op.add_column("background_jobs", sa.Column(name, column_type, nullable=True))
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "background_jobs" not in inspector.get_table_names():
+        return
+    existing = {col["name"] for col in inspector.get_columns("background_jobs")}
+    for name in COLUMNS:
+        if name in existing:
+            op.drop_column("background_jobs", name)
@@ -0,0 +1,55 @@
+"""keep ci history when a ci is deleted
+
+Revision ID: b0c1d2e3f4a5
+Revises: a9b0c1d2e3f4
+Create Date: 2026-10-19 11:00:00.000000
+
+ci_history.ci_id becomes nullable and its foreign key switches to
+ON DELETE SET NULL, so deleting a CI detaches its history instead of
+failing or requiring the history rows to be removed.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "b0c1d2e3f4a5"
+down_revision = "a9b0c1d2e3f4"
+branch_labels = None
+depends_on = None
+
+FK_NAME = "ci_history_ci_id_fkey"
+
+
+def _ci_foreign_keys(inspector):
+    return [
+        fk
+        for fk in inspector.get_foreign_keys("ci_history")
+        if fk["referred_table"] == "ci_instances" and fk["constrained_columns"] == ["ci_id"]
+    ]
+
+
+def _set_foreign_key(ondelete, nullable):
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "ci_history" not in inspector.get_table_names():
+        return
+    foreign_keys = _ci_foreign_keys(inspector)
+    with op.batch_alter_table("ci_history") as batch_op:
+        batch_op.alter_column("ci_id", existing_type=sa.Integer(), nullable=nullable)
+        # SQLite 的外键没有名称，无法单独替换，保持原样
+        if bind.dialect.name != "sqlite":
+            for fk in foreign_keys:
+                if fk.get("name"):
+                    batch_op.drop_constraint(fk["name"], type_="foreignkey")
+            batch_op.create_foreign_key(
+                FK_NAME, "ci_instances", ["ci_id"], ["id"], ondelete=ondelete
+            )
+
+
+def upgrade():
+    _set_foreign_key("SET NULL", nullable=True)
+
+
+def downgrade():
+    # 已脱离 CI 的历史无法恢复 NOT NULL，列保持可空
+    _set_foreign_key(None, nullable=True)
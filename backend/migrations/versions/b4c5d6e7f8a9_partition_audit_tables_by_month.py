@@ -0,0 +1,145 @@
+"""partition audit tables by month
+
+Revision ID: b4c5d6e7f8a9
+Revises: a3b4c5d6e7f8
+Create Date: 2026-10-18 18:00:00.000000
+
+operation_logs / ci_history:
+- all databases: composite indexes (user_id, created_at) / (ci_id, created_at)
+- PostgreSQL: rebuilt as RANGE (created_at) partitioned tables with monthly
+  partitions plus a default partition; primary key becomes (id, created_at).
+  Later months are created by app.services.audit_partition_service.
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "b4c5d6e7f8a9"
+down_revision = "a3b4c5d6e7f8"
+branch_labels = None
+depends_on = None
+
+COMPOSITE_INDEXES = {
+    "operation_logs": ("ix_operation_logs_user_created", ["user_id", "created_at"]),
+    "ci_history": ("ix_ci_history_ci_created", ["ci_id", "created_at"]),
+}
+MONTHS_AHEAD = 2
+
+
+def _month_start(value, offset=0):
+    month_index = value.year * 12 + value.month - 1 + offset
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _is_partitioned(bind, table):
+    relkind = bind.execute(
+        sa.text(
+            "SELECT c.relkind FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE c.relname = :name AND n.nspname = current_schema()"
+        ),
+        {"name": table},
+    ).scalar()
+    return relkind == "p"
+
+
+def _create_month_partitions(bind, table):
+    first = bind.execute(sa.text(f"SELECT min(created_at) FROM {table}_legacy")).scalar()
+    month = _month_start(first or date.today())
+    last = _month_start(date.today(), MONTHS_AHEAD)
+    while month <= last:
+        upper = _month_start(month, 1)
+        op.execute(
+            f"CREATE TABLE {table}_p{month:%Y%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        month = upper
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+
+def _rebuild(bind, table, partitioned):
+    """以 LIKE 复制列定义重建表并搬迁数据，保留序列、外键与索引"""
+    inspector = sa.inspect(bind)
+    indexes = [
+        idx
+        for idx in inspector.get_indexes(table)
+        if idx["name"] != COMPOSITE_INDEXES[table][0]
+    ]
+    foreign_keys = inspector.get_foreign_keys(table)
+
+    if partitioned:
+        op.execute(f"UPDATE {table} SET created_at = LOCALTIMESTAMP WHERE created_at IS NULL")
+    op.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+    sequence = bind.execute(
+        sa.text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": f"{table}_legacy"}
+    ).scalar()
+
+    if partitioned:
+        op.execute(
+            f"CREATE TABLE {table} (LIKE {table}_legacy INCLUDING DEFAULTS) "
+            "PARTITION BY RANGE (created_at)"
+        )
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN created_at SET NOT NULL")
+        _create_month_partitions(bind, table)
+    else:
+        op.execute(f"CREATE TABLE {table} (LIKE {table}_legacy INCLUDING DEFAULTS)")
+
+    op.execute(f"INSERT INTO {table} SELECT * FROM {table}_legacy")
+    if sequence:
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id")
+    has_default = bind.execute(
+        sa.text(
+            "SELECT column_default IS NOT NULL FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = :table AND column_name = 'id'"
+        ),
+        {"table": table},
+    ).scalar()
+    op.execute(f"DROP TABLE {table}_legacy")
+    if not has_default:
+        # 原表为 IDENTITY 列时 LIKE 不复制默认值，重新建立自增并对齐当前最大值
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY")
+        op.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"COALESCE((SELECT max(id) FROM {table}), 0) + 1, false)"
+        )
+
+    primary_key = "id, created_at" if partitioned else "id"
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({primary_key})")
+    for fk in foreign_keys:
+        op.create_foreign_key(
+            fk["name"],
+            table,
+            fk["referred_table"],
+            fk["constrained_columns"],
+            fk["referred_columns"],
+            ondelete=(fk.get("options") or {}).get("ondelete"),
+        )
+    for idx in indexes:
+        op.create_index(idx["name"], table, idx["column_names"], unique=idx["unique"])
+
+
+def upgrade():
+    bind = op.get_bind()
+    for table, (index_name, columns) in COMPOSITE_INDEXES.items():
+        inspector = sa.inspect(bind)
+        if table not in inspector.get_table_names():
+            continue
+        if bind.dialect.name == "postgresql" and not _is_partitioned(bind, table):
+            _rebuild(bind, table, partitioned=True)
+        index_names = {idx["name"] for idx in sa.inspect(bind).get_indexes(table)}
+        if index_name not in index_names:
+            op.create_index(index_name, table, columns)
+
+
+def downgrade():
+    bind = op.get_bind()
+    for table, (index_name, _) in COMPOSITE_INDEXES.items():
+        inspector = sa.inspect(bind)
+        if table not in inspector.get_table_names():
+            continue
+        index_names = {idx["name"] for idx in inspector.get_indexes(table)}
+        if index_name in index_names:
+            op.drop_index(index_name, table_name=table)
+        if bind.dialect.name == "postgresql" and _is_partitioned(bind, table):
+            _rebuild(bind, table, partitioned=False)
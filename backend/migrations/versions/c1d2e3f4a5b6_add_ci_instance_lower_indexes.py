@@ -0,0 +1,45 @@
+"""add lower(code)/lower(name) indexes on ci_instances
+
+Revision ID: c1d2e3f4a5b6
+Revises: b0c1d2e3f4a5
+Create Date: 2026-10-19 12:00:00.000000
+
+The alert CI index resolves ci_code/ci_name labels with case-insensitive
+equality on lower(code) and lower(name); expression indexes let those
+lookups use an index instead of scanning ci_instances.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "c1d2e3f4a5b6"
+down_revision = "b0c1d2e3f4a5"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("ix_ci_instances_code_lower", "code"),
+    ("ix_ci_instances_name_lower", "name"),
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "ci_instances" not in inspector.get_table_names():
+        return
+    existing = {index["name"] for index in inspector.get_indexes("ci_instances")}
+    for name, column in INDEXES:
+        if name not in existing:
+            op.create_index(name, "ci_instances", [sa.text(f"lower({column})")])
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "ci_instances" not in inspector.get_table_names():
+        return
+    existing = {index["name"] for index in inspector.get_indexes("ci_instances")}
+    for name, _ in INDEXES:
+        if name in existing:
+            op.drop_index(name, table_name="ci_instances")
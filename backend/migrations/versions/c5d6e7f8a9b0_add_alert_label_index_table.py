@@ -0,0 +1,68 @@
+"""add alert label index table
+
+Revision ID: c5d6e7f8a9b0
+Revises: b4c5d6e7f8a9
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "c5d6e7f8a9b0"
+down_revision = "b4c5d6e7f8a9"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "idx_alert_label_sort": ["scope", "sort_at", "alert_id"],
+    "idx_alert_label_status": ["scope", "status", "sort_at"],
+    "idx_alert_label_level": ["scope", "level", "sort_at"],
+    "idx_alert_label_monitor": ["scope", "monitor_id"],
+    "idx_alert_label_app": ["scope", "app"],
+    "idx_alert_label_rule": ["scope", "rule_id"],
+    "idx_alert_label_triggered": ["scope", "triggered_at"],
+}
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "alert_label_index" in inspector.get_table_names():
+        return
+
+    op.create_table(
+        "alert_label_index",
+        sa.Column("scope", sa.String(length=10), nullable=False),
+        sa.Column("alert_id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("status", sa.String(length=10), nullable=False),
+        sa.Column("level", sa.String(length=50), nullable=True),
+        sa.Column("monitor_id", sa.Integer(), nullable=True),
+        sa.Column("app", sa.String(length=100), nullable=True),
+        sa.Column("metric", sa.String(length=255), nullable=True),
+        sa.Column("rule_id", sa.Integer(), nullable=True),
+        sa.Column("instance", sa.Text(), nullable=True),
+        sa.Column("assignee", sa.Text(), nullable=True),
+        sa.Column("name", sa.Text(), nullable=True),
+        sa.Column("monitor_name", sa.Text(), nullable=True),
+        sa.Column("note", sa.Text(), nullable=True),
+        sa.Column("triggered_at", sa.BigInteger(), nullable=True),
+        sa.Column("sort_at", sa.DateTime(), nullable=False),
+        sa.Column("source_updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("scope", "alert_id"),
+    )
+    for name, columns in INDEXES.items():
+        op.create_index(name, "alert_label_index", columns)
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "alert_label_index" not in inspector.get_table_names():
+        return
+
+    index_names = {idx["name"] for idx in inspector.get_indexes("alert_label_index")}
+    for name in INDEXES:
+        if name in index_names:
+            op.drop_index(name, table_name="alert_label_index")
+    op.drop_table("alert_label_index")
@@ -0,0 +1,105 @@
+"""add notification unread counters and search indexes
+
+Revision ID: d2e3f4a5b6c7
+Revises: c1d2e3f4a5b6
+Create Date: 2026-10-19 13:00:00.000000
+
+- notification_unread_counters: per-user unread count. NULL or missing
+  means unknown and is recounted on read, so the table starts empty.
+- PostgreSQL: title/content keyword search stays ILIKE (substring);
+  pg_trgm GIN indexes serve it. They are built CONCURRENTLY so the
+  notifications table is not locked against writes. A search_vector
+  column and index left by earlier startup DDL are dropped.
+- SQLite: FTS5 trigram table kept in sync by triggers.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "d2e3f4a5b6c7"
+down_revision = "c1d2e3f4a5b6"
+branch_labels = None
+depends_on = None
+
+FTS_TABLE = "notifications_fts"
+PG_TRGM_INDEXES = {
+    "idx_notifications_title_trgm": "title",
+    "idx_notifications_content_trgm": "content",
+}
+
+SQLITE_DDL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, content, content='notifications', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON notifications BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON notifications BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, content ON notifications BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+)
+
+
+def _create_counter_table(inspector):
+    if "notification_unread_counters" in inspector.get_table_names():
+        # 启动时 create_all 建过的表计数列为 NOT NULL
+        with op.batch_alter_table("notification_unread_counters") as batch_op:
+            batch_op.alter_column("unread_count", existing_type=sa.Integer(), nullable=True)
+        return
+    op.create_table(
+        "notification_unread_counters",
+        sa.Column("user_id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("unread_count", sa.Integer(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+
+def _create_postgresql_index():
+    op.execute("DROP INDEX IF EXISTS idx_notifications_search_vector")
+    op.execute("ALTER TABLE notifications DROP COLUMN IF EXISTS search_vector")
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for name, column in PG_TRGM_INDEXES.items():
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON notifications USING GIN ({column} gin_trgm_ops)"
+            )
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    _create_counter_table(inspector)
+
+    if "notifications" not in inspector.get_table_names():
+        return
+    if bind.dialect.name == "postgresql":
+        _create_postgresql_index()
+    elif bind.dialect.name == "sqlite":
+        for statement in SQLITE_DDL:
+            op.execute(statement)
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name in PG_TRGM_INDEXES:
+                op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    elif bind.dialect.name == "sqlite":
+        for suffix in ("ai", "ad", "au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        op.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+    if "notification_unread_counters" in inspector.get_table_names():
+        op.drop_table("notification_unread_counters")
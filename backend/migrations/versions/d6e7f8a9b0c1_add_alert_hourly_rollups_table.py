@@ -0,0 +1,54 @@
+"""add alert hourly rollups table
+
+Revision ID: d6e7f8a9b0c1
+Revises: c5d6e7f8a9b0
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "d6e7f8a9b0c1"
+down_revision = "c5d6e7f8a9b0"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "idx_alert_rollup_last_alert": ["last_alert_id"],
+    "idx_alert_rollup_monitor": ["monitor_id", "bucket_ms"],
+}
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "alert_hourly_rollups" in inspector.get_table_names():
+        return
+
+    op.create_table(
+        "alert_hourly_rollups",
+        sa.Column("bucket_ms", sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column("monitor_id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("monitor_name", sa.String(length=255), nullable=False),
+        sa.Column("level", sa.String(length=50), nullable=False),
+        sa.Column("app", sa.String(length=100), nullable=False),
+        sa.Column("alert_count", sa.Integer(), nullable=False),
+        sa.Column("last_alert_id", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("bucket_ms", "monitor_id", "monitor_name", "level", "app"),
+    )
+    for name, columns in INDEXES.items():
+        op.create_index(name, "alert_hourly_rollups", columns)
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "alert_hourly_rollups" not in inspector.get_table_names():
+        return
+
+    index_names = {idx["name"] for idx in inspector.get_indexes("alert_hourly_rollups")}
+    for name in INDEXES:
+        if name in index_names:
+            op.drop_index(name, table_name="alert_hourly_rollups")
+    op.drop_table("alert_hourly_rollups")
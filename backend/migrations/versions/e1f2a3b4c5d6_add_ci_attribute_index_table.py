@@ -0,0 +1,77 @@
+"""add ci attribute index table
+
+Revision ID: e1f2a3b4c5d6
+Revises: d9e8f7a6b5c4
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "e1f2a3b4c5d6"
+down_revision = "d9e8f7a6b5c4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "ci_attribute_index" not in inspector.get_table_names():
+        op.create_table(
+            "ci_attribute_index",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("ci_id", sa.Integer(), nullable=False),
+            sa.Column("model_id", sa.Integer(), nullable=False),
+            sa.Column("field_code", sa.String(length=100), nullable=False),
+            sa.Column("value_text", sa.String(length=255), nullable=True),
+            sa.Column("value_number", sa.Float(), nullable=True),
+            sa.Column("value_date", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["ci_id"], ["ci_instances.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_ci_attribute_index_ci_id", "ci_attribute_index", ["ci_id"])
+        op.create_index(
+            "ix_ci_attr_model_field_text",
+            "ci_attribute_index",
+            ["model_id", "field_code", "value_text"],
+        )
+        op.create_index(
+            "ix_ci_attr_model_field_number",
+            "ci_attribute_index",
+            ["model_id", "field_code", "value_number"],
+        )
+        op.create_index(
+            "ix_ci_attr_model_field_date",
+            "ci_attribute_index",
+            ["model_id", "field_code", "value_date"],
+        )
+        op.create_index(
+            "ix_ci_attr_field_text", "ci_attribute_index", ["field_code", "value_text"]
+        )
+
+    # 回填历史 CI 的属性索引
+    if bind.execute(sa.text("SELECT COUNT(*) FROM ci_attribute_index")).scalar() == 0:
+        from app.services.ci_attribute_index_service import rebuild_attribute_index
+
+        rebuild_attribute_index(bind)
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "ci_attribute_index" not in inspector.get_table_names():
+        return
+
+    index_names = {idx["name"] for idx in inspector.get_indexes("ci_attribute_index")}
+    for index_name in (
+        "ix_ci_attr_field_text",
+        "ix_ci_attr_model_field_date",
+        "ix_ci_attr_model_field_number",
+        "ix_ci_attr_model_field_text",
+        "ix_ci_attribute_index_ci_id",
+    ):
+        if index_name in index_names:
+            op.drop_index(index_name, table_name="ci_attribute_index")
+    op.drop_table("ci_attribute_index")
@@ -0,0 +1,60 @@
+"""add unique index on active background job concurrency keys
+
+Revision ID: e3f4a5b6c7d8
+Revises: d2e3f4a5b6c7
+Create Date: 2026-10-19 14:00:00.000000
+
+A partial unique index on concurrency_key over pending/running jobs makes
+the database refuse a second active job with the same key, so the key
+holds across worker processes. Existing duplicate active jobs are marked
+failed first, keeping the newest one per key.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "e3f4a5b6c7d8"
+down_revision = "d2e3f4a5b6c7"
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = "uq_background_jobs_active_key"
+ACTIVE = "status IN ('pending', 'running')"
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "background_jobs" not in inspector.get_table_names():
+        return
+    index_names = {idx["name"] for idx in inspector.get_indexes("background_jobs")}
+    if INDEX_NAME in index_names:
+        return
+
+    op.execute(
+        f"""UPDATE background_jobs
+        SET status = 'failed', error_message = '同一并发键存在更新的任务'
+        WHERE {ACTIVE} AND concurrency_key IS NOT NULL AND id NOT IN (
+            SELECT MAX(id) FROM background_jobs
+            WHERE {ACTIVE} AND concurrency_key IS NOT NULL
+            GROUP BY concurrency_key
+        )"""
+    )
+    op.create_index(
+        INDEX_NAME,
+        "background_jobs",
+        ["concurrency_key"],
+        unique=True,
+        postgresql_where=sa.text(ACTIVE),
+        sqlite_where=sa.text(ACTIVE),
+    )
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "background_jobs" not in inspector.get_table_names():
+        return
+    index_names = {idx["name"] for idx in inspector.get_indexes("background_jobs")}
+    if INDEX_NAME in index_names:
+        op.drop_index(INDEX_NAME, table_name="background_jobs")
@@ -0,0 +1,56 @@
+"""add alert rule index table
+
+Revision ID: e7f8a9b0c1d2
+Revises: d6e7f8a9b0c1
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "e7f8a9b0c1d2"
+down_revision = "d6e7f8a9b0c1"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "idx_alert_rule_index_monitor": ["monitor_id"],
+    "idx_alert_rule_index_match": ["app", "monitor_id", "metric"],
+    "idx_alert_rule_index_bound": ["is_bound"],
+}
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "alert_rule_index" in inspector.get_table_names():
+        return
+
+    op.create_table(
+        "alert_rule_index",
+        sa.Column("rule_id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("monitor_id", sa.String(length=64), nullable=False),
+        sa.Column("app", sa.String(length=100), nullable=False),
+        sa.Column("instance", sa.String(length=255), nullable=False),
+        sa.Column("metric", sa.String(length=100), nullable=False),
+        sa.Column("source", sa.String(length=50), nullable=False),
+        sa.Column("is_bound", sa.Boolean(), nullable=False),
+        sa.Column("rule_updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("rule_id"),
+    )
+    for name, columns in INDEXES.items():
+        op.create_index(name, "alert_rule_index", columns)
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "alert_rule_index" not in inspector.get_table_names():
+        return
+
+    index_names = {idx["name"] for idx in inspector.get_indexes("alert_rule_index")}
+    for name in INDEXES:
+        if name in index_names:
+            op.drop_index(name, table_name="alert_rule_index")
+    op.drop_table("alert_rule_index")
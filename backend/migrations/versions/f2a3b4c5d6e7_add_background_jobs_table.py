@@ -0,0 +1,67 @@
+"""add background jobs table
+
+Revision ID: f2a3b4c5d6e7
+Revises: e1f2a3b4c5d6
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "f2a3b4c5d6e7"
+down_revision = "e1f2a3b4c5d6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "background_jobs" in inspector.get_table_names():
+        return
+
+    op.create_table(
+        "background_jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("job_type", sa.String(length=50), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("concurrency_key", sa.String(length=100), nullable=True),
+        sa.Column("params", sa.Text(), nullable=True),
+        sa.Column("progress", sa.Integer(), nullable=True),
+        sa.Column("progress_data", sa.Text(), nullable=True),
+        sa.Column("result", sa.Text(), nullable=True),
+        sa.Column("result_file", sa.String(length=500), nullable=True),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column("cancel_requested", sa.Boolean(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("created_by", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["created_by"], ["users.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("idx_background_jobs_status", "background_jobs", ["status"])
+    op.create_index(
+        "idx_background_jobs_created_by", "background_jobs", ["created_by", "created_at"]
+    )
+    op.create_index(
+        "idx_background_jobs_type", "background_jobs", ["job_type", "created_at"]
+    )
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "background_jobs" not in inspector.get_table_names():
+        return
+
+    index_names = {idx["name"] for idx in inspector.get_indexes("background_jobs")}
+    for index_name in (
+        "idx_background_jobs_type",
+        "idx_background_jobs_created_by",
+        "idx_background_jobs_status",
+    ):
+        if index_name in index_names:
+            op.drop_index(index_name, table_name="background_jobs")
+    op.drop_table("background_jobs")
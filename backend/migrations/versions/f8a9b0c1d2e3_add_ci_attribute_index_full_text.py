@@ -0,0 +1,56 @@
+"""add full text column to ci attribute index
+
+Revision ID: f8a9b0c1d2e3
+Revises: e7f8a9b0c1d2
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "f8a9b0c1d2e3"
+down_revision = "e7f8a9b0c1d2"
+branch_labels = None
+depends_on = None
+
+REBUILD_CHUNK_SIZE = 1000
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "ci_attribute_index" not in inspector.get_table_names():
+        return
+    columns = {col["name"] for col in inspector.get_columns("ci_attribute_index")}
+    if "value_full" in columns:
+        return
+
+    op.add_column("ci_attribute_index", sa.Column("value_full", sa.Text(), nullable=True))
+
+    # 之前被截断到 255 个字符的属性值，重建所在 CI 的索引以补齐完整文本
+    ci_ids = [
+        row[0]
+        for row in bind.execute(
+            sa.text(
+                "SELECT DISTINCT ci_id FROM ci_attribute_index "
+                "WHERE LENGTH(value_text) >= 255 ORDER BY ci_id"
+            )
+        )
+    ]
+    if not ci_ids:
+        return
+    from app.services.ci_attribute_index_service import rebuild_attribute_index
+
+    for i in range(0, len(ci_ids), REBUILD_CHUNK_SIZE):
+        rebuild_attribute_index(bind, ci_ids=ci_ids[i : i + REBUILD_CHUNK_SIZE])
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "ci_attribute_index" not in inspector.get_table_names():
+        return
+    columns = {col["name"] for col in inspector.get_columns("ci_attribute_index")}
+    if "value_full" in columns:
+        op.drop_column("ci_attribute_index", "value_full")
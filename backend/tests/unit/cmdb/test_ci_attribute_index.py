@@ -0,0 +1,135 @@
+"""CI 属性索引单元测试"""
+
+import json
+
+from app.models.ci_instance import CiAttributeIndex, CiInstance
+
+
+def _make_ci(db_session, model, user, code, values):
+    ci = CiInstance(name=code, code=code, model_id=model.id, created_by=user.id)
+    ci.set_attribute_values(values)
+    db_session.add(ci)
+    db_session.commit()
+    return ci
+
+
+def _number_form_config():
+    return json.dumps(
+        [
+            {"controlType": "text", "props": {"code": "hostname", "label": "主机名"}},
+            {"controlType": "number", "props": {"code": "cpu", "label": "CPU"}},
+            {"controlType": "date", "props": {"code": "online_date", "label": "上线日期"}},
+        ]
+    )
+
+
+class TestCiAttributeIndex:
+    """测试属性索引同步与过滤"""
+
+    def test_index_rows_written_on_save(self, db_session, test_ci_instance):
+        rows = CiAttributeIndex.query.filter_by(ci_id=test_ci_instance.id).all()
+        assert {(r.field_code, r.value_text) for r in rows} == {
+            ("ip", "192.168.1.100"),
+            ("hostname", "web-server-01"),
+        }
+
+    def test_index_rows_replaced_on_update_and_removed_on_delete(
+        self, db_session, test_ci_instance
+    ):
+        test_ci_instance.set_attribute_values({"ip": "10.0.0.1"})
+        db_session.commit()
+        rows = CiAttributeIndex.query.filter_by(ci_id=test_ci_instance.id).all()
+        assert [(r.field_code, r.value_text) for r in rows] == [("ip", "10.0.0.1")]
+
+        ci_id = test_ci_instance.id
+        db_session.delete(test_ci_instance)
+        db_session.commit()
+        assert CiAttributeIndex.query.filter_by(ci_id=ci_id).count() == 0
+
+    def test_typed_columns_and_range_filter(self, db_session, test_model, test_user):
+        from app.services.ci_attribute_index_service import attribute_filter
+
+        test_model.form_config = _number_form_config()
+        db_session.commit()
+        small = _make_ci(
+            db_session, test_model, test_user, "ci-small", {"cpu": "4", "online_date": "2025-01-01"}
+        )
+        large = _make_ci(
+            db_session, test_model, test_user, "ci-large", {"cpu": 32, "online_date": "2026-06-01"}
+        )
+
+        def ids(condition):
+            return {ci.id for ci in CiInstance.query.filter(condition).all()}
+
+        assert ids(attribute_filter("cpu", "8", "gt", test_model.id)) == {large.id}
+        assert ids(attribute_filter("cpu", "4", "lte", test_model.id)) == {small.id}
+        assert ids(attribute_filter("online_date", "2026-01-01", "lt")) == {small.id}
+        assert ids(attribute_filter("cpu", "32", "eq")) == {large.id}
+        assert ids(attribute_filter("cpu", "32", "ne", test_model.id)) == {small.id}
+
+    def test_multi_value_and_contains_filter(self, db_session, test_model, test_user):
+        from app.services.ci_attribute_index_service import attribute_filter
+
+        tagged = _make_ci(
+            db_session, test_model, test_user, "ci-tagged", {"tags": ["Prod", "db"]}
+        )
+        _make_ci(db_session, test_model, test_user, "ci-plain", {"tags": ["dev"]})
+
+        matched = CiInstance.query.filter(attribute_filter("tags", "prod", "contains")).all()
+        assert [ci.id for ci in matched] == [tagged.id]
+        matched = CiInstance.query.filter(
+            attribute_filter("tags", ["db", "qa"], "in", test_model.id)
+        ).all()
+        assert [ci.id for ci in matched] == [tagged.id]
+
+    def test_long_values_match_full_text(self, db_session, test_model, test_user):
+        from app.services.ci_attribute_index_service import attribute_filter
+
+        prefix = "x" * 255
+        long_ci = _make_ci(db_session, test_model, test_user, "ci-long", {"note": prefix + "-tail"})
+        short_ci = _make_ci(db_session, test_model, test_user, "ci-short", {"note": prefix})
+
+        def ids(condition):
+            return {ci.id for ci in CiInstance.query.filter(condition).all()}
+
+        assert ids(attribute_filter("note", prefix + "-tail", "eq")) == {long_ci.id}
+        assert ids(attribute_filter("note", prefix, "eq")) == {short_ci.id}
+        assert ids(attribute_filter("note", "-TAIL", "contains")) == {long_ci.id}
+        assert ids(attribute_filter("note", [prefix, "other"], "in")) == {short_ci.id}
+
+    def test_form_type_change_rebuilds_typed_columns(
+        self, db_session, test_model, test_user
+    ):
+        ci = _make_ci(
+            db_session, test_model, test_user, "ci-rebuild", {"online_date": "2026-03-01"}
+        )
+        row = CiAttributeIndex.query.filter_by(ci_id=ci.id, field_code="online_date").one()
+        assert row.value_date is None
+
+        test_model.form_config = _number_form_config()
+        db_session.commit()
+        db_session.expire_all()
+        row = CiAttributeIndex.query.filter_by(ci_id=ci.id, field_code="online_date").one()
+        assert row.value_date.strftime("%Y-%m-%d") == "2026-03-01"
+
+    def test_compile_view_filter_conditions(self, db_session, test_model, test_user):
+        from app.services.ci_attribute_index_service import compile_filter_conditions
+
+        prod = _make_ci(
+            db_session, test_model, test_user, "ci-prod", {"env": "prod", "mem": "64"}
+        )
+        _make_ci(db_session, test_model, test_user, "ci-test", {"env": "test", "mem": "128"})
+        _make_ci(db_session, test_model, test_user, "ci-none", {"mem": "8"})
+
+        predicates = compile_filter_conditions(
+            [
+                {"field": "env", "operator": "ne", "value": "test"},
+                {"field": "mem", "operator": "gte", "value": "16"},
+                {"field": "env", "operator": "unknown", "value": "x"},
+                {"field": "owner", "operator": "eq", "value": ""},
+            ],
+            test_model.id,
+        )
+        assert len(predicates) == 2
+        matched = CiInstance.query.filter(*predicates).all()
+        assert [ci.id for ci in matched] == [prod.id]
@@ -0,0 +1,141 @@
+"""CI 批量更新/删除服务单元测试"""
+
+import json
+
+from app.models.ci_instance import CiAttributeIndex, CiHistory, CiInstance
+from app.models.cmdb_relation import CmdbRelation
+
+
+def _create_cis(db_session, model, user, count, attributes=None):
+    model.form_config = json.dumps(
+        [
+            {"controlType": "text", "props": {"code": "env", "label": "环境"}},
+            {"controlType": "number", "props": {"code": "cpu", "label": "CPU"}},
+        ]
+    )
+    cis = []
+    for index in range(count):
+        ci = CiInstance(
+            name=f"host{index}", code=f"HOST-{index}", model_id=model.id, created_by=user.id
+        )
+        ci.set_attribute_values(dict(attributes or {"env": "dev", "cpu": 2}))
+        cis.append(ci)
+    db_session.add_all(cis)
+    db_session.commit()
+    return cis
+
+
+class TestBatchUpdate:
+    """测试批量更新"""
+
+    def test_updates_values_history_and_index(self, db_session, test_model, test_user):
+        from app.services.ci_batch_service import batch_update_instances
+
+        cis = _create_cis(db_session, test_model, test_user, 3)
+        ids = [ci.id for ci in cis]
+
+        updated = batch_update_instances(
+            ids, test_model.id, {"env": "prod"}, test_user.id, operator_name="tester"
+        )
+        assert sorted(updated) == sorted(ids)
+
+        for ci in CiInstance.query.filter(CiInstance.id.in_(ids)):
+            assert ci.get_attribute_values() == {"env": "prod", "cpu": 2}
+            assert ci.updated_by == test_user.id
+
+        histories = CiHistory.query.filter_by(operation="UPDATE").all()
+        assert len(histories) == 3
+        assert {(h.old_value, h.new_value, h.operator_name) for h in histories} == {
+            ("dev", "prod", "tester")
+        }
+
+        env_index = CiAttributeIndex.query.filter_by(field_code="env").all()
+        assert sorted(row.ci_id for row in env_index) == sorted(ids)
+        assert {row.value_text for row in env_index} == {"prod"}
+
+    def test_skips_other_model_and_foreign_owner(
+        self, db_session, test_model, test_target_model, test_user, another_user
+    ):
+        from app.services.ci_batch_service import batch_update_instances
+
+        own = _create_cis(db_session, test_model, test_user, 1)[0]
+        foreign = CiInstance(
+            name="other", code="OTHER-1", model_id=test_model.id, created_by=another_user.id
+        )
+        other_model = CiInstance(
+            name="app", code="APP-1", model_id=test_target_model.id, created_by=test_user.id
+        )
+        db_session.add_all([foreign, other_model])
+        db_session.commit()
+
+        updated = batch_update_instances(
+            [own.id, foreign.id, other_model.id], test_model.id, {"env": "prod"}, test_user.id
+        )
+        assert updated == [own.id]
+        assert CiHistory.query.count() == 1
+
+        admin_updated = batch_update_instances(
+            [own.id, foreign.id], test_model.id, {"env": "test"}, test_user.id, is_admin=True
+        )
+        assert sorted(admin_updated) == sorted([own.id, foreign.id])
+
+
+class TestBatchDelete:
+    """测试批量删除"""
+
+    def test_removes_relations_history_and_index(
+        self, db_session, test_model, test_user, test_relation_type
+    ):
+        from app.services.ci_batch_service import batch_update_instances, delete_instances
+        from app.services.relation_graph_service import relation_graph
+
+        cis = _create_cis(db_session, test_model, test_user, 3)
+        ids = [ci.id for ci in cis]
+        relation = CmdbRelation(
+            source_ci_id=cis[0].id,
+            target_ci_id=cis[1].id,
+            relation_type_id=test_relation_type.id,
+        )
+        kept = CmdbRelation(
+            source_ci_id=cis[1].id,
+            target_ci_id=cis[2].id,
+            relation_type_id=test_relation_type.id,
+        )
+        db_session.add_all([relation, kept])
+        db_session.commit()
+        kept_id = kept.id
+        batch_update_instances([ids[0]], test_model.id, {"env": "prod"}, test_user.id)
+        relation_graph.invalidate()
+        relation_graph.ensure_fresh()
+        assert relation_graph.edges_of(ids[0])
+
+        deleted = delete_instances([ids[0], 999999], test_user.id, operator_name="tester")
+        assert deleted == [(ids[0], "HOST-0", "host0")]
+
+        assert db_session.get(CiInstance, ids[0]) is None
+        assert [r.id for r in CmdbRelation.query] == [kept_id]
+        # 历史保留并脱离已删除的 CI
+        assert CiHistory.query.filter_by(ci_id=ids[0]).count() == 0
+        histories = CiHistory.query.filter(CiHistory.ci_id.is_(None)).all()
+        assert {(h.operation, h.old_value, h.operator_name) for h in histories} == {
+            ("UPDATE", "dev", None),
+            ("DELETE", "host0 (HOST-0)", "tester"),
+        }
+        assert CiAttributeIndex.query.filter_by(ci_id=ids[0]).count() == 0
+        assert relation_graph.edges_of(ids[0]) == []
+        assert relation_graph.edges_of(ids[2])
+
+    def test_non_admin_only_deletes_own(self, db_session, test_model, test_user, another_user):
+        from app.services.ci_batch_service import delete_instances
+
+        own = _create_cis(db_session, test_model, test_user, 1)[0]
+        foreign = CiInstance(
+            name="other", code="OTHER-1", model_id=test_model.id, created_by=another_user.id
+        )
+        db_session.add(foreign)
+        db_session.commit()
+        own_id, foreign_id = own.id, foreign.id
+
+        deleted = delete_instances([own_id, foreign_id], test_user.id, is_admin=False)
+        assert [row[0] for row in deleted] == [own_id]
+        assert db_session.get(CiInstance, foreign_id) is not None
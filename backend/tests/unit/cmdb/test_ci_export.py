@@ -0,0 +1,43 @@
+"""CI 导出单元测试"""
+
+import gzip
+
+from app.models.ci_instance import CiInstance
+
+
+def _make_instances(db_session, model, user, count):
+    for index in range(count):
+        ci = CiInstance(
+            name=f"host-{index}", code=f"H{index}", model_id=model.id, created_by=user.id
+        )
+        ci.set_attribute_values({"ip": f"10.0.0.{index}", "tags": ["a", "b"]})
+        db_session.add(ci)
+    db_session.commit()
+
+
+class TestExportCsv:
+    """测试分批生成 CSV"""
+
+    def test_batches_match_single_pass(self, db_session, test_model, test_user, monkeypatch):
+        from app.routes import ci_instance
+
+        _make_instances(db_session, test_model, test_user, 5)
+        query = CiInstance.query.filter_by(model_id=test_model.id)
+        field_defs = ci_instance._export_field_defs(test_model, query)
+        assert [field["code"] for field in field_defs] == ["ip", "tags"]
+
+        content = "".join(ci_instance._iter_export_csv(query, field_defs))
+        lines = content.split("\r\n")
+        assert len(lines) == 7
+        assert lines[1].split(",")[:4] == ["H0", "host-0", "", "testuser"]
+        assert lines[1].endswith(',10.0.0.0,"a,b"')
+
+        monkeypatch.setattr(ci_instance, "EXPORT_BATCH_SIZE", 2)
+        chunks = list(ci_instance._iter_export_csv(query, field_defs))
+        assert len(chunks) == 3
+        assert "".join(chunks) == content
+
+        compressed = b"".join(
+            ci_instance._gzip_chunks(chunk.encode("utf-8") for chunk in chunks)
+        )
+        assert gzip.decompress(compressed).decode("utf-8") == content
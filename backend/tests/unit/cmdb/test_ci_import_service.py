@@ -0,0 +1,164 @@
+"""CI 批量导入服务单元测试"""
+
+import io
+import json
+
+from app.models.ci_instance import CiAttributeIndex, CiInstance, CodeSequence
+from app.models.cmdb_relation import CmdbRelation, RelationTrigger
+
+
+def _set_fields(db_session, model, fields):
+    model.form_config = json.dumps(
+        [
+            {
+                "controlType": control_type,
+                "props": {"code": code, "label": label, "required": required},
+            }
+            for code, label, control_type, required in fields
+        ]
+    )
+    db_session.commit()
+
+
+class TestCodeReservation:
+    """测试批量预留编码"""
+
+    def test_reserve_consecutive_codes(self, db_session):
+        from app.utils.code_generator import generate_ci_code_v2, generate_ci_codes
+
+        first = generate_ci_code_v2()
+        codes = generate_ci_codes(3)
+        assert [int(code[-8:]) for code in codes] == [
+            int(first[-8:]) + offset for offset in (1, 2, 3)
+        ]
+        assert CodeSequence.query.filter_by(sequence_type="ci").one().current_value == 4
+        assert generate_ci_codes(0) == []
+
+
+class TestImportCsv:
+    """测试分批导入"""
+
+    def test_chunked_import_with_full_error_report(
+        self, db_session, test_model, test_user, test_ci_instance
+    ):
+        from app.services.ci_import_service import import_ci_csv
+
+        _set_fields(
+            db_session,
+            test_model,
+            [("ip", "IP", "text", True), ("cpu", "CPU", "number", False)],
+        )
+        content = (
+            "CI名称,CI编码,*IP(必填),CPU\n"
+            "web-1,,10.0.0.1,4\n"
+            ",,10.0.0.2,2.5\n"
+            "bad,,,8\n"
+            "dup,server-01,10.0.0.3,1\n"
+            "custom,C-1,10.0.0.4,x\n"
+            "again,C-1,10.0.0.5,1\n"
+            "\n"
+        )
+        progress = []
+        result = import_ci_csv(
+            io.StringIO(content, newline=""),
+            test_model,
+            test_user.id,
+            chunk_size=2,
+            progress=progress.append,
+        )
+
+        assert result["success_count"] == 3
+        assert result["error_messages"] == [
+            "第4行: 必填属性不能为空(IP)",
+            "第5行: CI编码已存在: server-01",
+            "第7行: CI编码在文件中重复: C-1",
+        ]
+        assert [p["processed_rows"] for p in progress if p["stage"] == "loading"] == [
+            2,
+            4,
+            6,
+        ]
+        assert progress[-1]["stage"] == "finished"
+
+        imported = (
+            CiInstance.query.filter(CiInstance.id != test_ci_instance.id)
+            .order_by(CiInstance.id)
+            .all()
+        )
+        assert [ci.name for ci in imported] == ["web-1", "10.0.0.2", "custom"]
+        assert imported[2].code == "C-1"
+        assert imported[0].get_attribute_values() == {"ip": "10.0.0.1", "cpu": 4}
+        assert imported[2].get_attribute_values()["cpu"] == "x"
+        # Core 批量插入同步写入属性索引
+        assert (
+            CiAttributeIndex.query.filter_by(ci_id=imported[1].id, field_code="cpu")
+            .one()
+            .value_number
+            == 2.5
+        )
+
+    def test_reference_and_rule_relations_after_load(
+        self,
+        db_session,
+        test_model,
+        test_target_model,
+        test_user,
+        test_relation_type,
+    ):
+        from app.services.ci_import_service import import_ci_csv
+
+        _set_fields(
+            db_session,
+            test_model,
+            [("app_id", "应用", "text", False), ("app_name", "应用名", "text", False)],
+        )
+        target = CiInstance(
+            name="app", code="APP-1", model_id=test_target_model.id, created_by=test_user.id
+        )
+        target.set_attribute_values({"name": "billing"})
+        db_session.add(target)
+        db_session.add_all(
+            [
+                RelationTrigger(
+                    name="引用",
+                    source_model_id=test_model.id,
+                    target_model_id=test_target_model.id,
+                    relation_type_id=test_relation_type.id,
+                    trigger_type="reference",
+                    trigger_condition=json.dumps({"source_field": "app_id"}),
+                    is_active=True,
+                ),
+                RelationTrigger(
+                    name="规则",
+                    source_model_id=test_model.id,
+                    target_model_id=test_target_model.id,
+                    relation_type_id=test_relation_type.id,
+                    trigger_type="expression",
+                    trigger_condition=json.dumps(
+                        {"source_field": "app_name", "target_field": "name"}
+                    ),
+                    is_active=True,
+                ),
+            ]
+        )
+        db_session.commit()
+
+        content = (
+            "CI名称,应用,应用名\n"
+            f"h1,{target.id},\n"
+            "h2,,billing\n"
+            f"h3,{target.id},billing\n"
+            "h4,999999,\n"
+        )
+        result = import_ci_csv(io.StringIO(content, newline=""), test_model, test_user.id)
+
+        assert result["success_count"] == 4
+        assert result["relation_created_count"] == 3
+        sources = {
+            ci.name
+            for ci in CiInstance.query.join(
+                CmdbRelation, CmdbRelation.source_ci_id == CiInstance.id
+            ).filter(CmdbRelation.target_ci_id == target.id)
+        }
+        assert sources == {"h1", "h2", "h3"}
+        assert {r.source_type for r in CmdbRelation.query} == {"reference", "rule"}
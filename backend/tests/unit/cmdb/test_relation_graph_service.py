@@ -0,0 +1,150 @@
+"""关系图缓存服务单元测试"""
+
+from app.models.ci_instance import CiInstance
+from app.models.cmdb_relation import CmdbRelation
+
+
+def _make_chain(db_session, model, user, relation_type, length):
+    cis = []
+    for index in range(length):
+        ci = CiInstance(
+            name=f"node-{index}", code=f"node-{index}", model_id=model.id, created_by=user.id
+        )
+        db_session.add(ci)
+        cis.append(ci)
+    db_session.commit()
+    relations = []
+    for left, right in zip(cis, cis[1:]):
+        relation = CmdbRelation(
+            source_ci_id=left.id,
+            target_ci_id=right.id,
+            relation_type_id=relation_type.id,
+        )
+        db_session.add(relation)
+        relations.append(relation)
+    db_session.commit()
+    return cis, relations
+
+
+class TestRelationGraph:
+    """测试邻接索引的加载与增量更新"""
+
+    def test_load_and_incremental_changes(
+        self, db_session, test_model, test_user, test_relation_type
+    ):
+        from app.services.relation_graph_service import RelationGraph, relation_edge
+
+        cis, relations = _make_chain(db_session, test_model, test_user, test_relation_type, 4)
+        graph = RelationGraph()
+
+        assert graph.relation_ids_within_depth([cis[0].id], 2) == {
+            relations[0].id,
+            relations[1].id,
+        }
+        version = graph.version
+
+        extra = CmdbRelation(
+            source_ci_id=cis[3].id,
+            target_ci_id=cis[0].id,
+            relation_type_id=test_relation_type.id,
+        )
+        db_session.add(extra)
+        db_session.flush()
+        graph.add_relation(extra)
+        db_session.commit()
+        assert graph.version == version + 1
+        assert graph.relation_ids_within_depth([cis[0].id], 1) == {
+            relations[0].id,
+            extra.id,
+        }
+
+        edge = relation_edge(relations[0])
+        db_session.delete(relations[0])
+        graph.record_changes(removed=[edge])
+        db_session.commit()
+        assert [item[0] for item in graph.all_edges()] == [
+            relations[1].id,
+            relations[2].id,
+            extra.id,
+        ]
+
+    def test_reload_when_other_process_changes_version(
+        self, db_session, test_model, test_user, test_relation_type
+    ):
+        from app.services.relation_graph_service import RelationGraph
+
+        cis, relations = _make_chain(db_session, test_model, test_user, test_relation_type, 3)
+        graph = RelationGraph()
+        other = RelationGraph()
+        assert len(graph.all_edges()) == 2
+
+        # 另一进程删除关系并递增共享版本号，本地副本下次使用时重载
+        edge = (relations[1].id, cis[1].id, cis[2].id, test_relation_type.id)
+        db_session.delete(relations[1])
+        other.record_changes(removed=[edge])
+        db_session.commit()
+
+        assert [item[0] for item in graph.all_edges()] == [relations[0].id]
+
+
+    def test_rollback_discards_changes(
+        self, db_session, test_model, test_user, test_relation_type
+    ):
+        from app.services.relation_graph_service import RelationGraph, relation_edge
+
+        cis, relations = _make_chain(db_session, test_model, test_user, test_relation_type, 3)
+        graph = RelationGraph()
+        assert len(graph.all_edges()) == 2
+        version = graph.version
+
+        graph.remove_relation(relations[0])
+        db_session.delete(relations[0])
+        db_session.rollback()
+        assert graph.version == version
+        assert graph._read_shared_version() == version
+        assert len(graph.all_edges()) == 2
+
+        # 版本号从 0 起递增，不受整数列宽限制
+        graph.record_changes(removed=[relation_edge(relations[0])])
+        graph.record_changes(removed=[relation_edge(relations[1])])
+        assert graph._read_shared_version() == version + 2
+        db_session.commit()
+        assert graph.version == version + 2
+
+
+class TestGraphBackedTopology:
+    """测试基于关系图的拓扑收集"""
+
+    def test_collect_by_depth_matches_database_traversal(
+        self, db_session, test_model, test_user, test_relation_type
+    ):
+        from app.services.relation_graph_service import RelationGraph
+        from app.services.topology_service import collect_relations_by_depth
+
+        cis, _ = _make_chain(db_session, test_model, test_user, test_relation_type, 6)
+        graph = RelationGraph()
+        blocked = cis[4].id
+        for starts, depth in (([cis[2].id], 2), ([cis[0].id, cis[5].id], 3)):
+            expected = collect_relations_by_depth(
+                starts, depth, can_access=lambda ci: ci.id != blocked
+            )
+            actual = collect_relations_by_depth(
+                starts, depth, can_access=lambda ci: ci.id != blocked, graph=graph
+            )
+            assert [rel.id for rel in actual] == [rel.id for rel in expected]
+
+    def test_collect_all_relations_with_node_limit(
+        self, db_session, test_model, test_user, test_relation_type
+    ):
+        from app.services.relation_graph_service import RelationGraph
+        from app.services.topology_service import collect_all_relations
+
+        cis, relations = _make_chain(db_session, test_model, test_user, test_relation_type, 5)
+        graph = RelationGraph()
+
+        result = collect_all_relations(graph, can_access=lambda ci: ci.id != cis[0].id)
+        assert [rel.id for rel in result] == [r.id for r in relations[1:]]
+
+        # 前 3 个节点之外只保留与其相连的关系，供拓扑截断使用
+        result = collect_all_relations(graph, node_limit=3)
+        assert [rel.id for rel in result] == [r.id for r in relations[:3]]
@@ -0,0 +1,58 @@
+"""拓扑遍历服务单元测试"""
+
+from app.models.ci_instance import CiInstance
+from app.models.cmdb_relation import CmdbRelation
+
+
+def _make_chain(db_session, model, user, relation_type, length):
+    cis = []
+    for index in range(length):
+        ci = CiInstance(
+            name=f"node-{index}", code=f"node-{index}", model_id=model.id, created_by=user.id
+        )
+        db_session.add(ci)
+        cis.append(ci)
+    db_session.commit()
+    relations = []
+    for left, right in zip(cis, cis[1:]):
+        relation = CmdbRelation(
+            source_ci_id=left.id,
+            target_ci_id=right.id,
+            relation_type_id=relation_type.id,
+        )
+        db_session.add(relation)
+        relations.append(relation)
+    db_session.commit()
+    return cis, relations
+
+
+class TestCollectRelationsByDepth:
+    """测试按层批量遍历"""
+
+    def test_depth_limit(self, db_session, test_model, test_user, test_relation_type):
+        from app.services.topology_service import collect_relations_by_depth
+
+        cis, relations = _make_chain(db_session, test_model, test_user, test_relation_type, 5)
+
+        result = collect_relations_by_depth([cis[2].id], 1)
+        assert {rel.id for rel in result} == {relations[1].id, relations[2].id}
+
+        result = collect_relations_by_depth([cis[0].id], 3)
+        assert [rel.id for rel in result] == [r.id for r in relations[:3]]
+
+    def test_multiple_starts_and_access_filter(
+        self, db_session, test_model, test_user, test_relation_type
+    ):
+        from app.services.topology_service import collect_relations_by_depth
+
+        cis, relations = _make_chain(db_session, test_model, test_user, test_relation_type, 5)
+
+        result = collect_relations_by_depth([cis[0].id, cis[4].id], 1)
+        assert {rel.id for rel in result} == {relations[0].id, relations[3].id}
+
+        # 不可访问的 CI 既不出现在结果中，也不会被继续展开
+        blocked = cis[1].id
+        result = collect_relations_by_depth(
+            [cis[0].id], 4, can_access=lambda ci: ci.id != blocked
+        )
+        assert result == []
@@ -0,0 +1,64 @@
+"""部门树服务单元测试"""
+
+from app.models.department import Department
+
+
+def _make_department(db_session, code, parent=None):
+    department = Department(name=code, code=code, parent_id=parent.id if parent else None)
+    db_session.add(department)
+    db_session.commit()
+    return department
+
+
+class TestDepartmentTree:
+    """测试下级部门查询"""
+
+    def test_descendants_in_depth_first_order(self, db_session):
+        from app.services.department_tree_service import get_descendant_ids, get_subtree_ids
+
+        root = _make_department(db_session, "root")
+        a = _make_department(db_session, "a", root)
+        b = _make_department(db_session, "b", root)
+        a1 = _make_department(db_session, "a1", a)
+        other = _make_department(db_session, "other")
+
+        assert get_descendant_ids(root.id) == [a.id, a1.id, b.id]
+        assert root.get_all_children_ids() == [a.id, a1.id, b.id]
+        assert get_subtree_ids(a.id) == {a.id, a1.id}
+        assert get_descendant_ids(other.id) == []
+        assert get_subtree_ids(None) == set()
+
+    def test_cache_invalidated_when_parent_changes(self, app, db_session):
+        from app.services.department_tree_service import get_descendant_ids
+
+        app.config["DEPARTMENT_TREE_CACHE_SECONDS"] = 60
+        root = _make_department(db_session, "root")
+        a = _make_department(db_session, "a", root)
+        b = _make_department(db_session, "b")
+        assert get_descendant_ids(root.id) == [a.id]
+
+        b.parent_id = a.id
+        db_session.commit()
+        assert get_descendant_ids(root.id) == [a.id, b.id]
+
+        db_session.delete(b)
+        db_session.commit()
+        assert get_descendant_ids(root.id) == [a.id]
+
+    def test_other_process_change_seen_through_shared_version(self, app, db_session):
+        from app.services.department_tree_service import bump_tree_version, get_descendant_ids
+
+        app.config["DEPARTMENT_TREE_CACHE_SECONDS"] = 60
+        root = _make_department(db_session, "root")
+        a = _make_department(db_session, "a")
+        assert get_descendant_ids(root.id) == []
+
+        # 模拟其他进程：直接改表并递增版本号，本进程的缓存未被清除
+        departments = Department.__table__
+        connection = db_session.connection()
+        connection.execute(
+            departments.update().where(departments.c.id == a.id).values(parent_id=root.id)
+        )
+        bump_tree_version(connection)
+        db_session.commit()
+        assert get_descendant_ids(root.id) == [a.id]
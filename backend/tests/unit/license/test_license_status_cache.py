@@ -0,0 +1,77 @@
+"""License 状态缓存单元测试"""
+
+import time
+
+from app.services.license_status_service import LicenseStatusCache
+
+
+def _loader(statuses):
+    calls = []
+
+    def load():
+        calls.append(1)
+        return dict(statuses[min(len(calls), len(statuses)) - 1])
+
+    return load, calls
+
+
+class TestLicenseStatusCache:
+    """测试授权状态缓存"""
+
+    def test_cached_within_ttl(self, app):
+        load, calls = _loader([{"has_license": True, "expired": False, "expire_time": ""}])
+        cache = LicenseStatusCache(loader=load)
+        app.config["LICENSE_STATUS_CACHE_SECONDS"] = 60
+        app.config["LICENSE_STATUS_MAX_STALE_SECONDS"] = 300
+
+        assert cache.get_status()["has_license"] is True
+        assert cache.get_status()["has_license"] is True
+        assert len(calls) == 1
+
+    def test_invalidate_forces_reload(self, app):
+        load, calls = _loader(
+            [
+                {"has_license": False, "expired": False, "expire_time": ""},
+                {"has_license": True, "expired": False, "expire_time": ""},
+            ]
+        )
+        cache = LicenseStatusCache(loader=load)
+
+        assert cache.get_status()["has_license"] is False
+        cache.invalidate()
+        assert cache.get_status()["has_license"] is True
+        assert len(calls) == 2
+
+    def test_cached_license_expires_without_reload(self, app):
+        load, calls = _loader(
+            [{"has_license": True, "expired": False, "expire_time": "2000-01-01 00:00:00"}]
+        )
+        cache = LicenseStatusCache(loader=load)
+        app.config["LICENSE_STATUS_CACHE_SECONDS"] = 60
+        app.config["LICENSE_STATUS_MAX_STALE_SECONDS"] = 300
+
+        cache.get_status()
+        status = cache.get_status()
+        assert status["expired"] is True
+        assert len(calls) == 1
+
+    def test_stale_entry_served_while_revalidating(self, app):
+        load, calls = _loader(
+            [
+                {"has_license": True, "expired": False, "expire_time": ""},
+                {"has_license": False, "expired": False, "expire_time": ""},
+            ]
+        )
+        cache = LicenseStatusCache(loader=load)
+        app.config["LICENSE_STATUS_CACHE_SECONDS"] = 0
+        app.config["LICENSE_STATUS_MAX_STALE_SECONDS"] = 60
+
+        cache.get_status()
+        # 超过 TTL：先返回旧值，后台线程刷新
+        assert cache.get_status()["has_license"] is True
+        for _ in range(50):
+            if len(calls) == 2 and not cache._refreshing:
+                break
+            time.sleep(0.02)
+        app.config["LICENSE_STATUS_CACHE_SECONDS"] = 60
+        assert cache.get_status()["has_license"] is False
@@ -0,0 +1,74 @@
+"""操作日志导出单元测试"""
+
+import csv
+import io
+import zipfile
+from datetime import datetime
+
+from app.models.operation_log import OperationLog
+
+
+def _make_logs(db_session):
+    db_session.add_all(
+        [
+            OperationLog(
+                username="admin",
+                operation_type="UPDATE",
+                operation_desc='修改 "核心交换机", 端口 1,2\n第二行',
+                created_at=datetime(2026, 3, 1, 8, 0, 0),
+            ),
+            OperationLog(
+                username="admin",
+                operation_type="LOGIN",
+                operation_desc="登录",
+                created_at=datetime(2026, 3, 1, 9, 0, 0),
+            ),
+            OperationLog(
+                username="ops",
+                operation_type="DELETE",
+                operation_desc="删除",
+                created_at=datetime(2026, 4, 2, 10, 0, 0),
+            ),
+        ]
+    )
+    db_session.commit()
+
+
+def _query():
+    return OperationLog.query.order_by(OperationLog.created_at.desc(), OperationLog.id.desc())
+
+
+class TestLogExport:
+    """测试日志 CSV 生成与分区导出"""
+
+    def test_csv_escapes_and_batches(self, db_session, monkeypatch):
+        from app.routes import log
+
+        _make_logs(db_session)
+        content = "".join(log._iter_log_csv(log._iter_log_rows(_query())))
+        rows = list(csv.reader(io.StringIO(content)))
+        assert rows[0] == log.EXPORT_HEADERS
+        assert [row[1] for row in rows[1:]] == ["ops", "admin", "admin"]
+        assert rows[3][4] == '修改 "核心交换机", 端口 1,2\n第二行'
+
+        monkeypatch.setattr(log, "EXPORT_BATCH_SIZE", 2)
+        chunks = list(log._iter_log_csv(log._iter_log_rows(_query())))
+        assert len(chunks) == 2
+        assert "".join(chunks) == content
+
+    def test_partitioned_zip(self, db_session, monkeypatch):
+        from app.routes import log
+
+        _make_logs(db_session)
+        monkeypatch.setattr(log, "EXPORT_BATCH_SIZE", 1)
+        data = b"".join(
+            log._iter_partitioned_zip(log._iter_log_rows(_query()), log.PARTITION_FORMATS["month"])
+        )
+
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            assert archive.namelist() == ["logs_2026-04.csv", "logs_2026-03.csv"]
+            march = list(
+                csv.reader(io.StringIO(archive.read("logs_2026-03.csv").decode("utf-8")))
+            )
+        assert march[0] == log.EXPORT_HEADERS
+        assert [row[2] for row in march[1:]] == ["LOGIN", "UPDATE"]
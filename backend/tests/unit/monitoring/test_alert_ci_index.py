@@ -0,0 +1,135 @@
+"""告警关联 CI 索引单元测试"""
+
+import json
+
+from app.models.ci_instance import CiInstance
+from app.models.hertzbeat_models import Monitor, SingleAlert
+
+
+def _alert(db_session, fingerprint, labels=None, annotations=None, content=None, status="firing"):
+    row = SingleAlert(
+        fingerprint=fingerprint,
+        labels_json=json.dumps(labels or {}),
+        annotations_json=json.dumps(annotations or {}),
+        content=content,
+        status=status,
+    )
+    db_session.add(row)
+    db_session.commit()
+    return row
+
+
+def _cis(db_session, model, user, count):
+    cis = [
+        CiInstance(
+            name=f"web-{index}", code=f"CI-WEB-{index}", model_id=model.id, created_by=user.id
+        )
+        for index in range(count)
+    ]
+    db_session.add_all(cis)
+    db_session.commit()
+    return cis
+
+
+class TestAlertCiIndex:
+    """测试告警到 CI 的匹配与增量同步"""
+
+    def test_match_order(self, db_session, test_model, test_user):
+        from app.services.alert_ci_index_service import AlertCiIndex
+
+        cis = _cis(db_session, test_model, test_user, 5)
+        monitor = Monitor(
+            name="m1",
+            app="linux",
+            instance="10.0.0.1",
+            annotations_json=json.dumps({"ci_id": cis[4].id}),
+        )
+        db_session.add(monitor)
+        db_session.commit()
+
+        _alert(db_session, "a", labels={"ci_id": str(cis[0].id)})
+        _alert(db_session, "b", annotations={"ci_code": "ci-web-1"})
+        _alert(db_session, "c", content="disk usage high on CI-WEB-2, please check")
+        _alert(db_session, "d", content="host web-3: load too high")
+        _alert(db_session, "e", labels={"monitor_id": str(monitor.id)})
+        _alert(db_session, "f", labels={"ci_id": "999999"}, content="unrelated")
+        _alert(db_session, "g", labels={"ci_id": str(cis[1].id)}, status="resolved")
+
+        index = AlertCiIndex()
+        ids = [ci.id for ci in cis]
+        assert index.open_alert_ci_ids(ids + [999999]) == set(ids)
+        assert index.open_alert_ci_ids([ids[0], "bad", None]) == {ids[0]}
+
+    def test_sync_tracks_firing_and_resolved(self, db_session, test_model, test_user, app):
+        from app.services.alert_ci_index_service import AlertCiIndex
+
+        app.config["ALERT_CI_INDEX_REBUILD_SECONDS"] = 3600
+        cis = _cis(db_session, test_model, test_user, 2)
+        ids = [ci.id for ci in cis]
+        first = _alert(db_session, "a", labels={"ci_id": ids[0]})
+
+        index = AlertCiIndex()
+        assert index.open_alert_ci_ids(ids) == {ids[0]}
+
+        _alert(db_session, "b", annotations={"ciName": "WEB-1"})
+        first.status = "resolved"
+        db_session.commit()
+        assert index.open_alert_ci_ids(ids) == {ids[1]}
+
+    def test_monitor_binding_change_invalidates(self, db_session, test_model, test_user, app):
+        from app.services.alert_ci_index_service import alert_ci_index
+
+        app.config["ALERT_CI_INDEX_REBUILD_SECONDS"] = 3600
+        cis = _cis(db_session, test_model, test_user, 2)
+        ids = [ci.id for ci in cis]
+        monitor = Monitor(
+            name="m1",
+            app="linux",
+            instance="10.0.0.1",
+            annotations_json=json.dumps({"ci_id": ids[0]}),
+        )
+        db_session.add(monitor)
+        db_session.commit()
+        _alert(db_session, "a", labels={"monitorId": monitor.id})
+
+        alert_ci_index.invalidate()
+        assert alert_ci_index.open_alert_ci_ids(ids) == {ids[0]}
+
+        monitor.annotations_json = json.dumps({"ci_code": "CI-WEB-1"})
+        db_session.commit()
+        assert alert_ci_index.open_alert_ci_ids(ids) == {ids[1]}
+
+    def test_content_matches_code_or_name_spans(self, db_session, test_model, test_user):
+        from app.services.alert_ci_index_service import AlertCiIndex
+
+        spaced = CiInstance(
+            name="Order DB: primary", code="CI-ORDER-DB", model_id=test_model.id, created_by=test_user.id
+        )
+        cis = _cis(db_session, test_model, test_user, 2)
+        db_session.add(spaced)
+        db_session.commit()
+        monitor = Monitor(
+            name="m1",
+            app="linux",
+            instance="10.0.0.1",
+            annotations_json=json.dumps({"ci_id": cis[1].id}),
+        )
+        db_session.add(monitor)
+        db_session.commit()
+
+        # 名称含空格和冒号；编码嵌在其他文本中
+        _alert(db_session, "a", content="[critical] order db: PRIMARY replication lag")
+        _alert(db_session, "b", content="host=ci-web-0.prod unreachable")
+        # 内容匹配优先于监控任务绑定，未命中时退回绑定的 CI
+        _alert(db_session, "c", labels={"monitor_id": str(monitor.id)}, content="no ci here")
+
+        # 以词边界起止才算命中：web-1 不会匹配 web-10
+        _alert(db_session, "d", content="pool web-10 exhausted")
+
+        index = AlertCiIndex()
+        index.ensure_fresh()
+        # 内容在入索引时即解析为 ci_id
+        assert set(index._alert_ci.values()) == {spaced.id, cis[0].id, cis[1].id, 0}
+        assert index.open_alert_ci_ids([spaced.id]) == {spaced.id}
+        assert index.open_alert_ci_ids([cis[0].id]) == {cis[0].id}
+        assert index.open_alert_ci_ids([cis[1].id]) == {cis[1].id}
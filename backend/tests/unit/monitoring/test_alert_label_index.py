@@ -0,0 +1,140 @@
+"""告警筛选索引单元测试"""
+
+import json
+from datetime import datetime, timedelta
+
+from app.models.alert_label_index import AlertLabelIndex
+from app.models.hertzbeat_models import AlertHistory, SingleAlert
+from app.services.monitoring_target_helpers import _parse_rfc3339_to_ms
+
+
+def _alert(db_session, index, labels, annotations=None, status="firing"):
+    now = datetime(2026, 1, 1) + timedelta(minutes=index)
+    row = SingleAlert(
+        fingerprint=f"fp-{index}",
+        labels_json=json.dumps(labels),
+        annotations_json=json.dumps(annotations or {}),
+        status=status,
+        start_at=int(now.timestamp() * 1000),
+        created_at=now,
+        updated_at=now,
+    )
+    db_session.add(row)
+    db_session.commit()
+    return row
+
+
+def _history(db_session, index, labels):
+    row = AlertHistory(
+        alert_id=index,
+        alert_type="single",
+        labels_json=json.dumps(labels),
+        annotations_json="{}",
+        status="resolved",
+        created_at=datetime(2026, 1, 1) + timedelta(minutes=index),
+    )
+    db_session.add(row)
+    db_session.commit()
+    return row
+
+
+def _page(scope, args, page=1, page_size=20):
+    from app.services.alert_label_index_service import query_alert_page
+
+    return query_alert_page(scope, args, page, page_size, parse_rfc3339_to_ms=_parse_rfc3339_to_ms)
+
+
+class TestSyncAlertLabels:
+    """测试索引同步"""
+
+    def test_current_incremental_sync(self, db_session):
+        from app.services.alert_label_index_service import sync_current_labels
+
+        first = _alert(db_session, 1, {"severity": "critical", "app": "MySQL"})
+        second = _alert(db_session, 2, {"severity": "warning", "app": "redis"})
+
+        assert sync_current_labels() == 2
+        assert db_session.get(AlertLabelIndex, ("current", first.id)).app == "mysql"
+        # 未变化的告警不再重新展开
+        assert sync_current_labels() == 0
+
+        second.annotations_json = json.dumps({"assignee": "Alice"})
+        second.updated_at = second.updated_at + timedelta(seconds=1)
+        db_session.delete(first)
+        db_session.commit()
+
+        assert sync_current_labels() == 1
+        rows = AlertLabelIndex.query.filter_by(scope="current").all()
+        assert [(row.alert_id, row.assignee) for row in rows] == [(second.id, "alice")]
+
+    def test_history_append_and_purge(self, db_session):
+        from app.services.alert_label_index_service import sync_history_labels
+
+        old = _history(db_session, 1, {"app": "linux"})
+        _history(db_session, 2, {"app": "linux"})
+        assert sync_history_labels() == 2
+        assert sync_history_labels() == 0
+
+        db_session.delete(old)
+        db_session.commit()
+        _history(db_session, 3, {"app": "linux"})
+        assert sync_history_labels() == 1
+        assert AlertLabelIndex.query.filter_by(scope="history").count() == 2
+
+    def test_request_sync_is_capped(self, app, db_session):
+        from app.services.alert_label_index_service import (
+            ensure_alert_labels_fresh,
+            sync_alert_labels,
+        )
+
+        app.config["ALERT_LABEL_REQUEST_SYNC_LIMIT"] = 2
+        for index in range(1, 6):
+            _history(db_session, index, {"app": "linux"})
+
+        # 请求内每次最多追加 2 条，其余由后台任务补齐
+        ensure_alert_labels_fresh()
+        assert AlertLabelIndex.query.filter_by(scope="history").count() == 2
+        assert sync_alert_labels() == {"current": 0, "history": 3}
+        assert AlertLabelIndex.query.filter_by(scope="history").count() == 5
+
+
+class TestQueryAlertPage:
+    """测试 SQL 筛选、计数与分页"""
+
+    def test_filters_match_item_semantics(self, db_session):
+        _alert(db_session, 1, {"severity": "critical", "app": "mysql", "monitor_id": "7", "rule_id": 3})
+        _alert(db_session, 2, {"severity": "warning", "alertname": "Disk_Full", "instance": "db-01"})
+        _alert(db_session, 3, {"severity": "critical"}, status="resolved")
+
+        assert _page("current", {"level": "Critical"})["total"] == 1
+        assert _page("current", {"status": "closed", "level": "critical"})["total"] == 1
+        assert _page("current", {"monitor_id": "7", "rule_id": "3"})["total"] == 1
+        assert _page("current", {"monitor_id": "abc"})["total"] == 0
+        assert _page("current", {"q": "disk_"})["total"] == 1
+        # LIKE 通配符按字面匹配
+        assert _page("current", {"name": "%"})["total"] == 0
+        assert _page("current", {"instance": "DB-"})["total"] == 1
+        assert _page("current", {"start_at": "2026-01-01T00:02:00Z"})["total"] == 1
+
+    def test_offset_and_cursor_pages(self, db_session):
+        rows = [_alert(db_session, index, {"app": "linux"}) for index in range(5)]
+        expected = [row.id for row in reversed(rows)]
+
+        first = _page("current", {"app": "linux"}, page_size=2)
+        assert first["total"] == 5
+        assert [row.id for row in first["rows"]] == expected[:2]
+        second = _page("current", {"app": "linux"}, page=2, page_size=2)
+        assert [row.id for row in second["rows"]] == expected[2:4]
+
+        seen = []
+        cursor = None
+        while True:
+            args = {"app": "linux"}
+            if cursor:
+                args["cursor"] = cursor
+            result = _page("current", args, page_size=2)
+            seen.extend(row.id for row in result["rows"])
+            cursor = result["next_cursor"]
+            if not cursor:
+                break
+        assert seen == expected
@@ -0,0 +1,109 @@
+"""告警小时汇总单元测试"""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+from app.models.alert_hourly_rollup import AlertHourlyRollup
+from app.models.hertzbeat_models import AlertHistory, SingleAlert
+
+
+def _hour_floor(hours_ago=0):
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return now - timedelta(hours=hours_ago)
+
+
+def _history(db_session, triggered, labels):
+    row = AlertHistory(
+        alert_id=1,
+        alert_type="single",
+        labels_json=json.dumps(labels),
+        annotations_json="{}",
+        status="resolved",
+        start_at=int(triggered.timestamp() * 1000),
+    )
+    db_session.add(row)
+    db_session.commit()
+    return row
+
+
+def _current(db_session, index, labels):
+    row = SingleAlert(
+        fingerprint=f"fp-{index}",
+        labels_json=json.dumps(labels),
+        annotations_json="{}",
+        status="firing",
+    )
+    db_session.add(row)
+    db_session.commit()
+    return row
+
+
+class TestAlertRollups:
+    """测试历史告警汇总"""
+
+    def test_incremental_rollup_and_trend(self, db_session):
+        from app.services.alert_label_index_service import sync_history_labels
+        from app.services.alert_rollup_service import hourly_alert_trend, sync_alert_rollups
+
+        two_hours_ago = _hour_floor(2) + timedelta(minutes=5)
+        _history(db_session, two_hours_ago, {"severity": "critical", "monitor_id": "3"})
+        _history(db_session, two_hours_ago, {"severity": "critical", "monitor_id": "3"})
+        _history(db_session, _hour_floor() + timedelta(seconds=1), {"app": "mysql"})
+        sync_history_labels()
+
+        assert sync_alert_rollups() == 2
+        bucket = int(_hour_floor(2).timestamp() * 1000)
+        row = db_session.get(AlertHourlyRollup, (bucket, 3, "-", "critical", ""))
+        assert row.alert_count == 2
+        # 没有新告警时不重算
+        assert sync_alert_rollups() == 0
+
+        _history(db_session, two_hours_ago, {"severity": "critical", "monitor_id": "3"})
+        trend = hourly_alert_trend()
+        assert len(trend) == 24
+        assert [point["value"] for point in trend[-3:]] == [3, 0, 1]
+        assert trend[-1]["time"] == _hour_floor().strftime("%H:00")
+
+    def test_purge_keeps_watermark(self, db_session):
+        from app.services.alert_label_index_service import sync_history_labels
+        from app.services.alert_rollup_service import purge_alert_rollups, sync_alert_rollups
+
+        _history(db_session, _hour_floor(24 * 10), {"app": "linux"})
+        _history(db_session, _hour_floor(24 * 5), {"app": "linux"})
+        sync_history_labels()
+        sync_alert_rollups()
+        assert AlertHourlyRollup.query.count() == 2
+
+        assert purge_alert_rollups(retention_days=1) == 1
+        assert AlertHourlyRollup.query.count() == 1
+        assert sync_alert_rollups() == 0
+
+
+class TestTopAlertMonitors:
+    """测试当前告警排行"""
+
+    def test_grouped_by_monitor_with_display_name(self, db_session):
+        from app.services.alert_rollup_service import top_alert_monitors
+
+        _current(db_session, 1, {"monitor_name": "DB-Primary"})
+        _current(db_session, 2, {"monitor_name": "DB-Primary"})
+        _current(db_session, 3, {"instance": "web-01"})
+
+        assert top_alert_monitors() == [
+            {"name": "DB-Primary", "value": 2},
+            {"name": "web-01", "value": 1},
+        ]
+
+    def test_alerts_without_name_fall_back_to_monitor_id(self, db_session):
+        from app.services.alert_rollup_service import top_alert_monitors
+
+        _current(db_session, 1, {"monitor_id": "7"})
+        _current(db_session, 2, {"monitor_id": "7"})
+        _current(db_session, 3, {"monitor_id": "8"})
+        _current(db_session, 4, {"severity": "critical"})
+
+        # 与原实现一致：名称 -> 实例 -> 监控任务 ID，三者都没有的告警不参与排行
+        assert top_alert_monitors() == [
+            {"name": "7", "value": 2},
+            {"name": "8", "value": 1},
+        ]
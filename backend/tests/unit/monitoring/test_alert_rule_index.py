@@ -0,0 +1,146 @@
+"""告警规则索引与匹配器单元测试"""
+
+import json
+from datetime import datetime, timedelta
+
+from app.models.alert_rule_index import AlertRuleIndex
+from app.models.hertzbeat_models import AlertDefine
+
+
+def _rule(db_session, name, minutes=0, annotations=None, **labels):
+    row = AlertDefine(
+        name=name,
+        labels_json=json.dumps(labels),
+        annotations_json=json.dumps(annotations or {}),
+        updated_at=datetime(2026, 1, 1) + timedelta(minutes=minutes),
+    )
+    db_session.add(row)
+    db_session.commit()
+    return row
+
+
+class TestAlertRuleIndexSync:
+    """测试索引同步"""
+
+    def test_orm_writes_sync_index(self, db_session):
+        row = _rule(db_session, "cpu", monitor_id=7, app="Linux", metric="cpu")
+        entry = db_session.get(AlertRuleIndex, row.id)
+        assert (entry.monitor_id, entry.app, entry.metric, entry.is_bound) == ("7", "linux", "cpu", True)
+
+        row.labels_json = json.dumps({"app": "linux"})
+        db_session.commit()
+        db_session.expire_all()
+        entry = db_session.get(AlertRuleIndex, row.id)
+        assert (entry.monitor_id, entry.is_bound) == ("", False)
+
+        rule_id = row.id
+        db_session.delete(row)
+        db_session.commit()
+        assert db_session.get(AlertRuleIndex, rule_id) is None
+
+    def test_reconcile_rules_written_outside_orm(self, db_session):
+        from app.services.alert_rule_index_service import sync_alert_rule_index
+
+        rules = AlertDefine.__table__
+        db_session.execute(
+            rules.insert().values(
+                name="external",
+                type="realtime_metric",
+                times=1,
+                labels_json=json.dumps({"source": "template_default"}),
+                annotations_json="{}",
+                enabled=True,
+                notice_rule_ids_json="[]",
+                escalation_config="",
+                created_at=datetime(2026, 1, 1),
+                updated_at=datetime(2026, 1, 1),
+            )
+        )
+        db_session.commit()
+
+        assert sync_alert_rule_index() == 1
+        assert AlertRuleIndex.query.one().is_bound is True
+        assert sync_alert_rule_index() == 0
+
+
+class TestAlertRuleMatcher:
+    """测试匹配器与原逐条匹配结果一致"""
+
+    def test_matches_like_rule_match_monitor(self, app, db_session):
+        from app.routes.monitoring_target import _rule_match_monitor
+        from app.services.alert_rule_index_service import alert_rule_matcher
+
+        _rule(db_session, "global", 0, metric="cpu")
+        _rule(db_session, "linux", 1, app="linux", metric="cpu")
+        _rule(db_session, "bound", 2, monitor_id="7", metric="mem")
+        _rule(db_session, "other-monitor", 3, monitor_id="8")
+        _rule(db_session, "instance", 4, app="linux", instance="Host-A")
+        _rule(db_session, "annotated", 5, annotations={"metric": "disk"})
+
+        monitors = [
+            {"id": 7, "app": "linux", "target": "host-a"},
+            {"id": 7, "app": "redis", "target": "host-b"},
+            {"id": 9, "app": "", "target": ""},
+            {},
+        ]
+        ordered = AlertDefine.query.order_by(AlertDefine.updated_at.desc(), AlertDefine.id.desc()).all()
+        for monitor in monitors:
+            expected = [row.id for row in ordered if _rule_match_monitor(row, monitor)]
+            assert list(alert_rule_matcher.iter_rule_ids(monitor)) == expected
+
+        linux = {"id": 7, "app": "linux", "target": "host-b"}
+        names = {row.id: row.name for row in ordered}
+        assert names[alert_rule_matcher.match(linux, "cpu")] == "linux"
+        assert names[alert_rule_matcher.match(linux, "mem")] == "bound"
+        assert names[alert_rule_matcher.match(linux, "disk")] == "annotated"
+
+    def test_resolve_rule_heuristic(self, app, db_session):
+        from app.services.alert_rule_match_service import resolve_rule_for_alert
+
+        rule = _rule(db_session, "bound", monitor_id="7", metric="mem")
+        found, matched_by = resolve_rule_for_alert(
+            999,
+            labels={"monitor_id": "7", "metric": "mem"},
+            annotations={},
+            monitor_payload_loader=lambda monitor_id: {"id": monitor_id, "app": "linux"},
+        )
+        assert (found.id, matched_by) == (rule.id, "heuristic")
+
+
+class TestApplyDefaultRulesBulk:
+    """测试批量应用模板默认规则"""
+
+    def test_bulk_create_then_update(self, app, db_session):
+        from app.routes.monitoring_target import (
+            _apply_default_rules_bulk,
+            _load_monitor_default_alert_rules,
+        )
+        from app.services.alert_rule_index_service import bound_rule_names
+
+        monitors = {
+            monitor_id: {"id": monitor_id, "app": "mysql", "target": f"db-{monitor_id}"}
+            for monitor_id in (11, 12, 13)
+        }
+        defaults = _load_monitor_default_alert_rules(monitors[11])
+        names = {item["name"] for item in defaults}
+
+        results, failed = _apply_default_rules_bulk(monitors)
+        assert failed == []
+        assert [results[m]["created"] for m in monitors] == [len(defaults)] * 3
+        bound = bound_rule_names(monitors)
+        assert {m: set(bound[str(m)]) for m in monitors} == {m: names for m in monitors}
+        rule = db_session.get(AlertDefine, bound["12"][defaults[0]["name"]])
+        assert rule.labels["instance"] == "db-12"
+
+        # 再次应用只更新已绑定规则
+        results, failed = _apply_default_rules_bulk(monitors)
+        assert failed == []
+        assert results[13] == {
+            "monitor_id": 13,
+            "app": "mysql",
+            "created": 0,
+            "updated": len(defaults),
+            "total": len(defaults),
+        }
+        assert AlertDefine.query.count() == len(defaults) * 3
+        assert AlertRuleIndex.query.filter_by(is_bound=True).count() == len(defaults) * 3
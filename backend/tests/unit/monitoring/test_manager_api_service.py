@@ -1,3 +1,10 @@
+import gzip
+import http.client
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
 from app.services.manager_api_service import ManagerAPIService, ManagerError
 
 
@@ -11,7 +18,7 @@ def test_retry_then_success(app):
         calls["n"] += 1
         if calls["n"] < 2:
             raise TimeoutError("timeout")
-        return 200, b'{"ok": true}'
+        return 200, {}, b'{"ok": true}'
 
     svc._transport = fake_transport
     with app.app_context():
@@ -43,3 +50,165 @@ def test_circuit_open_after_failures(app):
         except ManagerError as e:
             assert e.status == 503
             assert e.code == "UPSTREAM_UNAVAILABLE"
+
+
+class _ManagerHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps({"path": self.path, "port": self.client_address[1]}).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        self.send_response(404 if self.path.startswith("/missing") else 200)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ManagerHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_pooled_keep_alive_and_gzip(app):
+    server = _serve()
+    svc = ManagerAPIService()
+    app.config["GO_MANAGER_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with app.app_context():
+            first = svc.request("GET", "/api/v1/monitors/7")
+            second = svc.request("GET", "/api/v1/monitors/8", params={"page": 1})
+            status, headers, raw = svc.request_raw("GET", "/api/v1/metrics/export")
+    finally:
+        server.shutdown()
+        server.server_close()
+        svc._pool.clear()
+
+    # 同一个连接（客户端端口相同）承载了三次请求，响应体已解压
+    assert second["path"] == "/api/v1/monitors/8?page=1"
+    assert first["port"] == second["port"]
+    assert status == 200 and "Content-Encoding" not in headers
+    assert json.loads(raw)["port"] == first["port"]
+    stats = svc.stats()
+    assert (stats["pool"]["created"], stats["pool"]["reused"]) == (1, 2)
+    assert stats["endpoints"]["GET /api/v1/monitors/{id}"]["count"] == 2
+
+
+def test_client_error_not_counted_as_failure(app):
+    server = _serve()
+    svc = ManagerAPIService()
+    app.config["GO_MANAGER_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    app.config["GO_MANAGER_CB_FAILURE_THRESHOLD"] = 1
+    try:
+        with app.app_context():
+            try:
+                svc.request("GET", "/missing")
+                assert False, "expected not found error"
+            except ManagerError as e:
+                assert e.status == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+        svc._pool.clear()
+    assert svc.stats()["circuit"] == {"state": "closed", "failure_count": 0}
+
+
+def test_half_open_allows_single_probe(app):
+    svc = ManagerAPIService()
+    app.config["GO_MANAGER_MAX_RETRIES"] = 0
+    app.config["GO_MANAGER_CB_RECOVERY_SECONDS"] = 0
+    svc._state = "open"
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_transport(method, url, data, headers, timeout):
+        started.set()
+        release.wait(5)
+        return 200, {}, b"{}"
+
+    svc._transport = slow_transport
+    results = []
+
+    def probe():
+        with app.app_context():
+            results.append(svc.request("GET", "/api/v1/monitors"))
+
+    thread = threading.Thread(target=probe)
+    thread.start()
+    assert started.wait(5)
+    with app.app_context():
+        try:
+            svc.request("GET", "/api/v1/monitors")
+            assert False, "expected half-open rejection"
+        except ManagerError as e:
+            assert e.status == 503
+    release.set()
+    thread.join(5)
+    assert results == [{}]
+    assert svc.stats()["circuit"]["state"] == "closed"
+
+
+class _DroppedConnection:
+    """请求写出后读取响应时服务端已关闭连接"""
+
+    def __init__(self, sent):
+        self.sent = sent
+
+    def request(self, method, target, body=None, headers=None):
+        self.sent.append(method)
+
+    def getresponse(self):
+        raise http.client.RemoteDisconnected("Remote end closed connection without response")
+
+
+class _OkConnection(_DroppedConnection):
+    def getresponse(self):
+        response = mock.Mock(status=200, will_close=True)
+        response.read.return_value = b'{"ok": true}'
+        response.getheaders.return_value = []
+        return response
+
+
+class _StalePool:
+    """第一次返回复用的失效连接，之后返回新连接"""
+
+    def __init__(self, sent):
+        self.sent = sent
+        self.acquired = 0
+
+    def acquire(self, key, timeout, idle_seconds):
+        self.acquired += 1
+        if self.acquired == 1:
+            return _DroppedConnection(self.sent), True
+        return _OkConnection(self.sent), False
+
+    def discard(self, conn):
+        pass
+
+
+def test_stale_connection_resent_only_for_idempotent_methods(app):
+    app.config["GO_MANAGER_MAX_RETRIES"] = 2
+    results = {}
+    for method in ("GET", "POST"):
+        svc = ManagerAPIService()
+        sent = []
+        svc._pool = _StalePool(sent)
+        svc._use_system_proxy = lambda: False
+        with app.app_context():
+            try:
+                results[method] = (svc.request(method, "/api/v1/monitors", payload={}), sent)
+            except ManagerError as e:
+                results[method] = (e.status, sent)
+
+    assert results["GET"] == ({"ok": True}, ["GET", "GET"])
+    # 服务端可能已处理 POST，不重发
+    assert results["POST"] == (503, ["POST"])
@@ -0,0 +1,77 @@
+"""监控任务 CI 绑定同步单元测试"""
+
+import json
+from datetime import datetime, timedelta
+
+from app.models.ci_instance import CiInstance
+from app.models.hertzbeat_models import Monitor
+from app.models.monitor_ci_binding import MonitorCiBinding
+
+
+def _monitor(db_session, name, annotations):
+    row = Monitor(
+        name=name, app="linux", instance=f"{name}.local", annotations_json=json.dumps(annotations)
+    )
+    db_session.add(row)
+    db_session.commit()
+    return row
+
+
+def _cis(db_session, model, user, count):
+    cis = [
+        CiInstance(name=f"h{index}", code=f"H-{index}", model_id=model.id, created_by=user.id)
+        for index in range(count)
+    ]
+    db_session.add_all(cis)
+    db_session.commit()
+    return cis
+
+
+class TestSyncMonitorBindings:
+    """测试绑定展开与增量同步"""
+
+    def test_incremental_sync(self, db_session, test_model, test_user):
+        from app.services.monitor_ci_binding_service import sync_monitor_bindings
+
+        cis = _cis(db_session, test_model, test_user, 2)
+        first = _monitor(db_session, "m1", {"ci_id": cis[0].id, "ci_model_id": test_model.id})
+        second = _monitor(db_session, "m2", {})
+
+        assert sync_monitor_bindings() == 2
+        assert db_session.get(MonitorCiBinding, first.id).ci_id == cis[0].id
+        assert db_session.get(MonitorCiBinding, second.id).ci_id is None
+        # 未变化的监控任务不再重新展开
+        assert sync_monitor_bindings() == 0
+
+        second.annotations_json = json.dumps({"ci_id": str(cis[1].id)})
+        second.updated_at = datetime.utcnow() + timedelta(seconds=1)
+        db_session.delete(first)
+        db_session.commit()
+
+        assert sync_monitor_bindings() == 1
+        assert [(b.monitor_id, b.ci_id) for b in MonitorCiBinding.query] == [
+            (second.id, cis[1].id)
+        ]
+
+    def test_monitored_filter_and_bindings(
+        self, db_session, test_model, test_target_model, test_user
+    ):
+        from app.services.monitor_ci_binding_service import (
+            load_ci_bindings,
+            monitored_ci_filter,
+            sync_monitor_bindings,
+        )
+
+        cis = _cis(db_session, test_model, test_user, 3)
+        monitor = _monitor(db_session, "m1", {"ci_id": cis[0].id})
+        _monitor(db_session, "m2", {"ci_id": cis[1].id, "ci_model_id": test_target_model.id})
+        sync_monitor_bindings([monitor.id, monitor.id + 1])
+
+        base = CiInstance.query.filter_by(model_id=test_model.id)
+        unmonitored = base.filter(~monitored_ci_filter(test_model.id)).order_by(CiInstance.id)
+        assert [ci.id for ci in unmonitored] == [cis[1].id, cis[2].id]
+
+        bindings = load_ci_bindings([ci.id for ci in cis], test_model.id)
+        assert bindings == {
+            cis[0].id: [{"monitor_id": monitor.id, "monitor_name": "m1", "app": "linux"}]
+        }
@@ -0,0 +1,245 @@
+"""通知发送扇出单元测试"""
+
+import pytest
+
+from app.models import User
+from app.notifications.models import NotificationRecipient
+
+
+class _RecordingSocketIO:
+    def __init__(self):
+        self.calls = []
+
+    def emit(self, event, data, to=None, room=None, namespace=None, **kwargs):
+        self.calls.append({"event": event, "data": data, "to": to or room})
+
+
+@pytest.fixture
+def recorded_emits(monkeypatch):
+    from app.notifications import websocket
+
+    fake = _RecordingSocketIO()
+    monkeypatch.setattr(websocket, "socketio", fake)
+    monkeypatch.setattr(websocket, "EMIT_ROOM_BATCH_SIZE", 2)
+    return fake.calls
+
+
+def _users(db_session, count, prefix="member", **kwargs):
+    users = []
+    for index in range(count):
+        user = User(username=f"{prefix}{index}", email=f"{prefix}{index}@example.com", **kwargs)
+        user.set_password("Password123!")
+        users.append(user)
+    db_session.add_all(users)
+    db_session.commit()
+    return users
+
+
+class TestNotificationFanOut:
+    """测试接收人批量写入与推送方式"""
+
+    def test_send_to_users_skips_inactive_and_batches_emits(
+        self, db_session, test_admin, test_notification_type, recorded_emits
+    ):
+        from app.notifications.services import NotificationService
+
+        active = _users(db_session, 3)
+        inactive = _users(db_session, 1, prefix="inactive", status="inactive")[0]
+        user_ids = [u.id for u in active] + [inactive.id, active[0].id, 999999]
+
+        notification, recipient_ids = NotificationService.send_to_users(
+            test_admin.id, user_ids, test_notification_type.id, "标题", "内容"
+        )
+
+        rows = NotificationRecipient.query.filter_by(notification_id=notification.id).all()
+        assert sorted(r.id for r in rows) == sorted(recipient_ids)
+        assert sorted(r.user_id for r in rows) == sorted(u.id for u in active)
+        assert {r.delivery_status for r in rows} == {"pending"}
+        assert not any(r.is_read for r in rows)
+
+        assert [len(call["to"]) for call in recorded_emits] == [2, 1]
+        assert {call["data"]["id"] for call in recorded_emits} == {notification.id}
+
+    def test_department_uses_user_rooms_and_broadcast_uses_namespace(
+        self, db_session, test_admin, test_department, test_notification_type, recorded_emits
+    ):
+        from app.notifications.services import NotificationService
+
+        members = _users(db_session, 2, department_id=test_department.id)
+
+        _, recipient_ids = NotificationService.send_to_department(
+            test_admin.id, test_department.id, test_notification_type.id, "部门", "内容"
+        )
+        assert len(recipient_ids) == len(members)
+        # 推送到当前成员的用户房间，不依赖连接时加入的部门房间
+        assert sorted(recorded_emits[-1]["to"]) == sorted(f"user:{u.id}" for u in members)
+
+        _, recipient_ids = NotificationService.send_broadcast(
+            test_admin.id, test_notification_type.id, "全员", "内容"
+        )
+        assert len(recipient_ids) == User.query.filter_by(status="active").count()
+        assert recorded_emits[-1]["to"] is None
+        assert len(recorded_emits) == 2
+
+
+class TestUnreadCounter:
+    """测试未读计数维护"""
+
+    def test_counter_follows_read_state(
+        self, db_session, test_admin, test_notification_type, recorded_emits
+    ):
+        from app.notifications.models import NotificationUnreadCounter
+        from app.notifications.services import NotificationService
+
+        user = _users(db_session, 1)[0]
+        user_id = user.id
+        assert NotificationService.get_unread_count(user_id) == 0
+
+        recipient_ids = [
+            NotificationService.send_to_users(
+                test_admin.id, [user_id], test_notification_type.id, f"标题{index}", "内容"
+            )[1][0]
+            for index in range(3)
+        ]
+        assert NotificationService.get_unread_count(user_id) == 3
+
+        NotificationService.mark_as_read(recipient_ids[0], user_id)
+        NotificationService.mark_as_read(recipient_ids[0], user_id)
+        assert NotificationService.get_unread_count(user_id) == 2
+
+        NotificationService.mark_as_unread(recipient_ids[0], user_id)
+        assert NotificationService.get_unread_count(user_id) == 3
+
+        NotificationService.delete_notification(recipient_ids[1], user_id)
+        assert NotificationService.get_unread_count(user_id) == 2
+
+        NotificationService.mark_all_as_read(user_id)
+        assert NotificationService.get_unread_count(user_id) == 0
+
+        NotificationService.mark_as_unread(recipient_ids[2], user_id)
+        assert db_session.get(NotificationUnreadCounter, user_id).unread_count == 1
+        assert (
+            NotificationRecipient.query.filter_by(user_id=user_id, is_read=False).count() == 1
+        )
+
+    def test_missing_counter_is_recounted(
+        self, db_session, test_admin, test_notification_type, recorded_emits
+    ):
+        from app.notifications.services import NotificationService, invalidate_unread_counters
+
+        user_id = _users(db_session, 1)[0].id
+        for index in range(2):
+            NotificationService.send_to_users(
+                test_admin.id, [user_id], test_notification_type.id, f"标题{index}", "内容"
+            )
+        assert NotificationService.get_unread_count(user_id) == 2
+
+        NotificationRecipient.query.filter_by(user_id=user_id).delete()
+        invalidate_unread_counters([user_id])
+        db_session.commit()
+        assert NotificationService.get_unread_count(user_id) == 0
+
+    def test_adjust_without_counter_marks_unknown(
+        self, db_session, test_admin, test_notification_type, recorded_emits
+    ):
+        from app.notifications.models import NotificationUnreadCounter
+        from app.notifications.services import NotificationService
+
+        # 计数行不存在时发送：插入未知计数，而不是丢弃增量
+        user_id = _users(db_session, 1)[0].id
+        recipient_id = NotificationService.send_to_users(
+            test_admin.id, [user_id], test_notification_type.id, "标题", "内容"
+        )[1][0]
+        db_session.expire_all()
+        assert db_session.get(NotificationUnreadCounter, user_id).unread_count is None
+        assert NotificationService.get_unread_count(user_id) == 1
+
+        NotificationService.mark_as_read(recipient_id, user_id)
+        assert NotificationService.get_unread_count(user_id) == 0
+
+
+class TestInboxPagination:
+    """测试游标翻页与全文搜索"""
+
+    def _send(self, sender, user_id, type_id, titles):
+        from app.notifications.services import NotificationService
+
+        return [
+            NotificationService.send_to_users(sender.id, [user_id], type_id, title, "内容")[1][0]
+            for title in titles
+        ]
+
+    def test_keyset_pages_cover_offset_order(
+        self, db_session, test_admin, test_notification_type, recorded_emits
+    ):
+        from app.notifications.services import NotificationService
+
+        user_id = _users(db_session, 1)[0].id
+        recipient_ids = self._send(
+            test_admin, user_id, test_notification_type.id, [f"通知{i}" for i in range(7)]
+        )
+        for recipient_id in recipient_ids[:3]:
+            NotificationService.mark_as_read(recipient_id, user_id)
+
+        first = NotificationService.get_user_notifications(user_id, page_size=3)
+        assert first["pagination"]["total"] == 7
+        expected = [r["id"] for r in first["items"]]
+
+        cursor = first["pagination"]["next_cursor"]
+        while cursor:
+            page = NotificationService.get_user_notifications(
+                user_id, page_size=3, cursor=cursor
+            )
+            expected.extend(r["id"] for r in page["items"])
+            cursor = page["pagination"]["next_cursor"]
+
+        offset_ids = [
+            r["id"]
+            for r in NotificationService.get_user_notifications(user_id, page_size=20)["items"]
+        ]
+        assert expected == offset_ids
+        assert sorted(expected) == sorted(recipient_ids)
+        # 未读在前
+        assert set(expected[-3:]) == set(recipient_ids[:3])
+
+        with pytest.raises(ValueError):
+            NotificationService.get_user_notifications(user_id, cursor="not-a-cursor")
+
+    def test_search_uses_index_and_like_fallback(
+        self, db_session, test_admin, test_notification_type, recorded_emits
+    ):
+        from app.notifications.search import keyword_filter
+        from app.notifications.services import NotificationService
+
+        assert "notifications_fts" in str(keyword_filter("Disk"))
+        assert "notifications_fts" not in str(keyword_filter("磁"))
+
+        user_id = _users(db_session, 1)[0].id
+        self._send(
+            test_admin,
+            user_id,
+            test_notification_type.id,
+            ["Disk usage high", "CPU load", "磁盘告警", "disk full"],
+        )
+
+        result = NotificationService.search_notifications(user_id, query="DISK", page_size=1)
+        titles = [r["notification"]["title"] for r in result["items"]]
+        cursor = result["pagination"]["next_cursor"]
+        page = NotificationService.search_notifications(
+            user_id, query="DISK", page_size=1, cursor=cursor
+        )
+        titles.extend(r["notification"]["title"] for r in page["items"])
+        assert titles == ["disk full", "Disk usage high"]
+        assert page["pagination"]["has_more"] is False
+
+        result = NotificationService.search_notifications(user_id, query="磁盘")
+        assert [r["notification"]["title"] for r in result["items"]] == ["磁盘告警"]
+
+        # 子串匹配：词的一部分也能命中，与 PostgreSQL 上的 ILIKE 一致
+        result = NotificationService.search_notifications(user_id, query="sag")
+        assert [r["notification"]["title"] for r in result["items"]] == ["Disk usage high"]
+        result = NotificationService.search_notifications(user_id, query="is")
+        assert sorted(r["notification"]["title"] for r in result["items"]) == [
+            "Disk usage high",
+            "disk full",
+        ]
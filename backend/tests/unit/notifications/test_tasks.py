@@ -0,0 +1,138 @@
+"""通知与日志保留任务单元测试"""
+
+import gzip
+import json
+from datetime import datetime, timedelta
+
+from app.models import User
+from app.models.operation_log import OperationLog
+from app.notifications.models import (
+    Notification,
+    NotificationRecipient,
+    NotificationUnreadCounter,
+    get_local_now,
+)
+
+
+def _member(db_session):
+    user = User(username="member", email="member@example.com")
+    user.set_password("Password123!")
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+def _send(sender, user_id, type_id, count, **changes):
+    from app.notifications.services import NotificationService
+
+    notifications = []
+    for index in range(count):
+        notification, _ = NotificationService.send_to_users(
+            sender.id, [user_id], type_id, f"通知{index}", "内容"
+        )
+        for key, value in changes.items():
+            setattr(notification, key, value)
+        notifications.append(notification)
+    return notifications
+
+
+class TestNotificationRetention:
+    """测试通知清理、归档与重试"""
+
+    def test_cleanup_deletes_expired_in_chunks(
+        self, app, db_session, test_admin, test_notification_type
+    ):
+        from app.notifications.services import NotificationService
+        from app.notifications.tasks import cleanup_expired_notifications
+        from app.tasks.retention import get_retention_metrics
+
+        app.config["RETENTION_CHUNK_SIZE"] = 2
+        user_id = _member(db_session).id
+        expired = _send(
+            test_admin,
+            user_id,
+            test_notification_type.id,
+            5,
+            expires_at=get_local_now() - timedelta(days=1),
+        )
+        kept = _send(test_admin, user_id, test_notification_type.id, 1)[0]
+        db_session.commit()
+        kept_id = kept.id
+        assert NotificationService.get_unread_count(user_id) == 6
+
+        assert cleanup_expired_notifications() == len(expired)
+
+        assert [n.id for n in Notification.query] == [kept_id]
+        assert NotificationRecipient.query.count() == 1
+        assert db_session.get(NotificationUnreadCounter, user_id) is None
+        assert NotificationService.get_unread_count(user_id) == 1
+        metrics = get_retention_metrics()["expired_notifications"]
+        assert metrics["chunks"] == 3
+        assert metrics["error"] is None
+
+    def test_archive_soft_flags_old_notifications(
+        self, db_session, test_admin, test_notification_type
+    ):
+        from app.notifications.tasks import archive_old_notifications
+
+        user_id = _member(db_session).id
+        _send(
+            test_admin,
+            user_id,
+            test_notification_type.id,
+            3,
+            created_at=get_local_now() - timedelta(days=120),
+        )
+        recent = _send(test_admin, user_id, test_notification_type.id, 1)[0]
+        db_session.commit()
+
+        assert archive_old_notifications() == 3
+        assert archive_old_notifications() == 0
+        assert not db_session.get(Notification, recent.id).is_archived
+
+    def test_retry_groups_recipients_by_notification(
+        self, db_session, test_admin, test_notification_type, monkeypatch
+    ):
+        from app.notifications import tasks
+
+        emits = []
+        monkeypatch.setattr(
+            tasks, "emit_to_users", lambda user_ids, event, data: emits.append((user_ids, data))
+        )
+        user_id = _member(db_session).id
+        notifications = _send(test_admin, user_id, test_notification_type.id, 2)
+        NotificationRecipient.query.update({"delivery_status": "failed"})
+        db_session.commit()
+
+        assert tasks.retry_failed_deliveries() == 2
+        assert sorted(data["id"] for _, data in emits) == sorted(n.id for n in notifications)
+        assert {r.delivery_status for r in NotificationRecipient.query} == {"delivered"}
+
+
+class TestOperationLogRetention:
+    """测试操作日志清理与归档文件"""
+
+    def test_purge_archives_to_gzip(self, app, db_session, tmp_path):
+        from app.tasks.retention import purge_operation_logs
+
+        app.config["RETENTION_CHUNK_SIZE"] = 2
+        app.config["RETENTION_ARCHIVE_DIR"] = str(tmp_path)
+        old = datetime.now() - timedelta(days=60)
+        db_session.add_all(
+            [
+                OperationLog(operation_type="LOGIN", username=f"u{index}", created_at=old)
+                for index in range(3)
+            ]
+            + [OperationLog(operation_type="LOGIN", username="recent")]
+        )
+        db_session.commit()
+
+        metrics = purge_operation_logs(retention_days=30)
+
+        assert metrics["deleted"] == 3
+        assert metrics["archived"] == 3
+        assert [log.username for log in OperationLog.query] == ["recent"]
+        with gzip.open(metrics["archive_file"], "rt", encoding="utf-8") as archive:
+            rows = [json.loads(line) for line in archive]
+        assert sorted(row["username"] for row in rows) == ["u0", "u1", "u2"]
+        assert {row["_table"] for row in rows} == {"operation_logs"}
@@ -0,0 +1,236 @@
+"""后台任务服务单元测试"""
+
+import json
+
+import pytest
+
+from app.models.background_job import BackgroundJob
+from app.models.ci_instance import CiInstance
+from app.models.cmdb_relation import CmdbRelation, RelationTrigger
+
+
+class TestJobManager:
+    """测试任务提交、并发键与取消（测试配置下任务同步执行）"""
+
+    def test_completed_job_records_progress_and_result(self, db_session, test_user):
+        from app.services.job_service import job_manager
+
+        def run(context):
+            context.report(progress=50, force=True, processed=1)
+            return {"value": 42}
+
+        job = job_manager.submit("demo", run, params={"a": 1}, created_by=test_user.id)
+        assert job.status == "completed"
+        assert job.get_result() == {"value": 42}
+        assert job.progress == 100
+        assert job.get_progress_data() == {"processed": 1}
+        assert job.to_dict()["params"] == {"a": 1}
+
+    def test_failed_job_keeps_error_and_releases_key(self, db_session):
+        from app.services.job_service import job_manager
+
+        def run(context):
+            raise RuntimeError("boom")
+
+        job = job_manager.submit("demo", run, concurrency_key="model:1")
+        assert job.status == "failed"
+        assert job.error_message == "boom"
+        assert job_manager.try_acquire("model:1")
+        job_manager.release("model:1")
+
+    def test_concurrency_key_conflict(self, db_session):
+        from app.services.job_service import JobConflictError, job_manager
+
+        with job_manager.hold_key("model:7") as acquired:
+            assert acquired
+            with pytest.raises(JobConflictError):
+                job_manager.submit("demo", lambda context: None, concurrency_key="model:7")
+        assert BackgroundJob.query.count() == 0
+
+    def test_concurrency_key_enforced_across_processes(self, db_session, tmp_path):
+        from app.services.job_service import JobConflictError, job_manager
+
+        # 其他进程提交的未结束任务
+        remote = BackgroundJob(
+            job_type="demo", status="running", concurrency_key="model:8", worker_id="other-host:1"
+        )
+        db_session.add(remote)
+        db_session.commit()
+
+        upload = tmp_path / "upload.csv"
+        upload.write_text("a")
+        with pytest.raises(JobConflictError):
+            job_manager.submit(
+                "demo",
+                lambda context: None,
+                concurrency_key="model:8",
+                input_files=[str(upload)],
+            )
+        assert not upload.exists()
+        with job_manager.hold_key("model:8") as acquired:
+            assert not acquired
+        assert BackgroundJob.query.count() == 1
+
+        remote.status = "completed"
+        db_session.commit()
+        job = job_manager.submit("demo", lambda context: None, concurrency_key="model:8")
+        assert job.status == "completed"
+
+    def test_cancel_stops_at_next_report(self, db_session):
+        from app.services.job_service import job_manager
+
+        steps = []
+
+        def run(context):
+            for step in range(3):
+                steps.append(step)
+                if step == 1:
+                    job_manager.cancel(db_session.get(BackgroundJob, context.job_id))
+                context.report(progress=step * 30)
+            return {}
+
+        job = job_manager.submit("demo", run)
+        assert job.status == "cancelled"
+        assert job.cancel_requested
+        assert steps == [0, 1]
+
+    def test_input_files_removed_when_job_finishes_or_pending_job_cancelled(
+        self, db_session, tmp_path
+    ):
+        from app.services.job_service import job_manager
+
+        finished = tmp_path / "finished.csv"
+        finished.write_text("a")
+        job_manager.submit("demo", lambda context: {}, input_files=[str(finished)])
+        assert not finished.exists()
+
+        pending = tmp_path / "pending.csv"
+        pending.write_text("a")
+        job = BackgroundJob(
+            job_type="demo", status="pending", input_files=json.dumps([str(pending)])
+        )
+        db_session.add(job)
+        db_session.commit()
+        job_manager.cancel(job)
+        assert job.status == "cancelled"
+        assert not pending.exists()
+
+    def test_recover_interrupted_jobs(self, db_session, tmp_path):
+        import os
+        import socket
+
+        from app.services.job_service import job_manager
+
+        upload = tmp_path / "upload.csv"
+        upload.write_text("a")
+        orphaned = BackgroundJob(
+            job_type="demo",
+            status="running",
+            worker_id=f"{socket.gethostname()}:{os.getpid()}",
+            input_files=json.dumps([str(upload)]),
+        )
+        legacy = BackgroundJob(job_type="demo", status="pending")
+        remote = BackgroundJob(job_type="demo", status="running", worker_id="other-host:1")
+        done = BackgroundJob(job_type="demo", status="completed")
+        db_session.add_all([orphaned, legacy, remote, done])
+        db_session.commit()
+
+        assert job_manager.recover_interrupted_jobs() == 2
+        assert [job.status for job in (orphaned, legacy, remote, done)] == [
+            "failed",
+            "failed",
+            "running",
+            "completed",
+        ]
+        assert not upload.exists()
+
+    def test_purge_job_results_expires_files_then_records(self, db_session, tmp_path):
+        from datetime import datetime, timedelta
+
+        from app.services.job_service import purge_job_results
+
+        def finished_job(days_ago, path=None, status="completed"):
+            if path is not None:
+                path.write_text("a")
+            job = BackgroundJob(
+                job_type="export",
+                status=status,
+                result=json.dumps({"filename": "ci.csv.gz"}),
+                result_file=str(path) if path is not None else None,
+                completed_at=datetime.now() - timedelta(days=days_ago),
+            )
+            db_session.add(job)
+            return job
+
+        fresh_file = tmp_path / "fresh.csv.gz"
+        expired_file = tmp_path / "expired.csv.gz"
+        old_file = tmp_path / "old.csv.gz"
+        fresh = finished_job(1, fresh_file)
+        expired = finished_job(10, expired_file)
+        old = finished_job(100, old_file)
+        running = finished_job(100, status="running")
+        db_session.commit()
+        old_id = old.id
+
+        metrics = purge_job_results(result_retention_days=7, retention_days=90)
+        assert metrics["files"]["updated"] == 2
+        assert metrics["jobs"]["deleted"] == 1
+
+        assert fresh_file.exists()
+        assert not expired_file.exists()
+        assert not old_file.exists()
+        db_session.expire_all()
+        assert fresh.result_file == str(fresh_file)
+        assert expired.result_file is None
+        assert db_session.get(BackgroundJob, old_id) is None
+        assert running.status == "running"
+
+
+class TestScanConcurrency:
+    """测试批量扫描与 CI 触发器队列"""
+
+    def test_batch_scan_skipped_while_model_key_held(self, db_session, test_model):
+        from app.services.job_service import job_manager, model_key
+        from app.tasks.batch_scan import batch_scan_model
+
+        with job_manager.hold_key(model_key(test_model.id)):
+            result = batch_scan_model(test_model.id)
+        assert result["status"] == "skipped"
+
+    def test_trigger_queue_processes_saved_cis(
+        self, db_session, test_model, test_target_model, test_user, test_relation_type
+    ):
+        from app.services.trigger_service import ci_trigger_queue
+
+        target = CiInstance(
+            name="app", code="APP-1", model_id=test_target_model.id, created_by=test_user.id
+        )
+        target.set_attribute_values({"name": "billing"})
+        sources = []
+        for index in range(3):
+            ci = CiInstance(
+                name=f"h{index}", code=f"H{index}", model_id=test_model.id, created_by=test_user.id
+            )
+            ci.set_attribute_values({"app": "billing" if index < 2 else "other"})
+            sources.append(ci)
+        db_session.add_all([target, *sources])
+        db_session.add(
+            RelationTrigger(
+                name="规则",
+                source_model_id=test_model.id,
+                target_model_id=test_target_model.id,
+                relation_type_id=test_relation_type.id,
+                trigger_type="expression",
+                trigger_condition=json.dumps({"source_field": "app", "target_field": "name"}),
+                is_active=True,
+            )
+        )
+        db_session.commit()
+
+        for ci in sources:
+            ci_trigger_queue.enqueue(ci.id)
+
+        assert sorted(r.source_ci_id for r in CmdbRelation.query) == [
+            sources[0].id,
+            sources[1].id,
+        ]
@@ -0,0 +1,106 @@
+"""触发器服务集合化匹配单元测试"""
+
+import json
+
+from app.models.ci_instance import CiInstance
+from app.models.cmdb_relation import CmdbRelation, TriggerExecutionLog
+
+
+def _make_ci(db_session, model, user, code, values):
+    ci = CiInstance(name=code, code=code, model_id=model.id, created_by=user.id)
+    ci.set_attribute_values(values)
+    db_session.add(ci)
+    db_session.commit()
+    return ci
+
+
+def _rule_trigger(db_session, trigger, source_field="host_ip", target_field="ip"):
+    trigger.trigger_type = "rule"
+    trigger.trigger_condition = json.dumps(
+        {"source_field": source_field, "target_field": target_field}
+    )
+    db_session.commit()
+    return trigger
+
+
+class TestTriggerMatcher:
+    """测试哈希匹配器"""
+
+    def test_match_uses_string_equality(
+        self, db_session, test_trigger, test_model, test_target_model, test_user
+    ):
+        from app.services.trigger_service import TriggerMatcher
+
+        trigger = _rule_trigger(db_session, test_trigger)
+        trigger.target_model_id = test_target_model.id
+        db_session.commit()
+        first = _make_ci(db_session, test_target_model, test_user, "t-1", {"ip": "10.0.0.1"})
+        second = _make_ci(db_session, test_target_model, test_user, "t-2", {"ip": "10.0.0.1"})
+        _make_ci(db_session, test_target_model, test_user, "t-3", {"ip": "10.0.0.2"})
+        _make_ci(db_session, test_target_model, test_user, "t-4", {"port": 8080})
+
+        matcher = TriggerMatcher()
+        assert sorted(matcher.match({"host_ip": "10.0.0.1"}, trigger)) == [
+            first.id,
+            second.id,
+        ]
+        assert matcher.match({"host_ip": "10.0.0.9"}, trigger) == []
+        assert matcher.match({}, trigger) == []
+
+
+class TestProcessTriggerForModel:
+    """测试按模型批量执行触发器"""
+
+    def test_creates_relations_and_cleans_stale_rule_relations(
+        self,
+        db_session,
+        test_trigger,
+        test_model,
+        test_target_model,
+        test_user,
+    ):
+        from app.services.trigger_service import process_trigger_for_model
+
+        trigger = _rule_trigger(db_session, test_trigger)
+        host_a = _make_ci(db_session, test_target_model, test_user, "h-a", {"ip": "10.0.0.1"})
+        host_b = _make_ci(db_session, test_target_model, test_user, "h-b", {"ip": "10.0.0.2"})
+        vm_1 = _make_ci(db_session, test_model, test_user, "vm-1", {"host_ip": "10.0.0.1"})
+        vm_2 = _make_ci(db_session, test_model, test_user, "vm-2", {"host_ip": "10.0.0.9"})
+
+        stale = CmdbRelation(
+            source_ci_id=vm_1.id,
+            target_ci_id=host_b.id,
+            relation_type_id=trigger.relation_type_id,
+            source_type="rule",
+        )
+        manual = CmdbRelation(
+            source_ci_id=vm_2.id,
+            target_ci_id=host_b.id,
+            relation_type_id=trigger.relation_type_id,
+            source_type="manual",
+        )
+        db_session.add_all([stale, manual])
+        db_session.commit()
+
+        result = process_trigger_for_model(trigger)
+
+        assert result["processed_ci_count"] == 2
+        assert result["created_count"] == 1
+        pairs = {
+            (r.source_ci_id, r.target_ci_id, r.source_type)
+            for r in CmdbRelation.query.all()
+        }
+        assert pairs == {
+            (vm_1.id, host_a.id, "rule"),
+            (vm_2.id, host_b.id, "manual"),
+        }
+        statuses = {
+            (log.source_ci_id, log.status)
+            for log in TriggerExecutionLog.query.filter_by(trigger_id=trigger.id)
+        }
+        assert statuses == {(vm_1.id, "success"), (vm_2.id, "skipped")}
+
+        # 再次执行时已存在的关系只计为跳过
+        result = process_trigger_for_model(trigger)
+        assert result["created_count"] == 0
+        assert CmdbRelation.query.count() == 2
@@ -0,0 +1,77 @@
+"""缓存工具单元测试"""
+
+import time
+
+from app.utils.cache import CacheProxy, MemoryCache, cached
+
+
+class TestMemoryCache:
+    """测试进程内 LRU 缓存"""
+
+    def test_lru_eviction_by_entries(self):
+        cache = MemoryCache(max_entries=2, max_bytes=0)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.info()["evictions"] == 1
+
+    def test_eviction_by_bytes(self):
+        cache = MemoryCache(max_entries=0, max_bytes=3000)
+        cache.set("a", "x" * 1000)
+        cache.set("b", "x" * 1000)
+        cache.set("c", "x" * 1000)
+        assert cache.get("a") is None
+        assert cache.info()["bytes"] <= 3000
+        # 超过上限的单个值不缓存
+        cache.set("big", "x" * 5000)
+        assert cache.get("big") is None
+
+    def test_expire_and_counters(self):
+        cache = MemoryCache()
+        cache.set("a", 1, expire_seconds=0)
+        assert cache.get("a") is None
+        cache.set("b", 2)
+        assert cache.get("b") == 2
+        info = cache.info()
+        assert (info["hits"], info["misses"], info["expirations"]) == (1, 1, 1)
+        assert info["entries"] == 1
+
+    def test_tag_invalidation(self):
+        cache = MemoryCache()
+        cache.set("view_nodes_tree:1:user:1", [1], tags=["view:1", "user:1"])
+        cache.set("view_nodes_tree:1:user:2", [2], tags=["view:1", "user:2"])
+        cache.set("view_nodes_tree:2:user:1", [3], tags=["view:2", "user:1"])
+
+        cache.invalidate_tags("user:1")
+        assert cache.get("view_nodes_tree:1:user:1") is None
+        assert cache.get("view_nodes_tree:2:user:1") is None
+        assert cache.get("view_nodes_tree:1:user:2") == [2]
+
+        cache.invalidate_tags("view:1")
+        assert cache.get("view_nodes_tree:1:user:2") is None
+        assert cache.info()["entries"] == 0
+
+
+class TestCachedDecorator:
+    """测试缓存装饰器"""
+
+    def test_cached_with_tag_function(self, monkeypatch):
+        proxy = CacheProxy(MemoryCache())
+        monkeypatch.setattr("app.utils.cache.cache", proxy)
+        calls = []
+
+        @cached(expire_seconds=60, key_prefix="test", tags=lambda item_id: [f"item:{item_id}"])
+        def load(item_id):
+            calls.append(item_id)
+            return {"id": item_id, "at": time.time()}
+
+        first = load(1)
+        assert load(1) == first
+        proxy.invalidate_tags("item:1")
+        load(1)
+        assert calls == [1, 1]
@@ -0,0 +1,77 @@
+"""键集分页工具单元测试"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.ci_instance import CiHistory, CiInstance
+from app.models.operation_log import OperationLog
+
+
+def _pages(query, created_column, id_column, limit):
+    from app.utils.pagination import time_keyset_page
+
+    ids, cursor = [], None
+    while True:
+        page = time_keyset_page(
+            query, created_column, id_column, cursor, limit, lambda row: row.id
+        )
+        ids.extend(page["items"])
+        cursor = page["next_cursor"]
+        if not page["has_more"]:
+            assert cursor is None
+            return ids
+
+
+class TestTimeKeysetPage:
+    """测试按 (created_at, id) 倒序的游标翻页"""
+
+    def test_pages_match_full_order_with_ties(self, db_session):
+        base = datetime(2026, 1, 1, 12, 0, 0)
+        db_session.add_all(
+            [
+                OperationLog(operation_type="LOGIN", created_at=base + timedelta(minutes=i // 2))
+                for i in range(7)
+            ]
+        )
+        db_session.commit()
+
+        expected = [
+            row.id
+            for row in OperationLog.query.order_by(
+                OperationLog.created_at.desc(), OperationLog.id.desc()
+            )
+        ]
+        assert _pages(OperationLog.query, OperationLog.created_at, OperationLog.id, 3) == expected
+        assert _pages(OperationLog.query, OperationLog.created_at, OperationLog.id, 10) == expected
+
+    def test_ci_history_filter_and_bad_cursor(self, db_session, test_model, test_user):
+        from app.utils.pagination import time_keyset_page
+
+        cis = [
+            CiInstance(name=f"ci{i}", code=f"CI-{i}", model_id=test_model.id, created_by=test_user.id)
+            for i in range(2)
+        ]
+        db_session.add_all(cis)
+        db_session.commit()
+        db_session.add_all(
+            [
+                CiHistory(ci_id=cis[i % 2].id, operation="UPDATE", operator_id=test_user.id)
+                for i in range(5)
+            ]
+        )
+        db_session.commit()
+
+        query = CiHistory.query.filter_by(ci_id=cis[0].id)
+        ids = _pages(query, CiHistory.created_at, CiHistory.id, 2)
+        assert sorted(ids, reverse=True) == ids
+        assert len(ids) == 3
+
+        with pytest.raises(ValueError):
+            time_keyset_page(query, CiHistory.created_at, CiHistory.id, "bad", 2, lambda r: r)
+
+    def test_partitions_are_noop_without_postgresql(self, db_session):
+        from app.services.audit_partition_service import drop_partitions_before, ensure_partitions
+
+        assert ensure_partitions() == 0
+        assert drop_partitions_before("operation_logs", datetime.now()) == []
@@ -0,0 +1,82 @@
+"""请求主体单元测试"""
+
+import json
+
+from app.models.role import Role, UserRole
+from app.utils.principal import PermissionMatcher, build_principal, merge_data_scopes
+
+
+def _make_role(db_session, code, permissions, scope):
+    role = Role(
+        name=code,
+        code=code,
+        menu_permissions=json.dumps(permissions),
+        data_permissions=json.dumps({"scope": scope}),
+    )
+    db_session.add(role)
+    db_session.commit()
+    return role
+
+
+class TestPermissionMatcher:
+    """测试权限匹配与范围合并"""
+
+    def test_exact_and_wildcard(self):
+        matcher = PermissionMatcher(["cmdb:instance:view", "monitoring:*"])
+        assert matcher.matches("cmdb:instance:view")
+        assert matcher.matches("monitoring:alert:center")
+        assert not matcher.matches("cmdb:instance:edit")
+        assert PermissionMatcher(["*"]).matches("anything")
+        assert not PermissionMatcher([]).matches("cmdb:instance:view")
+
+    def test_merge_scopes(self):
+        assert merge_data_scopes(["self", "department"]) == "department"
+        assert merge_data_scopes(["department", "department_and_children"]) == (
+            "department_and_children"
+        )
+        assert merge_data_scopes([]) == "self"
+
+
+class TestPrincipal:
+    """测试主体构建与缓存失效"""
+
+    def test_roles_merged_and_cache_invalidated(self, app, db_session, test_user):
+        app.config["PRINCIPAL_CACHE_SECONDS"] = 60
+        viewer = _make_role(db_session, "viewer", ["cmdb:*"], "department")
+        db_session.add(UserRole(user_id=test_user.id, role_id=viewer.id))
+        db_session.commit()
+
+        principal = build_principal(test_user)
+        assert principal.has_permission("cmdb:instance:view")
+        assert not principal.has_permission("system:user:create")
+        assert principal.data_scope == "department"
+        assert not principal.is_admin
+
+        # 角色变更提交后缓存失效
+        admin = _make_role(db_session, "admin", [], "all")
+        db_session.add(UserRole(user_id=test_user.id, role_id=admin.id))
+        db_session.commit()
+        principal = build_principal(test_user)
+        assert principal.is_admin
+        assert principal.data_scope == "all"
+
+        viewer.set_menu_permissions(["system:*"])
+        db_session.commit()
+        assert build_principal(test_user).has_permission("system:user:create")
+
+    def test_admin_required_uses_request_principal(self, app, db_session, test_user, test_admin):
+        from flask_jwt_extended import create_access_token, verify_jwt_in_request
+
+        from app.utils.decorators import admin_required
+
+        view = admin_required(lambda: "ok")
+        for user, allowed in ((test_user, False), (test_admin, True)):
+            with app.test_request_context():
+                token = create_access_token(identity=str(user.id))
+            with app.test_request_context(headers={"Authorization": f"Bearer {token}"}):
+                verify_jwt_in_request()
+                response = view()
+            if allowed:
+                assert response == "ok"
+            else:
+                assert response[1] == 403
@@ -22,6 +22,7 @@ export const exportLogs = (params: LogParams) => {
   return request({
     url: '/logs/export',
     method: 'GET',
-    params
+    params: { ...params, stream: 1 },
+    responseType: 'blob'
   })
 }